@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark - バッテリー読み取りの逐次実行 vs 並行実行
+
+5・50・500台の模擬デバイス（読み取り遅延20〜200ms）で
+BatteryMonitor.update_battery_levels() の所要時間を比較する。
+
+使い方:
+    python benchmarks/bench_battery_concurrency.py
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from bluetooth_manager import BluetoothManager  # noqa: E402
+from battery_monitor import BatteryMonitor  # noqa: E402
+from backends.simulated import SimulatedBackend  # noqa: E402
+
+
+def run(device_count: int, max_concurrent_reads: int) -> float:
+    """1回の更新の所要時間（秒）を返す"""
+    backend = SimulatedBackend(device_count, seed=1, latency_range=(0.02, 0.2))
+    manager = BluetoothManager(backend=backend)
+    monitor = BatteryMonitor(manager, max_concurrent_reads=max_concurrent_reads)
+    start = time.perf_counter()
+    asyncio.run(monitor.update_battery_levels())
+    return time.perf_counter() - start
+
+
+def main():
+    logging.disable(logging.WARNING)
+    print(
+        f"{'devices':>8} {'sequential':>12} {'limit=8':>10} {'limit=64':>10} {'speedup':>8}"
+    )
+    for device_count in (5, 50, 500):
+        sequential = run(device_count, 1)
+        limited = run(device_count, 8)
+        wide = run(device_count, 64)
+        print(
+            f"{device_count:>8} {sequential:>11.2f}s {limited:>9.2f}s "
+            f"{wide:>9.2f}s {sequential / wide:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark - バッテリー履歴のメモリ量と追加・検索の所要時間
+
+(datetime, int) のタプルをリストに追加して [-N:] で切り詰める従来方式と、
+型付き配列のリングバッファ (BatteryHistoryBuffer) を比較する。
+
+使い方:
+    python benchmarks/bench_battery_history.py [--samples N] [--capacity N]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from battery_history import BatteryHistoryBuffer  # noqa: E402
+
+
+class ListHistory:
+    """従来方式の履歴"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.samples = []
+
+    def append(self, timestamp, battery_level):
+        self.samples.append((datetime.fromtimestamp(timestamp), battery_level))
+        if len(self.samples) > self.capacity:
+            self.samples = self.samples[-self.capacity :]
+
+    def range(self, start, end):
+        start_dt = datetime.fromtimestamp(start)
+        end_dt = datetime.fromtimestamp(end)
+        return [s for s in self.samples if start_dt <= s[0] <= end_dt]
+
+
+def measure(factory, samples, capacity):
+    """(10k件あたりのメモリ量[バイト], 追加1件あたり[us], 範囲検索1回あたり[us])"""
+    base = 1_700_000_000.0
+
+    # メモリ量はtracemallocで計測（計測中は処理が遅くなるため時間は別に計る）
+    tracemalloc.start()
+    history = factory(capacity)
+    for i in range(samples):
+        history.append(base + i * 60, 100 - i % 100)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    history = factory(capacity)
+    start = time.perf_counter()
+    for i in range(samples):
+        history.append(base + i * 60, 100 - i % 100)
+    append_us = (time.perf_counter() - start) * 1e6 / samples
+
+    retained = min(samples, capacity)
+    first = base + (samples - retained) * 60
+    queries = 1000
+    start = time.perf_counter()
+    for i in range(queries):
+        offset = first + (i % 100) * retained * 0.005 * 60
+        history.range(offset, offset + retained * 0.01 * 60)
+    query_us = (time.perf_counter() - start) * 1e6 / queries
+
+    return memory * 10_000 / retained, append_us, query_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=50_000)
+    parser.add_argument("--capacity", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"samples: {args.samples}, capacity: {args.capacity}")
+    print(f"{'store':<14} {'KiB/10k samples':>16} {'us/append':>10} {'us/query':>10}")
+    for label, factory in (
+        ("list[tuple]", ListHistory),
+        ("ring buffer", BatteryHistoryBuffer),
+    ):
+        memory, append_us, query_us = measure(factory, args.samples, args.capacity)
+        print(
+            f"{label:<14} {memory / 1024:>16.1f} {append_us:>10.2f} {query_us:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark - バッテリーアイコンの描画
+
+毎回QPixmapとQPainterで描画し直す従来方式と、
+共有キャッシュから取得する方式の1回あたりの所要時間を比較する。
+
+使い方:
+    python benchmarks/bench_battery_icons.py [--iterations N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtGui import QIcon  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+from ui.battery_icons import STYLES, BatteryIconCache  # noqa: E402
+
+
+def render_uncached(style_name, level, charging, device_pixel_ratio):
+    """キャッシュを使わずに毎回描画（従来方式）"""
+    style = STYLES[style_name]
+    state = style.state_for(level, charging)
+    pixmap = BatteryIconCache._render(
+        style_name, style, state, style.bucket_for(level), device_pixel_ratio
+    )
+    return QIcon(pixmap) if style_name == "tray" else pixmap
+
+
+def render_cached(cache, style_name, level, charging, device_pixel_ratio):
+    """共有キャッシュから取得"""
+    if style_name == "tray":
+        return cache.icon(style_name, level, charging, device_pixel_ratio)
+    return cache.pixmap(style_name, level, charging, device_pixel_ratio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    _ = QApplication([])  # QPixmapの生成にはQApplicationが必要（参照を保持する）
+    rng = random.Random(0)
+    requests = [
+        (
+            rng.choice(["tray", "row"]),
+            rng.choice([None] + list(range(101))),
+            rng.random() < 0.1,
+            rng.choice([1.0, 1.5, 2.0]),
+        )
+        for _ in range(args.iterations)
+    ]
+
+    start = time.perf_counter()
+    for request in requests:
+        render_uncached(*request)
+    uncached_us = (time.perf_counter() - start) * 1e6 / len(requests)
+
+    cache = BatteryIconCache()
+    start = time.perf_counter()
+    for request in requests:
+        render_cached(cache, *request)
+    cached_us = (time.perf_counter() - start) * 1e6 / len(requests)
+
+    print(f"iterations: {len(requests)}")
+    print(f"{'mode':<12} {'us/icon':>10}")
+    print(f"{'uncached':<12} {uncached_us:>10.2f}")
+    print(f"{'cached':<12} {cached_us:>10.2f}")
+    print(f"speedup: {uncached_us / cached_us:.1f}x")
+    print(f"cache: {cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark - 設定の保存
+
+設定ダイアログで複数の値をまとめて変更した場合を模擬し、変更のたびに書き込む方式
+（flush_delay=0）と、batch()・遅延書き込みでまとめる方式の書き込み回数と
+呼び出し元の所要時間を比較する。あわせて設定値の取得1回あたりの時間を、
+キーパスを分割して辞書をたどる従来の方式とスナップショットで比較する。
+
+使い方:
+    python benchmarks/bench_config.py [--changes N] [--rounds N] [--gets N]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from utils.config import ConfigManager  # noqa: E402
+
+
+def apply_changes(config, changes, round_index):
+    for index in range(changes):
+        config.set(f"ui.bench.key{index}", round_index * changes + index)
+
+
+def run(mode, changes, rounds):
+    """(呼び出し元の所要時間 [ms/回], 書き込み回数/回)"""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        flush_delay = 0 if mode == "immediate" else 0.05
+        config = ConfigManager(os.path.join(temp_dir, "config.json"), flush_delay)
+        writes = config.write_count
+        elapsed = 0.0
+        for round_index in range(rounds):
+            start = time.perf_counter()
+            if mode == "batch":
+                with config.batch():
+                    apply_changes(config, changes, round_index)
+            else:
+                apply_changes(config, changes, round_index)
+            elapsed += time.perf_counter() - start
+            if mode == "debounced":
+                # 遅延書き込みが終わるまで待つ（計測時間には含めない）
+                time.sleep(config.flush_delay * 3)
+        config.close()
+        return elapsed * 1000 / rounds, (config.write_count - writes) / rounds
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def walk_get(config_data, key_path, default=None):
+    """従来のConfigManager.get（キーパスを分割して入れ子の辞書をたどる）"""
+    try:
+        value = config_data
+        for key in key_path.split("."):
+            value = value[key]
+        return value
+    except (KeyError, TypeError):
+        return default
+
+
+def get_latency(gets):
+    """各方式での取得1回あたりの時間 (ns)"""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        config = ConfigManager(os.path.join(temp_dir, "config.json"))
+        key_path = "battery.low_battery_threshold"
+        snapshot = config.snapshot
+        cases = {
+            "dict walk": lambda: walk_get(config.config_data, key_path, 10),
+            "get()": lambda: config.get(key_path, 10),
+            "snapshot attribute": lambda: snapshot.battery.low_battery_threshold,
+        }
+        results = {}
+        for name, read in cases.items():
+            start = time.perf_counter()
+            for _ in range(gets):
+                read()
+            results[name] = (time.perf_counter() - start) * 1e9 / gets
+        config.close()
+        return results
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--changes", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--gets", type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f"{args.changes} changes per dialog, {args.rounds} rounds")
+    for mode in ("immediate", "batch", "debounced"):
+        ms, writes = run(mode, args.changes, args.rounds)
+        print(f"  {mode:10s} caller {ms:8.2f} ms, {writes:5.1f} writes per dialog")
+
+    print(f"get latency ({args.gets} reads, including call overhead)")
+    for name, ns in get_latency(args.gets).items():
+        print(f"  {name:18s} {ns:8.1f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark - PnPデバイスレコードの解析
+
+PowerShellBackendがスキャンごとに行うPnPレコードの解析（アドレス抽出・名前の
+クリーンアップ・デバイスタイプ判定）の1デバイスあたりの時間を、毎回解析する場合と
+InstanceIdごとの解析結果のキャッシュを使う場合で比較する。
+
+使い方:
+    python benchmarks/bench_device_identity.py [--devices N] [--scans N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from backends.powershell import PowerShellBackend  # noqa: E402
+
+NAMES = [
+    "AirPods Pro - Find My",
+    "MX Master 3",
+    "Magic Keyboard",
+    "Xbox Controller",
+    "Bluetooth HID デバイス",
+]
+
+
+class IdleSession:
+    """何もしないPowerShellセッション（解析のみを計測するため）"""
+
+    def close(self):
+        pass
+
+
+def records(count):
+    result = []
+    for index in range(count):
+        if index % 4 == 3:
+            # アドレスを含まないインスタンスID（ダイジェストによるID）
+            instance_id = f"HID\\{{00001124}}_VID&0002046D\\8&{index:04X}&0&0000"
+        else:
+            instance_id = (
+                f"BTHLE\\DEV_A0B1C2D3{index:04X}\\7&2B3C&0&A0B1C2D3{index:04X}"
+            )
+        result.append(
+            {
+                "FriendlyName": f"{NAMES[index % len(NAMES)]} {index}",
+                "Status": "OK",
+                "InstanceId": instance_id,
+            }
+        )
+    return result
+
+
+def parse_uncached(backend, record):
+    """キャッシュを使わない解析（変更前と同じ処理）"""
+    clean_name = backend._clean_device_name(record["FriendlyName"])
+    return (
+        backend._extract_address_from_instance_id(record["InstanceId"]),
+        clean_name,
+        backend._determine_device_type(clean_name),
+    )
+
+
+def per_device_us(parse, scan_records, scans):
+    start = time.perf_counter()
+    for _ in range(scans):
+        for record in scan_records:
+            parse(record)
+    return (time.perf_counter() - start) * 1e6 / (scans * len(scan_records))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--scans", type=int, default=2000)
+    args = parser.parse_args()
+
+    scan_records = records(args.devices)
+    backend = PowerShellBackend(powershell_session=IdleSession())
+    uncached = per_device_us(
+        lambda record: parse_uncached(backend, record), scan_records, args.scans
+    )
+    cached = per_device_us(
+        lambda record: backend._get_identity(
+            record["InstanceId"], record["FriendlyName"]
+        ),
+        scan_records,
+        args.scans,
+    )
+
+    print(f"{args.devices} devices x {args.scans} scans")
+    print(f"  parse every scan  {uncached:7.2f} µs per device")
+    print(
+        f"  identity cache    {cached:7.2f} µs per device {backend.get_identity_stats()}"
+    )
+
+
+if __name__ == "__main__":
+    main()
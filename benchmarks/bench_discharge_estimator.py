@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark - 残り使用時間推定の精度とスループット
+
+模擬バックエンドの放電曲線に従う合成トレース（1分間隔・整数%・ノイズあり）で、
+指数重み付き最小二乗法による逐次推定と、毎回全履歴を最小二乗法で
+当てはめ直す方式の推定誤差と1ティックあたりの処理時間を比較する。
+（全履歴の当てはめは履歴を無制限に保持した場合の参考値）
+
+使い方:
+    python benchmarks/bench_discharge_estimator.py [--devices N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+import numpy as np  # noqa: E402
+from backends.simulated import DISCHARGE_CURVE, _interpolate  # noqa: E402
+from discharge_estimator import DischargeEstimator  # noqa: E402
+
+
+def make_traces(count, rng):
+    """(連続使用時間[時間], 1分ごとの残量配列) のリスト"""
+    traces = []
+    for _ in range(count):
+        runtime = rng.uniform(4, 40)
+        minutes = int(runtime * 60 * 0.9)
+        levels = np.array(
+            [
+                _interpolate(DISCHARGE_CURVE, minute / 60 / runtime) + rng.gauss(0, 0.7)
+                for minute in range(minutes)
+            ]
+        )
+        # 実機の読み取り値と同様に整数%で、増加しない値にする
+        levels = np.minimum.accumulate(np.clip(np.round(levels), 0, 100))
+        traces.append((runtime, levels))
+    return traces
+
+
+def least_squares_hours(timestamps, levels):
+    """全履歴への直線当てはめによる残り時間（時間）"""
+    slope = np.polyfit(timestamps, levels, 1)[0] * 3600
+    return levels[-1] / -slope if slope < 0 else None
+
+
+def accuracy(traces, checkpoints=(0.25, 0.5, 0.75)):
+    """各チェックポイントでの (平均絶対誤差[時間], 平均絶対誤差率, 推定数)"""
+    errors = {"incremental": [], "full refit": []}
+    for runtime, levels in traces:
+        estimator = DischargeEstimator()
+        targets = {int(len(levels) * c / 0.9) for c in checkpoints}
+        for minute, level in enumerate(levels):
+            estimator.observe("A", minute * 60, int(level))
+            if minute not in targets:
+                continue
+            true_hours = runtime - minute / 60
+            estimate = estimator.estimate_remaining("A")
+            if estimate is not None:
+                errors["incremental"].append((estimate.hours, true_hours))
+            timestamps = np.arange(minute + 1) * 60.0
+            fitted = least_squares_hours(timestamps, levels[: minute + 1])
+            if fitted is not None:
+                errors["full refit"].append((fitted, true_hours))
+
+    results = {}
+    for name, pairs in errors.items():
+        estimated, actual = np.array(pairs).T
+        error = np.abs(estimated - actual)
+        results[name] = (error.mean(), (error / actual).mean(), len(pairs))
+    return results
+
+
+def throughput(devices, ticks, history):
+    """1ティック（全デバイスに1サンプル）あたりの処理時間 (ms)"""
+    rates = np.linspace(2, 40, devices)
+    estimator = DischargeEstimator()
+    start = time.perf_counter()
+    for tick in range(ticks):
+        for index in range(devices):
+            estimator.observe(index, tick * 60, int(100 - rates[index] * tick / 60))
+        estimator.update()
+        estimator.estimate_all()
+    incremental_ms = (time.perf_counter() - start) * 1000 / ticks
+
+    timestamps = np.arange(history) * 60.0
+    levels = 100 - np.outer(rates, timestamps / 3600)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for index in range(devices):
+            least_squares_hours(timestamps, levels[index])
+    refit_ms = (time.perf_counter() - start) * 1000 / ticks
+    return incremental_ms, refit_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--traces", type=int, default=50)
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--history", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"accuracy ({args.traces} traces, checkpoints at 25/50/75% of runtime)")
+    for name, (error, ratio, count) in accuracy(make_traces(args.traces, rng)).items():
+        print(
+            f"  {name:<14} mean abs error {error:6.2f} h / {ratio:6.1%}"
+            f"  ({count} estimates)"
+        )
+
+    incremental_ms, refit_ms = throughput(args.devices, args.ticks, args.history)
+    print(f"throughput ({args.devices} devices, refit over {args.history} samples)")
+    print(f"  {'incremental':<14} {incremental_ms:8.2f} ms/tick")
+    print(f"  {'full refit':<14} {refit_ms:8.2f} ms/tick")
+
+
+if __name__ == "__main__":
+    main()
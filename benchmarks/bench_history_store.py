@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark - SQLite履歴ストアの書き込みと期間検索
+
+1分間隔のサンプルを複数デバイス分書き込み、書き込みスループット、
+データベースの大きさ（1サンプルあたり）、期間検索の所要時間を計測する。
+データベースは一時ディレクトリに作成する。
+
+使い方:
+    python benchmarks/bench_history_store.py [--devices N] [--days N]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from history_store import HistoryStore  # noqa: E402
+
+
+def database_size(db_path):
+    return sum(
+        os.path.getsize(db_path + suffix)
+        for suffix in ("", "-wal")
+        if os.path.exists(db_path + suffix)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=24)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    db_path = os.path.join(directory, "history.db")
+    end = time.time()
+    begin = end - args.days * 86400
+    addresses = [f"02:00:00:00:00:{i:02X}" for i in range(args.devices)]
+    store = HistoryStore(db_path, batch_size=5000, retention_days=None)
+
+    try:
+        store.start()
+        samples = 0
+        start = time.perf_counter()
+        for minute in range(args.days * 1440):
+            ts = begin + minute * 60
+            for address in addresses:
+                store.record(address, 100 - minute % 100, ts)
+            samples += len(addresses)
+        enqueue_seconds = time.perf_counter() - start
+        store.flush(timeout=None)
+        total_seconds = time.perf_counter() - start
+
+        rng = random.Random(0)
+
+        def query_ms(span_seconds):
+            start = time.perf_counter()
+            for _ in range(args.queries):
+                offset = rng.uniform(begin, end - span_seconds)
+                store.query(rng.choice(addresses), offset, offset + span_seconds)
+            return (time.perf_counter() - start) * 1000 / args.queries
+
+        print(f"devices: {args.devices}, days: {args.days}, samples: {samples}")
+        print(f"record() per sample:   {enqueue_seconds * 1e6 / samples:.2f} us")
+        print(f"write throughput:      {samples / total_seconds:,.0f} samples/s")
+        print(
+            f"database size:         {database_size(db_path) / samples:.1f} bytes/sample"
+        )
+        print(f"query 1 hour:          {query_ms(3600):.3f} ms")
+        print(f"query 1 day:           {query_ms(86400):.3f} ms")
+        print(f"query 7 days:          {query_ms(7 * 86400):.3f} ms")
+
+        start = time.perf_counter()
+        for _ in range(args.queries):
+            store.query(rng.choice(addresses), limit=100)
+        latest_ms = (time.perf_counter() - start) * 1000 / args.queries
+        print(f"latest 100 samples:    {latest_ms:.3f} ms")
+    finally:
+        store.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark - ログの量
+
+SimulatedBackendで15秒ごとのスキャンとバッテリー読み取りを1時間分（疑似時計で）
+実行し、ログファイルに書き込まれるバイト数を、量の制御なしの場合と
+LogVolumeControl（同じメッセージの集約・ロガーごとの上限）を使う場合で比較する。
+あわせて、無効なレベルのログ呼び出し1回あたりの時間をf-stringと%形式で比較する。
+
+使い方:
+    python benchmarks/bench_log_volume.py [--hours N] [--devices N] [--level DEBUG]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from backends.simulated import SimulatedBackend  # noqa: E402
+from battery_monitor import BatteryMonitor  # noqa: E402
+from bluetooth_manager import BluetoothManager  # noqa: E402
+from utils.logger import get_volume_stats, setup_logging, shutdown_logging  # noqa: E402
+
+POLL_INTERVAL = 15  # 秒
+
+
+class FakeClock:
+    """シミュレーション用の時計（ログレコードの作成時刻にも使う）"""
+
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+def install_record_clock(clock):
+    """ログレコードの作成時刻を疑似時計にする（戻り値は元のファクトリー）"""
+    original = logging.getLogRecordFactory()
+
+    def factory(*args, **kwargs):
+        record = original(*args, **kwargs)
+        record.created = clock()
+        record.msecs = 0
+        return record
+
+    logging.setLogRecordFactory(factory)
+    return original
+
+
+def simulate(log_dir, hours, devices, level, **volume):
+    """(書き込まれたバイト数, 量の制御の統計)"""
+    clock = FakeClock()
+    original_factory = install_record_clock(clock)
+    log_file = setup_logging(
+        level=level, log_dir=log_dir, console_level=logging.CRITICAL, **volume
+    )
+    try:
+        backend = SimulatedBackend(
+            device_count=devices,
+            latency_range=(0, 0),
+            failure_rate=0.05,
+            time_scale=1.0,
+            clock=clock,
+        )
+        manager = BluetoothManager(backend=backend)
+        monitor = BatteryMonitor(manager)
+
+        async def run():
+            for _ in range(int(hours * 3600 / POLL_INTERVAL)):
+                await manager.scan_devices()
+                await monitor.update_battery_levels()
+                clock.now += POLL_INTERVAL
+
+        asyncio.run(run())
+        stats = get_volume_stats()
+    finally:
+        shutdown_logging()
+        logging.setLogRecordFactory(original_factory)
+    return os.path.getsize(log_file), stats
+
+
+def disabled_call_cost(iterations):
+    """無効なレベル（DEBUG）のログ呼び出し1回あたりの時間 [ns] (f-string, %形式)"""
+    logger = logging.getLogger("bench.disabled")
+    logger.setLevel(logging.INFO)
+    device = {"name": "Test Mouse", "address": "00:11:22:33:44:55", "level": 80}
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        logger.debug(f"バッテリー読み取り: {device['name']} {device}")
+    eager = (time.perf_counter() - start) * 1e9 / iterations
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        logger.debug("バッテリー読み取り: %s %s", device["name"], device)
+    lazy = (time.perf_counter() - start) * 1e9 / iterations
+    return eager, lazy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--devices", type=int, default=5)
+    parser.add_argument("--level", default="INFO")
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+    level = logging.getLevelName(args.level.upper())
+
+    print(
+        f"{args.devices} devices, poll every {POLL_INTERVAL} s for {args.hours:g} h,"
+        f" level {args.level.upper()}"
+    )
+    cases = [
+        ("no volume control", {"aggregate_window": 0}),
+        ("aggregate 60 s", {"aggregate_window": 60}),
+        (
+            "rate limits only",
+            {
+                "aggregate_window": 0,
+                "rate_limits": {"bluetooth_manager": 2, "battery_monitor": 2},
+            },
+        ),
+    ]
+    baseline = None
+    for name, volume in cases:
+        log_dir = tempfile.mkdtemp()
+        try:
+            size, stats = simulate(log_dir, args.hours, args.devices, level, **volume)
+        finally:
+            shutil.rmtree(log_dir)
+        per_hour = size / args.hours
+        baseline = baseline or per_hour
+        line = f"  {name:20s} {per_hour / 1024:9.1f} KiB/h ({per_hour / baseline:6.1%})"
+        if stats is not None:
+            line += f" {stats}"
+        print(line)
+
+    eager, lazy = disabled_call_cost(args.iterations)
+    print(
+        f"disabled debug call: f-string {eager:6.0f} ns, lazy %-format {lazy:6.0f} ns"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark - ログ出力のオーバーヘッド
+
+ログを出すスレッドでの1回あたりの所要時間を、ロガーごとにRotatingFileHandlerで
+直接書き込む従来の方式と、QueueHandler/QueueListenerで書き込みを1つの
+バックグラウンドスレッドに任せる方式で比較する。--disk-delayを指定すると
+1レコードごとに書き込みが遅れるディスク（ウイルス対策ソフトの検査など）を再現する。
+
+使い方:
+    python benchmarks/bench_logging.py [--records N] [--disk-delay 秒]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from utils import logger as log_module  # noqa: E402
+from utils.logger import setup_logging, shutdown_logging  # noqa: E402
+
+
+class DelayedRotatingFileHandler(RotatingFileHandler):
+    """1レコードごとに書き込みが遅れるファイルハンドラー"""
+
+    delay_seconds = 0.0
+
+    def emit(self, record):
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        super().emit(record)
+
+
+def log_records(logger, records):
+    """(ログを出すスレッドでの1回あたりの時間 [µs])"""
+    start = time.perf_counter()
+    for index in range(records):
+        logger.info(f"デバイス 00:11:22:33:44:{index % 256:02X} の残量: {index % 100}%")
+    return (time.perf_counter() - start) * 1e6 / records
+
+
+def direct(log_dir, records, disk_delay):
+    """従来の方式（ロガーに直接ファイルハンドラーを付ける）"""
+    DelayedRotatingFileHandler.delay_seconds = disk_delay
+    handler = DelayedRotatingFileHandler(
+        os.path.join(log_dir, "direct.log"),
+        maxBytes=5 * 1024 * 1024,
+        backupCount=3,
+        encoding="utf-8",
+    )
+    handler.setFormatter(
+        logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+    )
+    logger = logging.getLogger("bench.direct")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    per_call = log_records(logger, records)
+    logger.removeHandler(handler)
+    handler.close()
+    return per_call, 0.0
+
+
+def queued(log_dir, records, disk_delay, json_lines=False):
+    """キュー経由の方式（戻り値の2つ目はシャットダウン時に残りを書き込む時間 [ms]）"""
+    setup_logging(log_dir=log_dir, json_lines=json_lines)
+    if disk_delay:
+        for handler in log_module._listener.handlers:
+            if isinstance(handler, RotatingFileHandler):
+                handler.__class__ = DelayedRotatingFileHandler
+        DelayedRotatingFileHandler.delay_seconds = disk_delay
+    per_call = log_records(logging.getLogger("bench.queued"), records)
+    start = time.perf_counter()
+    shutdown_logging()
+    return per_call, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--disk-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(
+        f"{args.records} records, disk delay {args.disk_delay * 1000:g} ms per record"
+    )
+    cases = [
+        ("direct file handler", direct),
+        ("queue (text)", queued),
+        ("queue (json lines)", lambda d, r, delay: queued(d, r, delay, True)),
+    ]
+    for name, run in cases:
+        log_dir = tempfile.mkdtemp()
+        try:
+            per_call, drain_ms = run(log_dir, args.records, args.disk_delay)
+        finally:
+            shutil.rmtree(log_dir)
+        line = f"  {name:20s} {per_call:8.2f} µs per call on the logging thread"
+        if drain_ms:
+            line += f" (drain at exit {drain_ms:7.1f} ms)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark - メインウィンドウのデバイスリスト更新
+
+オフスクリーンのQtで、模擬デバイスを大量に表示した場合の
+初回読み込み・差分更新・変化イベントの反映・再描画・スクロールの所要時間と、
+1フレームあたりに描画される行数を計測する。
+
+使い方:
+    python benchmarks/bench_main_window_refresh.py [--devices N] [--iterations N]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QObject, pyqtSignal  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+from bluetooth_manager import BluetoothManager  # noqa: E402
+from battery_monitor import BatteryMonitor  # noqa: E402
+from battery_events import BatteryEventTracker  # noqa: E402
+from backends.simulated import SimulatedBackend  # noqa: E402
+from ui.main_window import ConnectedMainWindow  # noqa: E402
+
+
+class StubRefreshWorker(QObject):
+    """更新要求を無視するワーカー"""
+
+    devices_updated = pyqtSignal(list)
+    battery_events = pyqtSignal(list)
+    refresh_failed = pyqtSignal(str)
+    devices_found = pyqtSignal(list)
+
+    def request_refresh(self, force=False):
+        pass
+
+
+def timed(app, func, iterations=1):
+    """funcとイベント処理の1回あたりの所要時間(ms)を返す"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+        app.processEvents()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    app = QApplication([])
+    monitor = BatteryMonitor(BluetoothManager(backend=SimulatedBackend(0)))
+    window = ConnectedMainWindow(monitor, StubRefreshWorker())
+    window.show()
+    app.processEvents()
+
+    backend = SimulatedBackend(args.devices)
+    devices = asyncio.run(backend.enumerate_devices())
+    rng = random.Random(0)
+    for device in devices:
+        device.battery_level = rng.randint(0, 100)
+
+    view = window.device_view
+    delegate = window.device_delegate
+
+    def change(ratio):
+        for device in devices:
+            if rng.random() < ratio:
+                device.battery_level = rng.randint(0, 100)
+        window.update_device_list(devices)
+
+    tracker = BatteryEventTracker()
+    tracker.diff(devices, 10)
+
+    def change_events(count):
+        """count台の残量を変え、その変化イベントのみをスロットル経由で反映"""
+        changed = rng.sample(devices, count)
+        for device in changed:
+            device.battery_level = (device.battery_level + 1) % 101
+        events = tracker.diff(devices, 10, changed)
+        return lambda: (
+            window.event_throttle.push(events),
+            window.event_throttle.flush(),
+        )
+
+    def timed_events(count):
+        total = 0.0
+        for _ in range(args.iterations):
+            total += timed(app, change_events(count))
+        return total / args.iterations
+
+    def burst(count):
+        """1台ずつcount回届いたイベントが何回の反映にまとめられるか"""
+        throttle = window.event_throttle
+        flushes = throttle.flush_count
+        for device in rng.sample(devices, count):
+            device.battery_level = (device.battery_level + 1) % 101
+            throttle.push(tracker.diff(devices, 10, [device]))
+        while throttle.pending_count:
+            app.processEvents()
+        return throttle.flush_count - flushes
+
+    def scroll():
+        bar = view.verticalScrollBar()
+        bar.setValue(rng.randint(bar.minimum(), bar.maximum()))
+        view.viewport().repaint()
+
+    print(f"devices: {args.devices}")
+    print(f"{'operation':<28} {'ms':>10}")
+    rows = [
+        ("initial load", timed(app, lambda: window.update_device_list(devices))),
+        ("refresh, no change", timed(app, lambda: change(0.0), args.iterations)),
+        ("refresh, 10% changed", timed(app, lambda: change(0.1), args.iterations)),
+        ("refresh, 100% changed", timed(app, lambda: change(1.0), args.iterations)),
+        ("events, 1 device changed", timed_events(1)),
+        ("events, 50 devices changed", timed_events(50)),
+        ("scroll + repaint", timed(app, scroll, args.iterations)),
+    ]
+    for label, ms in rows:
+        print(f"{label:<28} {ms:>10.2f}")
+
+    print(f"burst of 500 single-device events applied in {burst(500)} flush(es)")
+
+    delegate.paint_count = 0
+    view.viewport().grab()
+    print(f"rows painted per frame: {delegate.paint_count}")
+
+
+if __name__ == "__main__":
+    main()
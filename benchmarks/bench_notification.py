@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark - 通知の送信
+
+表示に時間のかかる通知バックエンド（FakeNotifierで遅延を再現）に対して、
+複数デバイスの低バッテリー通知を同時に送った場合の呼び出し元の停止時間と
+表示された通知の数を、直接呼び出す方式とディスパッチャー経由で比較する。
+
+使い方:
+    python benchmarks/bench_notification.py [--alerts N] [--delay 秒]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from notification import Alert, FakeNotifier, NotificationDispatcher  # noqa: E402
+
+
+def alerts(count):
+    return [
+        Alert("⚠️ 警告: バッテリー残量低下", f"Device {i}のバッテリーが9%", key=str(i))
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--alerts", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    notifier = FakeNotifier(delay=args.delay)
+    start = time.perf_counter()
+    for alert in alerts(args.alerts):
+        notifier.notify(alert.title, alert.message, alert.duration)
+    direct_ms = (time.perf_counter() - start) * 1000
+    direct_toasts = len(notifier.sent)
+
+    notifier = FakeNotifier(delay=args.delay)
+    dispatcher = NotificationDispatcher(notifier, coalesce_window=0.5)
+    dispatcher.start()
+    start = time.perf_counter()
+    for alert in alerts(args.alerts):
+        dispatcher.submit(alert)
+    submit_ms = (time.perf_counter() - start) * 1000
+    dispatcher.close()
+    stats = dispatcher.get_stats()
+
+    print(f"{args.alerts} alerts, notifier delay {args.delay * 1000:.0f} ms")
+    print(f"  direct      caller blocked {direct_ms:9.2f} ms, {direct_toasts} toasts")
+    print(
+        f"  dispatcher  caller blocked {submit_ms:9.2f} ms, {len(notifier.sent)} toast"
+        f" (coalesced {stats['coalesced']}, max latency {stats['max_latency']:.2f} s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark - デバイスごとの読み取り間隔の調整
+
+放電速度の異なるデバイス（1%/日のマウス〜20%/時間のイヤホン）を模擬時計で
+動かし、固定間隔（60秒）と比べた読み取り数と、残量が低バッテリー閾値を
+下回ってから検出するまでの遅れを計測する。あわせて多数のデバイスを
+登録したときの1ティックあたりの処理時間を計測する。
+
+使い方:
+    python benchmarks/bench_poll_scheduler.py [--devices N] [--hours N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from discharge_estimator import DischargeEstimator  # noqa: E402
+from poll_scheduler import PollScheduler  # noqa: E402
+
+THRESHOLD = 10
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def simulate(devices, hours, tick):
+    """(読み取り数, 固定間隔の読み取り数, 閾値検出の遅れ[秒]のリスト)"""
+    rng = random.Random(0)
+    rates = [rng.choice([1 / 24, 0.5, 2.0, 8.0, 20.0]) for _ in range(devices)]
+    starts = [rng.uniform(20, 100) for _ in range(devices)]
+
+    clock = FakeClock()
+    scheduler = PollScheduler(fixed_interval=60, clock=clock)
+    estimator = DischargeEstimator()
+    addresses = [f"device-{index}" for index in range(devices)]
+    scheduler.sync(addresses)
+    detected = {}
+
+    def level_at(index, seconds):
+        return max(0, int(starts[index] - rates[index] * seconds / 3600))
+
+    while clock.now <= hours * 3600:
+        due = scheduler.pop_due()
+        for address in due:
+            index = int(address.split("-")[1])
+            level = level_at(index, clock.now)
+            estimator.observe(address, clock.now, level)
+        estimator.update()
+        for address in due:
+            index = int(address.split("-")[1])
+            level = level_at(index, clock.now)
+            estimate = estimator.estimate_remaining(address)
+            rate = None
+            if estimate is not None and estimate.confidence >= scheduler.min_confidence:
+                rate = estimate.rate_per_hour
+            if level <= THRESHOLD:
+                detected.setdefault(index, clock.now)
+            scheduler.record_read(address, level, rate, threshold=THRESHOLD)
+        clock.now += tick
+
+    delays = []
+    for index, seen in detected.items():
+        # 残量が閾値以下になった時刻（整数%に丸めた値で判定）
+        crossed = max(0.0, (starts[index] - THRESHOLD - 1) * 3600 / rates[index])
+        while level_at(index, crossed) > THRESHOLD:
+            crossed += 1
+        delays.append(seen - crossed)
+    stats = scheduler.get_stats()
+    return stats["reads"], stats["fixed_reads"], delays
+
+
+def tick_cost(devices, ticks):
+    """全デバイスを登録した状態で期限が来たデバイスのみ取り出す1ティックの時間 (µs)"""
+    clock = FakeClock()
+    scheduler = PollScheduler(clock=clock)
+    rng = random.Random(0)
+    for index in range(devices):
+        scheduler.schedule(f"device-{index}", rng.uniform(0, 1800))
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        clock.now += 15
+        for address in scheduler.pop_due():
+            scheduler.record_read(address, 80, rate_per_hour=0.5)
+    return (time.perf_counter() - start) * 1e6 / ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--tick", type=float, default=15)
+    parser.add_argument("--tick-devices", type=int, default=5000)
+    args = parser.parse_args()
+
+    reads, fixed_reads, delays = simulate(args.devices, args.hours, args.tick)
+    print(f"{args.devices} devices, {args.hours} h, tick {args.tick:g} s")
+    print(f"  fixed 60 s polling  {fixed_reads:8d} reads")
+    print(
+        f"  adaptive polling    {reads:8d} reads"
+        f"  ({1 - reads / fixed_reads:.0%} fewer)"
+    )
+    if delays:
+        print(
+            f"  threshold detection delay: mean {sum(delays) / len(delays):5.1f} s,"
+            f" max {max(delays):5.1f} s ({len(delays)} crossings,"
+            f" fixed polling up to 60 s)"
+        )
+
+    cost = tick_cost(args.tick_devices, 120)
+    print(f"tick with {args.tick_devices} devices scheduled: {cost:8.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark - スキャンごとのPowerShell起動 vs 常駐PowerShellセッション
+
+Windowsでは実際のpowershellを、それ以外ではテスト用のスタンドインホストを使用する。
+
+使い方:
+    python benchmarks/bench_powershell_session.py [--iterations N]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from powershell_session import DEFAULT_HOST_COMMAND, PowerShellSession  # noqa: E402
+
+FAKE_HOST = os.path.join(ROOT_DIR, "tests", "fixtures", "fake_powershell_host.py")
+COMMAND = "Get-PnpDevice -PresentOnly | Select-Object FriendlyName, Status, InstanceId | ConvertTo-Json"
+
+
+def spawn_per_scan(use_powershell: bool):
+    """従来方式: スキャンごとにプロセスを起動"""
+    if use_powershell:
+        subprocess.run(
+            ["powershell", "-Command", COMMAND],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    else:
+        request = json.dumps({"id": 1, "command": COMMAND}) + "\n"
+        subprocess.run(
+            [sys.executable, "-X", "utf8", FAKE_HOST],
+            input=request,
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+
+
+def measure(func, iterations: int):
+    """実行時間（ミリ秒）のリストを返す"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples):
+    """計測結果を表示"""
+    print(
+        f"{label:<24} mean {statistics.mean(samples):8.2f} ms  "
+        f"median {statistics.median(samples):8.2f} ms  "
+        f"max {max(samples):8.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    use_powershell = shutil.which("powershell") is not None
+    host_command = (
+        DEFAULT_HOST_COMMAND
+        if use_powershell
+        else [
+            sys.executable,
+            "-X",
+            "utf8",
+            FAKE_HOST,
+        ]
+    )
+    print(f"ホスト: {'powershell' if use_powershell else 'fake_powershell_host.py'}")
+
+    spawn_samples = measure(lambda: spawn_per_scan(use_powershell), args.iterations)
+
+    session = PowerShellSession(host_command=host_command, timeout=30)
+    try:
+        start = time.perf_counter()
+        session.start()
+        startup_ms = (time.perf_counter() - start) * 1000
+        session.run(COMMAND)  # ウォームアップ
+        session_samples = measure(lambda: session.run(COMMAND), args.iterations)
+    finally:
+        session.close()
+
+    report("spawn-per-scan", spawn_samples)
+    report("persistent session", session_samples)
+    print(f"{'session startup':<24} {startup_ms:8.2f} ms (初回のみ)")
+    print(
+        f"speedup: {statistics.mean(spawn_samples) / statistics.mean(session_samples):.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark - スキャン出力のストリーミング
+
+デバイスの列挙に時間のかかるPowerShell（テスト用のスタンドインホストで1行ごとに
+--line-delay秒待機して再現）に対して、最初のデバイスが得られるまでの時間と
+全件の列挙が終わるまでの時間を、出力全体を受け取ってから解析する方式と
+1行ずつ解析して返す方式で比較する。
+
+使い方:
+    python benchmarks/bench_scan_streaming.py [--devices N] [--line-delay 秒]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from backends.powershell import SCAN_COMMAND, PowerShellBackend  # noqa: E402
+from powershell_session import PowerShellSession  # noqa: E402
+
+FAKE_HOST = os.path.join(ROOT_DIR, "tests", "fixtures", "fake_powershell_host.py")
+
+
+def scan_output(count):
+    """1行に1つのデバイスのスキャン出力"""
+    return "\n".join(
+        json.dumps(
+            {
+                "FriendlyName": f"Device {index}",
+                "Status": "OK",
+                "InstanceId": f"BTHLE\\DEV_A0B1C2D3{index:04X}\\7&2B3C&0&A0B1C2D3{index:04X}",
+                "Class": "Bluetooth",
+            }
+        )
+        for index in range(count)
+    )
+
+
+def buffered(session):
+    """出力全体を受け取ってから解析（(最初のデバイスまで, 全件) [ms]）"""
+    start = time.perf_counter()
+    lines = list(session.stream(SCAN_COMMAND))
+    devices = [json.loads(line) for line in lines]
+    elapsed = (time.perf_counter() - start) * 1000
+    return (elapsed if devices else None), elapsed
+
+
+def streamed(session):
+    """1行ずつ解析してデバイスを返す（(最初のデバイスまで, 全件) [ms]）"""
+    backend = PowerShellBackend(powershell_session=session)
+
+    async def run():
+        first = None
+        start = time.perf_counter()
+        async for _ in backend.stream_devices():
+            if first is None:
+                first = (time.perf_counter() - start) * 1000
+        return first, (time.perf_counter() - start) * 1000
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=10)
+    parser.add_argument("--line-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    os.environ["FAKE_PNP_OUTPUT"] = scan_output(args.devices)
+    os.environ["FAKE_STREAM_DELAY"] = str(args.line_delay)
+    session = PowerShellSession(host_command=[sys.executable, "-X", "utf8", FAKE_HOST])
+    try:
+        session.start()
+        print(f"{args.devices} devices, {args.line_delay * 1000:g} ms per device")
+        for name, run in (("buffered", buffered), ("streamed", streamed)):
+            first, total = run(session)
+            print(
+                f"  {name:10s} first device {first:8.1f} ms,"
+                f" all devices {total:8.1f} ms"
+            )
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark - 起動時間
+
+simulatedバックエンドと保存済みの履歴データベースを用意した一時的なAPPDATAで
+アプリケーションを別プロセスとして起動し、次の時間を計測する。
+
+- import: mainモジュールの読み込み完了まで
+- tray visible: トレイアイコンとメインウィンドウの表示まで
+- first data: 初回スキャンの結果がUIに届くまで
+- rows: トレイ表示の時点でメインウィンドウに表示されている行数
+  （前回起動時に保存したデバイス一覧を「前回の値」として表示する）
+
+eagerは以前の起動順序（numpyを含む推定器の読み込みと履歴データベースの
+読み込みを表示前に行う）を再現したもの、fastは現在の起動順序。
+
+使い方:
+    python benchmarks/bench_startup.py [--runs N] [--devices N]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+sys.path.insert(0, SRC_DIR)
+
+from history_store import HistoryStore  # noqa: E402
+from device_snapshot import DeviceSnapshotStore  # noqa: E402
+from bluetooth_manager import BluetoothDevice  # noqa: E402
+
+# 子プロセスで実行するスクリプト（argv: srcディレクトリ, モード）
+CHILD_SCRIPT = """
+import time
+started = time.perf_counter()
+import json, sys
+sys.path.insert(0, sys.argv[1])
+eager = sys.argv[2] == "eager"
+if eager:
+    import discharge_estimator  # 以前はbattery_monitorの読み込み時にnumpyも読み込んでいた
+import main
+imported = time.perf_counter()
+from PyQt5.QtCore import QTimer
+
+app = main.ConnectedApp()
+rows = []
+mark_startup = app.mark_startup
+def mark(name):
+    mark_startup(name)
+    if name == "tray_visible":
+        rows.append(app.main_window.device_model.rowCount())
+app.mark_startup = mark
+if eager:
+    # 以前は表示前に履歴データベースを開いて読み込んでいた
+    app.prepare_history()
+app.refresh_worker.devices_updated.connect(lambda _: QTimer.singleShot(0, app.app.quit))
+app.run()
+app.quit_application()
+
+offset = main.STARTUP_TIME - started
+timings = {"import": imported - started, "rows": rows[0]}
+for name in ("tray_visible", "first_data"):
+    timings[name] = app.startup_timings[name] + offset
+print(json.dumps(timings))
+"""
+
+
+def prepare_appdata(appdata, devices):
+    """simulatedバックエンドの設定と、デバイスごとに100件の履歴、前回のデバイス一覧を用意"""
+    config_dir = os.path.join(appdata, "Connected")
+    os.makedirs(config_dir)
+    with open(os.path.join(config_dir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {"devices": {"backend": "simulated", "simulated_device_count": devices}}, f
+        )
+
+    store = HistoryStore(os.path.join(config_dir, "history.db"), retention_days=None)
+    store.start()
+    for index in range(devices):
+        for sample in range(100):
+            store.record(
+                f"device-{index}", 100 - sample // 2, 1_700_000_000 + sample * 600
+            )
+    store.close()
+
+    snapshot = DeviceSnapshotStore(
+        os.path.join(config_dir, "devices.json"), save_delay=0
+    )
+    last_known = []
+    for index in range(devices):
+        device = BluetoothDevice(f"Device {index}", f"device-{index}")
+        device.battery_level = 50
+        last_known.append(device)
+    snapshot.update(last_known)
+
+
+def run_once(appdata, mode):
+    env = dict(os.environ, APPDATA=appdata, QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, SRC_DIR, mode],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--devices", type=int, default=20)
+    args = parser.parse_args()
+
+    appdata = tempfile.mkdtemp()
+    try:
+        prepare_appdata(appdata, args.devices)
+        print(f"{args.devices} simulated devices, median of {args.runs} runs")
+        print(
+            f"  {'':6s} {'import':>10s} {'tray visible':>14s} {'first data':>12s}"
+            f" {'rows':>6s}"
+        )
+        for mode in ("eager", "fast"):
+            runs = [run_once(appdata, mode) for _ in range(args.runs)]
+            median = {
+                name: statistics.median(run[name] for run in runs) * 1000
+                for name in ("import", "tray_visible", "first_data")
+            }
+            print(
+                f"  {mode:6s} {median['import']:8.0f} ms {median['tray_visible']:11.0f} ms"
+                f" {median['first_data']:9.0f} ms {runs[0]['rows']:6d}"
+            )
+    finally:
+        shutil.rmtree(appdata)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Async Worker - アプリケーション全体で共有する非同期処理ワーカー
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Coroutine, Optional
+from PyQt5.QtCore import QObject, pyqtSignal
+from battery_monitor import BatteryMonitor
+from bluetooth_manager import BluetoothDevice
+from device_events import DeviceEvent
+from scan_coordinator import ScanCoordinator
+
+
+class AsyncLoopThread:
+    """アプリケーションの生存期間中、1つのasyncioイベントループをワーカースレッドで実行するクラス"""
+
+    def __init__(self, name: str = "ConnectedAsyncLoop"):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        """イベントループが動作中かどうか"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """ワーカースレッドを起動（起動済みの場合は何もしない）"""
+        if self.is_running:
+            return
+
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        """ワーカースレッド本体"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """コルーチンをイベントループに投入し、concurrent.futures.Futureを返す"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, timeout: float = 5.0):
+        """実行中のタスクをキャンセルしてイベントループを停止"""
+        if not self.is_running:
+            return
+
+        async def _shutdown():
+            tasks = [
+                task
+                for task in asyncio.all_tasks()
+                if task is not asyncio.current_task()
+            ]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown(), self.loop).result(timeout)
+        except Exception as e:
+            self.logger.warning(f"非同期タスクの停止に失敗: {e}")
+
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+
+
+class BatteryRefreshWorker(QObject):
+    """バッテリー情報の更新をUIスレッド外で実行し、結果をシグナルで通知するクラス"""
+
+    # シグナル定義
+    refresh_started = pyqtSignal()
+    devices_updated = pyqtSignal(list)  # List[BluetoothDevice]
+    devices_found = pyqtSignal(list)  # List[BluetoothDevice]（全件列挙の途中経過）
+    refresh_failed = pyqtSignal(str)  # error message
+    battery_events = pyqtSignal(list)  # List[BatteryEvent]（前回との差分のみ）
+
+    def __init__(
+        self,
+        battery_monitor: BatteryMonitor,
+        loop_thread: Optional[AsyncLoopThread] = None,
+        coordinator: Optional[ScanCoordinator] = None,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.logger = logging.getLogger(__name__)
+        self.battery_monitor = battery_monitor
+        self.loop_thread = loop_thread or AsyncLoopThread()
+        # すべての更新要求はコーディネーターを経由して重複スキャンを防ぐ
+        self.coordinator = coordinator or ScanCoordinator(battery_monitor)
+
+        # デバイスの接続・切断イベントでは該当デバイスのみを更新する
+        battery_monitor.bluetooth_manager.add_device_listener(self._on_device_event)
+        # 全件列挙で見つかったデバイスは、列挙の完了を待たずに通知する
+        battery_monitor.bluetooth_manager.add_scan_listener(
+            lambda device: self.devices_found.emit([device])
+        )
+        # 変化イベントはQueuedConnectionでUIスレッドに配送される
+        battery_monitor.add_event_listener(self.battery_events.emit)
+
+    def request_refresh(self, force: bool = False) -> Future:
+        """バッテリー情報の更新を要求（UIスレッドをブロックしない）
+
+        force=Falseの場合、鮮度期間内のキャッシュ結果が使われることがある
+        """
+        self.refresh_started.emit()
+        future = self.loop_thread.submit(self.coordinator.request_scan(force))
+        future.add_done_callback(self._on_refresh_done)
+        return future
+
+    def request_initial_refresh(
+        self, prepare: Optional[Callable[[], None]] = None
+    ) -> Future:
+        """起動時の初回更新を要求（UIスレッドをブロックしない）
+
+        prepareを指定した場合、スキャンの前にイベントループのスレッドで呼び出す
+        （履歴データベースを開くなど、初回スキャンより前に必要な重い準備処理）
+        """
+        self.refresh_started.emit()
+        future = self.loop_thread.submit(self._initial_refresh(prepare))
+        future.add_done_callback(self._on_refresh_done)
+        return future
+
+    async def _initial_refresh(self, prepare: Optional[Callable[[], None]]):
+        if prepare is not None:
+            try:
+                prepare()
+            except Exception as e:
+                # 準備に失敗してもデバイスの表示は続ける
+                self.logger.error(f"起動時の準備処理に失敗しました: {e}")
+        return await self.coordinator.request_scan()
+
+    def request_scheduled_refresh(self) -> Future:
+        """読み取り期限が来たデバイスのみの更新を要求（定期タイマーから呼ぶ）"""
+        future = self.loop_thread.submit(self.coordinator.request_poll())
+        future.add_done_callback(self._on_scheduled_refresh_done)
+        return future
+
+    def _on_scheduled_refresh_done(self, future: Future):
+        """定期更新の完了時の処理（結果は変化イベントとしてのみ通知される）"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.logger.error(f"バッテリー情報の定期更新に失敗しました: {error}")
+
+    def _on_refresh_done(self, future: Future):
+        """更新完了時の処理（ワーカースレッドから呼ばれる）"""
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is not None:
+            self.logger.error(f"バッテリー情報の更新に失敗しました: {error}")
+            self.refresh_failed.emit(str(error))
+            return
+
+        # シグナルはQueuedConnectionでUIスレッドに配送される
+        self.devices_updated.emit(list(future.result() or []))
+
+    def _on_device_event(self, event: DeviceEvent, device: Optional[BluetoothDevice]):
+        """デバイスイベント受信時の処理（イベントソースのスレッドから呼ばれる）"""
+        future = self.loop_thread.submit(self._apply_device_event(device))
+        future.add_done_callback(self._on_refresh_done)
+
+    async def _apply_device_event(self, device: Optional[BluetoothDevice]):
+        """イベントの対象デバイスのみバッテリー情報を更新し、最新の一覧を返す"""
+        if device is not None:
+            await self.battery_monitor.refresh_device(device)
+
+        # キャッシュ済みのスキャン結果は古くなったため破棄
+        self.coordinator.invalidate()
+        manager = self.battery_monitor.bluetooth_manager
+        devices = list(manager.get_connected_devices().values())
+        self.battery_monitor.publish_changes(
+            devices, [device] if device is not None else []
+        )
+        return devices
+
+    def shutdown(self):
+        """ワーカーを停止"""
+        self.loop_thread.stop()
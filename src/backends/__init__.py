@@ -0,0 +1,23 @@
+"""
+backends/__init__.py - デバイスバックエンド
+"""
+
+from backends.base import DeviceBackend
+
+
+def create_backend(name: str, **options) -> DeviceBackend:
+    """名前からバックエンドを生成 ("powershell" / "simulated" / "ble")"""
+    if name == "powershell":
+        from backends.powershell import PowerShellBackend
+
+        return PowerShellBackend(**options)
+    elif name == "simulated":
+        from backends.simulated import SimulatedBackend
+
+        return SimulatedBackend(**options)
+    elif name == "ble":
+        from backends.ble import BleBatteryBackend
+
+        return BleBatteryBackend(**options)
+    else:
+        raise ValueError(f"不明なバックエンド: {name}")
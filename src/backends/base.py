@@ -0,0 +1,47 @@
+"""
+Device Backend - デバイスバックエンドの基底クラス
+"""
+
+from typing import AsyncIterator, List, Optional
+from bluetooth_manager import BluetoothDevice
+from device_events import DeviceEventCallback
+
+
+class DeviceBackend:
+    """デバイスの列挙・バッテリー読み取り・イベント購読を提供するバックエンドの基底クラス"""
+
+    name = "base"
+
+    async def enumerate_devices(self) -> List[BluetoothDevice]:
+        """デバイスを列挙（接続されていないデバイスを含んでもよい）"""
+        raise NotImplementedError
+
+    async def stream_devices(self) -> AsyncIterator[BluetoothDevice]:
+        """デバイスを見つかった順に返す（既定では列挙の完了後にまとめて返す）"""
+        for device in await self.enumerate_devices():
+            yield device
+
+    async def read_battery_level(self, device: BluetoothDevice) -> Optional[int]:
+        """デバイスのバッテリー残量を読み取る（取得できない場合はNone）"""
+        raise NotImplementedError
+
+    def subscribe(self, callback: DeviceEventCallback) -> bool:
+        """デバイスイベントを購読（対応していない場合はFalseを返す）
+
+        コールバックに渡すDeviceEventにはdeviceを設定すること
+        """
+        return False
+
+    def unsubscribe(self):
+        """デバイスイベントの購読を解除"""
+
+    @property
+    def is_subscribed(self) -> bool:
+        """デバイスイベントを購読中かどうか"""
+        return False
+
+    async def aclose(self):
+        """イベントループ上で保持している接続などを解放"""
+
+    def close(self):
+        """バックエンドが保持するリソースを解放"""
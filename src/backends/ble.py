@@ -0,0 +1,303 @@
+"""
+BLE Backend - GATT Battery Service (0x2A19) によるバッテリー残量の読み取り
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional
+from bluetooth_manager import BluetoothDevice
+from backends.base import DeviceBackend
+from device_events import DeviceEventCallback
+
+try:
+    from bleak import BleakClient
+except ImportError:  # bleakが利用できない環境
+    BleakClient = None
+
+
+# Battery Level characteristic (Battery Service 0x180F)
+BATTERY_LEVEL_UUID = "00002a19-0000-1000-8000-00805f9b34fb"
+
+MAC_ADDRESS_PATTERN = re.compile(r"^([0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}$")
+
+# 読み取り期限のうち、GATTで読めなかった場合のフォールバックに残しておく時間（秒）
+FALLBACK_MARGIN = 2.0
+
+
+def gatt_timeout_for(read_timeout: float) -> float:
+    """デバイスごとの読み取り期限からGATT読み取り（接続を含む）に使える時間を求める"""
+    return max(0.5, read_timeout - FALLBACK_MARGIN)
+
+
+class PooledConnection:
+    """プール内の接続"""
+
+    def __init__(self, client, now: float):
+        self.client = client
+        self.last_used = now
+        self.in_use = 0
+        self.lock = asyncio.Lock()  # 同一デバイスへの読み取りを直列化
+
+
+class BleakConnectionPool:
+    """アドレスごとにBleakClientの接続を保持し、ポーリングごとの接続処理を省くプール
+
+    - max_sizeを超える場合は最も長く使われていない接続を切断する
+    - idle_timeout秒以上使われていない接続は切断する
+    - イベントループのスレッドからのみ使用すること
+    """
+
+    def __init__(
+        self,
+        client_factory: Optional[Callable] = None,
+        max_size: int = 8,
+        idle_timeout: float = 300.0,
+        connect_timeout: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.client_factory = client_factory or BleakClient
+        if self.client_factory is None:
+            raise RuntimeError("bleakがインストールされていません")
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.clock = clock
+
+        self._connections: "OrderedDict[str, PooledConnection]" = OrderedDict()
+        self._connect_locks: Dict[str, asyncio.Lock] = {}
+
+        # 統計情報
+        self.connect_count = 0
+        self.reuse_count = 0
+        self.eviction_count = 0
+
+    @property
+    def size(self) -> int:
+        """保持している接続数"""
+        return len(self._connections)
+
+    @property
+    def reuse_ratio(self) -> float:
+        """接続の再利用率（0.0〜1.0）"""
+        total = self.connect_count + self.reuse_count
+        return self.reuse_count / total if total else 0.0
+
+    @asynccontextmanager
+    async def connection(self, address: str, timeout: Optional[float] = None):
+        """接続済みのクライアントを取得（プールになければ接続する）
+
+        timeoutを指定した場合、接続にかける時間はconnect_timeoutとの短い方になる
+        """
+        await self.evict_idle()
+
+        # 同じアドレスへの同時接続を防ぐ
+        connect_lock = self._connect_locks.setdefault(address, asyncio.Lock())
+        async with connect_lock:
+            pooled = self._connections.get(address)
+            if pooled is not None and not pooled.client.is_connected:
+                # 切断されていた場合は破棄して再接続
+                del self._connections[address]
+                pooled = None
+
+            if pooled is None:
+                await self._make_room()
+                connect_timeout = self.connect_timeout
+                if timeout is not None:
+                    connect_timeout = min(connect_timeout, timeout)
+                client = self.client_factory(address, timeout=connect_timeout)
+                await client.connect()
+                self.connect_count += 1
+                pooled = PooledConnection(client, self.clock())
+                self._connections[address] = pooled
+            else:
+                self.reuse_count += 1
+
+        if address in self._connections:
+            self._connections.move_to_end(address)
+        pooled.in_use += 1
+        try:
+            async with pooled.lock:
+                yield pooled.client
+        finally:
+            pooled.in_use -= 1
+            pooled.last_used = self.clock()
+
+    async def discard(self, address: str):
+        """指定アドレスの接続を切断してプールから削除"""
+        pooled = self._connections.pop(address, None)
+        if pooled is not None:
+            await self._disconnect(pooled)
+
+    async def evict_idle(self):
+        """一定時間使われていない接続を切断"""
+        now = self.clock()
+        for address, pooled in list(self._connections.items()):
+            if pooled.in_use == 0 and now - pooled.last_used >= self.idle_timeout:
+                del self._connections[address]
+                self.eviction_count += 1
+                await self._disconnect(pooled)
+
+    async def _make_room(self):
+        """プールが上限に達していれば、使用中でない最古の接続を切断"""
+        while len(self._connections) >= self.max_size:
+            for address, pooled in self._connections.items():
+                if pooled.in_use == 0:
+                    del self._connections[address]
+                    self.eviction_count += 1
+                    await self._disconnect(pooled)
+                    break
+            else:
+                # すべて使用中の場合は一時的に上限を超えて接続する
+                return
+
+    async def _disconnect(self, pooled: PooledConnection):
+        try:
+            await pooled.client.disconnect()
+        except Exception as e:
+            self.logger.debug("BLE切断エラー: %s", e)
+
+    async def close(self):
+        """すべての接続を切断"""
+        for address in list(self._connections):
+            await self.discard(address)
+
+    def get_stats(self) -> Dict[str, float]:
+        """接続プールの統計情報を取得"""
+        return {
+            "size": self.size,
+            "connect_count": self.connect_count,
+            "reuse_count": self.reuse_count,
+            "eviction_count": self.eviction_count,
+            "reuse_ratio": self.reuse_ratio,
+        }
+
+
+class BleBatteryBackend(DeviceBackend):
+    """GATT Battery Level特性からバッテリー残量を読み取るバックエンド
+
+    デバイスの列挙とイベント購読は基盤のバックエンド（既定はPowerShell）に委譲し、
+    GATTで読み取れないデバイスは基盤のバックエンドの読み取りにフォールバックする
+
+    - GATT読み取り（接続を含む）はgatt_timeout秒で打ち切り、呼び出し側の期限内に
+      フォールバックできるようにする
+    - GATTで読めなかったアドレスはunsupported_retry_interval秒の間GATTを試さない
+      （Battery Serviceを持たないクラシックBluetoothのヘッドセットなど）
+    """
+
+    name = "ble"
+
+    def __init__(
+        self,
+        base_backend: Optional[DeviceBackend] = None,
+        pool: Optional[BleakConnectionPool] = None,
+        fallback_to_base: bool = True,
+        gatt_timeout: float = gatt_timeout_for(5.0),
+        unsupported_retry_interval: float = 1800.0,
+    ):
+        self.logger = logging.getLogger(__name__)
+        if base_backend is None:
+            from backends.powershell import PowerShellBackend
+
+            base_backend = PowerShellBackend()
+        self.base_backend = base_backend
+        self.pool = pool or BleakConnectionPool()
+        self.fallback_to_base = fallback_to_base
+        self.gatt_timeout = gatt_timeout
+        self.unsupported_retry_interval = unsupported_retry_interval
+
+        # GATTで読めなかったアドレス -> 記録した時刻（pool.clock）
+        self._unsupported: Dict[str, float] = {}
+
+        # 統計情報
+        self.read_count = 0
+        self.failure_count = 0
+        self.skipped_count = 0
+        self.read_latencies = deque(maxlen=100)  # 直近の読み取り時間（秒）
+
+    async def enumerate_devices(self):
+        return await self.base_backend.enumerate_devices()
+
+    async def stream_devices(self):
+        async for device in self.base_backend.stream_devices():
+            yield device
+
+    async def read_battery_level(self, device: BluetoothDevice) -> Optional[int]:
+        if self._should_try_gatt(device.address):
+            start = time.perf_counter()
+            try:
+                level = await asyncio.wait_for(
+                    self._read_gatt(device.address), self.gatt_timeout
+                )
+                self.read_count += 1
+                self.read_latencies.append(time.perf_counter() - start)
+                if level is not None:
+                    return level
+            except Exception as e:
+                # タイムアウト（asyncio.TimeoutError）もここで扱い、フォールバックする
+                self.failure_count += 1
+                self._unsupported[device.address] = self.pool.clock()
+                self.logger.debug(
+                    "GATTバッテリー読み取りエラー for %s: %r", device.name, e
+                )
+                await self.pool.discard(device.address)
+
+        if self.fallback_to_base:
+            return await self.base_backend.read_battery_level(device)
+        return None
+
+    def _should_try_gatt(self, address: str) -> bool:
+        """GATTでの読み取りを試すかどうか（最近GATTで読めなかったアドレスは試さない）"""
+        if not MAC_ADDRESS_PATTERN.match(address):
+            return False
+        failed_at = self._unsupported.get(address)
+        if failed_at is None:
+            return True
+        if self.pool.clock() - failed_at >= self.unsupported_retry_interval:
+            del self._unsupported[address]
+            return True
+        self.skipped_count += 1
+        return False
+
+    async def _read_gatt(self, address: str) -> Optional[int]:
+        async with self.pool.connection(address, timeout=self.gatt_timeout) as client:
+            data = await client.read_gatt_char(BATTERY_LEVEL_UUID)
+        if data:
+            return max(0, min(100, int(data[0])))
+        return None
+
+    def subscribe(self, callback: DeviceEventCallback) -> bool:
+        return self.base_backend.subscribe(callback)
+
+    def unsubscribe(self):
+        self.base_backend.unsubscribe()
+
+    @property
+    def is_subscribed(self) -> bool:
+        return self.base_backend.is_subscribed
+
+    def get_stats(self) -> Dict[str, Optional[float]]:
+        """接続数・再利用率・読み取り時間などの統計情報を取得"""
+        stats = self.pool.get_stats()
+        stats["read_count"] = self.read_count
+        stats["failure_count"] = self.failure_count
+        stats["skipped_count"] = self.skipped_count
+        stats["unsupported_count"] = len(self._unsupported)
+        stats["average_read_latency"] = (
+            sum(self.read_latencies) / len(self.read_latencies)
+            if self.read_latencies
+            else None
+        )
+        return stats
+
+    async def aclose(self):
+        """BLE接続をすべて切断"""
+        await self.pool.close()
+        await self.base_backend.aclose()
+
+    def close(self):
+        self.base_backend.close()
@@ -0,0 +1,443 @@
+"""
+PowerShell Backend - PowerShell (Get-PnpDevice) によるデバイスバックエンド
+"""
+
+import asyncio
+import hashlib
+import logging
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from bluetooth_manager import BluetoothDevice
+from backends.base import DeviceBackend
+from device_events import DeviceEvent, DeviceEventCallback, DeviceEventSource
+from powershell_session import PowerShellSession
+
+# XX:XX:XX:XX:XX:XX / XX-XX-XX-XX-XX-XX 形式のアドレス
+MAC_SEPARATED_PATTERN = re.compile(r"(?:[0-9A-Fa-f]{2}[:-]){5}[0-9A-Fa-f]{2}")
+# 区切りのない12桁の16進数（DEV_XXXXXXXXXXXX やインスタンスIDの末尾など）
+MAC_PLAIN_PATTERN = re.compile(r"[0-9A-Fa-f]{12}")
+# デバイス本体のノード（HID・GATTサービスなどの子ノードはこれ以外の形になる）
+DEVICE_NODE_PATTERN = re.compile(r"^BTH(?:ENUM|LE)\\DEV_[0-9A-Fa-f]{12}(?:\\|$)", re.I)
+# サービスのGUID（{0000110B-0000-1000-8000-00805F9B34FB}の末尾はアドレスと同じ形になる）
+GUID_PATTERN = re.compile(r"\{[0-9A-Fa-f-]+\}")
+
+# デバイス名のクリーンアップ（パターン, 置換後）
+NAME_CLEANUP_RULES = [
+    # AirPods Max (Green) - Find My -> AirPods Max (Green)
+    (re.compile(r" - Find My.*$"), ""),
+    (re.compile(r"^Bluetooth HID デバイス$"), "Bluetoothマウス・キーボード"),
+    (
+        re.compile(r"^Bluetooth 低エネルギー GATT 対応 HID デバイス$"),
+        "Bluetooth HIDデバイス",
+    ),
+]
+
+# デバイスタイプの判定（上から順に、名前に含まれるキーワードで判定）
+DEVICE_TYPE_KEYWORDS = [
+    ("ヘッドホン・イヤホン", ("airpods", "headphone", "headset", "earphone", "buds")),
+    ("マウス", ("mouse", "マウス")),
+    ("キーボード", ("keyboard", "キーボード")),
+    ("ゲームコントローラー", ("controller", "gamepad", "コントローラー")),
+    ("HIDデバイス", ("hid",)),
+]
+
+# (アドレス, クリーンアップ後の名前, デバイスタイプ)
+DeviceIdentity = Tuple[str, str, str]
+
+# デバイスプロパティ（DEVPKEY）: レコードのキー
+BATTERY_LEVEL_KEY = "{104EA319-6EE2-4701-BD47-8DDBF425BBE5} 2"
+IS_CONNECTED_KEY = "{83DA6326-97A6-4088-9453-A1923F573B29} 15"
+PROPERTY_NAMES = {
+    BATTERY_LEVEL_KEY: "BatteryLevel",
+    IS_CONNECTED_KEY: "IsConnected",
+}
+
+# $idsの全デバイスのプロパティを1回のGet-PnpDevicePropertyで取得
+DEVICE_PROPERTY_QUERY = (
+    "@(Get-PnpDeviceProperty -InstanceId $ids -KeyName "
+    f"'{BATTERY_LEVEL_KEY}', '{IS_CONNECTED_KEY}' -ErrorAction SilentlyContinue"
+    " | Where-Object { $_.Data -ne $null } | Select-Object InstanceId, KeyName, Data)"
+)
+
+# BluetoothとHIDクラスの存在するデバイス（デバイスノードとBluetooth HID）を列挙し、
+# 同じ呼び出しでバッテリー残量と接続状態をまとめて取得する。1行に1つの圧縮JSONを
+# 見つかった順に出力する（デバイスノード、HID、最後にプロパティ）
+SCAN_COMMAND = (
+    r"""
+$ids = New-Object System.Collections.Generic.List[string]
+foreach ($class in 'Bluetooth', 'HIDClass') {
+    Get-PnpDevice -PresentOnly -Class $class -ErrorAction SilentlyContinue |
+        Where-Object { $_.InstanceId -match '^(BTHENUM|BTHLE)\\DEV_|^HID\\\{0000(1124|1812)-' } |
+        ForEach-Object {
+            $ids.Add($_.InstanceId)
+            $_ | Select-Object FriendlyName, Status, InstanceId, Class | ConvertTo-Json -Compress
+        }
+}
+if ($ids.Count -gt 0) {
+    $ids = $ids.ToArray()
+    """
+    + DEVICE_PROPERTY_QUERY
+    + r""" | ForEach-Object { $_ | ConvertTo-Json -Compress }
+}
+"""
+)
+
+
+def battery_query_command(instance_ids: List[str]) -> str:
+    """指定デバイスのバッテリー残量と接続状態を1回で取得するコマンド"""
+    quoted = ", ".join(
+        "'" + instance_id.replace("'", "''") + "'" for instance_id in instance_ids
+    )
+    return (
+        f"$ids = @({quoted})\n"
+        "@{ properties = "
+        + DEVICE_PROPERTY_QUERY
+        + " } | ConvertTo-Json -Compress -Depth 3"
+    )
+
+
+def _as_list(value: Any) -> list:
+    """ConvertTo-Jsonの結果を配列として扱う（1件の場合はオブジェクト、0件の場合はnull）"""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def parse_device_properties(items: Any) -> Dict[str, Dict[str, Any]]:
+    """Get-PnpDevicePropertyの結果をInstanceIdごとのプロパティに変換
+
+    {InstanceId: {"BatteryLevel": 残量, "IsConnected": 接続状態}}
+    """
+    properties: Dict[str, Dict[str, Any]] = {}
+    for item in _as_list(items):
+        if not isinstance(item, dict) or item.get("Data") is None:
+            continue
+        name = PROPERTY_NAMES.get(str(item.get("KeyName", "")).upper())
+        if name is not None:
+            properties.setdefault(item.get("InstanceId") or "", {})[name] = item["Data"]
+    return properties
+
+
+def parse_scan_line(line: str) -> Optional[dict]:
+    """スキャンの出力1行（デバイスまたはプロパティのJSON）を解析（不正な行はNone）"""
+    try:
+        item = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(item, dict) or not item.get("InstanceId"):
+        return None
+    return item
+
+
+def parse_battery_level(value: Any) -> Optional[int]:
+    """バッテリー残量プロパティの値を0〜100の整数に変換（不正な値はNone）"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if 0 <= value <= 100:
+        return int(value)
+    return None
+
+
+class PowerShellBackend(DeviceBackend):
+    """常駐PowerShellホストでPnPデバイスを列挙するバックエンド"""
+
+    name = "powershell"
+
+    def __init__(
+        self,
+        powershell_session: Optional[PowerShellSession] = None,
+        event_source: Optional[DeviceEventSource] = None,
+        identity_cache_size: int = 256,
+        battery_max_age: float = 5.0,
+    ):
+        self.logger = logging.getLogger(__name__)
+        # スキャンごとにプロセスを起動しないよう、常駐PowerShellホストを使用
+        self.powershell = powershell_session or PowerShellSession()
+        self.event_source = event_source
+
+        # (InstanceId, FriendlyName) ごとの解析結果のLRUキャッシュ
+        # （スキャンとイベントソースの両方のスレッドから使われる）
+        self.identity_cache_size = max(1, identity_cache_size)
+        self._identities: "OrderedDict[Tuple[str, str], DeviceIdentity]" = OrderedDict()
+        self._identity_lock = threading.Lock()
+        self.identity_hits = 0
+        self.identity_misses = 0
+
+        # バッテリー残量はスキャンと同じ問い合わせで全デバイス分を取得し、
+        # battery_max_age秒以内の読み取りには取得済みの値を返す
+        self.battery_max_age = battery_max_age
+        self._instance_ids: Dict[str, str] = {}  # アドレス: InstanceId
+        # アドレス: (バッテリー残量, 取得時刻)
+        self._battery_levels: Dict[str, Tuple[Optional[int], float]] = {}
+        self._battery_query: Optional[asyncio.Future] = None
+        self.battery_query_count = 0
+        self.skipped_line_count = 0  # スキャン出力の不正な行の数
+
+    async def enumerate_devices(self) -> List[BluetoothDevice]:
+        """PnPデバイスを列挙（PowerShellの応答待ちでイベントループを止めない）"""
+        return [device async for device in self.stream_devices()]
+
+    async def stream_devices(self) -> AsyncIterator[BluetoothDevice]:
+        """PnPデバイスを見つかった順に返す
+
+        PowerShellの出力を1行ずつ解析し、列挙の完了を待たずにデバイスを返す。
+        接続状態とバッテリー残量のプロパティは最後に届くため、返したデバイスの
+        is_connectedは列挙の完了時に更新されることがある
+        """
+        loop = asyncio.get_running_loop()
+        lines: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        producer = loop.run_in_executor(
+            None, self._read_scan_lines, loop, lines.put_nowait
+        )
+
+        devices: Dict[str, BluetoothDevice] = {}  # InstanceId: 返したデバイス
+        addresses = set()
+        properties: Dict[str, Dict[str, Any]] = {}
+        while True:
+            line = await lines.get()
+            if line is None:
+                break
+            item = parse_scan_line(line)
+            if item is None:
+                # 不正な行は飛ばし、他のデバイスの結果は使う
+                self.skipped_line_count += 1
+                self.logger.debug("スキャン出力の不正な行を無視: %s", line)
+                continue
+
+            if "KeyName" in item:
+                for instance_id, values in parse_device_properties(item).items():
+                    properties.setdefault(instance_id, {}).update(values)
+                continue
+
+            device = self._parse_device_record(item)
+            # 同じデバイスのHIDコレクションはデバイスノードにまとめる
+            if device.address in addresses:
+                continue
+            addresses.add(device.address)
+            devices[item["InstanceId"]] = device
+            yield device
+
+        await producer
+
+        # 残量のプロパティがないデバイスは、残量を取得できないデバイスとして扱う
+        for instance_id, device in devices.items():
+            record = {"InstanceId": instance_id, "BatteryLevel": None}
+            record.update(properties.get(instance_id, {}))
+            if record.get("IsConnected") is not None and not record["IsConnected"]:
+                device.is_connected = False
+            self._remember_device(device, record)
+
+    def _read_scan_lines(self, loop: asyncio.AbstractEventLoop, put):
+        """スキャンの出力行をイベントループのキューへ送る（ワーカースレッドで実行）"""
+        try:
+            for line in self.powershell.stream(SCAN_COMMAND):
+                loop.call_soon_threadsafe(put, line)
+        except Exception as e:
+            self.logger.error(f"PowerShell Bluetoothデバイス取得エラー: {e}")
+        finally:
+            loop.call_soon_threadsafe(put, None)
+
+    def _parse_device_record(self, record: dict) -> BluetoothDevice:
+        """PnPデバイスのレコードをBluetoothDeviceに変換"""
+        name = record.get("FriendlyName") or "Unknown Device"
+        status = record.get("Status", "Unknown")
+        instance_id = record.get("InstanceId") or ""
+
+        address, clean_name, device_type = self._get_identity(instance_id, name)
+        bt_device = BluetoothDevice(
+            name=clean_name,
+            address=address,
+            device_type=device_type,
+        )
+        # 接続状態のプロパティがあればそちらを優先（ペアリング済みで未接続のデバイスも存在する）
+        is_connected = record.get("IsConnected")
+        bt_device.is_connected = status == "OK" and (
+            is_connected is None or bool(is_connected)
+        )
+        return bt_device
+
+    def _remember_device(self, device: BluetoothDevice, record: dict):
+        """バッテリー残量の問い合わせに使うInstanceIdと、取得済みの残量を記録"""
+        instance_id = record.get("InstanceId")
+        if instance_id:
+            self._instance_ids[device.address] = instance_id
+        if "BatteryLevel" in record or "IsConnected" in record:
+            self._battery_levels[device.address] = (
+                parse_battery_level(record.get("BatteryLevel")),
+                time.monotonic(),
+            )
+
+    def _get_identity(self, instance_id: str, name: str) -> DeviceIdentity:
+        """アドレス・名前・タイプを取得（変化のないデバイスはキャッシュから返す）"""
+        key = (instance_id, name)
+        with self._identity_lock:
+            identity = self._identities.get(key)
+            if identity is not None:
+                self._identities.move_to_end(key)
+                self.identity_hits += 1
+                return identity
+
+        clean_name = self._clean_device_name(name)
+        identity = (
+            self._extract_address_from_instance_id(instance_id),
+            clean_name,
+            self._determine_device_type(clean_name),
+        )
+        with self._identity_lock:
+            self.identity_misses += 1
+            self._identities[key] = identity
+            if len(self._identities) > self.identity_cache_size:
+                self._identities.popitem(last=False)
+        return identity
+
+    def get_identity_stats(self) -> Dict[str, int]:
+        """解析結果のキャッシュの統計"""
+        return {
+            "size": len(self._identities),
+            "hits": self.identity_hits,
+            "misses": self.identity_misses,
+        }
+
+    def _clean_device_name(self, name: str) -> str:
+        """デバイス名をクリーンアップ"""
+        # 不要な文字列を削除
+        for pattern, replacement in NAME_CLEANUP_RULES:
+            name = pattern.sub(replacement, name)
+        return name.strip()
+
+    def _extract_address_from_instance_id(self, instance_id: str) -> str:
+        """インスタンスIDからMACアドレスを抽出（簡易版）"""
+        try:
+            # MACアドレスっぽいパターンを探す（サービスのGUIDは除く）
+            target = GUID_PATTERN.sub("", instance_id)
+            match = MAC_SEPARATED_PATTERN.search(target) or MAC_PLAIN_PATTERN.search(
+                target
+            )
+            if match:
+                mac = match.group(0).replace("-", "").replace(":", "")
+                return ":".join([mac[i : i + 2] for i in range(0, 12, 2)])
+
+            # 見つからない場合は、インスタンスIDの最後の部分から安定したIDを作る
+            # （hash()はプロセスごとに値が変わるため使わない）
+            last_part = instance_id.split("\\")[-1]
+            digest = hashlib.blake2s(last_part.encode("utf-8"), digest_size=4)
+            return f"ID_{digest.hexdigest().upper()}"
+
+        except Exception as e:
+            self.logger.debug("アドレス抽出エラー: %s", e)
+
+        return "Unknown"
+
+    def _determine_device_type(self, name: str) -> str:
+        """デバイス名からデバイスタイプを判定"""
+        name_lower = name.lower()
+        for device_type, keywords in DEVICE_TYPE_KEYWORDS:
+            if any(keyword in name_lower for keyword in keywords):
+                return device_type
+        return "Bluetoothデバイス"
+
+    async def read_battery_level(self, device: BluetoothDevice) -> Optional[int]:
+        """デバイスのバッテリー残量を取得
+
+        直近のスキャン・問い合わせで取得した値を返す。古い場合は全デバイス分を
+        1回の問い合わせで取得し直す（同時に読み取るデバイスは同じ結果を共有する）
+        """
+        try:
+            cached = self._battery_levels.get(device.address)
+            now = time.monotonic()
+            if cached is not None and now - cached[1] < self.battery_max_age:
+                return cached[0]
+            if device.address not in self._instance_ids:
+                return None
+
+            if self._battery_query is None:
+                loop = asyncio.get_running_loop()
+                self._battery_query = loop.run_in_executor(
+                    None, self._query_battery_levels
+                )
+                self._battery_query.add_done_callback(self._on_battery_query_done)
+            # 読み取りのタイムアウトで問い合わせ自体はキャンセルしない
+            await asyncio.shield(self._battery_query)
+
+            cached = self._battery_levels.get(device.address)
+            return cached[0] if cached is not None else None
+
+        except Exception as e:
+            self.logger.error(f"バッテリー残量取得エラー for {device.name}: {e}")
+            return None
+
+    def _on_battery_query_done(self, future: asyncio.Future):
+        self._battery_query = None
+
+    def _query_battery_levels(self):
+        """把握している全デバイスのバッテリー残量を1回の問い合わせで取得"""
+        instance_ids = dict(self._instance_ids)
+        if not instance_ids:
+            return
+        self.battery_query_count += 1
+        output = self.powershell.run(battery_query_command(list(instance_ids.values())))
+        data = json.loads(output) if output.strip() else {}
+        properties = parse_device_properties(
+            data.get("properties") if isinstance(data, dict) else None
+        )
+
+        now = time.monotonic()
+        for address, instance_id in instance_ids.items():
+            values = properties.get(instance_id, {})
+            self._battery_levels[address] = (
+                parse_battery_level(values.get("BatteryLevel")),
+                now,
+            )
+
+    def subscribe(self, callback: DeviceEventCallback) -> bool:
+        """PnPデバイスイベントを購読"""
+        if self.event_source is None:
+            return False
+
+        def on_event(event: DeviceEvent):
+            record = {
+                "FriendlyName": event.name or "Unknown Device",
+                "Status": event.status or "Unknown",
+                "InstanceId": event.instance_id,
+            }
+            event.device = self._parse_device_record(record)
+            # 同じデバイスの別ノード（HIDなど）のイベントでInstanceIdを置き換えない
+            address = event.device.address
+            if (
+                event.kind == DeviceEvent.REMOVED or not event.device.is_connected
+            ) and self._is_child_node(event.instance_id, address):
+                # 子ノードの削除ではデバイス本体が残っているため、デバイスを削除しない
+                self.logger.debug("子ノードの削除・状態変化を無視: %s", event)
+                return
+            if event.kind != DeviceEvent.REMOVED and address not in self._instance_ids:
+                self._remember_device(event.device, record)
+            callback(event)
+
+        self.event_source.start(on_event)
+        return True
+
+    @staticmethod
+    def _is_child_node(instance_id: str, address: str) -> bool:
+        """アドレスを持つデバイスの、本体ではないノード（サービス・HIDなど）かどうか"""
+        if address.startswith("ID_"):
+            # アドレスのないノードはそれ自体を1つのデバイスとして扱う
+            return False
+        return not DEVICE_NODE_PATTERN.match(instance_id or "")
+
+    def unsubscribe(self):
+        if self.event_source is not None:
+            self.event_source.stop()
+
+    @property
+    def is_subscribed(self) -> bool:
+        return self.event_source is not None and self.event_source.is_running
+
+    def close(self):
+        """常駐PowerShellホストを終了"""
+        self.powershell.close()
@@ -0,0 +1,206 @@
+"""
+Simulated Backend - 負荷試験・プロファイリング用の模擬デバイスバックエンド
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from bluetooth_manager import BluetoothDevice
+from backends.base import DeviceBackend
+from device_events import DeviceEvent, DeviceEventCallback
+
+# 模擬デバイスのプロファイル: (名前, タイプ, 連続使用時間[時間], 充電時間[時間])
+DEVICE_PROFILES = [
+    ("AirPods Pro", "ヘッドホン・イヤホン", 6.0, 1.5),
+    ("WH-1000XM5", "ヘッドホン・イヤホン", 30.0, 3.0),
+    ("MX Master 3", "マウス", 70 * 24.0, 2.0),
+    ("Magic Keyboard", "キーボード", 30 * 24.0, 2.0),
+    ("Xbox Wireless Controller", "ゲームコントローラー", 40.0, 3.0),
+    ("Galaxy Buds2", "ヘッドホン・イヤホン", 5.0, 1.0),
+    ("MX Keys", "キーボード", 10 * 24.0, 3.0),
+]
+
+# リチウムイオン電池の放電曲線（経過割合 -> 表示残量%）
+# 満充電直後に少し早く減り、中盤は緩やか、終盤で急に落ちる
+DISCHARGE_CURVE = [(0.0, 100.0), (0.05, 92.0), (0.85, 18.0), (1.0, 0.0)]
+
+
+def _interpolate(curve: List[Tuple[float, float]], x: float) -> float:
+    """区分線形補間"""
+    for (x0, y0), (x1, y1) in zip(curve, curve[1:]):
+        if x <= x1:
+            return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+    return curve[-1][1]
+
+
+class SimulatedDevice:
+    """模擬デバイスの特性と状態"""
+
+    def __init__(
+        self,
+        index: int,
+        rng: random.Random,
+        latency_range: Tuple[float, float],
+        failure_rate: float,
+        unsupported_rate: float,
+    ):
+        profile_name, device_type, runtime_hours, charge_hours = DEVICE_PROFILES[
+            index % len(DEVICE_PROFILES)
+        ]
+        self.index = index
+        self.name = (
+            profile_name
+            if index < len(DEVICE_PROFILES)
+            else f"{profile_name} #{index // len(DEVICE_PROFILES) + 1}"
+        )
+        self.address = "02:00:" + ":".join(
+            f"{(index >> shift) & 0xFF:02X}" for shift in (24, 16, 8, 0)
+        )
+        self.device_type = device_type
+        self.instance_id = f"SIMULATED\\DEV_{self.address.replace(':', '')}"
+
+        # 個体差
+        self.runtime_hours = runtime_hours * rng.uniform(0.8, 1.2)
+        self.charge_hours = charge_hours * rng.uniform(0.9, 1.1)
+        self.recharge_at = rng.uniform(0.75, 0.95)  # この割合まで使うと充電する
+        self.phase_hours = rng.uniform(0, self.cycle_hours)
+        self.base_latency = rng.uniform(*latency_range)
+        self.failure_rate = failure_rate
+        self.battery_supported = rng.random() >= unsupported_rate
+        self.is_connected = True
+
+        # 読み取りごとの揺らぎ・失敗はデバイス単位の乱数で決める（並行実行でも決定的）
+        self.rng = random.Random(rng.random())
+
+    @property
+    def cycle_hours(self) -> float:
+        """放電から充電完了までの1サイクルの時間"""
+        return self.runtime_hours * self.recharge_at + self.charge_hours
+
+    def state_at(self, elapsed_hours: float) -> Tuple[int, bool]:
+        """経過時間における (残量%, 充電中か) を返す"""
+        position = (elapsed_hours + self.phase_hours) % self.cycle_hours
+        discharge_hours = self.runtime_hours * self.recharge_at
+
+        if position < discharge_hours:
+            level = _interpolate(DISCHARGE_CURVE, position / self.runtime_hours)
+            return int(round(level)), False
+
+        # 充電中: 充電開始時の残量から100%まで線形に回復
+        start_level = _interpolate(DISCHARGE_CURVE, self.recharge_at)
+        progress = (position - discharge_hours) / self.charge_hours
+        return int(round(start_level + (100 - start_level) * progress)), True
+
+
+class SimulatedBackend(DeviceBackend):
+    """数千台規模のデバイスを決定的に模擬するバックエンド
+
+    - 放電曲線・充電サイクルに従った残量
+    - デバイスごとの読み取り遅延と一定確率の失敗
+    - 接続・切断イベント（set_connectedで発生）
+    """
+
+    name = "simulated"
+
+    def __init__(
+        self,
+        device_count: int = 5,
+        seed: int = 0,
+        latency_range: Tuple[float, float] = (0.01, 0.05),
+        enumerate_latency: float = 0.0,
+        failure_rate: float = 0.0,
+        unsupported_rate: float = 0.0,
+        time_scale: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.enumerate_latency = enumerate_latency
+        self.time_scale = time_scale  # 実時間1秒あたりの模擬経過秒数
+        self.clock = clock
+        self.start_time = clock()
+
+        rng = random.Random(seed)
+        self.devices: Dict[str, SimulatedDevice] = {}
+        for index in range(device_count):
+            device = SimulatedDevice(
+                index, rng, latency_range, failure_rate, unsupported_rate
+            )
+            self.devices[device.address] = device
+
+        self.read_count = 0
+        self._callback: Optional[DeviceEventCallback] = None
+
+    def elapsed_hours(self) -> float:
+        """模擬上の経過時間（時間）"""
+        return (self.clock() - self.start_time) * self.time_scale / 3600
+
+    async def enumerate_devices(self) -> List[BluetoothDevice]:
+        if self.enumerate_latency:
+            await asyncio.sleep(self.enumerate_latency)
+        return [
+            self._to_bluetooth_device(device)
+            for device in self.devices.values()
+            if device.is_connected
+        ]
+
+    async def read_battery_level(self, device: BluetoothDevice) -> Optional[int]:
+        simulated = self.devices.get(device.address)
+        if simulated is None or not simulated.is_connected:
+            return None
+
+        self.read_count += 1
+        latency = simulated.base_latency * simulated.rng.uniform(0.7, 1.3)
+        if latency:
+            await asyncio.sleep(latency)
+
+        if not simulated.battery_supported:
+            return None
+        if simulated.rng.random() < simulated.failure_rate:
+            return None
+
+        level, charging = simulated.state_at(self.elapsed_hours())
+        device.is_charging = charging
+        return level
+
+    def set_connected(self, address: str, connected: bool):
+        """デバイスの接続状態を変更し、購読中であればイベントを配信"""
+        simulated = self.devices[address]
+        if simulated.is_connected == connected:
+            return
+
+        simulated.is_connected = connected
+        if self._callback is not None:
+            kind = DeviceEvent.ADDED if connected else DeviceEvent.REMOVED
+            device = self._to_bluetooth_device(simulated)
+            self._callback(
+                DeviceEvent(
+                    kind,
+                    simulated.instance_id,
+                    simulated.name,
+                    "OK" if connected else "Unknown",
+                    device=device,
+                )
+            )
+
+    def subscribe(self, callback: DeviceEventCallback) -> bool:
+        self._callback = callback
+        return True
+
+    def unsubscribe(self):
+        self._callback = None
+
+    @property
+    def is_subscribed(self) -> bool:
+        return self._callback is not None
+
+    @staticmethod
+    def _to_bluetooth_device(simulated: SimulatedDevice) -> BluetoothDevice:
+        device = BluetoothDevice(
+            name=simulated.name,
+            address=simulated.address,
+            device_type=simulated.device_type,
+        )
+        device.is_connected = simulated.is_connected
+        return device
@@ -0,0 +1,221 @@
+"""
+Battery Events - デバイスごとのバッテリー状態の変化イベント
+"""
+
+import asyncio
+import copy
+import time
+from typing import Dict, Iterable, List, Optional
+from bluetooth_manager import BluetoothDevice
+
+
+class BatteryEvent:
+    """バッテリー状態の変化イベント
+
+    deviceはイベント発生時点のBluetoothDeviceの複製で、以降の更新の影響を受けない
+    """
+
+    LEVEL_CHANGED = "level_changed"  # 残量・充電状態の変化
+    CONNECTED = "connected"
+    DISCONNECTED = "disconnected"
+    THRESHOLD_CROSSED = "threshold_crossed"  # 低バッテリー閾値をまたいだ
+
+    def __init__(
+        self,
+        kind: str,
+        device: BluetoothDevice,
+        old_level: Optional[int] = None,
+        new_level: Optional[int] = None,
+        threshold: Optional[int] = None,
+    ):
+        self.kind = kind
+        self.address = device.address
+        self.device = device
+        self.old_level = old_level
+        self.new_level = new_level
+        self.threshold = threshold  # THRESHOLD_CROSSEDの場合の閾値
+        self.timestamp = time.time()
+
+    @property
+    def is_low(self) -> bool:
+        """閾値以下になったかどうか（THRESHOLD_CROSSEDで、閾値を下回った場合True）"""
+        return (
+            self.new_level is not None
+            and self.threshold is not None
+            and self.new_level <= self.threshold
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"BatteryEvent({self.kind}, {self.address!r}, "
+            f"{self.old_level} -> {self.new_level})"
+        )
+
+
+class BatteryEventTracker:
+    """前回の状態と比較してデバイスごとの変化イベントを作るクラス
+
+    イベントループのスレッドからのみ呼び出すこと
+    """
+
+    def __init__(self):
+        # address: 前回イベントを作成した時点のデバイスの複製
+        self._snapshots: Dict[str, BluetoothDevice] = {}
+
+    def __contains__(self, device_address: str) -> bool:
+        return device_address in self._snapshots
+
+    def diff(
+        self,
+        devices: List[BluetoothDevice],
+        threshold: int,
+        refreshed: Optional[Iterable[BluetoothDevice]] = None,
+    ) -> List[BatteryEvent]:
+        """接続デバイスの一覧から前回との差分イベントを作成
+
+        refreshedを指定した場合、残量の変化はそのデバイスと新しいデバイスについてのみ
+        調べる（切断は常にdevices全体で調べる）
+        """
+        current = {device.address: device for device in devices}
+        events = []
+        for address in [a for a in self._snapshots if a not in current]:
+            snapshot = self._snapshots.pop(address)
+            events.append(
+                BatteryEvent(
+                    BatteryEvent.DISCONNECTED, snapshot, snapshot.battery_level
+                )
+            )
+
+        if refreshed is None:
+            candidates = devices
+        else:
+            candidates = [
+                device for device in devices if device.address not in self._snapshots
+            ]
+            candidates.extend(
+                device for device in refreshed if device.address in current
+            )
+        for device in candidates:
+            events.extend(self._diff_device(device, threshold))
+        return events
+
+    def _diff_device(
+        self, device: BluetoothDevice, threshold: int
+    ) -> List[BatteryEvent]:
+        previous = self._snapshots.get(device.address)
+        if previous is not None and (
+            previous.battery_level == device.battery_level
+            and previous.is_charging == device.is_charging
+        ):
+            return []
+
+        snapshot = copy.copy(device)
+        self._snapshots[device.address] = snapshot
+        level = snapshot.battery_level
+        if previous is None:
+            return [BatteryEvent(BatteryEvent.CONNECTED, snapshot, None, level)]
+
+        old_level = previous.battery_level
+        events = [BatteryEvent(BatteryEvent.LEVEL_CHANGED, snapshot, old_level, level)]
+        if (
+            old_level is not None
+            and level is not None
+            and (old_level > threshold) != (level > threshold)
+        ):
+            events.append(
+                BatteryEvent(
+                    BatteryEvent.THRESHOLD_CROSSED,
+                    snapshot,
+                    old_level,
+                    level,
+                    threshold,
+                )
+            )
+        return events
+
+
+def merge_events(events: Iterable[BatteryEvent]) -> List[BatteryEvent]:
+    """同じデバイスの連続するイベントを最終状態を表す1件にまとめる
+
+    切断で終わる場合はDISCONNECTED、途中で接続された場合はCONNECTED、
+    それ以外はLEVEL_CHANGED（old_levelは最初のイベントの値）になる。
+    順序は各デバイスの最初のイベントの順
+    """
+    first: Dict[str, BatteryEvent] = {}
+    last: Dict[str, BatteryEvent] = {}
+    connected: Dict[str, bool] = {}
+    for event in events:
+        first.setdefault(event.address, event)
+        last[event.address] = event
+        if event.kind == BatteryEvent.CONNECTED:
+            connected[event.address] = True
+        elif event.kind == BatteryEvent.DISCONNECTED:
+            connected[event.address] = False
+
+    merged = []
+    for address, event in last.items():
+        if event.kind == BatteryEvent.DISCONNECTED:
+            merged.append(event)
+        elif connected.get(address):
+            merged.append(
+                BatteryEvent(
+                    BatteryEvent.CONNECTED, event.device, None, event.new_level
+                )
+            )
+        else:
+            merged.append(
+                BatteryEvent(
+                    BatteryEvent.LEVEL_CHANGED,
+                    event.device,
+                    first[address].old_level,
+                    event.new_level,
+                )
+            )
+    return merged
+
+
+class BatteryEventStream:
+    """変化イベントを受け取る非同期イテレーター
+
+    async for event in stream: の形で使う。イベントループのスレッドで作成・使用し、
+    不要になったらcloseで購読を解除する。取り出しが追いつかずmaxsizeを超えた場合は
+    古いイベントから捨てる
+    """
+
+    def __init__(self, unsubscribe=None, maxsize: int = 1000):
+        self._queue: "asyncio.Queue" = asyncio.Queue(maxsize)
+        self._unsubscribe = unsubscribe
+        self._closed = False
+        self.dropped_count = 0
+
+    def publish(self, events: List[BatteryEvent]):
+        """イベントを追加（イベントループのスレッドから呼ぶ）"""
+        if self._closed:
+            return
+        for event in events:
+            if self._queue.full():
+                self._queue.get_nowait()
+                self.dropped_count += 1
+            self._queue.put_nowait(event)
+
+    def close(self):
+        """購読を解除し、待機中の取り出しを終了させる"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._unsubscribe is not None:
+            self._unsubscribe(self)
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> BatteryEvent:
+        if self._closed and self._queue.empty():
+            raise StopAsyncIteration
+        event = await self._queue.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
@@ -0,0 +1,158 @@
+"""
+Battery History - デバイスごとのバッテリー履歴（固定容量のリングバッファ）
+"""
+
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class BatteryHistoryBuffer:
+    """1デバイス分のバッテリー履歴を保持する固定容量のリングバッファ
+
+    - タイムスタンプはエポック秒 (array('d'))、残量は0〜100 (array('B'))
+    - 各サンプルを i と i + capacity の2か所に書き込むミラー方式のため、
+      最新capacity件は常に連続した領域になり、ゼロコピーのmemoryviewで参照できる
+    - 追加はO(1)、時刻による範囲検索は二分探索でO(log n)
+    """
+
+    def __init__(self, capacity: int = 100):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._timestamps = array("d", bytes(8 * 2 * capacity))
+        self._levels = array("B", bytes(2 * capacity))
+        self._start = 0  # 最も古いサンプルの位置
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, battery_level: int):
+        """サンプルを追加（容量を超えた場合は最も古いサンプルを上書き）"""
+        if self._count:
+            # 二分探索のため時刻の逆行（システム時刻の変更など）は直前の時刻に揃える
+            timestamp = max(timestamp, self._timestamps[self._start + self._count - 1])
+        level = max(0, min(100, int(battery_level)))
+
+        if self._count < self.capacity:
+            index = self._start + self._count
+            self._count += 1
+        else:
+            index = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        index %= self.capacity
+        self._timestamps[index] = timestamp
+        self._timestamps[index + self.capacity] = timestamp
+        self._levels[index] = level
+        self._levels[index + self.capacity] = level
+
+    def views(self) -> Tuple[memoryview, memoryview]:
+        """古い順の (タイムスタンプ, 残量) をゼロコピーのmemoryviewで取得
+
+        ビューはバッファを直接参照するため、以降の追加で内容が変わる
+        """
+        end = self._start + self._count
+        return (
+            memoryview(self._timestamps)[self._start : end],
+            memoryview(self._levels)[self._start : end],
+        )
+
+    def range(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Tuple[memoryview, memoryview]:
+        """start <= タイムスタンプ <= end のサンプルをゼロコピーで取得"""
+        timestamps, levels = self.views()
+        first = 0 if start is None else bisect_left(timestamps, start)
+        last = len(timestamps) if end is None else bisect_right(timestamps, end)
+        return timestamps[first:last], levels[first:last]
+
+    def latest(self) -> Optional[Tuple[float, int]]:
+        """最新のサンプルを取得"""
+        if not self._count:
+            return None
+        index = self._start + self._count - 1
+        return self._timestamps[index], self._levels[index]
+
+    def __iter__(self) -> Iterator[Tuple[float, int]]:
+        timestamps, levels = self.views()
+        return zip(timestamps.tolist(), levels.tolist())
+
+    def clear(self):
+        """履歴を消去"""
+        self._start = 0
+        self._count = 0
+
+    @property
+    def nbytes(self) -> int:
+        """バッファが確保しているメモリ量（バイト）"""
+        return self._timestamps.itemsize * len(
+            self._timestamps
+        ) + self._levels.itemsize * len(self._levels)
+
+
+class BatteryHistory:
+    """全デバイスのバッテリー履歴"""
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self._buffers: Dict[str, BatteryHistoryBuffer] = {}
+
+    def __contains__(self, device_address: str) -> bool:
+        return device_address in self._buffers
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def record(
+        self,
+        device_address: str,
+        battery_level: int,
+        timestamp: Optional[float] = None,
+    ):
+        """サンプルを記録（timestampを省略した場合は現在時刻）"""
+        buffer = self._buffers.get(device_address)
+        if buffer is None:
+            buffer = self._buffers[device_address] = BatteryHistoryBuffer(self.capacity)
+        buffer.append(time.time() if timestamp is None else timestamp, battery_level)
+
+    def get(self, device_address: str) -> Optional[BatteryHistoryBuffer]:
+        """指定デバイスのバッファを取得"""
+        return self._buffers.get(device_address)
+
+    def query(
+        self,
+        device_address: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Tuple[memoryview, memoryview]:
+        """指定デバイス・期間の (タイムスタンプ, 残量) をゼロコピーで取得"""
+        buffer = self._buffers.get(device_address)
+        if buffer is None:
+            return memoryview(array("d")), memoryview(array("B"))
+        return buffer.range(start, end)
+
+    def as_tuples(
+        self,
+        device_address: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> List[Tuple[datetime, int]]:
+        """指定デバイス・期間の履歴を (datetime, 残量) のリストで取得"""
+        timestamps, levels = self.query(device_address, start, end)
+        return [
+            (datetime.fromtimestamp(timestamp), level)
+            for timestamp, level in zip(timestamps.tolist(), levels.tolist())
+        ]
+
+    def remove(self, device_address: str):
+        """指定デバイスの履歴を削除"""
+        self._buffers.pop(device_address, None)
+
+    @property
+    def nbytes(self) -> int:
+        """全デバイスのバッファが確保しているメモリ量（バイト）"""
+        return sum(buffer.nbytes for buffer in self._buffers.values())
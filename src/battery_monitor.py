@@ -4,78 +4,338 @@ Battery Monitor - バッテリー監視機能
 
 import asyncio
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional
 from bluetooth_manager import BluetoothManager, BluetoothDevice
+from battery_history import BatteryHistory
+from history_store import HistoryStore
+from poll_scheduler import PollScheduler
+from battery_events import BatteryEvent, BatteryEventStream, BatteryEventTracker
+
+if TYPE_CHECKING:
+    from discharge_estimator import DischargeEstimator, RemainingEstimate
+
+
+class DeviceReadStats:
+    """デバイスごとのバッテリー読み取り統計"""
+
+    def __init__(self):
+        self.read_count = 0
+        self.failure_count = 0
+        self.timeout_count = 0
+        self.last_latency: Optional[float] = None  # 秒
+        self.average_latency: Optional[float] = None  # 秒（指数移動平均）
+        self.max_latency = 0.0  # 秒
+
+    def record(self, latency: float, success: bool, alpha: float = 0.3):
+        """読み取り結果を記録"""
+        self.read_count += 1
+        if not success:
+            self.failure_count += 1
+
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        if self.average_latency is None:
+            self.average_latency = latency
+        else:
+            self.average_latency += alpha * (latency - self.average_latency)
+
+    def record_timeout(self, latency: float):
+        """タイムアウトを記録"""
+        self.timeout_count += 1
+        self.record(latency, success=False)
+
+    def to_dict(self) -> Dict[str, Optional[float]]:
+        """統計情報を辞書で取得"""
+        return {
+            "read_count": self.read_count,
+            "failure_count": self.failure_count,
+            "timeout_count": self.timeout_count,
+            "last_latency": self.last_latency,
+            "average_latency": self.average_latency,
+            "max_latency": self.max_latency,
+        }
 
 
 class BatteryMonitor:
     """バッテリー監視クラス"""
 
-    def __init__(self, bluetooth_manager: BluetoothManager):
+    def __init__(
+        self,
+        bluetooth_manager: BluetoothManager,
+        max_concurrent_reads: int = 8,
+        read_timeout: float = 5.0,
+        history_capacity: int = 100,
+        history_store: Optional[HistoryStore] = None,
+        poll_scheduler: Optional[PollScheduler] = None,
+        scan_freshness: float = 60.0,
+    ):
         self.logger = logging.getLogger(__name__)
         self.bluetooth_manager = bluetooth_manager
-        self.battery_history: Dict[str, List[tuple]] = (
-            {}
-        )  # device_address: [(timestamp, battery_level)]
+        self.max_concurrent_reads = max(1, max_concurrent_reads)
+        self.read_timeout = read_timeout  # デバイスごとの読み取り期限（秒）
+        self.read_stats: Dict[str, DeviceReadStats] = {}
+        # デバイスごとに最新history_capacity件を保持
+        self.battery_history = BatteryHistory(history_capacity)
+        # 永続化先（書き込みはストアのバックグラウンドスレッドで行われる）
+        self.history_store = history_store
+        # 放電速度と残り使用時間の推定（numpyの読み込みを避けるため初回使用時に作成）
+        self._discharge_estimator: Optional["DischargeEstimator"] = None
+        self._estimator_lock = threading.Lock()
+        # デバイスごとの読み取り間隔（poll_due_devicesで期限が来たデバイスのみ読み取る）
+        self.poll_scheduler = (
+            poll_scheduler if poll_scheduler is not None else PollScheduler()
+        )
+        # 期限が来たデバイスの読み取りでは、全件列挙はscan_freshness秒ごとに留める
+        self.scan_freshness = scan_freshness
+        # 前回との差分から変化イベントを作り、リスナーと非同期イテレーターに配信する
+        self.event_tracker = BatteryEventTracker()
+        self._event_listeners: List[Callable[[List[BatteryEvent]], None]] = []
+        self._event_streams: List[BatteryEventStream] = []
         self.low_battery_threshold = 10  # 初期値10%
         self.notification_sent = set()  # 通知済みデバイスを追跡
 
-    async def update_battery_levels(self):
-        """全接続デバイスのバッテリーレベルを更新"""
+    @property
+    def discharge_estimator(self) -> "DischargeEstimator":
+        """放電速度と残り使用時間の推定（サンプルごとに逐次更新）"""
+        if self._discharge_estimator is None:
+            with self._estimator_lock:
+                if self._discharge_estimator is None:
+                    from discharge_estimator import DischargeEstimator
+
+                    self._discharge_estimator = DischargeEstimator()
+        return self._discharge_estimator
+
+    async def update_battery_levels(self, force: bool = False):
+        """全接続デバイスのバッテリーレベルを更新
+
+        force=Trueの場合、イベント購読中でもデバイスを全件列挙する（手動更新用）
+        """
         try:
             # デバイスをスキャンして更新
-            devices = await self.bluetooth_manager.scan_devices()
+            devices = await self.bluetooth_manager.scan_devices(force=force)
+            self.poll_scheduler.sync(device.address for device in devices)
+            updated_count = await self._refresh_devices(devices)
+            self.publish_changes(devices)
 
-            updated_count = 0
-            for device in devices:
-                try:
-                    # バッテリーレベルを取得・更新
-                    success = await self.bluetooth_manager.update_device_battery_info(
-                        device
-                    )
+            self.logger.info("バッテリー情報を更新したデバイス数: %d", updated_count)
+            return devices
 
-                    if success and device.battery_level is not None:
-                        # バッテリー履歴に記録
-                        self._record_battery_history(
-                            device.address, device.battery_level
-                        )
+        except Exception as e:
+            self.logger.error(f"バッテリーレベル更新エラー: {e}")
+            return []
 
-                        # 低バッテリー通知をチェック
-                        self._check_low_battery_notification(device)
+    async def poll_due_devices(self) -> Optional[List[BluetoothDevice]]:
+        """読み取り期限が来たデバイスのみバッテリーレベルを更新
 
-                        updated_count += 1
+        接続デバイスの一覧を返す（期限が来たデバイスがない場合はNone）
+        """
+        try:
+            # イベントを購読していない場合も、タイマーの間隔ごとに全件列挙はしない
+            devices = await self.bluetooth_manager.scan_devices(
+                max_age=self.scan_freshness
+            )
+            self.poll_scheduler.sync(device.address for device in devices)
 
-                except Exception as e:
-                    self.logger.error(
-                        f"デバイス {device.name} のバッテリー更新エラー: {e}"
-                    )
+            due = set(self.poll_scheduler.pop_due())
+            if not due:
+                return None
 
-            self.logger.info(f"バッテリー情報を更新したデバイス数: {updated_count}")
+            refreshed = [device for device in devices if device.address in due]
+            updated_count = await self._refresh_devices(refreshed)
+            self.publish_changes(devices, refreshed)
+            self.logger.debug(
+                "期限が来たデバイスを更新: %d/%d (接続デバイス数: %d)",
+                updated_count,
+                len(due),
+                len(devices),
+            )
             return devices
 
         except Exception as e:
             self.logger.error(f"バッテリーレベル更新エラー: {e}")
+            return None
+
+    async def _refresh_devices(self, devices: List[BluetoothDevice]) -> int:
+        """デバイスを並行して更新し、次回の読み取り期限を決める（更新できた数を返す）"""
+        # 同時読み取り数を制限しつつ全デバイスを並行して更新
+        # （タイムアウトしたデバイスは前回の値のまま、部分的な結果を返す）
+        semaphore = asyncio.Semaphore(self.max_concurrent_reads)
+        results = await asyncio.gather(
+            *(self._refresh_device_limited(device, semaphore) for device in devices)
+        )
+
+        # 今回のサンプルを全デバイス分まとめて推定に反映
+        self._update_remaining_estimates(devices)
+        for device, success in zip(devices, results):
+            self._schedule_next_read(device, success)
+
+        return sum(1 for success in results if success)
+
+    def _schedule_next_read(self, device: BluetoothDevice, success: bool):
+        """放電速度・残量・読み取り時間から次回の読み取り期限を決める"""
+        stats = self.read_stats.get(device.address)
+        estimate = device.time_remaining
+        rate_per_hour = None
+        if (
+            estimate is not None
+            and estimate.confidence >= self.poll_scheduler.min_confidence
+        ):
+            rate_per_hour = estimate.rate_per_hour
+        self.poll_scheduler.record_read(
+            device.address,
+            device.battery_level if success else None,
+            rate_per_hour=rate_per_hour,
+            charging=device.is_charging,
+            read_cost=stats.average_latency if stats is not None else None,
+            threshold=self.low_battery_threshold,
+        )
+
+    async def _refresh_device_limited(
+        self, device: BluetoothDevice, semaphore: asyncio.Semaphore
+    ) -> bool:
+        """同時実行数と期限を適用してデバイスを更新し、読み取り統計を記録"""
+        async with semaphore:
+            stats = self.read_stats.setdefault(device.address, DeviceReadStats())
+            start = time.perf_counter()
+            try:
+                success = await asyncio.wait_for(
+                    self.refresh_device(device, update_estimate=False),
+                    self.read_timeout,
+                )
+            except asyncio.TimeoutError:
+                stats.record_timeout(time.perf_counter() - start)
+                self.logger.warning(
+                    "デバイス %s のバッテリー読み取りがタイムアウトしました",
+                    device.name,
+                )
+                return False
+
+            stats.record(time.perf_counter() - start, success)
+            return success
+
+    def add_event_listener(self, listener: Callable[[List[BatteryEvent]], None]):
+        """変化イベントのリスナーを登録（イベントループのスレッドから呼ばれる）"""
+        self._event_listeners.append(listener)
+
+    def events(self, maxsize: int = 1000) -> BatteryEventStream:
+        """変化イベントを受け取る非同期イテレーターを作成（イベントループのスレッドで使う）"""
+        stream = BatteryEventStream(self._event_streams.remove, maxsize)
+        self._event_streams.append(stream)
+        return stream
+
+    def publish_changes(
+        self,
+        devices: List[BluetoothDevice],
+        refreshed: Optional[Iterable[BluetoothDevice]] = None,
+    ) -> List[BatteryEvent]:
+        """前回との差分イベントを作成して配信
+
+        refreshedを指定した場合、残量の変化はそのデバイスについてのみ調べる
+        """
+        try:
+            events = self.event_tracker.diff(
+                devices, self.low_battery_threshold, refreshed
+            )
+        except Exception as e:
+            self.logger.error(f"変化イベントの作成エラー: {e}")
             return []
+        if not events:
+            return events
 
-    def _record_battery_history(self, device_address: str, battery_level: int):
-        """バッテリー履歴を記録"""
+        for listener in list(self._event_listeners):
+            try:
+                listener(events)
+            except Exception as e:
+                self.logger.error(f"変化イベントリスナーエラー: {e}")
+        for stream in list(self._event_streams):
+            stream.publish(events)
+        return events
+
+    def get_read_stats(self, device_address: str) -> Optional[DeviceReadStats]:
+        """指定されたデバイスの読み取り統計を取得"""
+        return self.read_stats.get(device_address)
+
+    async def refresh_device(
+        self, device: BluetoothDevice, update_estimate: bool = True
+    ) -> bool:
+        """指定デバイスのバッテリーレベルのみを更新
+
+        update_estimate=Falseの場合、残り使用時間の推定は呼び出し側でまとめて更新する
+        """
         try:
-            if device_address not in self.battery_history:
-                self.battery_history[device_address] = []
+            # バッテリーレベルを取得・更新
+            success = await self.bluetooth_manager.update_device_battery_info(device)
 
-            timestamp = datetime.now()
-            self.battery_history[device_address].append((timestamp, battery_level))
+            if success and device.battery_level is not None:
+                # バッテリー履歴に記録
+                self._record_battery_history(
+                    device.address, device.battery_level, device.is_charging
+                )
+                if update_estimate:
+                    self._update_remaining_estimates([device])
+                    self._schedule_next_read(device, True)
+
+                # 低バッテリー通知をチェック
+                self._check_low_battery_notification(device)
 
-            # 履歴の上限を設定（最新の100件まで）
-            if len(self.battery_history[device_address]) > 100:
-                self.battery_history[device_address] = self.battery_history[
-                    device_address
-                ][-100:]
+                return True
 
+        except Exception as e:
+            self.logger.error(f"デバイス {device.name} のバッテリー更新エラー: {e}")
+
+        return False
+
+    def _record_battery_history(
+        self, device_address: str, battery_level: int, charging: bool = False
+    ):
+        """バッテリー履歴を記録"""
+        try:
+            timestamp = time.time()
+            self.battery_history.record(device_address, battery_level, timestamp)
+            self.discharge_estimator.observe(
+                device_address, timestamp, battery_level, charging
+            )
+            if self.history_store is not None:
+                self.history_store.record(device_address, battery_level, timestamp)
         except Exception as e:
             self.logger.error(f"バッテリー履歴記録エラー: {e}")
 
+    def restore_history(self):
+        """永続化された履歴から各デバイスの最新の履歴をメモリに読み込む"""
+        if self.history_store is None:
+            return
+
+        try:
+            for address in self.history_store.addresses():
+                for timestamp, battery_level in self.history_store.query(
+                    address, limit=self.battery_history.capacity
+                ):
+                    self.battery_history.record(address, battery_level, timestamp)
+                    self.discharge_estimator.observe(address, timestamp, battery_level)
+            self.logger.info(f"{len(self.battery_history)}台分の履歴を読み込みました")
+        except Exception as e:
+            self.logger.error(f"バッテリー履歴の読み込みエラー: {e}")
+
+    def _update_remaining_estimates(self, devices: List[BluetoothDevice]):
+        """保留中のサンプルを推定に反映し、各デバイスの残り使用時間を更新"""
+        try:
+            self.discharge_estimator.update()
+            for device in devices:
+                device.time_remaining = self.discharge_estimator.estimate_remaining(
+                    device.address
+                )
+        except Exception as e:
+            self.logger.error(f"残り使用時間の推定エラー: {e}")
+
+    def estimate_remaining(self, device_address: str) -> Optional["RemainingEstimate"]:
+        """指定デバイスの残り使用時間（時間）と信頼度を推定"""
+        if self._discharge_estimator is None:
+            # サンプルをまだ1件も記録していない
+            return None
+        return self._discharge_estimator.estimate_remaining(device_address)
+
     def _check_low_battery_notification(self, device: BluetoothDevice):
         """低バッテリー通知をチェック"""
         try:
@@ -86,7 +346,7 @@ class BatteryMonitor:
             ):
 
                 self.logger.warning(
-                    f"低バッテリー警告: {device.name} - {device.battery_level}%"
+                    "低バッテリー警告: %s - %s%%", device.name, device.battery_level
                 )
                 self.notification_sent.add(device.address)
 
@@ -103,9 +363,22 @@ class BatteryMonitor:
         except Exception as e:
             self.logger.error(f"低バッテリー通知チェックエラー: {e}")
 
-    def get_device_battery_history(self, device_address: str) -> List[tuple]:
-        """指定されたデバイスのバッテリー履歴を取得"""
-        return self.battery_history.get(device_address, [])
+    def get_device_battery_history(
+        self,
+        device_address: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        zero_copy: bool = False,
+    ):
+        """指定されたデバイスのバッテリー履歴を取得
+
+        既定では [(datetime, battery_level)] のリストを返す。
+        zero_copy=Trueの場合は (エポック秒, 残量) のmemoryviewの組を複製せずに返す。
+        start・endはエポック秒で期間を指定する
+        """
+        if zero_copy:
+            return self.battery_history.query(device_address, start, end)
+        return self.battery_history.as_tuples(device_address, start, end)
 
     def set_low_battery_threshold(self, threshold: int):
         """低バッテリー閾値を設定"""
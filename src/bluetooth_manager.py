@@ -2,13 +2,12 @@
 Bluetooth Manager - Bluetoothデバイスの管理
 """
 
-import asyncio
 import logging
-import subprocess
-import json
-import re
-from typing import List, Dict, Optional
+import threading
+import time
+from typing import Callable, List, Dict, Optional
 from datetime import datetime
+from device_events import DeviceEvent
 
 
 class BluetoothDevice:
@@ -20,187 +19,165 @@ class BluetoothDevice:
         self.device_type = device_type
         self.battery_level: Optional[int] = None
         self.is_connected = False
+        self.is_charging = False
         self.last_updated: Optional[datetime] = None
+        # 残り使用時間の推定値（RemainingEstimate、推定できない場合はNone）
+        self.time_remaining = None
+        # 前回起動時に保存した値で、まだスキャンで確認していない
+        self.is_stale = False
 
 
 class BluetoothManager:
     """Bluetoothデバイスの管理クラス"""
 
-    def __init__(self):
+    def __init__(self, backend=None, reconcile_interval: float = 600.0):
         self.logger = logging.getLogger(__name__)
         self.connected_devices: Dict[str, BluetoothDevice] = {}
 
-    async def scan_devices(self) -> List[BluetoothDevice]:
-        """接続されているBluetoothデバイスをスキャン"""
+        # デバイスの列挙・バッテリー読み取り・イベント購読はバックエンドに委譲
+        if backend is None:
+            from backends.powershell import PowerShellBackend
+
+            backend = PowerShellBackend()
+        self.backend = backend
+
+        # イベント購読中は、全件列挙は安全策の定期再照合のみ行う
+        self.reconcile_interval = reconcile_interval
+        self._last_reconcile: Optional[float] = None
+        self._devices_lock = threading.Lock()
+        self._device_listeners: List[
+            Callable[[DeviceEvent, Optional[BluetoothDevice]], None]
+        ] = []
+        self._scan_listeners: List[Callable[[BluetoothDevice], None]] = []
+
+    async def scan_devices(
+        self, force: bool = False, max_age: Optional[float] = None
+    ) -> List[BluetoothDevice]:
+        """接続されているBluetoothデバイスをスキャン
+
+        イベント監視中は、再照合の期限が来るかforce=Trueの場合のみ全件列挙する
+        max_ageを指定した場合、前回の全件列挙からmax_age秒以内なら列挙しない
+        """
+        if not force and not self._is_reconcile_due(max_age):
+            return list(self.get_connected_devices().values())
+
         devices = []
         try:
-            # PowerShellを使用してBluetoothデバイスを取得
-            devices = self._get_powershell_bluetooth_devices()
+            # バックエンドからBluetoothデバイスを見つかった順に取得し、途中経過を通知
+            async for device in self.backend.stream_devices():
+                devices.append(device)
+                if device.is_connected:
+                    self._notify_scan_listeners(device)
 
             # 接続されているデバイスのみフィルタ
             connected_devices = [device for device in devices if device.is_connected]
 
-            self.logger.info(f"発見されたBluetoothデバイス数: {len(devices)}")
+            # 定期スキャンごとに出るため、書式化は出力時まで遅らせる
+            self.logger.info("発見されたBluetoothデバイス数: %d", len(devices))
             self.logger.info(
-                f"接続されているBluetoothデバイス数: {len(connected_devices)}"
+                "接続されているBluetoothデバイス数: %d", len(connected_devices)
             )
 
-            return connected_devices
+            self._reconcile(connected_devices)
+            return list(self.get_connected_devices().values())
 
         except Exception as e:
             self.logger.error(f"デバイススキャンエラー: {e}")
             return []
 
-    def _get_powershell_bluetooth_devices(self) -> List[BluetoothDevice]:
-        """PowerShellを使用してBluetoothデバイスを取得"""
-        devices = []
-        try:
-            # シンプルなBluetoothデバイス一覧取得
-            cmd = """
-            Get-PnpDevice | Where-Object {
-                ($_.Status -eq "OK") -and (
-                    $_.FriendlyName -like "*AirPods*" -or
-                    $_.FriendlyName -like "*Headphone*" -or
-                    $_.FriendlyName -like "*Headset*" -or
-                    $_.FriendlyName -like "*Mouse*" -or
-                    $_.FriendlyName -like "*Keyboard*" -or
-                    $_.FriendlyName -like "*Earphone*" -or
-                    $_.FriendlyName -like "*Bluetooth HID*" -or
-                    ($_.FriendlyName -like "*Bluetooth*" -and $_.FriendlyName -notlike "*Adapter*" -and $_.FriendlyName -notlike "*Enumerator*" -and $_.FriendlyName -notlike "*汎用*")
-                )
-            } | Select-Object FriendlyName, Status, InstanceId | ConvertTo-Json
-            """
-
-            result = subprocess.run(
-                ["powershell", "-Command", cmd],
-                capture_output=True,
-                text=True,
-                timeout=15,
-            )
-
-            if result.returncode == 0 and result.stdout.strip():
-                try:
-                    device_data = json.loads(result.stdout)
-                    if not isinstance(device_data, list):
-                        device_data = [device_data]
-
-                    for device in device_data:
-                        name = device.get("FriendlyName", "Unknown Device")
-                        status = device.get("Status", "Unknown")
-                        instance_id = device.get("InstanceId", "")
-
-                        # デバイス名をクリーンアップ
-                        clean_name = self._clean_device_name(name)
-
-                        # アドレスを抽出（簡易版）
-                        address = self._extract_address_from_instance_id(instance_id)
+    def _is_reconcile_due(self, max_age: Optional[float] = None) -> bool:
+        """全件列挙による再照合が必要かどうか"""
+        if self._last_reconcile is None:
+            return True
+        age = time.monotonic() - self._last_reconcile
+        if max_age is not None and age < max_age:
+            return False
+        if not self.backend.is_subscribed:
+            return True
+        return age >= self.reconcile_interval
+
+    def _reconcile(self, devices: List[BluetoothDevice]):
+        """全件列挙の結果で接続デバイス一覧を置き換える（既存デバイスの情報は引き継ぐ）"""
+        with self._devices_lock:
+            reconciled = {}
+            for device in devices:
+                existing = self.connected_devices.get(device.address)
+                if existing is not None:
+                    existing.name = device.name
+                    existing.device_type = device.device_type
+                    existing.is_connected = device.is_connected
+                    device = existing
+                reconciled[device.address] = device
+            self.connected_devices = reconciled
+            self._last_reconcile = time.monotonic()
+
+    def get_connected_devices(self) -> Dict[str, BluetoothDevice]:
+        """現在把握している接続デバイスを取得"""
+        with self._devices_lock:
+            return self.connected_devices.copy()
+
+    def start_event_monitoring(self):
+        """デバイスイベントの監視を開始（バックエンドが対応している場合）"""
+        if self.backend.subscribe(self.handle_device_event):
+            self.logger.info("デバイスイベントの監視を開始しました")
+
+    def stop_event_monitoring(self):
+        """デバイスイベントの監視を停止"""
+        self.backend.unsubscribe()
+
+    def add_device_listener(
+        self, listener: Callable[[DeviceEvent, Optional[BluetoothDevice]], None]
+    ):
+        """デバイスイベント反映後に呼ばれるリスナーを登録"""
+        self._device_listeners.append(listener)
+
+    def add_scan_listener(self, listener: Callable[[BluetoothDevice], None]):
+        """全件列挙の途中で接続デバイスが見つかるたびに呼ばれるリスナーを登録
+
+        列挙の完了時に接続していないと分かったデバイスが含まれることがある
+        """
+        self._scan_listeners.append(listener)
+
+    def _notify_scan_listeners(self, device: BluetoothDevice):
+        for listener in list(self._scan_listeners):
+            try:
+                listener(device)
+            except Exception as e:
+                self.logger.error(f"スキャンリスナーエラー: {e}")
+
+    def handle_device_event(self, event: DeviceEvent):
+        """デバイスイベントを接続デバイス一覧に反映（イベントソースのスレッドから呼ばれる）"""
+        device = event.device
+        if device is None:
+            self.logger.debug("デバイス情報のないイベントを無視: %s", event)
+            return
+
+        with self._devices_lock:
+            existing = self.connected_devices.get(device.address)
+            if event.kind == DeviceEvent.REMOVED or not device.is_connected:
+                self.connected_devices.pop(device.address, None)
+                device = None
+            elif existing is not None:
+                # バッテリー情報は引き継ぎ、名前などのみ更新
+                existing.name = device.name
+                existing.device_type = device.device_type
+                existing.is_connected = True
+                device = existing
+            else:
+                self.connected_devices[device.address] = device
 
-                        bt_device = BluetoothDevice(
-                            name=clean_name,
-                            address=address,
-                            device_type=self._determine_device_type(clean_name),
-                        )
-                        bt_device.is_connected = status == "OK"
-                        devices.append(bt_device)
+        self.logger.debug("デバイスイベントを反映: %s", event)
 
-                except json.JSONDecodeError as e:
-                    self.logger.warning(f"PowerShellからのJSON解析に失敗: {e}")
-                    self.logger.debug(f"生の出力: {result.stdout}")
-
-        except Exception as e:
-            self.logger.error(f"PowerShell Bluetoothデバイス取得エラー: {e}")
-
-        return devices
-
-    def _clean_device_name(self, name: str) -> str:
-        """デバイス名をクリーンアップ"""
-        # 不要な文字列を削除
-        name = re.sub(
-            r" - Find My.*$", "", name
-        )  # AirPods Max (Green) - Find My -> AirPods Max (Green)
-        name = re.sub(r"^Bluetooth HID デバイス$", "Bluetoothマウス・キーボード", name)
-        name = re.sub(
-            r"^Bluetooth 低エネルギー GATT 対応 HID デバイス$",
-            "Bluetooth HIDデバイス",
-            name,
-        )
-        return name.strip()
-
-    def _extract_address_from_instance_id(self, instance_id: str) -> str:
-        """インスタンスIDからMACアドレスを抽出（簡易版）"""
-        try:
-            # MACアドレスっぽいパターンを探す
-            mac_patterns = [
-                r"([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})",  # XX:XX:XX:XX:XX:XX
-                r"([0-9A-Fa-f]{12})",  # XXXXXXXXXXXX
-                r"DEV_([0-9A-Fa-f]{12})",  # DEV_XXXXXXXXXXXX
-                r"([0-9A-Fa-f]{6})([0-9A-Fa-f]{6})",  # XXXXXXYYYYYY
-            ]
-
-            for pattern in mac_patterns:
-                match = re.search(pattern, instance_id)
-                if match:
-                    if len(match.groups()) == 2 and len(match.group(0)) >= 12:
-                        # 連続する12桁の16進数を見つけた場合
-                        mac = match.group(0).replace("-", "").replace(":", "")
-                        if len(mac) == 12:
-                            return ":".join([mac[i : i + 2] for i in range(0, 12, 2)])
-                    elif len(match.group(0)) == 17:  # XX:XX:XX:XX:XX:XX format
-                        return match.group(0)
-
-            # 見つからない場合は、インスタンスIDの最後の部分を使用
-            parts = instance_id.split("\\")
-            if len(parts) > 0:
-                return f"ID_{hash(parts[-1]) % 10000:04d}"
-
-        except Exception as e:
-            self.logger.debug(f"アドレス抽出エラー: {e}")
-
-        return "Unknown"
-
-    def _determine_device_type(self, name: str) -> str:
-        """デバイス名からデバイスタイプを判定"""
-        name_lower = name.lower()
-
-        if any(
-            keyword in name_lower
-            for keyword in ["airpods", "headphone", "headset", "earphone", "buds"]
-        ):
-            return "ヘッドホン・イヤホン"
-        elif any(keyword in name_lower for keyword in ["mouse", "マウス"]):
-            return "マウス"
-        elif any(keyword in name_lower for keyword in ["keyboard", "キーボード"]):
-            return "キーボード"
-        elif any(
-            keyword in name_lower
-            for keyword in ["controller", "gamepad", "コントローラー"]
-        ):
-            return "ゲームコントローラー"
-        elif "hid" in name_lower:
-            return "HIDデバイス"
-        else:
-            return "Bluetoothデバイス"
+        for listener in list(self._device_listeners):
+            try:
+                listener(event, device)
+            except Exception as e:
+                self.logger.error(f"デバイスイベントリスナーエラー: {e}")
 
     async def get_battery_level(self, device: BluetoothDevice) -> Optional[int]:
         """デバイスのバッテリー残量を取得"""
         try:
-            # 現在は模擬データを返す（将来的に実装予定）
-            if device.name and "airpods" in device.name.lower():
-                # AirPodsの場合、模擬的なバッテリーレベル
-                import random
-
-                return random.randint(20, 95)
-            elif device.device_type in ["マウス", "キーボード"]:
-                # マウス・キーボードの場合
-                import random
-
-                return random.randint(40, 100)
-            else:
-                # その他のデバイス
-                import random
-
-                return random.randint(10, 85)
-
+            return await self.backend.read_battery_level(device)
         except Exception as e:
             self.logger.error(f"バッテリー残量取得エラー for {device.name}: {e}")
             return None
@@ -217,3 +194,12 @@ class BluetoothManager:
             self.logger.error(f"バッテリー情報更新エラー for {device.name}: {e}")
 
         return False
+
+    async def aclose(self):
+        """バックエンドがイベントループ上で保持している接続を解放"""
+        await self.backend.aclose()
+
+    def close(self):
+        """イベント監視を停止してバックエンドを終了"""
+        self.stop_event_monitoring()
+        self.backend.close()
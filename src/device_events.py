@@ -0,0 +1,250 @@
+"""
+Device Events - デバイスの接続・切断イベントソース
+"""
+
+import json
+import logging
+import subprocess
+import threading
+from datetime import datetime
+from typing import Callable, List, Optional
+
+
+class DeviceEvent:
+    """デバイスの追加・削除・変更イベント"""
+
+    ADDED = "added"
+    REMOVED = "removed"
+    CHANGED = "changed"
+
+    def __init__(
+        self,
+        kind: str,
+        instance_id: str,
+        name: Optional[str] = None,
+        status: Optional[str] = None,
+        device=None,
+    ):
+        self.kind = kind
+        self.instance_id = instance_id
+        self.name = name
+        self.status = status
+        # バックエンドが解析したBluetoothDevice（未解析の場合はNone）
+        self.device = device
+        self.timestamp = datetime.now()
+
+    @classmethod
+    def from_record(cls, record: dict) -> "DeviceEvent":
+        """PowerShellから受け取ったレコードからイベントを作成"""
+        kind = record.get("kind", cls.CHANGED)
+        if kind not in (cls.ADDED, cls.REMOVED, cls.CHANGED):
+            kind = cls.CHANGED
+        return cls(
+            kind=kind,
+            instance_id=record.get("InstanceId", ""),
+            name=record.get("FriendlyName"),
+            status=record.get("Status"),
+        )
+
+    def __repr__(self) -> str:
+        return f"DeviceEvent({self.kind}, {self.instance_id!r}, {self.name!r})"
+
+
+DeviceEventCallback = Callable[[DeviceEvent], None]
+
+
+class DeviceEventSource:
+    """デバイスイベントソースの基底クラス"""
+
+    def start(self, callback: DeviceEventCallback):
+        """イベントの配信を開始"""
+        raise NotImplementedError
+
+    def stop(self):
+        """イベントの配信を停止"""
+        raise NotImplementedError
+
+    @property
+    def is_running(self) -> bool:
+        """イベントを配信中かどうか"""
+        raise NotImplementedError
+
+
+class FakeDeviceEventSource(DeviceEventSource):
+    """テスト用のプロセス内イベントソース（emitで任意のイベントを配信）"""
+
+    def __init__(self):
+        self._callback: Optional[DeviceEventCallback] = None
+
+    def start(self, callback: DeviceEventCallback):
+        self._callback = callback
+
+    def stop(self):
+        self._callback = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._callback is not None
+
+    def emit(self, event: DeviceEvent):
+        """イベントを配信"""
+        if self._callback is not None:
+            self._callback(event)
+
+
+# WMIのデバイス変更イベントを購読し、Bluetoothデバイスの差分を1行1イベントのJSONで出力する
+#
+# __InstanceOperationEvent（WITHIN句）はWMIがWin32_PnPEntity全体を定期的に
+# ポーリングして差分を作るため、アプリの実行中はその間隔でCPUを使い続ける。
+# Win32_DeviceChangeEventはデバイスの追加・削除時にOSから通知される外部イベントで
+# ポーリングを伴わないため、通知を受けたときだけBluetoothデバイスを問い合わせ、
+# 前回の状態との差分（追加・削除・状態の変化）を出力する。
+# 1回の接続で通知がまとめて届くため、少し待ってから溜まった通知を捨てて1回だけ問い合わせる。
+EVENT_WATCHER_SCRIPT = r"""
+[Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+function Get-BluetoothEntities {
+    $entities = @{}
+    Get-CimInstance -ClassName Win32_PnPEntity -Filter "PNPDeviceID LIKE 'BTH%'" | ForEach-Object {
+        $entities[$_.PNPDeviceID] = $_
+    }
+    return $entities
+}
+function Write-DeviceEvent($kind, $entity) {
+    $payload = @{
+        kind = $kind
+        InstanceId = $entity.PNPDeviceID
+        FriendlyName = $entity.Name
+        Status = $entity.Status
+    }
+    [Console]::Out.WriteLine(($payload | ConvertTo-Json -Compress))
+    [Console]::Out.Flush()
+}
+$known = Get-BluetoothEntities
+Register-CimIndicationEvent -ClassName Win32_DeviceChangeEvent -SourceIdentifier ConnectedDeviceChange | Out-Null
+try {
+    while ($true) {
+        Wait-Event -SourceIdentifier ConnectedDeviceChange | Out-Null
+        Start-Sleep -Milliseconds 500
+        Get-Event -SourceIdentifier ConnectedDeviceChange -ErrorAction SilentlyContinue | Remove-Event
+        $current = Get-BluetoothEntities
+        foreach ($id in $current.Keys) {
+            if (-not $known.ContainsKey($id)) {
+                Write-DeviceEvent 'added' $current[$id]
+            } elseif ($known[$id].Status -ne $current[$id].Status -or $known[$id].Name -ne $current[$id].Name) {
+                Write-DeviceEvent 'changed' $current[$id]
+            }
+        }
+        foreach ($id in $known.Keys) {
+            if (-not $current.ContainsKey($id)) {
+                Write-DeviceEvent 'removed' $known[$id]
+            }
+        }
+        $known = $current
+    }
+} finally {
+    Unregister-Event -SourceIdentifier ConnectedDeviceChange
+}
+"""
+
+DEFAULT_WATCHER_COMMAND = [
+    "powershell",
+    "-NoLogo",
+    "-NoProfile",
+    "-NonInteractive",
+    "-ExecutionPolicy",
+    "Bypass",
+    "-Command",
+    EVENT_WATCHER_SCRIPT,
+]
+
+
+class PowerShellDeviceEventSource(DeviceEventSource):
+    """PowerShell/WMIのイベント購読でデバイスの接続・切断を検出するイベントソース"""
+
+    def __init__(
+        self,
+        watcher_command: Optional[List[str]] = None,
+        restart_delay: float = 5.0,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.watcher_command = watcher_command or DEFAULT_WATCHER_COMMAND
+        self.restart_delay = restart_delay
+        self.restart_count = 0
+
+        self._callback: Optional[DeviceEventCallback] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, callback: DeviceEventCallback):
+        if self.is_running:
+            return
+
+        self._callback = callback
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name="DeviceEventWatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.kill()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _watch(self):
+        """監視プロセスを実行し、終了した場合は再起動する"""
+        while not self._stopping.is_set():
+            try:
+                self._process = subprocess.Popen(
+                    self.watcher_command,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                    encoding="utf-8",
+                    errors="replace",
+                    bufsize=1,
+                )
+                self.logger.info(
+                    f"デバイスイベント監視を開始しました (pid: {self._process.pid})"
+                )
+
+                for line in self._process.stdout:
+                    self._dispatch_line(line)
+
+                self._process.wait()
+            except Exception as e:
+                self.logger.error(f"デバイスイベント監視エラー: {e}")
+
+            if self._stopping.wait(self.restart_delay):
+                break
+
+            self.restart_count += 1
+            self.logger.warning("デバイスイベント監視プロセスを再起動します")
+
+    def _dispatch_line(self, line: str):
+        """1行分のJSONをイベントとして配信"""
+        line = line.strip()
+        if not line:
+            return
+
+        try:
+            event = DeviceEvent.from_record(json.loads(line))
+        except (json.JSONDecodeError, AttributeError) as e:
+            self.logger.debug("デバイスイベントの解析に失敗: %s", e)
+            return
+
+        if self._callback is not None:
+            try:
+                self._callback(event)
+            except Exception as e:
+                self.logger.error(f"デバイスイベント処理エラー: {e}")
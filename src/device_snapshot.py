@@ -0,0 +1,153 @@
+"""
+Device Snapshot - 前回起動時に接続していたデバイスの保存と読み込み
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from bluetooth_manager import BluetoothDevice
+
+FORMAT_VERSION = 1
+
+# (アドレス, 名前, 種類, 残量, 充電中, 最終更新のエポック秒)
+Row = Tuple[str, str, str, Optional[int], bool, Optional[float]]
+
+
+def _to_row(device: BluetoothDevice) -> Row:
+    last_updated = device.last_updated
+    return (
+        device.address,
+        device.name,
+        device.device_type,
+        device.battery_level,
+        bool(device.is_charging),
+        last_updated.timestamp() if last_updated is not None else None,
+    )
+
+
+def _from_row(row) -> BluetoothDevice:
+    address, name, device_type, battery_level, is_charging, last_updated = row
+    device = BluetoothDevice(name, address, device_type)
+    device.battery_level = battery_level
+    device.is_charging = is_charging
+    device.is_connected = True
+    device.is_stale = True
+    if last_updated is not None:
+        device.last_updated = datetime.fromtimestamp(last_updated)
+    return device
+
+
+class DeviceSnapshotStore:
+    """接続デバイスの最新の一覧をJSONファイルに保存し、次回の起動時に読み込むクラス
+
+    updateは一覧を複製して書き込みを予約するだけで、ファイルへの書き込みは
+    save_delay秒のあいだ変化がなければタイマーのスレッドで1回行う。
+    読み込んだデバイスはis_stale=Trueで、実際のスキャン結果で置き換えるまでの表示に使う
+    """
+
+    def __init__(self, path: str, save_delay: float = 2.0):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        self._rows: List[Row] = []
+        self._saved_rows: Optional[List[Row]] = (
+            None  # 最後に書き込んだ（読み込んだ）内容
+        )
+        self._timer: Optional[threading.Timer] = None
+
+        # 統計情報
+        self.write_count = 0
+        self.load_time: Optional[float] = None  # 秒
+
+    def load(self) -> List[BluetoothDevice]:
+        """保存されたデバイス一覧を読み込む（ファイルがない・壊れている場合は空）"""
+        start = time.perf_counter()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != FORMAT_VERSION:
+                return []
+            devices = [_from_row(row) for row in data.get("devices", [])]
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            self.logger.warning(f"前回のデバイス一覧を読み込めませんでした: {e}")
+            return []
+
+        with self._lock:
+            self._rows = [_to_row(device) for device in devices]
+            self._saved_rows = list(self._rows)
+        self.load_time = time.perf_counter() - start
+        self.logger.info(
+            f"前回のデバイス一覧を読み込みました: {len(devices)}台 "
+            f"({self.load_time * 1000:.1f} ms)"
+        )
+        return devices
+
+    def update(self, devices: Iterable[BluetoothDevice]):
+        """現在のデバイス一覧を記録し、内容が変わっていれば書き込みを予約"""
+        rows = [_to_row(device) for device in devices]
+        with self._lock:
+            self._rows = rows
+            if rows == self._saved_rows:
+                self._cancel_timer()
+                return
+            if self.save_delay <= 0:
+                self._save()
+                return
+            # 変化のたびに書き込みを先送りし、落ち着いてから1回だけ書き込む
+            self._cancel_timer()
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> bool:
+        """予約中の書き込みがあれば直ちに書き込む（書き込んだ場合True）"""
+        with self._lock:
+            self._cancel_timer()
+            if self._rows == self._saved_rows:
+                return False
+            return self._save()
+
+    def close(self):
+        """予約中の書き込みを済ませる"""
+        self.flush()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _save(self) -> bool:
+        """一時ファイルに書き込んでから置き換える（書き込み中に終了しても壊れない）"""
+        data = {
+            "version": FORMAT_VERSION,
+            "saved_at": time.time(),
+            "devices": self._rows,
+        }
+        temp_path = None
+        try:
+            directory = os.path.dirname(self.path) or "."
+            prefix = os.path.basename(self.path) + "."
+            fd, temp_path = tempfile.mkstemp(
+                prefix=prefix, suffix=".tmp", dir=directory
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+            temp_path = None
+            self._saved_rows = list(self._rows)
+            self.write_count += 1
+            return True
+        except Exception as e:
+            self.logger.error(f"デバイス一覧の保存エラー: {e}")
+            return False
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
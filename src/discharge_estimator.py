@@ -0,0 +1,228 @@
+"""
+Discharge Estimator - 放電速度と残り使用時間の推定
+"""
+
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class RemainingEstimate:
+    """残り使用時間の推定値"""
+
+    def __init__(self, hours: float, rate_per_hour: float, confidence: float):
+        self.hours = hours  # 残り使用時間（時間）
+        self.rate_per_hour = rate_per_hour  # 放電速度（%/時間）
+        self.confidence = confidence  # 信頼度（0.0〜1.0）
+
+    def __repr__(self) -> str:
+        return (
+            f"RemainingEstimate(hours={self.hours:.2f}, "
+            f"rate_per_hour={self.rate_per_hour:.2f}, confidence={self.confidence:.2f})"
+        )
+
+
+class DischargeEstimator:
+    """全デバイスの放電速度を指数重み付き最小二乗法で推定するクラス
+
+    - 残量と時刻の重み付き和をEWMAと同じ形で減衰させながら逐次更新し、
+      そこから回帰直線の傾きを放電速度として求める（履歴を再計算しない）
+    - observeで受け取ったサンプルは保留され、updateで全デバイス分を
+      NumPyで一括して反映する
+    - 充電中・rise_threshold%を超える残量の増加・長時間の未観測の後は推定をやり直す
+      （報告される残量の1〜2%の揺れでは履歴を捨てない）
+    - 信頼度は観測期間の長さと傾きの標準誤差から求める
+    """
+
+    # デバイスごとの状態配列と初期値
+    STATE_FIELDS = (
+        ("_last_ts", np.nan),  # 直前のサンプルの時刻
+        ("_last_level", np.nan),  # 直前のサンプルの残量
+        ("_first_ts", np.nan),  # 推定を開始した時刻
+        ("_count", 0.0),  # 反映したサンプル数
+        # 減衰させた重み付き和（時刻は推定開始からの経過時間[時間]）
+        ("_w", 0.0),
+        ("_w2", 0.0),
+        ("_t", 0.0),
+        ("_l", 0.0),
+        ("_tt", 0.0),
+        ("_tl", 0.0),
+        ("_ll", 0.0),
+    )
+
+    def __init__(
+        self,
+        time_constant: float = 7200.0,
+        min_samples: int = 3,
+        min_rate: float = 0.05,
+        max_gap: float = 6 * 3600.0,
+        rise_threshold: float = 3.0,
+        initial_capacity: int = 16,
+    ):
+        self.time_constant = time_constant  # 秒（重みが1/eになるまでの時間）
+        self.min_samples = min_samples
+        self.min_rate = min_rate  # %/時間（これ未満は放電していないとみなす）
+        self.max_gap = max_gap  # 秒（これ以上間隔が空いた場合は推定をやり直す）
+        # %（これを超えて増えた場合は充電とみなす）
+        self.rise_threshold = rise_threshold
+
+        self._slots: Dict[str, int] = {}
+        self._allocate(initial_capacity)
+        self._pending: List[tuple] = []  # (slot, timestamp, level, charging)
+        self._lock = threading.Lock()
+
+    def _allocate(self, capacity: int):
+        """状態配列を確保（既存の値は引き継ぐ）"""
+        for name, fill in self.STATE_FIELDS:
+            array = np.full(capacity, fill, dtype=np.float64)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[: len(old)] = old
+            setattr(self, name, array)
+
+    def observe(
+        self,
+        device_address: str,
+        timestamp: float,
+        battery_level: int,
+        charging: bool = False,
+    ):
+        """サンプルを追加（updateまで推定には反映されない）"""
+        with self._lock:
+            slot = self._slots.get(device_address)
+            if slot is None:
+                slot = len(self._slots)
+                if slot >= len(self._last_ts):
+                    self._allocate(len(self._last_ts) * 2)
+                self._slots[device_address] = slot
+            self._pending.append((slot, timestamp, battery_level, charging))
+
+    def update(self) -> int:
+        """保留中のサンプルを全デバイス分まとめて反映し、反映した件数を返す"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+
+            data = np.array(pending, dtype=np.float64)
+            # 同じデバイスのサンプルが複数ある場合は時刻順に1件ずつ段階的に反映する
+            order = np.lexsort((data[:, 1], data[:, 0]))
+            data = data[order]
+            _, first_index = np.unique(data[:, 0], return_index=True)
+            rank = np.arange(len(data)) - np.repeat(
+                first_index, np.diff(np.append(first_index, len(data)))
+            )
+            for step in range(int(rank.max()) + 1):
+                self._apply(data[rank == step])
+            return len(data)
+
+    def _apply(self, data: np.ndarray):
+        """デバイスごとに1件ずつのサンプルを一括反映"""
+        slots = data[:, 0].astype(np.intp)
+        ts = data[:, 1]
+        level = data[:, 2]
+        charging = data[:, 3] > 0
+
+        dt = ts - self._last_ts[slots]
+        first = np.isnan(dt)
+        rising = level - self._last_level[slots] > self.rise_threshold
+        # 初回・充電中・大きな残量の増加・長時間の未観測は推定をやり直す
+        reset = first | charging | rising | (dt > self.max_gap)
+        # 時刻が同じか戻ったサンプルは使わない
+        use = reset | (dt > 0)
+        slots, ts, level, dt, reset = (
+            slots[use],
+            ts[use],
+            level[use],
+            dt[use],
+            reset[use],
+        )
+
+        self._first_ts[slots] = np.where(reset, ts, self._first_ts[slots])
+        # 経過時間に応じて過去のサンプルの重みを減衰させる
+        decay = np.zeros_like(dt)
+        decay[~reset] = np.exp(-dt[~reset] / self.time_constant)
+        t = (ts - self._first_ts[slots]) / 3600.0
+
+        self._w[slots] = self._w[slots] * decay + 1.0
+        self._w2[slots] = self._w2[slots] * decay * decay + 1.0
+        self._t[slots] = self._t[slots] * decay + t
+        self._l[slots] = self._l[slots] * decay + level
+        self._tt[slots] = self._tt[slots] * decay + t * t
+        self._tl[slots] = self._tl[slots] * decay + t * level
+        self._ll[slots] = self._ll[slots] * decay + level * level
+        self._count[slots] = np.where(reset, 1.0, self._count[slots] + 1.0)
+        self._last_ts[slots] = ts
+        self._last_level[slots] = level
+
+    def _compute(self, slots: np.ndarray):
+        """指定スロットの (残り時間, 放電速度, 信頼度, 推定できたか) を一括計算"""
+        w = self._w[slots]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_t = self._t[slots] / w
+            mean_l = self._l[slots] / w
+            var_t = self._tt[slots] / w - mean_t * mean_t
+            cov = self._tl[slots] / w - mean_t * mean_l
+            var_l = self._ll[slots] / w - mean_l * mean_l
+
+            slope = cov / var_t
+            rate = -slope
+            # 最新時刻における回帰直線上の残量から残り時間を求める
+            elapsed = (self._last_ts[slots] - self._first_ts[slots]) / 3600.0
+            level = np.clip(mean_l + slope * (elapsed - mean_t), 0.0, 100.0)
+            hours = level / rate
+
+            # 傾きの標準誤差（有効サンプル数は重みの偏りから求める）
+            residual = np.maximum(var_l - slope * cov, 0.0)
+            effective = w * w / self._w2[slots]
+            standard_error = np.sqrt(
+                residual / (var_t * np.maximum(effective - 2.0, 1.0))
+            )
+            # 観測期間が時定数に比べて短いほど、標準誤差が大きいほど信頼度を下げる
+            warmup = 1.0 - np.exp(-elapsed * 3600.0 / self.time_constant)
+            confidence = warmup / (1.0 + (standard_error / rate) ** 2)
+
+        valid = (
+            (self._count[slots] >= self.min_samples)
+            & (var_t > 0)
+            & (rate >= self.min_rate)
+        )
+        return hours, rate, confidence, valid
+
+    def estimate_remaining(self, device_address: str) -> Optional[RemainingEstimate]:
+        """指定デバイスの残り使用時間を推定（推定できない場合はNone）"""
+        self.update()
+        with self._lock:
+            slot = self._slots.get(device_address)
+            if slot is None:
+                return None
+            hours, rate, confidence, valid = self._compute(np.array([slot]))
+            if not valid[0]:
+                return None
+            return RemainingEstimate(
+                float(hours[0]), float(rate[0]), float(confidence[0])
+            )
+
+    def estimate_all(self) -> Dict[str, RemainingEstimate]:
+        """全デバイスの残り使用時間を一括で推定（推定できたデバイスのみ）"""
+        self.update()
+        with self._lock:
+            if not self._slots:
+                return {}
+            addresses = list(self._slots)
+            slots = np.fromiter(self._slots.values(), dtype=np.intp)
+            hours, rate, confidence, valid = self._compute(slots)
+            return {
+                addresses[i]: RemainingEstimate(
+                    float(hours[i]), float(rate[i]), float(confidence[i])
+                )
+                for i in np.flatnonzero(valid)
+            }
+
+    def reset(self, device_address: str):
+        """指定デバイスの推定を破棄"""
+        with self._lock:
+            slot = self._slots.get(device_address)
+            if slot is not None:
+                for name, fill in self.STATE_FIELDS:
+                    getattr(self, name)[slot] = fill
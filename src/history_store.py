@@ -0,0 +1,317 @@
+"""
+History Store - SQLiteによるバッテリー履歴の永続化
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    id INTEGER PRIMARY KEY,
+    address TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS samples (
+    device_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    level INTEGER NOT NULL,
+    PRIMARY KEY (device_id, ts)
+) WITHOUT ROWID;
+"""
+
+
+class HistoryStore:
+    """バッテリー履歴をSQLite (WALモード) に保存するストア
+
+    - recordはキューに積むだけで、書き込みはバックグラウンドのスレッドが
+      flush_interval秒またはbatch_size件ごとに1トランザクションでまとめて行う
+    - サンプルは (device_id, ts) を主キーとするWITHOUT ROWIDテーブルに格納し、
+      デバイス・期間による検索は主キーの範囲走査になる
+    - retention_days日より古いサンプルは定期的に削除する
+    - 書き込みキューはmax_queue件までで、超えた分は捨てて警告する。書き込みスレッドが
+      エラーで停止していた場合は、restart_interval秒に1回まで再起動する
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        flush_interval: float = 5.0,
+        batch_size: int = 500,
+        retention_days: Optional[float] = 365,
+        prune_interval: float = 3600.0,
+        max_queue: int = 10000,
+        restart_interval: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.retention_days = retention_days
+        self.prune_interval = prune_interval
+        self.restart_interval = restart_interval
+        self.clock = clock
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, max_queue))
+        self._thread: Optional[threading.Thread] = None
+        self._last_restart: Optional[float] = None
+        self._device_ids: Dict[str, int] = {}
+
+        # 読み取りは書き込みスレッドと別の接続で行う（WALにより並行して読める）
+        self._read_connection: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+
+        # 統計情報
+        self.written_count = 0
+        self.batch_count = 0
+        self.pruned_count = 0
+        self.dropped_count = 0  # キューが一杯で捨てたサンプル数
+        self.restart_count = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """データベースを開いて書き込みスレッドを開始"""
+        if self.is_running:
+            return
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.close()
+
+        self._thread = threading.Thread(
+            target=self._run, name="HistoryStoreWriter", daemon=True
+        )
+        self._thread.start()
+        self.logger.info(f"履歴データベースを開きました: {self.db_path}")
+
+    def record(
+        self,
+        device_address: str,
+        battery_level: int,
+        timestamp: Optional[float] = None,
+    ):
+        """サンプルを書き込みキューに追加（ディスクI/Oは行わない）"""
+        if timestamp is None:
+            timestamp = self.clock()
+        self._restart_if_stopped()
+        try:
+            # 同じ秒のサンプルが重ならないよう、小数部も保存する
+            self._queue.put_nowait(
+                (device_address, float(timestamp), int(battery_level))
+            )
+        except queue.Full:
+            self.dropped_count += 1
+            if self.dropped_count == 1 or self.dropped_count % 1000 == 0:
+                self.logger.warning(
+                    "履歴の書き込みキューが一杯のためサンプルを捨てました (累計%d件)",
+                    self.dropped_count,
+                )
+
+    def _restart_if_stopped(self):
+        """書き込みスレッドがエラーで停止していれば再起動（closeの後は何もしない）"""
+        if self._thread is None or self._thread.is_alive():
+            return
+        now = time.monotonic()
+        if (
+            self._last_restart is not None
+            and now - self._last_restart < self.restart_interval
+        ):
+            return
+        self._last_restart = now
+        self.restart_count += 1
+        self.logger.error("履歴の書き込みスレッドが停止していたため再起動します")
+        try:
+            self.start()
+        except sqlite3.Error as e:
+            self.logger.error(f"履歴の書き込みスレッドを再起動できませんでした: {e}")
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """キュー内のサンプルをすべて書き込むまで待つ"""
+        if not self.is_running:
+            return self._queue.empty()
+
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 10.0):
+        """未書き込みのサンプルを書き込んでから停止"""
+        if self.is_running:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                self.logger.warning("履歴の書き込みが時間内に完了しませんでした")
+        self._thread = None
+
+        with self._read_lock:
+            if self._read_connection is not None:
+                self._read_connection.close()
+                self._read_connection = None
+
+    def query(
+        self,
+        device_address: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[int, int]]:
+        """指定デバイス・期間の (エポック秒, 残量) を古い順に取得
+
+        limitを指定した場合は期間内の新しい方からlimit件を返す
+        """
+        sql = (
+            "SELECT ts, level FROM samples"
+            " WHERE device_id = (SELECT id FROM devices WHERE address = ?)"
+            " AND ts >= ? AND ts <= ?"
+        )
+        params: list = [
+            device_address,
+            start if start is not None else -(2**62),
+            end if end is not None else 2**62,
+        ]
+        if limit is not None:
+            sql += " ORDER BY ts DESC LIMIT ?"
+            params.append(limit)
+        else:
+            sql += " ORDER BY ts"
+
+        with self._read_lock:
+            rows = self._reader().execute(sql, params).fetchall()
+        return rows[::-1] if limit is not None else rows
+
+    def addresses(self) -> List[str]:
+        """履歴のあるデバイスのアドレス一覧"""
+        with self._read_lock:
+            rows = self._reader().execute("SELECT address FROM devices").fetchall()
+        return [row[0] for row in rows]
+
+    def get_stats(self) -> Dict[str, int]:
+        """書き込みの統計情報を取得"""
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written_count,
+            "batches": self.batch_count,
+            "pruned": self.pruned_count,
+            "dropped": self.dropped_count,
+            "restarts": self.restart_count,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # WALでは NORMAL でもコミット済みデータは壊れない（電源断時に直近の数件が失われうる）
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        if self._read_connection is None:
+            self._read_connection = self._connect()
+        return self._read_connection
+
+    def _run(self):
+        """書き込みスレッド本体"""
+        connection = self._connect()
+        batch: List[Tuple[str, float, int]] = []
+        waiters: List[threading.Event] = []
+        deadline = time.monotonic() + self.flush_interval
+        next_prune = time.monotonic()
+        stopping = False
+
+        try:
+            while not stopping:
+                if time.monotonic() >= next_prune:
+                    self._prune(connection)
+                    next_prune = time.monotonic() + self.prune_interval
+
+                try:
+                    item = self._queue.get(
+                        timeout=max(0.0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    item = ()
+
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif item:
+                    batch.append(item)
+
+                if (
+                    stopping
+                    or waiters
+                    or len(batch) >= self.batch_size
+                    or time.monotonic() >= deadline
+                ):
+                    if batch:
+                        self._write_batch(connection, batch)
+                        batch = []
+                    for waiter in waiters:
+                        waiter.set()
+                    waiters = []
+                    deadline = time.monotonic() + self.flush_interval
+        except Exception as e:
+            self.logger.error(f"履歴の書き込みスレッドでエラーが発生しました: {e}")
+        finally:
+            connection.close()
+
+    def _write_batch(self, connection: sqlite3.Connection, batch):
+        """サンプルを1トランザクションで書き込む"""
+        try:
+            with connection:
+                rows = [
+                    (self._device_id(connection, address), ts, level)
+                    for address, ts, level in batch
+                ]
+                connection.executemany(
+                    "INSERT OR REPLACE INTO samples (device_id, ts, level)"
+                    " VALUES (?, ?, ?)",
+                    rows,
+                )
+            self.written_count += len(rows)
+            self.batch_count += 1
+        except sqlite3.Error as e:
+            # ロールバックされたデバイスIDが残らないようにする
+            self._device_ids.clear()
+            self.logger.error(f"履歴の書き込みに失敗しました ({len(batch)}件): {e}")
+
+    def _device_id(self, connection: sqlite3.Connection, address: str) -> int:
+        device_id = self._device_ids.get(address)
+        if device_id is None:
+            connection.execute(
+                "INSERT OR IGNORE INTO devices (address) VALUES (?)", (address,)
+            )
+            device_id = connection.execute(
+                "SELECT id FROM devices WHERE address = ?", (address,)
+            ).fetchone()[0]
+            self._device_ids[address] = device_id
+        return device_id
+
+    def _prune(self, connection: sqlite3.Connection):
+        """保存期間を過ぎたサンプルを削除"""
+        if not self.retention_days:
+            return
+
+        cutoff = self.clock() - self.retention_days * 86400
+        try:
+            # デバイスごとに主キーの範囲で削除する（ts単独の索引は持たない）
+            deleted = 0
+            with connection:
+                for (device_id,) in connection.execute(
+                    "SELECT id FROM devices"
+                ).fetchall():
+                    deleted += connection.execute(
+                        "DELETE FROM samples WHERE device_id = ? AND ts < ?",
+                        (device_id, cutoff),
+                    ).rowcount
+            if deleted:
+                self.pruned_count += deleted
+                self.logger.info(f"保存期間を過ぎた履歴を{deleted}件削除しました")
+        except sqlite3.Error as e:
+            self.logger.error(f"履歴の削除に失敗しました: {e}")
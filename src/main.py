@@ -5,77 +5,342 @@ Connected - Bluetooth Device Battery Monitor
 """
 
 import sys
-import asyncio
+import time
+
+# 起動時間の計測の基準（重いモジュールを読み込む前に記録）
+STARTUP_TIME = time.perf_counter()
+
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import QTimer
 from ui.tray_icon import SystemTrayIcon
 from ui.main_window import ConnectedMainWindow
+from ui.battery_icons import shared_icon_cache
 from bluetooth_manager import BluetoothManager
+from backends import create_backend
+from device_events import PowerShellDeviceEventSource
 from battery_monitor import BatteryMonitor
+from poll_scheduler import PollScheduler
+from history_store import HistoryStore
+from device_snapshot import DeviceSnapshotStore
+from notification import NotificationDispatcher, NotificationManager, PlyerNotifier
+from async_worker import BatteryRefreshWorker
+from scan_coordinator import ScanCoordinator
 from utils.config import ConfigManager
-from utils.logger import setup_logger
+from utils.logger import (
+    apply_log_levels,
+    get_volume_stats,
+    setup_logger,
+    setup_logging,
+    shutdown_logging,
+)
 
 
 class ConnectedApp:
+    CONFIG_WATCH_INTERVAL = 2000  # ミリ秒（設定ファイルの変更を確認する間隔）
+
     def __init__(self):
+        self.startup_timings = {}  # 名前: STARTUP_TIMEからの経過秒
         self.app = QApplication(sys.argv)
-        self.logger = setup_logger()
         self.config = ConfigManager()
+        # ログの書き込みはバックグラウンドのスレッドで行う（全ロガーで1つのファイルを共有）
+        setup_logging(
+            json_lines=self.config.get("logging.json_lines", False),
+            max_bytes=self.config.get("logging.max_bytes", 5 * 1024 * 1024),
+            backup_count=self.config.get("logging.backup_count", 3),
+            aggregate_window=self.config.get("logging.aggregate_window", 60),
+            rate_limits=self.config.get("logging.rate_limits", {}),
+            sample_rates=self.config.get("logging.sample_rates", {}),
+        )
+        apply_log_levels(self.config.get("logging.levels", {}))
+        self.logger = setup_logger()
+        self.mark_startup("imported")
 
         # アプリケーションが終了しないようにする
         self.app.setQuitOnLastWindowClosed(False)
 
         # コンポーネントの初期化
-        self.bluetooth_manager = BluetoothManager()
-        self.battery_monitor = BatteryMonitor(self.bluetooth_manager)
+        self.bluetooth_manager = BluetoothManager(
+            backend=self.create_device_backend(),
+            reconcile_interval=self.config.get_reconcile_interval(),
+        )
+        self.history_store = self.create_history_store()
+        self.battery_monitor = BatteryMonitor(
+            self.bluetooth_manager,
+            max_concurrent_reads=self.config.get("battery.max_concurrent_reads", 8),
+            read_timeout=self.config.get("battery.read_timeout", 5),
+            history_capacity=self.config.get("battery.history_capacity", 100),
+            history_store=self.history_store,
+            poll_scheduler=self.create_poll_scheduler(),
+            scan_freshness=self.config.get_update_interval(),
+        )
+        self.battery_monitor.set_low_battery_threshold(
+            self.config.get_low_battery_threshold()
+        )
+
+        # 低バッテリー・接続の通知（表示はワーカースレッドで行い、まとめて間引く）
+        self.notification_manager = self.create_notification_manager()
+        self.battery_monitor.add_event_listener(
+            self.notification_manager.handle_battery_events
+        )
+
+        # 接続デバイスの一覧を変化のたびに保存し、次回の起動時にすぐ表示する
+        self.device_snapshot = DeviceSnapshotStore(
+            self.config.get_data_path("devices.json")
+        )
+        self.battery_monitor.add_event_listener(self.save_device_snapshot)
+
+        # タイマー・ボタン・トレイからの更新要求を1つのスキャンにまとめる
+        self.scan_coordinator = ScanCoordinator(
+            self.battery_monitor,
+            freshness_seconds=self.config.get_scan_freshness(),
+        )
+
+        # アプリケーション全体で共有する非同期ワーカー（UIスレッド外で更新を実行）
+        self.refresh_worker = BatteryRefreshWorker(
+            self.battery_monitor, coordinator=self.scan_coordinator
+        )
 
         # UIコンポーネント
-        self.main_window = ConnectedMainWindow(self.battery_monitor)
-        self.tray_icon = SystemTrayIcon(self.battery_monitor, self.config)
+        self.main_window = ConnectedMainWindow(
+            self.battery_monitor, self.refresh_worker
+        )
+        self.tray_icon = SystemTrayIcon(
+            self.battery_monitor, self.config, self.refresh_worker
+        )
 
         # シグナル接続
         self.setup_signals()
 
-        # タイマーの設定（1分間隔でバッテリー情報を更新）
+        # タイマーの設定（ティックごとに読み取り期限が来たデバイスのみ更新）
         self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_battery_info)
-        self.update_timer.start(60000)  # 60秒間隔
+        self.update_timer.timeout.connect(self.poll_battery_info)
+        self.update_timer.start(
+            int(self.battery_monitor.poll_scheduler.min_interval * 1000)
+        )
+
+        # 設定ファイルの変更を再起動せずに反映
+        self.subscribe_config()
+        self.config_watch_timer = QTimer()
+        self.config_watch_timer.timeout.connect(self.config.reload_if_changed)
+        self.config_watch_timer.start(self.CONFIG_WATCH_INTERVAL)
 
         self.logger.info("Connected アプリケーションが開始されました")
 
+    def create_device_backend(self):
+        """設定に応じたデバイスバックエンドを生成"""
+        backend_name = self.config.get("devices.backend", "powershell")
+        if backend_name == "simulated":
+            return create_backend(
+                "simulated",
+                device_count=self.config.get("devices.simulated_device_count", 5),
+            )
+
+        # Windowsではデバイスの接続・切断をWMIイベントで検出し、全件列挙は定期再照合のみ行う
+        event_source = (
+            PowerShellDeviceEventSource() if sys.platform == "win32" else None
+        )
+        powershell_backend = create_backend("powershell", event_source=event_source)
+        if backend_name != "ble":
+            return powershell_backend
+
+        # BLEデバイスはGATT Battery Serviceから読み取り、接続はプールして再利用する
+        from backends.ble import BleakConnectionPool, gatt_timeout_for
+
+        pool = BleakConnectionPool(
+            max_size=self.config.get("devices.ble_max_connections", 8),
+            idle_timeout=self.config.get("devices.ble_idle_timeout", 300),
+        )
+        # GATTの接続は読み取り期限より前に打ち切り、残りの時間でフォールバックする
+        gatt_timeout = gatt_timeout_for(self.config.get("battery.read_timeout", 5))
+        return create_backend(
+            "ble",
+            base_backend=powershell_backend,
+            pool=pool,
+            gatt_timeout=gatt_timeout,
+        )
+
+    def create_poll_scheduler(self):
+        """設定に応じてデバイスごとの読み取り間隔のスケジューラーを生成"""
+        return PollScheduler(
+            min_interval=self.config.get("battery.min_poll_interval", 15),
+            max_interval=self.config.get("battery.max_poll_interval", 1800),
+            fixed_interval=self.config.get_update_interval(),
+        )
+
+    def create_notification_manager(self):
+        """設定に応じて通知マネージャーを生成"""
+        dispatcher = NotificationDispatcher(
+            PlyerNotifier(),
+            coalesce_window=self.config.get("notifications.coalesce_window", 2),
+            per_key_interval=self.config.get("notifications.per_device_interval", 300),
+            global_limit=self.config.get("notifications.max_per_minute", 3),
+        )
+        manager = NotificationManager(dispatcher=dispatcher)
+        if not self.config.is_notifications_enabled():
+            manager.disable_notifications()
+        manager.low_battery_alert = self.config.get(
+            "notifications.low_battery_alert", True
+        )
+        manager.device_connection_alert = self.config.get(
+            "notifications.device_connection_alert", False
+        )
+        manager.low_battery_threshold = self.config.get_low_battery_threshold()
+        return manager
+
+    def create_history_store(self):
+        """設定に応じてバッテリー履歴のストアを生成（無効な場合はNone）
+
+        データベースを開くのは起動後にprepare_historyで行う
+        """
+        if not self.config.get("history.enabled", True):
+            return None
+
+        return HistoryStore(
+            self.config.get_data_path("history.db"),
+            flush_interval=self.config.get("history.flush_interval", 5),
+            retention_days=self.config.get("history.retention_days", 365),
+        )
+
+    def prepare_history(self):
+        """履歴データベースを開き、保存済みの履歴を読み込む（イベントループのスレッドで呼ばれる）"""
+        if self.history_store is None:
+            return
+
+        try:
+            self.history_store.start()
+        except Exception as e:
+            self.logger.error(f"履歴データベースを開けませんでした: {e}")
+            self.battery_monitor.history_store = None
+            self.history_store = None
+            return
+        self.battery_monitor.restore_history()
+
+    def subscribe_config(self):
+        """設定の変更を各コンポーネントに反映するように購読"""
+        self.config.subscribe(
+            "battery.low_battery_threshold", self.apply_low_battery_threshold
+        )
+        for key_path in (
+            "battery.min_poll_interval",
+            "battery.max_poll_interval",
+            "battery.update_interval",
+        ):
+            self.config.subscribe(key_path, lambda _: self.apply_poll_settings())
+        self.config.subscribe(
+            "notifications", lambda _: self.apply_notification_settings()
+        )
+        self.config.subscribe(
+            "logging.levels", lambda levels: apply_log_levels(levels or {})
+        )
+
+    def apply_low_battery_threshold(self, threshold):
+        """低バッテリー閾値の変更を反映"""
+        self.battery_monitor.set_low_battery_threshold(threshold)
+        self.notification_manager.low_battery_threshold = threshold
+
+    def apply_poll_settings(self):
+        """読み取り間隔の設定の変更を反映（次回の読み取りから適用）"""
+        battery = self.config.snapshot.battery
+        scheduler = self.battery_monitor.poll_scheduler
+        scheduler.min_interval = battery.min_poll_interval
+        scheduler.max_interval = max(
+            battery.min_poll_interval, battery.max_poll_interval
+        )
+        scheduler.fixed_interval = battery.update_interval
+        self.battery_monitor.scan_freshness = battery.update_interval
+        self.update_timer.setInterval(int(scheduler.min_interval * 1000))
+        self.logger.info(
+            f"読み取り間隔を変更しました: {scheduler.min_interval}〜"
+            f"{scheduler.max_interval}秒"
+        )
+
+    def apply_notification_settings(self):
+        """通知設定の変更を反映"""
+        notifications = self.config.snapshot.notifications
+        if notifications.enabled:
+            self.notification_manager.enable_notifications()
+        else:
+            self.notification_manager.disable_notifications()
+        self.notification_manager.low_battery_alert = notifications.low_battery_alert
+        self.notification_manager.device_connection_alert = (
+            notifications.device_connection_alert
+        )
+
+    def show_last_known_devices(self):
+        """前回起動時のデバイス一覧を表示（初回スキャンの結果で置き換えられる）"""
+        devices = self.device_snapshot.load()
+        if devices:
+            self.main_window.show_last_known_devices(devices)
+            self.tray_icon.update_icon(devices)
+
+    def save_device_snapshot(self, changes=None):
+        """現在の接続デバイスの一覧を保存（変化イベント・更新完了時に呼ばれる）
+
+        changes（変化イベントまたはデバイス一覧）は使わず、把握している全デバイスを保存する
+        """
+        self.device_snapshot.update(
+            self.bluetooth_manager.get_connected_devices().values()
+        )
+
+    def mark_startup(self, name: str):
+        """起動からの経過時間を記録"""
+        elapsed = time.perf_counter() - STARTUP_TIME
+        self.startup_timings[name] = elapsed
+        self.logger.info(f"起動時間 ({name}): {elapsed * 1000:.0f} ms")
+
+    def on_first_data(self, devices):
+        """初回のデバイス一覧の受信時の処理"""
+        self.refresh_worker.devices_updated.disconnect(self.on_first_data)
+        self.mark_startup("first_data")
+
+    def start_background_tasks(self):
+        """表示後に行う初期化（履歴の読み込みと初回スキャンはワーカースレッドで行う）"""
+        self.refresh_worker.devices_updated.connect(self.on_first_data)
+        self.refresh_worker.request_initial_refresh(self.prepare_history)
+
+        # デバイスイベントの監視を開始
+        self.bluetooth_manager.start_event_monitoring()
+
     def setup_signals(self):
         """シグナルとスロットを接続"""
         # メインウィンドウのシグナル
         self.main_window.close_requested.connect(self.quit_application)
         self.main_window.refresh_requested.connect(self.update_battery_info)
 
+        # スキャン結果（デバイスが0台になった場合を含む）を保存
+        self.refresh_worker.devices_updated.connect(self.save_device_snapshot)
+
         # システムトレイのシグナル
         self.tray_icon.show_main_window.connect(self.show_main_window)
 
+        # テーマ（パレット）変更時は描画済みのアイコンを破棄
+        self.app.paletteChanged.connect(self.on_theme_changed)
+
     def show_main_window(self):
         """メインウィンドウを表示"""
         self.main_window.show()
         self.main_window.raise_()
         self.main_window.activateWindow()
 
+    def on_theme_changed(self, palette):
+        """テーマ変更時にアイコンキャッシュを破棄して再描画"""
+        shared_icon_cache().invalidate()
+        self.main_window.device_view.viewport().update()
+
     def update_battery_info(self):
-        """バッテリー情報を更新"""
+        """バッテリー情報を更新（結果はシグナル経由でUIに反映）"""
         try:
-            # 非同期でバッテリー情報を更新
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                devices = loop.run_until_complete(
-                    self.battery_monitor.update_battery_levels()
-                )
-
-                # UIを更新
-                self.main_window.refresh_device_list()
-                # システムトレイも更新（後で実装）
-                # self.tray_icon.update_icon(devices)
-
-            finally:
-                loop.close()
+            # システムトレイ・メインウィンドウはdevices_updatedシグナルで更新される
+            # ユーザーの操作による更新のため、イベント購読中でも全件列挙する
+            self.refresh_worker.request_refresh(force=True)
+
+        except Exception as e:
+            self.logger.error(f"バッテリー情報の更新に失敗しました: {e}")
+
+    def poll_battery_info(self):
+        """読み取り期限が来たデバイスのバッテリー情報を更新"""
+        try:
+            self.refresh_worker.request_scheduled_refresh()
 
         except Exception as e:
             self.logger.error(f"バッテリー情報の更新に失敗しました: {e}")
@@ -83,19 +348,52 @@ class ConnectedApp:
     def quit_application(self):
         """アプリケーションを終了"""
         self.logger.info("Connected アプリケーションを終了します")
+        self.logger.info(f"スキャン統計: {self.scan_coordinator.get_stats()}")
+        self.logger.info(
+            f"読み取り間隔の統計: {self.battery_monitor.poll_scheduler.get_stats()}"
+        )
         self.tray_icon.hide()
+        self.update_timer.stop()
+        self.config_watch_timer.stop()
+        try:
+            # イベントループ上で保持しているBLE接続などを切断
+            self.refresh_worker.loop_thread.submit(
+                self.bluetooth_manager.aclose()
+            ).result(timeout=5)
+        except Exception as e:
+            self.logger.warning(f"デバイス接続の切断に失敗しました: {e}")
+        self.refresh_worker.shutdown()
+        self.bluetooth_manager.close()
+        self.logger.info(f"通知の統計: {self.notification_manager.get_stats()}")
+        self.notification_manager.close()
+        if self.history_store is not None:
+            # 未書き込みの履歴を書き込んでから終了
+            self.history_store.close()
+        self.device_snapshot.close()
+        # 未書き込みの設定変更を書き込んでから終了
+        self.config.flush()
+        self.logger.info(f"設定ファイルの書き込み回数: {self.config.write_count}")
+        volume_stats = get_volume_stats()
+        if volume_stats is not None:
+            self.logger.info(f"ログの量の制御: {volume_stats}")
+        # キューに残ったログを書き込んでから終了
+        shutdown_logging()
         self.app.quit()
 
     def run(self):
         """アプリケーションを実行"""
-        # 初回バッテリー情報取得
-        self.update_battery_info()
+        # 前回起動時のデバイス一覧を「前回の値」として先に表示
+        self.show_last_known_devices()
 
-        # システムトレイアイコンを表示
+        # システムトレイアイコンを表示（初回スキャンの完了を待たない）
         self.tray_icon.show()
 
-        # 初回はメインウィンドウも表示
+        # 初回はメインウィンドウも表示（スキャン中はその旨を表示）
         self.show_main_window()
+        self.mark_startup("tray_visible")
+
+        # 履歴の読み込み・初回スキャン・イベント監視はメインループの開始後に始める
+        QTimer.singleShot(0, self.start_background_tasks)
 
         # アプリケーションのメインループを開始
         return self.app.exec_()
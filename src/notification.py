@@ -3,44 +3,327 @@ Notification Manager - 通知機能
 """
 
 import logging
-from plyer import notification
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
 from PyQt5.QtWidgets import QSystemTrayIcon, QMessageBox
 from PyQt5.QtCore import QObject, pyqtSignal
+from battery_events import BatteryEvent
+
+
+class Alert:
+    """通知1件分の内容
+
+    keyが同じ通知（同じデバイスの通知など）は、新しいものが古いものを置き換える
+    stateは通知が表す状態（接続・切断など）で、状態が変わった通知は間隔制限を受けない
+    """
+
+    INFO = 0
+    WARNING = 1
+    CRITICAL = 2
+
+    def __init__(
+        self,
+        title: str,
+        message: str,
+        duration: int = 5,
+        key: Optional[str] = None,
+        priority: int = INFO,
+        state: Optional[str] = None,
+    ):
+        self.title = title
+        self.message = message
+        self.duration = duration
+        self.key = key
+        self.priority = priority
+        self.state = state
+        self.created = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f"Alert({self.title!r}, key={self.key!r}, priority={self.priority})"
+
+
+class Notifier:
+    """トースト通知を表示するバックエンドの基底クラス"""
+
+    def notify(self, title: str, message: str, duration: int):
+        """通知を表示（失敗した場合は例外を送出）"""
+        raise NotImplementedError
+
+
+class PlyerNotifier(Notifier):
+    """plyerによるWindows 10/11のネイティブ通知"""
+
+    def notify(self, title: str, message: str, duration: int):
+        from plyer import notification
+
+        notification.notify(
+            title=title,
+            message=message,
+            app_name="Connected",
+            timeout=duration,
+            toast=True,  # Windows 10/11のトースト通知
+        )
+
+
+class FakeNotifier(Notifier):
+    """テスト用の通知バックエンド（表示した通知を記録する）"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay  # 秒（遅い通知バックエンドの再現）
+        self.fail = fail
+        self.sent: List[tuple] = []  # (title, message, duration)
+        self.threads: List[threading.Thread] = []
+
+    def notify(self, title: str, message: str, duration: int):
+        self.threads.append(threading.current_thread())
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("notification failed")
+        self.sent.append((title, message, duration))
+
+
+class NotificationDispatcher:
+    """通知をワーカースレッドで表示するディスパッチャー
+
+    - submitはキューに積むだけで、呼び出し元のスレッドをブロックしない
+    - 最初の通知からcoalesce_window秒以内に届いた通知は1件のダイジェストにまとめる
+    - 同じkeyの通知は新しいもので置き換える（古い通知は捨てる）
+    - 同じkeyの通知はper_key_interval秒に1回まで（優先度が上がった場合・状態が
+      変わった場合を除く）
+    - 全体ではglobal_period秒あたりglobal_limit件まで（超えた分は待ってまとめる）
+    """
+
+    def __init__(
+        self,
+        notifier: Notifier,
+        coalesce_window: float = 2.0,
+        per_key_interval: float = 300.0,
+        global_limit: int = 3,
+        global_period: float = 60.0,
+        on_dispatched: Optional[Callable[[str, str], None]] = None,
+        on_failed: Optional[Callable[[str, str], None]] = None,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.notifier = notifier
+        self.coalesce_window = coalesce_window
+        self.per_key_interval = per_key_interval
+        self.global_limit = max(1, global_limit)
+        self.global_period = global_period
+        self.on_dispatched = on_dispatched
+        self.on_failed = on_failed
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._last_sent: Dict[str, tuple] = {}  # key: (表示時刻, 優先度, 状態)
+        self._sent_times: deque = deque()  # 直近global_period秒の表示時刻
+
+        # 統計情報
+        self.submitted_count = 0
+        self.dispatched_count = 0  # 表示した通知（ダイジェストは1件）
+        self.coalesced_count = 0  # ダイジェストにまとめた通知
+        self.superseded_count = 0  # 新しい通知に置き換えられた通知
+        self.rate_limited_count = 0  # 同じkeyの間隔制限で捨てた通知
+        self.failed_count = 0
+        self.last_latency: Optional[float] = None  # 秒（submitから表示完了まで）
+        self.average_latency: Optional[float] = None  # 秒（指数移動平均）
+        self.max_latency = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def queue_depth(self) -> int:
+        """ワーカースレッドがまだ取り出していない通知の数"""
+        return self._queue.qsize()
+
+    def start(self):
+        """ワーカースレッドを開始（開始済みの場合は何もしない）"""
+        with self._start_lock:
+            if self.is_running:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="NotificationDispatcher", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, alert: Alert):
+        """通知をキューに追加（表示はワーカースレッドで行う）"""
+        self.start()
+        self.submitted_count += 1
+        self._queue.put(alert)
+
+    def close(self, timeout: float = 5.0):
+        """まとめ中の通知を表示してから停止"""
+        if self.is_running:
+            self._queue.put(None)
+            self._thread.join(timeout)
+        self._thread = None
+
+    def get_stats(self) -> Dict[str, Optional[float]]:
+        """キューの深さ・遅延・件数の統計情報を取得"""
+        return {
+            "queue_depth": self.queue_depth,
+            "submitted": self.submitted_count,
+            "dispatched": self.dispatched_count,
+            "coalesced": self.coalesced_count,
+            "superseded": self.superseded_count,
+            "rate_limited": self.rate_limited_count,
+            "failed": self.failed_count,
+            "last_latency": self.last_latency,
+            "average_latency": self.average_latency,
+            "max_latency": self.max_latency,
+        }
+
+    def _run(self):
+        """ワーカースレッド本体"""
+        stopping = False
+        while not stopping:
+            alert = self._queue.get()
+            if alert is None:
+                break
+
+            batch: Dict[object, Alert] = {}
+            self._add(batch, alert)
+            deadline = time.monotonic() + self.coalesce_window
+            while True:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    # 全体の上限に達している場合は、表示できるまで待ちながらまとめ続ける
+                    wait = self._global_wait() if batch else 0.0
+                    if wait <= 0:
+                        break
+                    deadline = time.monotonic() + wait
+                    continue
+                try:
+                    alert = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+                if alert is None:
+                    stopping = True
+                    break
+                self._add(batch, alert)
+
+            self._dispatch(list(batch.values()))
+
+    def _add(self, batch: Dict[object, Alert], alert: Alert):
+        """まとめ中の通知に追加（間隔制限・置き換えを適用）"""
+        if alert.key is not None:
+            # まとめ中の通知と状態が異なる場合は、間隔制限を受けずに置き換える
+            pending = batch.get(alert.key)
+            state_changed = pending is not None and pending.state != alert.state
+            last = self._last_sent.get(alert.key)
+            if (
+                not state_changed
+                and last is not None
+                and time.monotonic() - last[0] < self.per_key_interval
+                and alert.priority <= last[1]
+                and alert.state == last[2]
+            ):
+                self.rate_limited_count += 1
+                return
+            if alert.key in batch:
+                self.superseded_count += 1
+                del batch[alert.key]
+        batch[alert.key if alert.key is not None else id(alert)] = alert
+
+    def _global_wait(self) -> float:
+        """全体の上限まで余裕ができるまでの秒数（0以下なら表示できる）"""
+        now = time.monotonic()
+        while self._sent_times and now - self._sent_times[0] >= self.global_period:
+            self._sent_times.popleft()
+        if len(self._sent_times) < self.global_limit:
+            return 0.0
+        return self._sent_times[0] + self.global_period - now
+
+    def _dispatch(self, alerts: List[Alert]):
+        """通知（複数の場合はダイジェスト）を表示"""
+        if not alerts:
+            return
+
+        if len(alerts) == 1:
+            title, message = alerts[0].title, alerts[0].message
+        else:
+            top = max(alerts, key=lambda alert: alert.priority)
+            title = f"{top.title}（ほか{len(alerts) - 1}件）"
+            message = "\n".join(alert.message for alert in alerts)
+            self.coalesced_count += len(alerts) - 1
+        duration = max(alert.duration for alert in alerts)
+
+        try:
+            self.notifier.notify(title, message, duration)
+        except Exception as e:
+            self.failed_count += 1
+            self.logger.error(f"通知送信エラー: {e}")
+            if self.on_failed is not None:
+                self.on_failed(title, message)
+            return
+
+        now = time.monotonic()
+        self._sent_times.append(now)
+        for alert in alerts:
+            if alert.key is not None:
+                self._last_sent[alert.key] = (now, alert.priority, alert.state)
+            latency = now - alert.created
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            if self.average_latency is None:
+                self.average_latency = latency
+            else:
+                self.average_latency += 0.3 * (latency - self.average_latency)
+        self.dispatched_count += 1
+        self.logger.info(f"通知送信: {title} - {message}")
+        if self.on_dispatched is not None:
+            self.on_dispatched(title, message)
+
 
 class NotificationManager(QObject):
-    """通知管理クラス"""
-    
+    """通知管理クラス
+
+    通知はNotificationDispatcherのワーカースレッドで表示され、呼び出し元をブロックしない
+    """
+
     # シグナル定義
     notification_sent = pyqtSignal(str, str)  # title, message
-    
-    def __init__(self):
+
+    def __init__(
+        self,
+        notifier: Optional[Notifier] = None,
+        dispatcher: Optional[NotificationDispatcher] = None,
+    ):
         super().__init__()
         self.logger = logging.getLogger(__name__)
         self.notification_enabled = True
-    
-    def send_notification(self, title: str, message: str, duration: int = 5):
-        """システム通知を送信"""
+        self.low_battery_alert = True
+        self.device_connection_alert = False
+        self.low_battery_threshold = 10
+        self.dispatcher = dispatcher or NotificationDispatcher(
+            notifier or PlyerNotifier()
+        )
+        # シグナルはワーカースレッドから発行される（QueuedConnectionで配送）
+        self.dispatcher.on_dispatched = self.notification_sent.emit
+        self.dispatcher.on_failed = self._fallback_tray_notification
+
+    def send_notification(
+        self,
+        title: str,
+        message: str,
+        duration: int = 5,
+        key: Optional[str] = None,
+        priority: int = Alert.INFO,
+        state: Optional[str] = None,
+    ):
+        """システム通知を送信（キューに積むだけで、表示はワーカースレッドで行う）"""
         if not self.notification_enabled:
             return
-        
-        try:
-            # Windows 10/11のネイティブ通知を使用
-            notification.notify(
-                title=title,
-                message=message,
-                app_name="Connected",
-                timeout=duration,
-                toast=True  # Windows 10/11のトースト通知
-            )
-            
-            self.logger.info(f"通知送信: {title} - {message}")
-            self.notification_sent.emit(title, message)
-            
-        except Exception as e:
-            self.logger.error(f"通知送信エラー: {e}")
-            # フォールバック: システムトレイ通知
-            self._fallback_tray_notification(title, message)
-    
+
+        self.dispatcher.submit(Alert(title, message, duration, key, priority, state))
+
     def _fallback_tray_notification(self, title: str, message: str):
         """システムトレイ通知へのフォールバック"""
         try:
@@ -49,45 +332,94 @@ class NotificationManager(QObject):
             pass
         except Exception as e:
             self.logger.error(f"フォールバック通知エラー: {e}")
-    
-    def send_battery_alert(self, device_name: str, battery_level: int):
-        """バッテリーアラート専用の通知"""
+
+    def send_battery_alert(
+        self, device_name: str, battery_level: int, key: Optional[str] = None
+    ):
+        """バッテリーアラート専用の通知（keyには通常デバイスのアドレスを指定）"""
         if battery_level <= 5:
             title = "🔋 緊急: バッテリー残量極少"
             message = f"{device_name}のバッテリーが{battery_level}%です。すぐに充電してください。"
+            priority = Alert.CRITICAL
         elif battery_level <= 10:
             title = "⚠️ 警告: バッテリー残量低下"
             message = f"{device_name}のバッテリーが{battery_level}%になりました。充電をお勧めします。"
+            priority = Alert.WARNING
         elif battery_level <= 20:
             title = "📱 お知らせ: バッテリー残量注意"
             message = f"{device_name}のバッテリーが{battery_level}%です。"
+            priority = Alert.INFO
         else:
             return  # 20%以上の場合は通知しない
-        
-        self.send_notification(title, message)
-    
-    def send_device_connected(self, device_name: str):
+
+        self.send_notification(
+            title, message, key=f"battery:{key or device_name}", priority=priority
+        )
+
+    def send_device_connected(self, device_name: str, key: Optional[str] = None):
         """デバイス接続通知"""
         title = "🔗 デバイス接続"
         message = f"{device_name}が接続されました"
-        self.send_notification(title, message, duration=3)
-    
-    def send_device_disconnected(self, device_name: str):
+        # 切断通知と同じkeyで、まとめ中の切断通知は置き換え、間隔制限は受けない
+        self.send_notification(
+            title,
+            message,
+            duration=3,
+            key=f"connection:{key or device_name}",
+            state="connected",
+        )
+
+    def send_device_disconnected(self, device_name: str, key: Optional[str] = None):
         """デバイス切断通知"""
         title = "🔌 デバイス切断"
         message = f"{device_name}が切断されました"
-        self.send_notification(title, message, duration=3)
-    
+        self.send_notification(
+            title,
+            message,
+            duration=3,
+            key=f"connection:{key or device_name}",
+            state="disconnected",
+        )
+
+    def handle_battery_events(self, events):
+        """BatteryMonitorの変化イベントから通知を作成（イベントループのスレッドから呼ばれる）"""
+        for event in events:
+            device = event.device
+            if event.kind == BatteryEvent.THRESHOLD_CROSSED:
+                if self.low_battery_alert and event.is_low:
+                    self.send_battery_alert(device.name, event.new_level, event.address)
+            elif event.kind == BatteryEvent.CONNECTED:
+                if self.device_connection_alert:
+                    self.send_device_connected(device.name, event.address)
+                if (
+                    self.low_battery_alert
+                    and event.new_level is not None
+                    and event.new_level <= self.low_battery_threshold
+                ):
+                    # 接続時点で閾値以下のデバイス
+                    self.send_battery_alert(device.name, event.new_level, event.address)
+            elif event.kind == BatteryEvent.DISCONNECTED:
+                if self.device_connection_alert:
+                    self.send_device_disconnected(device.name, event.address)
+
+    def get_stats(self):
+        """通知キューの深さ・遅延などの統計情報を取得"""
+        return self.dispatcher.get_stats()
+
+    def close(self):
+        """まとめ中の通知を表示してからワーカースレッドを停止"""
+        self.dispatcher.close()
+
     def enable_notifications(self):
         """通知を有効にする"""
         self.notification_enabled = True
         self.logger.info("通知が有効になりました")
-    
+
     def disable_notifications(self):
         """通知を無効にする"""
         self.notification_enabled = False
         self.logger.info("通知が無効になりました")
-    
+
     def is_notification_enabled(self) -> bool:
         """通知が有効かどうかを確認"""
         return self.notification_enabled
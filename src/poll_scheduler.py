@@ -0,0 +1,188 @@
+"""
+Poll Scheduler - デバイスごとのバッテリー読み取り間隔の調整
+"""
+
+import heapq
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class PollScheduler:
+    """デバイスごとに次回の読み取り期限を決めるスケジューラー
+
+    - 期限は優先度付きキュー（heapq）で管理し、各ティックでは期限が来た
+      デバイスのみを取り出す（再スケジュールで古くなった要素は取り出し時に捨てる）
+    - 間隔は放電速度・低バッテリー閾値までの残量・充電状態・読み取りにかかる
+      時間から決め、min_interval〜max_intervalの範囲に収める
+    - 固定間隔（fixed_interval）で読み取った場合と比べて省いた読み取り数を集計する
+
+    イベントループのスレッドからのみ呼び出すこと
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 15.0,
+        max_interval: float = 1800.0,
+        fixed_interval: float = 60.0,
+        threshold_margin: int = 5,
+        read_cost_factor: float = 100.0,
+        min_confidence: float = 0.3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_interval = min_interval  # 秒
+        self.max_interval = max(min_interval, max_interval)  # 秒
+        self.fixed_interval = (
+            fixed_interval  # 秒（従来の固定間隔、放電速度が不明な場合の間隔）
+        )
+        self.threshold_margin = (
+            threshold_margin  # %（閾値までこの残量以内なら最短間隔）
+        )
+        self.read_cost_factor = (
+            read_cost_factor  # 読み取り時間のこの倍数より短い間隔にしない
+        )
+        self.min_confidence = min_confidence  # これ未満の信頼度の放電速度は使わない
+        self.clock = clock
+
+        self._heap: List[Tuple[float, int, str]] = []  # (期限, 追加順, アドレス)
+        self._deadlines: Dict[str, float] = {}
+        self._sequence = 0
+        self._last_read: Dict[str, float] = {}
+        self._last_level: Dict[str, Optional[int]] = {}
+        self._unchanged: Dict[str, int] = {}  # 残量が変わらなかった連続回数
+
+        # 統計情報
+        self.read_count = 0  # スケジューラー経由で記録した読み取り数
+        self.fixed_read_count = 0.0  # 固定間隔だった場合の読み取り数
+
+    def __contains__(self, device_address: str) -> bool:
+        return device_address in self._deadlines
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, device_address: str, delay: float = 0.0):
+        """delay秒後を次回の読み取り期限にする（既存の期限は置き換える）"""
+        deadline = self.clock() + delay
+        self._deadlines[device_address] = deadline
+        self._sequence += 1
+        heapq.heappush(self._heap, (deadline, self._sequence, device_address))
+
+    def sync(self, device_addresses: Iterable[str]):
+        """接続中のデバイスに合わせる（新しいデバイスは即時、切断されたデバイスは削除）"""
+        addresses = set(device_addresses)
+        for address in addresses - self._deadlines.keys():
+            self.schedule(address)
+        for address in self._deadlines.keys() - addresses:
+            self.remove(address)
+
+    def remove(self, device_address: str):
+        """デバイスをスケジュールから外す（ヒープの要素は取り出し時に捨てる）"""
+        self._deadlines.pop(device_address, None)
+        self._last_read.pop(device_address, None)
+        self._last_level.pop(device_address, None)
+        self._unchanged.pop(device_address, None)
+
+    def pop_due(self) -> List[str]:
+        """期限が来たデバイスのアドレスを期限順に取り出す"""
+        now = self.clock()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, address = heapq.heappop(self._heap)
+            if self._deadlines.get(address) != deadline:
+                continue  # 再スケジュール済み・削除済み
+            del self._deadlines[address]
+            due.append(address)
+        return due
+
+    def next_deadline(self) -> Optional[float]:
+        """最も早い読み取り期限（スケジュールされたデバイスがない場合はNone）"""
+        while self._heap:
+            deadline, _, address = self._heap[0]
+            if self._deadlines.get(address) == deadline:
+                return deadline
+            heapq.heappop(self._heap)
+        return None
+
+    def record_read(
+        self,
+        device_address: str,
+        battery_level: Optional[int],
+        rate_per_hour: Optional[float] = None,
+        charging: bool = False,
+        read_cost: Optional[float] = None,
+        threshold: int = 10,
+    ) -> float:
+        """読み取り結果から次回の期限を決め、その間隔（秒）を返す"""
+        now = self.clock()
+        last_read = self._last_read.get(device_address)
+        # 固定間隔なら前回の読み取りから今回までに行われていた読み取り数
+        if last_read is None:
+            self.fixed_read_count += 1
+        else:
+            self.fixed_read_count += (now - last_read) / self.fixed_interval
+        self.read_count += 1
+        self._last_read[device_address] = now
+
+        if battery_level is not None:
+            if battery_level == self._last_level.get(device_address):
+                self._unchanged[device_address] = (
+                    self._unchanged.get(device_address, 0) + 1
+                )
+            else:
+                self._unchanged[device_address] = 0
+            self._last_level[device_address] = battery_level
+
+        interval = self.compute_interval(
+            battery_level,
+            rate_per_hour,
+            charging,
+            read_cost,
+            threshold,
+            self._unchanged.get(device_address, 0),
+        )
+        self.schedule(device_address, interval)
+        return interval
+
+    def compute_interval(
+        self,
+        battery_level: Optional[int],
+        rate_per_hour: Optional[float] = None,
+        charging: bool = False,
+        read_cost: Optional[float] = None,
+        threshold: int = 10,
+        unchanged_reads: int = 0,
+    ) -> float:
+        """次回の読み取りまでの間隔（秒）を計算"""
+        if battery_level is None or charging:
+            # 読み取りに失敗した場合・充電中は従来どおりの間隔
+            interval = self.fixed_interval
+        elif rate_per_hour:
+            # 残量が1%変化する程度の間隔で読み取る
+            interval = 3600.0 / rate_per_hour
+        else:
+            # 放電速度が不明な間は、残量が変わらないほど間隔を倍々に広げる
+            interval = self.fixed_interval * 2 ** min(unchanged_reads, 10)
+
+        # 読み取りに時間のかかるデバイスほど間隔を広げる
+        if read_cost:
+            interval = max(interval, read_cost * self.read_cost_factor)
+
+        if battery_level is not None and not charging:
+            remaining = battery_level - threshold
+            if 0 < remaining <= self.threshold_margin:
+                # 閾値の直前は最短間隔で読み取って通知の遅れを防ぐ
+                interval = self.min_interval
+            elif remaining > 0 and rate_per_hour:
+                # 閾値に達するまでの時間の半分より長く空けない
+                interval = min(interval, remaining * 3600.0 / rate_per_hour / 2)
+
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def get_stats(self) -> Dict[str, float]:
+        """読み取り回数の統計情報を取得"""
+        return {
+            "devices": len(self._deadlines),
+            "reads": self.read_count,
+            "fixed_reads": round(self.fixed_read_count),
+            "saved": max(0, round(self.fixed_read_count - self.read_count)),
+        }
@@ -0,0 +1,285 @@
+"""
+PowerShell Session - 常駐PowerShellホストプロセスの管理
+"""
+
+import json
+import logging
+import queue
+import subprocess
+import threading
+from typing import Any, Iterator, List, Optional
+
+# 常駐ホストとして動作するPowerShellスクリプト
+# 1行1リクエストのJSON ({"id": n, "command": "..."}) を標準入力から受け取り、
+# 1行1レスポンスのJSON ({"id": n, "ok": bool, "output"/"error": "..."}) を標準出力へ返す
+# "stream": true のリクエストは出力を1行ずつ ({"id": n, "ok": true, "line": "..."}) 返し、
+# 最後に {"id": n, "ok": true, "done": true} を返す
+HOST_SCRIPT = r"""
+[Console]::InputEncoding = [System.Text.Encoding]::UTF8
+[Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+$ProgressPreference = 'SilentlyContinue'
+while ($true) {
+    $line = [Console]::In.ReadLine()
+    if ($line -eq $null) { break }
+    if ($line.Trim() -eq '') { continue }
+    $request = $line | ConvertFrom-Json
+    try {
+        if ($request.stream) {
+            Invoke-Expression $request.command | ForEach-Object {
+                $frame = @{ id = $request.id; ok = $true; line = [string]$_ }
+                [Console]::Out.WriteLine(($frame | ConvertTo-Json -Compress))
+                [Console]::Out.Flush()
+            }
+            $response = @{ id = $request.id; ok = $true; done = $true }
+        } else {
+            $output = (Invoke-Expression $request.command | Out-String)
+            $response = @{ id = $request.id; ok = $true; output = $output }
+        }
+    } catch {
+        $response = @{ id = $request.id; ok = $false; error = $_.Exception.Message }
+    }
+    [Console]::Out.WriteLine(($response | ConvertTo-Json -Compress))
+    [Console]::Out.Flush()
+}
+"""
+
+DEFAULT_HOST_COMMAND = [
+    "powershell",
+    "-NoLogo",
+    "-NoProfile",
+    "-NonInteractive",
+    "-ExecutionPolicy",
+    "Bypass",
+    "-Command",
+    HOST_SCRIPT,
+]
+
+
+class PowerShellSessionError(Exception):
+    """PowerShellセッションのエラー"""
+
+
+class PowerShellSession:
+    """PowerShellホストプロセスを常駐させ、標準入出力でコマンドを実行するクラス"""
+
+    def __init__(
+        self,
+        host_command: Optional[List[str]] = None,
+        timeout: float = 15.0,
+        max_retries: int = 1,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.host_command = host_command or DEFAULT_HOST_COMMAND
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self.restart_count = 0
+        self.request_count = 0
+
+        self._process: Optional[subprocess.Popen] = None
+        self._responses: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._reader: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._started_once = False
+
+    @property
+    def is_running(self) -> bool:
+        """ホストプロセスが動作中かどうか"""
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        """ホストプロセスを起動（起動済みの場合は何もしない）"""
+        with self._lock:
+            self._ensure_started()
+
+    def run(self, command: str, timeout: Optional[float] = None) -> str:
+        """コマンドを実行して出力文字列を返す
+
+        ホストがクラッシュまたは応答しない場合は再起動し、max_retries回まで再試行する
+        """
+        timeout = self.timeout if timeout is None else timeout
+        last_error: Optional[Exception] = None
+
+        with self._lock:
+            for _ in range(self.max_retries + 1):
+                try:
+                    self._ensure_started()
+                    return self._request(command, timeout)
+                except PowerShellSessionError:
+                    # コマンド自体のエラーは再試行しない
+                    raise
+                except (TimeoutError, OSError, EOFError) as e:
+                    last_error = e
+                    self.logger.warning(f"PowerShellホストを再起動します: {e}")
+                    self._terminate(force=True)
+
+        raise PowerShellSessionError(f"PowerShellコマンドの実行に失敗: {last_error}")
+
+    def stream(self, command: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """コマンドを実行し、出力を1行ずつ返すジェネレーター
+
+        timeoutは行と行の間の最大待ち時間。最初の行を受け取る前にホストが
+        クラッシュまたは応答しなくなった場合のみ、再起動して再試行する。
+        反復の間はセッションを占有するため、最後まで読むかclose()すること
+        """
+        timeout = self.timeout if timeout is None else timeout
+        last_error: Optional[Exception] = None
+
+        with self._lock:
+            for _ in range(self.max_retries + 1):
+                received = False
+                try:
+                    self._ensure_started()
+                    for line in self._request_stream(command, timeout):
+                        received = True
+                        yield line
+                    return
+                except PowerShellSessionError:
+                    raise
+                except (TimeoutError, OSError, EOFError) as e:
+                    last_error = e
+                    self.logger.warning(f"PowerShellホストを再起動します: {e}")
+                    self._terminate(force=True)
+                    if received:
+                        # 出力済みの行は取り消せないため再試行しない
+                        raise PowerShellSessionError(
+                            f"出力の途中でPowerShellホストが停止しました: {e}"
+                        )
+
+        raise PowerShellSessionError(f"PowerShellコマンドの実行に失敗: {last_error}")
+
+    def run_json(self, command: str, timeout: Optional[float] = None) -> Any:
+        """コマンドを実行してJSON出力を解析して返す（出力が空の場合はNone）"""
+        output = self.run(command, timeout).strip()
+        if not output:
+            return None
+        return json.loads(output)
+
+    def close(self):
+        """ホストプロセスを終了"""
+        with self._lock:
+            self._terminate()
+
+    def _ensure_started(self):
+        """ホストプロセスが停止していれば起動"""
+        if self.is_running:
+            return
+
+        self._terminate()
+        if self._started_once:
+            self.restart_count += 1
+
+        self._process = subprocess.Popen(
+            self.host_command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+        )
+        self._started_once = True
+        self._responses = queue.Queue()
+        self._reader = threading.Thread(
+            target=self._read_responses,
+            args=(self._process, self._responses),
+            daemon=True,
+        )
+        self._reader.start()
+        self.logger.info(f"PowerShellホストを起動しました (pid: {self._process.pid})")
+
+    def _request(self, command: str, timeout: float) -> str:
+        """リクエストを1行で送信し、同じIDのレスポンスを待つ"""
+        request_id = self._send(command)
+        response = self._receive(request_id, timeout)
+        if not response.get("ok", False):
+            raise PowerShellSessionError(response.get("error", "Unknown error"))
+        return response.get("output") or ""
+
+    def _request_stream(self, command: str, timeout: float) -> Iterator[str]:
+        """ストリーミングのリクエストを送信し、完了のレスポンスまで出力行を返す"""
+        request_id = self._send(command, stream=True)
+        while True:
+            response = self._receive(request_id, timeout)
+            if not response.get("ok", False):
+                raise PowerShellSessionError(response.get("error", "Unknown error"))
+            if response.get("done"):
+                return
+            line = response.get("line")
+            if line:
+                yield line
+
+    def _send(self, command: str, stream: bool = False) -> int:
+        """リクエストを1行で送信してIDを返す"""
+        self._next_id += 1
+        request_id = self._next_id
+        self.request_count += 1
+
+        request = {"id": request_id, "command": command}
+        if stream:
+            request["stream"] = True
+        assert self._process is not None and self._process.stdin is not None
+        self._process.stdin.write(json.dumps(request) + "\n")
+        self._process.stdin.flush()
+        return request_id
+
+    def _receive(self, request_id: int, timeout: float) -> dict:
+        """指定IDの次のレスポンスを待つ"""
+        while True:
+            try:
+                line = self._responses.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"PowerShellホストが{timeout}秒以内に応答しません")
+
+            if line is None:
+                raise EOFError("PowerShellホストが終了しました")
+
+            try:
+                response = json.loads(line)
+            except json.JSONDecodeError:
+                self.logger.debug("フレーム外の出力を無視: %s", line)
+                continue
+
+            if not isinstance(response, dict) or response.get("id") != request_id:
+                # 以前のリクエストに対する遅延レスポンスは破棄
+                continue
+
+            return response
+
+    @staticmethod
+    def _read_responses(process: subprocess.Popen, responses: "queue.Queue"):
+        """標準出力を1行ずつ読み取ってキューへ送る（終了時はNone）"""
+        try:
+            for line in process.stdout:
+                line = line.strip()
+                if line:
+                    responses.put(line)
+        except (OSError, ValueError):
+            pass
+        finally:
+            responses.put(None)
+
+    def _terminate(self, force: bool = False):
+        """ホストプロセスを終了（forceの場合は即座にkill）"""
+        process = self._process
+        self._process = None
+        if process is None:
+            return
+
+        if force and process.poll() is None:
+            process.kill()
+
+        try:
+            if process.stdin:
+                process.stdin.close()
+        except OSError:
+            pass
+
+        if process.poll() is None:
+            try:
+                process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
@@ -0,0 +1,119 @@
+"""
+Scan Coordinator - バッテリー情報スキャンの集約
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+from bluetooth_manager import BluetoothDevice
+from battery_monitor import BatteryMonitor
+
+
+class ScanCoordinator:
+    """重複するスキャン要求を1回のスキャンにまとめるクラス
+
+    - 実行中のスキャンがあれば、その結果を共有する
+    - 鮮度期間内であればキャッシュした結果を返す
+    - force=Trueの場合はキャッシュを使わずにスキャンし、イベント購読中でも全件列挙する
+
+    イベントループのスレッドからのみ呼び出すこと
+    """
+
+    def __init__(
+        self,
+        battery_monitor: BatteryMonitor,
+        freshness_seconds: float = 15.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.battery_monitor = battery_monitor
+        self.freshness_seconds = freshness_seconds
+        self.clock = clock
+
+        self._inflight: Optional[asyncio.Task] = None
+        self._inflight_forced = False  # 実行中のスキャンが全件列挙を伴うか
+        self._last_result: Optional[List[BluetoothDevice]] = None
+        self._last_scan_time: Optional[float] = None
+
+        # 統計情報
+        self.requested_count = 0  # 要求されたスキャン数
+        self.executed_count = 0  # 実際に実行したスキャン数
+        self.cached_count = 0  # キャッシュから返した数
+        self.coalesced_count = 0  # 実行中のスキャンに合流した数
+        self.skipped_count = 0  # 期限が来たデバイスがなく何もしなかった定期更新の数
+
+    async def request_scan(self, force: bool = False) -> List[BluetoothDevice]:
+        """スキャンを要求してデバイス一覧を返す"""
+        self.requested_count += 1
+
+        while self._inflight is not None and not self._inflight.done():
+            if force and not self._inflight_forced:
+                # 全件列挙を伴わない実行中の更新には合流せず、完了後に列挙する
+                await asyncio.shield(self._inflight)
+                continue
+            # 実行中のスキャンは要求後に開始されたものではないが、
+            # 完了時点の結果は強制更新でも十分に新しいため合流する
+            devices = await asyncio.shield(self._inflight)
+            if devices is not None:
+                self.coalesced_count += 1
+                return devices
+            # 合流した定期更新で期限が来たデバイスがなかった場合は改めてスキャンする
+
+        if not force and self.is_fresh():
+            self.cached_count += 1
+            return list(self._last_result)
+
+        self.executed_count += 1
+        self._inflight = asyncio.ensure_future(self._run_scan(force))
+        self._inflight_forced = force
+        return await asyncio.shield(self._inflight)
+
+    async def request_poll(self) -> Optional[List[BluetoothDevice]]:
+        """期限が来たデバイスのみの更新を要求（期限が来たデバイスがない場合はNone）
+
+        実行中のスキャン・更新があれば、それに合流する
+        """
+        self.requested_count += 1
+
+        if self._inflight is not None and not self._inflight.done():
+            self.coalesced_count += 1
+            return await asyncio.shield(self._inflight)
+
+        self._inflight = asyncio.ensure_future(self.battery_monitor.poll_due_devices())
+        self._inflight_forced = False
+        devices = await asyncio.shield(self._inflight)
+        if devices is None:
+            self.skipped_count += 1
+        else:
+            self.executed_count += 1
+        return devices
+
+    async def _run_scan(self, force: bool = False) -> List[BluetoothDevice]:
+        """スキャンを実行して結果をキャッシュ"""
+        devices = await self.battery_monitor.update_battery_levels(force)
+        self._last_result = list(devices)
+        self._last_scan_time = self.clock()
+        return list(devices)
+
+    def is_fresh(self) -> bool:
+        """キャッシュした結果が鮮度期間内かどうか"""
+        if self._last_result is None or self._last_scan_time is None:
+            return False
+        return self.clock() - self._last_scan_time < self.freshness_seconds
+
+    def invalidate(self):
+        """キャッシュを無効化"""
+        self._last_result = None
+        self._last_scan_time = None
+
+    def get_stats(self) -> Dict[str, int]:
+        """スキャン要求の統計情報を取得"""
+        return {
+            "requested": self.requested_count,
+            "executed": self.executed_count,
+            "cached": self.cached_count,
+            "coalesced": self.coalesced_count,
+            "skipped": self.skipped_count,
+            "saved": self.requested_count - self.executed_count,
+        }
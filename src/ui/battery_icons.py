@@ -0,0 +1,276 @@
+"""
+Battery Icons - バッテリーアイコンの描画とキャッシュ
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from PyQt5.QtCore import QPointF, Qt
+from PyQt5.QtGui import QColor, QIcon, QPainter, QPixmap, QPolygonF
+
+# バッテリーの状態
+NORMAL = "normal"
+LOW = "low"
+CRITICAL = "critical"
+UNKNOWN = "unknown"
+CHARGING = "charging"
+
+
+class IconStyle:
+    """アイコンの大きさ・配色・しきい値の定義"""
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        critical_threshold: int,
+        low_threshold: int,
+        fill_width: int,
+        colors: Dict[str, QColor],
+    ):
+        self.width = width
+        self.height = height
+        self.critical_threshold = critical_threshold
+        self.low_threshold = low_threshold
+        self.fill_width = fill_width  # 残量100%のときの塗りつぶし幅
+        self.colors = colors
+
+    def state_for(self, battery_level: Optional[int], charging: bool = False) -> str:
+        """バッテリーレベルと充電状態から表示状態を決定"""
+        if battery_level is None or battery_level < 0:
+            return UNKNOWN
+        if charging:
+            return CHARGING
+        if battery_level <= self.critical_threshold:
+            return CRITICAL
+        if battery_level <= self.low_threshold:
+            return LOW
+        return NORMAL
+
+    def bucket_for(self, battery_level: Optional[int]) -> int:
+        """残量を塗りつぶし幅（ピクセル）に丸めたもの（同じ見た目のアイコンは同じ値）"""
+        if battery_level is None or battery_level < 0:
+            return 0
+        return int(self.fill_width * min(battery_level, 100) / 100)
+
+
+# システムトレイ用 (16x16)
+TRAY_STYLE = IconStyle(
+    16,
+    16,
+    critical_threshold=10,
+    low_threshold=25,
+    fill_width=8,
+    colors={
+        NORMAL: QColor(0, 255, 0),  # 緑
+        LOW: QColor(255, 255, 0),  # 黄
+        CRITICAL: QColor(255, 0, 0),  # 赤
+        CHARGING: QColor(0, 255, 0),
+        UNKNOWN: QColor(128, 128, 128),  # グレー
+    },
+)
+
+# メインウィンドウのデバイスリスト用 (40x20)
+ROW_STYLE = IconStyle(
+    40,
+    20,
+    critical_threshold=15,
+    low_threshold=40,
+    fill_width=28,
+    colors={
+        NORMAL: QColor(52, 199, 89),  # 緑
+        LOW: QColor(255, 159, 10),  # オレンジ
+        CRITICAL: QColor(255, 69, 58),  # 赤
+        CHARGING: QColor(52, 199, 89),
+        UNKNOWN: QColor(80, 80, 80),  # グレー
+    },
+)
+
+STYLES = {"tray": TRAY_STYLE, "row": ROW_STYLE}
+
+
+def render_tray_icon(painter: QPainter, style: IconStyle, state: str, bucket: int):
+    """システムトレイ用アイコンを描画"""
+    if state == UNKNOWN:
+        # 不明状態：グレーのアイコン
+        painter.setBrush(style.colors[UNKNOWN])
+        painter.drawRect(2, 4, 10, 8)
+        painter.drawRect(12, 6, 2, 4)
+        return
+
+    # バッテリー外枠
+    painter.setPen(QColor(0, 0, 0))
+    painter.drawRect(2, 4, 10, 8)
+    painter.drawRect(12, 6, 2, 4)
+
+    # バッテリー残量
+    painter.setBrush(style.colors[state])
+    painter.drawRect(3, 5, bucket, 6)
+
+    if state == CHARGING:
+        _draw_bolt(painter, 2, 4, 10, 8)
+
+
+def render_row_icon(painter: QPainter, style: IconStyle, state: str, bucket: int):
+    """デバイスリスト用アイコンを描画"""
+    # バッテリー外枠 (白色)
+    painter.setPen(QColor(255, 255, 255))
+    painter.setBrush(Qt.NoBrush)
+    painter.drawRect(2, 4, 32, 12)
+    painter.drawRect(34, 7, 4, 6)
+
+    if state == UNKNOWN:
+        # 不明状態：グレーでストライプパターン
+        painter.fillRect(4, 6, 28, 8, style.colors[UNKNOWN])
+        painter.setPen(QColor(120, 120, 120))
+        for i in range(6, 30, 4):
+            painter.drawLine(i, 6, i, 14)
+        return
+
+    painter.fillRect(4, 6, bucket, 8, style.colors[state])
+
+    if state == CHARGING:
+        _draw_bolt(painter, 2, 4, 32, 12)
+
+
+def _draw_bolt(painter: QPainter, x: float, y: float, width: float, height: float):
+    """充電中を示す稲妻マークを枠の中央に描画"""
+    points = [
+        (0.55, 0.0),
+        (0.3, 0.55),
+        (0.5, 0.55),
+        (0.45, 1.0),
+        (0.7, 0.45),
+        (0.5, 0.45),
+    ]
+    bolt_width = height  # 縦横比を保つ
+    left = x + (width - bolt_width) / 2
+    polygon = QPolygonF(
+        [QPointF(left + px * bolt_width, y + py * height) for px, py in points]
+    )
+    painter.setPen(QColor(0, 0, 0, 160))
+    painter.setBrush(QColor(255, 255, 255))
+    painter.drawPolygon(polygon)
+
+
+RENDERERS = {"tray": render_tray_icon, "row": render_row_icon}
+
+
+class BatteryIconCache:
+    """描画済みのバッテリーアイコンを共有するLRUキャッシュ
+
+    (スタイル, 状態, 残量バケット, デバイスピクセル比) ごとに1回だけ描画する。
+    テーマ変更時はinvalidateでキャッシュを破棄する
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.logger = logging.getLogger(__name__)
+        self.max_size = max(1, max_size)
+        self._entries: "OrderedDict[Tuple, Tuple[QPixmap, Optional[QIcon]]]" = (
+            OrderedDict()
+        )
+
+        # 統計情報
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    def pixmap(
+        self,
+        style: str,
+        battery_level: Optional[int],
+        charging: bool = False,
+        device_pixel_ratio: float = 1.0,
+    ) -> QPixmap:
+        """バッテリーアイコンのピクスマップを取得"""
+        return self._lookup(style, battery_level, charging, device_pixel_ratio)[1][0]
+
+    def icon(
+        self,
+        style: str,
+        battery_level: Optional[int],
+        charging: bool = False,
+        device_pixel_ratio: float = 1.0,
+    ) -> QIcon:
+        """バッテリーアイコンのQIconを取得"""
+        key, (pixmap, icon) = self._lookup(
+            style, battery_level, charging, device_pixel_ratio
+        )
+        if icon is None:
+            icon = QIcon(pixmap)
+            self._entries[key] = (pixmap, icon)
+        return icon
+
+    def invalidate(self):
+        """キャッシュを破棄（テーマやパレットの変更時に呼ぶ）"""
+        if self._entries:
+            self.logger.debug("バッテリーアイコンのキャッシュを破棄 (%d件)", self.size)
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        """キャッシュの統計情報を取得"""
+        total = self.hits + self.misses
+        return {
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+    def _lookup(self, style_name, battery_level, charging, device_pixel_ratio):
+        style = STYLES[style_name]
+        state = style.state_for(battery_level, charging)
+        key = (style_name, state, style.bucket_for(battery_level), device_pixel_ratio)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return key, entry
+
+        self.misses += 1
+        pixmap = self._render(style_name, style, state, key[2], device_pixel_ratio)
+        entry = (pixmap, None)
+        self._entries[key] = entry
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return key, entry
+
+    @staticmethod
+    def _render(
+        style_name: str,
+        style: IconStyle,
+        state: str,
+        bucket: int,
+        device_pixel_ratio: float,
+    ) -> QPixmap:
+        """アイコンを描画（デバイスピクセル比に合わせた解像度で描画する）"""
+        pixmap = QPixmap(
+            round(style.width * device_pixel_ratio),
+            round(style.height * device_pixel_ratio),
+        )
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        pixmap.fill(QColor(0, 0, 0, 0))  # 透明
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        RENDERERS[style_name](painter, style, state, bucket)
+        painter.end()
+        return pixmap
+
+
+_shared_cache: Optional[BatteryIconCache] = None
+
+
+def shared_icon_cache() -> BatteryIconCache:
+    """アプリケーション全体で共有するアイコンキャッシュを取得"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = BatteryIconCache()
+    return _shared_cache
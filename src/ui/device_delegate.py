@@ -0,0 +1,135 @@
+"""
+Device Delegate - デバイスリストの行を直接描画するデリゲート
+"""
+
+from PyQt5.QtCore import QRect, QSize, Qt
+from PyQt5.QtGui import QColor, QFont, QPainter
+from PyQt5.QtWidgets import QStyle, QStyledItemDelegate
+from ui.battery_icons import BatteryIconCache, shared_icon_cache
+from ui.device_model import ItemRole, battery_status
+
+
+class DeviceItemDelegate(QStyledItemDelegate):
+    """デバイス名・バッテリーバー・残量・状態を1行に描画するデリゲート
+
+    行ごとのウィジェットやスタイルシートを持たず、表示中の行のみ描画される
+    """
+
+    ROW_HEIGHT = 48
+    MARGIN = 16
+    BATTERY_WIDTH = 40
+    BATTERY_HEIGHT = 20
+    PERCENTAGE_WIDTH = 58
+    STATUS_WIDTH = 80
+
+    BORDER_COLOR = QColor("#404040")
+    HOVER_COLOR = QColor("#3A3A3C")
+    TEXT_COLOR = QColor(255, 255, 255)
+    UNKNOWN_COLOR = QColor("#808080")
+
+    def __init__(self, parent=None, icon_cache: BatteryIconCache = None):
+        super().__init__(parent)
+        self.icon_cache = icon_cache or shared_icon_cache()
+        self.name_font = QFont()
+        self.name_font.setPixelSize(16)
+        self.percentage_font = QFont(self.name_font)
+        self.percentage_font.setBold(True)
+        self.remaining_font = QFont()
+        self.remaining_font.setPixelSize(12)
+        self.paint_count = 0  # 描画した行数（計測用）
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter: QPainter, option, index):
+        item = index.data(ItemRole)
+        if item is None:
+            return
+
+        self.paint_count += 1
+        rect = option.rect
+        painter.save()
+
+        if option.state & QStyle.State_MouseOver:
+            painter.fillRect(rect, self.HOVER_COLOR)
+
+        # 下線
+        painter.setPen(self.BORDER_COLOR)
+        painter.drawLine(rect.left(), rect.bottom(), rect.right(), rect.bottom())
+
+        content = rect.adjusted(self.MARGIN, 0, -self.MARGIN, 0)
+
+        # 状態表示（右端）
+        status_text, status_color = battery_status(item.battery_level, item.is_stale)
+        status_rect = QRect(
+            content.right() - self.STATUS_WIDTH,
+            content.top(),
+            self.STATUS_WIDTH,
+            content.height(),
+        )
+        painter.setFont(self.name_font)
+        painter.setPen(QColor(status_color))
+        painter.drawText(status_rect, Qt.AlignVCenter | Qt.AlignLeft, status_text)
+
+        # バッテリーアイコンと残量（中央）
+        battery_left = (
+            content.left()
+            + (content.width() - self.BATTERY_WIDTH - self.PERCENTAGE_WIDTH) // 2
+        )
+        battery_top = content.top() + (content.height() - self.BATTERY_HEIGHT) // 2
+        painter.drawPixmap(
+            battery_left,
+            battery_top,
+            self.icon_cache.pixmap(
+                "row",
+                item.battery_level,
+                item.is_charging,
+                painter.device().devicePixelRatioF(),
+            ),
+        )
+
+        known = item.battery_level is not None and item.battery_level >= 0
+        percentage_rect = QRect(
+            battery_left + self.BATTERY_WIDTH + 8,
+            content.top(),
+            self.PERCENTAGE_WIDTH - 8,
+            content.height(),
+        )
+        painter.setFont(self.percentage_font if known else self.name_font)
+        # 前回起動時の値は確認するまで淡色で表示
+        painter.setPen(
+            self.TEXT_COLOR if known and not item.is_stale else self.UNKNOWN_COLOR
+        )
+        painter.drawText(
+            percentage_rect,
+            Qt.AlignVCenter | Qt.AlignLeft,
+            f"{item.battery_level}%" if known else "不明",
+        )
+
+        # デバイス名（左端、収まらない場合は省略）
+        name_rect = QRect(
+            content.left(),
+            content.top(),
+            battery_left - content.left() - 8,
+            content.height(),
+        )
+        name_alignment = Qt.AlignVCenter
+        if item.remaining:
+            # 残り使用時間はデバイス名の下に小さく表示
+            name_rect.setHeight(content.height() // 2 + 4)
+            name_alignment = Qt.AlignBottom
+            remaining_rect = QRect(name_rect)
+            remaining_rect.moveTop(name_rect.bottom() + 1)
+            remaining_rect.setHeight(content.height() - name_rect.height())
+            painter.setFont(self.remaining_font)
+            painter.setPen(self.UNKNOWN_COLOR)
+            painter.drawText(remaining_rect, Qt.AlignTop | Qt.AlignLeft, item.remaining)
+
+        painter.setFont(self.name_font)
+        painter.setPen(self.TEXT_COLOR)
+        name = painter.fontMetrics().elidedText(
+            item.name, Qt.ElideRight, name_rect.width()
+        )
+        painter.drawText(name_rect, name_alignment | Qt.AlignLeft, name)
+
+        painter.restore()
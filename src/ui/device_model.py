@@ -0,0 +1,298 @@
+"""
+Device Model - デバイスリストのモデル
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from PyQt5.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QSortFilterProxyModel,
+    Qt,
+)
+from bluetooth_manager import BluetoothDevice
+from battery_events import BatteryEvent
+
+# カスタムロール
+ItemRole = Qt.UserRole + 1  # DeviceItem全体（デリゲート用）
+AddressRole = Qt.UserRole + 2
+BatteryLevelRole = Qt.UserRole + 3
+StatusRole = Qt.UserRole + 4
+DeviceTypeRole = Qt.UserRole + 5
+RemainingRole = Qt.UserRole + 6
+
+# この信頼度未満の残り時間推定は表示しない
+MIN_REMAINING_CONFIDENCE = 0.3
+
+
+def battery_status(
+    battery_level: Optional[int], is_stale: bool = False
+) -> Tuple[str, str]:
+    """バッテリーレベルに応じた (状態テキスト, 色) を返す"""
+    if is_stale:
+        # 前回起動時の値（スキャンで確認するまでの表示）
+        return "前回の値", "#8E8E93"
+    if battery_level is not None and 0 <= battery_level <= 15:
+        # 赤
+        return ("低下" if battery_level <= 10 else "接続中"), "#FF453A"
+    elif battery_level is None or battery_level < 0:
+        return "情報取得中", "#808080"  # グレー
+    else:
+        return "接続中", "#34C759"  # 緑
+
+
+def format_remaining(estimate) -> Optional[str]:
+    """残り使用時間の推定値を表示用の文字列にする（表示しない場合はNone）"""
+    if estimate is None or estimate.confidence < MIN_REMAINING_CONFIDENCE:
+        return None
+
+    hours = estimate.hours
+    if hours < 1:
+        minutes = max(10, int(round(hours * 6)) * 10)
+        return f"残り約{minutes}分"
+    elif hours < 48:
+        return f"残り約{int(round(hours))}時間"
+    else:
+        return f"残り約{int(round(hours / 24))}日"
+
+
+class DeviceItem:
+    """モデルが保持するデバイス情報のスナップショット
+
+    BluetoothDeviceはワーカースレッドで更新されるため、表示用の値を複製して保持する
+    """
+
+    __slots__ = (
+        "address",
+        "name",
+        "device_type",
+        "battery_level",
+        "is_connected",
+        "is_charging",
+        "remaining",
+        "is_stale",
+    )
+
+    def __init__(
+        self,
+        address: str,
+        name: str,
+        device_type: str,
+        battery_level: Optional[int],
+        is_connected: bool,
+        is_charging: bool = False,
+        remaining: Optional[str] = None,
+        is_stale: bool = False,
+    ):
+        self.address = address
+        self.name = name
+        self.device_type = device_type
+        self.battery_level = battery_level
+        self.is_connected = is_connected
+        self.is_charging = is_charging
+        self.remaining = remaining  # 残り使用時間の表示文字列
+        self.is_stale = is_stale  # 前回起動時の値（未確認）
+
+    @classmethod
+    def from_device(cls, device: BluetoothDevice) -> "DeviceItem":
+        return cls(
+            device.address,
+            device.name,
+            device.device_type,
+            device.battery_level,
+            device.is_connected,
+            getattr(device, "is_charging", False),
+            format_remaining(getattr(device, "time_remaining", None)),
+            getattr(device, "is_stale", False),
+        )
+
+    def values(self) -> tuple:
+        return (
+            self.name,
+            self.device_type,
+            self.battery_level,
+            self.is_connected,
+            self.is_charging,
+            self.remaining,
+            self.is_stale,
+        )
+
+    @property
+    def status(self) -> str:
+        return battery_status(self.battery_level, self.is_stale)[0]
+
+
+class DeviceListModel(QAbstractListModel):
+    """BatteryMonitorから取得したデバイス一覧のモデル
+
+    set_devicesはアドレスをキーに差分を取り、変更のあった行のみ通知する
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items: List[DeviceItem] = []
+        self._rows: Dict[str, int] = {}  # address: row
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._items)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._items):
+            return None
+
+        item = self._items[index.row()]
+        if role == ItemRole:
+            return item
+        elif role == Qt.DisplayRole:
+            return item.name
+        elif role == AddressRole:
+            return item.address
+        elif role == BatteryLevelRole:
+            # 不明は-1として並べ替えで末尾になるようにする
+            return item.battery_level if item.battery_level is not None else -1
+        elif role == StatusRole:
+            return item.status
+        elif role == DeviceTypeRole:
+            return item.device_type
+        elif role == RemainingRole:
+            return item.remaining
+        elif role == Qt.ToolTipRole:
+            tooltip = f"{item.name} ({item.device_type})\n{item.address}"
+            if item.remaining:
+                tooltip += f"\n{item.remaining}"
+            if item.is_stale:
+                tooltip += "\n前回起動時の値（確認中）"
+            return tooltip
+        return None
+
+    def roleNames(self):
+        roles = super().roleNames()
+        roles[AddressRole] = b"address"
+        roles[BatteryLevelRole] = b"batteryLevel"
+        roles[StatusRole] = b"status"
+        roles[DeviceTypeRole] = b"deviceType"
+        roles[RemainingRole] = b"remaining"
+        return roles
+
+    def device_at(self, row: int) -> Optional[DeviceItem]:
+        """指定行のデバイス情報を取得"""
+        if 0 <= row < len(self._items):
+            return self._items[row]
+        return None
+
+    def row_of(self, address: str) -> Optional[int]:
+        """指定アドレスの行番号を取得"""
+        return self._rows.get(address)
+
+    def set_devices(self, devices: List[BluetoothDevice]):
+        """デバイス一覧を反映（追加・削除・変更のあった行のみ通知）"""
+        incoming: Dict[str, DeviceItem] = {}
+        for device in devices:
+            incoming[device.address] = DeviceItem.from_device(device)
+
+        # 切断されたデバイスの行を削除
+        self._remove_addresses(
+            [item.address for item in self._items if item.address not in incoming]
+        )
+        self._upsert(incoming.values())
+
+    def add_devices(self, devices: List[BluetoothDevice]):
+        """表示していないデバイスのみ末尾に追加（既存の行は変更しない）"""
+        self._upsert(
+            DeviceItem.from_device(device)
+            for device in devices
+            if device.address not in self._rows
+        )
+
+    def apply_events(self, events: List[BatteryEvent]):
+        """変化イベントを反映（イベントのあったデバイスの行のみ調べる）"""
+        removed = []
+        updated = []
+        for event in events:
+            if event.kind == BatteryEvent.DISCONNECTED:
+                removed.append(event.address)
+            else:
+                updated.append(DeviceItem.from_device(event.device))
+        self._remove_addresses(removed)
+        self._upsert(updated)
+
+    def _remove_addresses(self, addresses: List[str]):
+        """指定アドレスの行を削除（連続する行はまとめて削除）"""
+        removed_rows = sorted(
+            row for row in map(self._rows.get, addresses) if row is not None
+        )
+        if not removed_rows:
+            return
+        for first, last in reversed(_contiguous_ranges(removed_rows)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._items[first : last + 1]
+            self.endRemoveRows()
+        self._rows = {item.address: row for row, item in enumerate(self._items)}
+
+    def _upsert(self, items: Iterable[DeviceItem]):
+        """既存の行は変更があれば更新し、新しいデバイスは末尾に追加"""
+        changed_rows = []
+        added: List[DeviceItem] = []
+        for new_item in items:
+            row = self._rows.get(new_item.address)
+            if row is None:
+                added.append(new_item)
+            elif new_item.values() != self._items[row].values():
+                self._items[row] = new_item
+                changed_rows.append(row)
+        for first, last in _contiguous_ranges(sorted(changed_rows)):
+            self.dataChanged.emit(self.index(first), self.index(last))
+
+        if added:
+            first = len(self._items)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            for item in added:
+                self._rows[item.address] = len(self._items)
+                self._items.append(item)
+            self.endInsertRows()
+
+    def clear(self):
+        """すべての行を削除"""
+        self.beginResetModel()
+        self._items = []
+        self._rows = {}
+        self.endResetModel()
+
+
+def _contiguous_ranges(rows: List[int]) -> List[Tuple[int, int]]:
+    """昇順の行番号リストを連続区間 (first, last) のリストにまとめる"""
+    ranges: List[Tuple[int, int]] = []
+    for row in rows:
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1] = (ranges[-1][0], row)
+        else:
+            ranges.append((row, row))
+    return ranges
+
+
+class DeviceSortFilterProxyModel(QSortFilterProxyModel):
+    """デバイス一覧の並べ替え・絞り込みを行うプロキシモデル"""
+
+    SORT_ROLES = {
+        "name": Qt.DisplayRole,
+        "battery": BatteryLevelRole,
+        "type": DeviceTypeRole,
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setDynamicSortFilter(True)
+        self.setSortCaseSensitivity(Qt.CaseInsensitive)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.setFilterRole(Qt.DisplayRole)
+        self.sort_by("name")
+
+    def sort_by(self, key: str, order: Qt.SortOrder = Qt.AscendingOrder):
+        """並べ替えの基準を設定 ("name" / "battery" / "type")"""
+        self.setSortRole(self.SORT_ROLES[key])
+        self.sort(0, order)
+
+    def set_filter_text(self, text: str):
+        """デバイス名で絞り込み（空文字列で解除）"""
+        self.setFilterFixedString(text)
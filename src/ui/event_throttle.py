@@ -0,0 +1,62 @@
+"""
+Event Throttle - 変化イベントをまとめて一定のフレームレートでUIに反映
+"""
+
+from typing import List
+from PyQt5.QtCore import QElapsedTimer, QObject, QTimer, pyqtSignal
+from battery_events import BatteryEvent, merge_events
+
+
+class EventThrottle(QObject):
+    """短時間に届いた変化イベントをまとめ、最大max_fps回/秒でflushedを発行するクラス
+
+    同じデバイスのイベントは最終状態の1件にまとめられるため、
+    大量の読み取り結果が届いても再描画は1フレームにつき1回になる
+    """
+
+    flushed = pyqtSignal(list)  # List[BatteryEvent]（デバイスごとに1件）
+
+    def __init__(self, max_fps: float = 30.0, parent=None):
+        super().__init__(parent)
+        self.min_interval = int(1000 / max_fps)  # ミリ秒
+        self._pending: List[BatteryEvent] = []
+        self._since_flush = QElapsedTimer()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+        # 統計情報
+        self.received_count = 0  # 受け取ったイベント数
+        self.emitted_count = 0  # まとめた後に発行したイベント数
+        self.flush_count = 0  # flushedの発行回数
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def push(self, events: List[BatteryEvent]):
+        """イベントを追加（前回の発行から最短間隔が経過した後にまとめて発行する）"""
+        if not events:
+            return
+        self._pending.extend(events)
+        self.received_count += len(events)
+        if self._timer.isActive():
+            return
+
+        delay = 0
+        if self._since_flush.isValid():
+            delay = max(0, self.min_interval - self._since_flush.elapsed())
+        self._timer.start(delay)
+
+    def flush(self):
+        """保留中のイベントをまとめて直ちに発行"""
+        self._timer.stop()
+        if not self._pending:
+            return
+
+        events = merge_events(self._pending)
+        self._pending = []
+        self._since_flush.start()
+        self.flush_count += 1
+        self.emitted_count += len(events)
+        self.flushed.emit(events)
@@ -8,16 +8,22 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QHBoxLayout,
     QLabel,
+    QLineEdit,
+    QListView,
+    QAbstractItemView,
     QPushButton,
     QFrame,
-    QScrollArea,
     QSpacerItem,
     QSizePolicy,
     QApplication,
 )
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal
-from PyQt5.QtGui import QFont, QPalette, QColor, QIcon, QPainter, QPixmap
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QFont, QPalette, QIcon
 from battery_monitor import BatteryMonitor
+from async_worker import BatteryRefreshWorker
+from ui.device_model import DeviceListModel, DeviceSortFilterProxyModel
+from ui.device_delegate import DeviceItemDelegate
+from ui.event_throttle import EventThrottle
 
 
 class ModernButton(QPushButton):
@@ -25,8 +31,7 @@ class ModernButton(QPushButton):
 
     def __init__(self, text, parent=None):
         super().__init__(text, parent)
-        self.setStyleSheet(
-            """
+        self.setStyleSheet("""
             QPushButton {
                 background-color: #404040;
                 color: white;
@@ -42,176 +47,7 @@ class ModernButton(QPushButton):
             QPushButton:pressed {
                 background-color: #303030;
             }
-        """
-        )
-
-
-class BatteryIcon(QLabel):
-    """バッテリーアイコンウィジェット"""
-
-    def __init__(self, battery_level=None, parent=None):
-        super().__init__(parent)
-        self.battery_level = battery_level
-        self.setFixedSize(40, 20)
-        self.update_icon()
-
-    def update_icon(self):
-        """バッテリーレベルに応じたアイコンを生成"""
-        pixmap = QPixmap(40, 20)
-        pixmap.fill(QColor(0, 0, 0, 0))
-
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-
-        # バッテリー外枠 (白色)
-        painter.setPen(QColor(255, 255, 255))
-        painter.drawRect(2, 4, 32, 12)
-        painter.drawRect(34, 7, 4, 6)
-
-        if self.battery_level is not None and self.battery_level >= 0:
-            # バッテリーレベルに応じた色と幅
-            if self.battery_level <= 15:
-                color = QColor(255, 69, 58)  # 赤
-            elif self.battery_level <= 40:
-                color = QColor(255, 159, 10)  # オレンジ
-            else:
-                color = QColor(52, 199, 89)  # 緑
-
-            # バッテリー残量を表示
-            fill_width = int(28 * self.battery_level / 100)
-            painter.fillRect(4, 6, fill_width, 8, color)
-        else:
-            # 不明状態：グレーでストライプパターン
-            painter.fillRect(4, 6, 28, 8, QColor(80, 80, 80))
-            # ストライプを追加して不明状態を示す
-            painter.setPen(QColor(120, 120, 120))
-            for i in range(6, 30, 4):
-                painter.drawLine(i, 6, i, 14)
-
-        painter.end()
-        self.setPixmap(pixmap)
-
-    def set_battery_level(self, level):
-        """バッテリーレベルを設定して更新"""
-        self.battery_level = level
-        self.update_icon()
-
-
-class DeviceRow(QFrame):
-    """デバイス情報行のウィジェット"""
-
-    def __init__(self, device_name, battery_level, status, parent=None):
-        super().__init__(parent)
-        self.device_name = device_name
-        self.battery_level = battery_level
-        self.status = status
-
-        self.setFrameStyle(QFrame.NoFrame)
-        self.setStyleSheet(
-            """
-            DeviceRow {
-                background-color: transparent;
-                border-bottom: 1px solid #404040;
-                padding: 8px 0px;
-            }
-        """
-        )
-
-        self.setup_ui()
-
-    def setup_ui(self):
-        """UI要素を設定"""
-        layout = QHBoxLayout()
-        layout.setContentsMargins(16, 12, 16, 12)
-
-        # デバイス名
-        name_label = QLabel(self.device_name)
-        name_label.setStyleSheet(
-            """
-            QLabel {
-                color: white;
-                font-size: 16px;
-                font-weight: normal;
-            }
-        """
-        )
-        name_label.setMinimumWidth(150)
-        layout.addWidget(name_label)
-
-        # スペーサー
-        layout.addItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
-
-        # バッテリーアイコン
-        battery_icon = BatteryIcon(self.battery_level)
-        layout.addWidget(battery_icon)
-
-        # バッテリー残量パーセンテージ
-        if self.battery_level is not None and self.battery_level >= 0:
-            percentage_label = QLabel(f"{self.battery_level}%")
-            percentage_label.setStyleSheet(
-                """
-                QLabel {
-                    color: white;
-                    font-size: 16px;
-                    font-weight: bold;
-                    margin-left: 8px;
-                }
-            """
-            )
-            percentage_label.setMinimumWidth(50)
-            layout.addWidget(percentage_label)
-        else:
-            # バッテリー情報が不明の場合
-            percentage_label = QLabel("不明")
-            percentage_label.setStyleSheet(
-                """
-                QLabel {
-                    color: #808080;
-                    font-size: 16px;
-                    font-weight: normal;
-                    margin-left: 8px;
-                }
-            """
-            )
-            percentage_label.setMinimumWidth(50)
-            layout.addWidget(percentage_label)
-
-        # スペーサー
-        layout.addItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
-
-        # 状態表示
-        status_label = QLabel(self.status)
-        if (
-            self.battery_level is not None
-            and self.battery_level >= 0
-            and self.battery_level <= 15
-        ):
-            status_color = "#FF453A"  # 赤
-            if self.battery_level <= 10:
-                status_text = "低下"
-            else:
-                status_text = "接続中"
-        elif self.battery_level is None or self.battery_level < 0:
-            status_color = "#808080"  # グレー
-            status_text = "情報取得中"
-        else:
-            status_color = "#34C759"  # 緑
-            status_text = "接続中"
-
-        status_label.setText(status_text)
-        status_label.setStyleSheet(
-            f"""
-            QLabel {{
-                color: {status_color};
-                font-size: 16px;
-                font-weight: normal;
-            }}
-        """
-        )
-        status_label.setMinimumWidth(80)
-        layout.addWidget(status_label)
-
-        self.setLayout(layout)
+        """)
 
 
 class ConnectedMainWindow(QWidget):
@@ -222,20 +58,41 @@ class ConnectedMainWindow(QWidget):
     settings_requested = pyqtSignal()
     close_requested = pyqtSignal()
 
-    def __init__(self, battery_monitor: BatteryMonitor, parent=None):
+    # この台数以上のデバイスがある場合に絞り込み欄を表示する
+    FILTER_THRESHOLD = 20
+    # 変化イベントを反映する最大フレームレート
+    MAX_FPS = 30
+    LOADING_TEXT = "Bluetoothデバイスを検索しています…"
+    NO_DEVICE_TEXT = "接続されているBluetoothデバイスがありません"
+
+    def __init__(
+        self,
+        battery_monitor: BatteryMonitor,
+        refresh_worker: BatteryRefreshWorker = None,
+        parent=None,
+    ):
         super().__init__(parent)
         self.battery_monitor = battery_monitor
-        self.device_rows = []
+
+        # バッテリー情報の取得はワーカースレッドで行い、結果をシグナルで受け取る
+        self.refresh_worker = refresh_worker or BatteryRefreshWorker(
+            battery_monitor, parent=self
+        )
+        self.refresh_worker.devices_updated.connect(self.update_device_list)
+        self.refresh_worker.refresh_failed.connect(self.on_refresh_failed)
+        self.refresh_worker.devices_found.connect(self.add_found_devices)
+        # 初回のデバイス一覧を受け取るまでは「検索中」と表示する
+        self.loading = True
+
+        # 定期更新の変化イベントはまとめて最大30回/秒で反映する
+        self.event_throttle = EventThrottle(self.MAX_FPS, self)
+        self.event_throttle.flushed.connect(self.apply_battery_events)
+        self.refresh_worker.battery_events.connect(self.event_throttle.push)
 
         self.setup_window()
         self.setup_ui()
         self.apply_dark_theme()
 
-        # 自動更新タイマー
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.refresh_device_list)
-        self.update_timer.start(30000)  # 30秒間隔
-
     def setup_window(self):
         """ウィンドウの基本設定"""
         self.setWindowTitle("Connected")
@@ -259,13 +116,40 @@ class ConnectedMainWindow(QWidget):
         column_header = self.create_column_header()
         main_layout.addWidget(column_header)
 
-        # デバイスリストエリア
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setFrameStyle(QFrame.NoFrame)
-        self.scroll_area.setStyleSheet(
-            """
-            QScrollArea {
+        # デバイスリストエリア（表示中の行のみデリゲートで描画する）
+        self.device_model = DeviceListModel(self)
+        self.proxy_model = DeviceSortFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.device_model)
+
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("デバイス名で絞り込み")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.setStyleSheet("""
+            QLineEdit {
+                background-color: #1C1C1E;
+                color: white;
+                border: none;
+                border-bottom: 1px solid #404040;
+                padding: 8px 16px;
+                font-size: 14px;
+            }
+        """)
+        self.filter_edit.textChanged.connect(self.proxy_model.set_filter_text)
+        self.filter_edit.hide()
+        main_layout.addWidget(self.filter_edit)
+
+        self.device_view = QListView()
+        self.device_view.setModel(self.proxy_model)
+        self.device_delegate = DeviceItemDelegate(self.device_view)
+        self.device_view.setItemDelegate(self.device_delegate)
+        self.device_view.setUniformItemSizes(True)
+        self.device_view.setSelectionMode(QAbstractItemView.NoSelection)
+        self.device_view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.device_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.device_view.setMouseTracking(True)
+        self.device_view.setFrameStyle(QFrame.NoFrame)
+        self.device_view.setStyleSheet("""
+            QListView {
                 background-color: #2C2C2E;
                 border: none;
             }
@@ -278,17 +162,20 @@ class ConnectedMainWindow(QWidget):
                 background-color: #606060;
                 border-radius: 4px;
             }
-        """
-        )
-
-        self.device_list_widget = QWidget()
-        self.device_list_layout = QVBoxLayout()
-        self.device_list_layout.setContentsMargins(0, 0, 0, 0)
-        self.device_list_layout.setSpacing(0)
-        self.device_list_widget.setLayout(self.device_list_layout)
+        """)
+        main_layout.addWidget(self.device_view)
 
-        self.scroll_area.setWidget(self.device_list_widget)
-        main_layout.addWidget(self.scroll_area)
+        # デバイスが見つからない場合（初回スキャン中を含む）の表示
+        self.no_device_label = QLabel(self.LOADING_TEXT)
+        self.no_device_label.setAlignment(Qt.AlignHCenter | Qt.AlignTop)
+        self.no_device_label.setStyleSheet("""
+            QLabel {
+                color: #8E8E93;
+                font-size: 16px;
+                padding: 40px;
+            }
+        """)
+        main_layout.addWidget(self.no_device_label)
 
         # ボタンエリア
         button_area = self.create_button_area()
@@ -296,36 +183,32 @@ class ConnectedMainWindow(QWidget):
 
         self.setLayout(main_layout)
 
-        # 初期データを読み込み
-        self.refresh_device_list()
+        # 初期データはアプリケーションがバックグラウンドで取得する（表示を待たせない）
+        self.update_placeholder()
 
     def create_header(self):
         """ヘッダーエリアを作成"""
         header = QFrame()
         header.setFixedHeight(60)
-        header.setStyleSheet(
-            """
+        header.setStyleSheet("""
             QFrame {
                 background-color: #1C1C1E;
                 border-bottom: 1px solid #404040;
             }
-        """
-        )
+        """)
 
         layout = QHBoxLayout()
         layout.setContentsMargins(20, 0, 20, 0)
 
         # アプリタイトル
         title_label = QLabel("Connected")
-        title_label.setStyleSheet(
-            """
+        title_label.setStyleSheet("""
             QLabel {
                 color: white;
                 font-size: 24px;
                 font-weight: bold;
             }
-        """
-        )
+        """)
         layout.addWidget(title_label)
 
         # スペーサー
@@ -334,8 +217,7 @@ class ConnectedMainWindow(QWidget):
         # 設定ボタン（歯車アイコン）
         settings_btn = QPushButton("⚙")
         settings_btn.setFixedSize(40, 40)
-        settings_btn.setStyleSheet(
-            """
+        settings_btn.setStyleSheet("""
             QPushButton {
                 background-color: transparent;
                 color: #8E8E93;
@@ -347,8 +229,7 @@ class ConnectedMainWindow(QWidget):
                 background-color: #404040;
                 color: white;
             }
-        """
-        )
+        """)
         settings_btn.clicked.connect(self.settings_requested.emit)
         layout.addWidget(settings_btn)
 
@@ -359,58 +240,50 @@ class ConnectedMainWindow(QWidget):
         """カラムヘッダーを作成"""
         header = QFrame()
         header.setFixedHeight(50)
-        header.setStyleSheet(
-            """
+        header.setStyleSheet("""
             QFrame {
                 background-color: #1C1C1E;
                 border-bottom: 1px solid #404040;
             }
-        """
-        )
+        """)
 
         layout = QHBoxLayout()
         layout.setContentsMargins(16, 0, 16, 0)
 
         # カラムタイトル
         device_label = QLabel("デバイス名")
-        device_label.setStyleSheet(
-            """
+        device_label.setStyleSheet("""
             QLabel {
                 color: #8E8E93;
                 font-size: 14px;
                 font-weight: bold;
             }
-        """
-        )
+        """)
         device_label.setMinimumWidth(150)
         layout.addWidget(device_label)
 
         layout.addItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
 
         battery_label = QLabel("バッテリー残量")
-        battery_label.setStyleSheet(
-            """
+        battery_label.setStyleSheet("""
             QLabel {
                 color: #8E8E93;
                 font-size: 14px;
                 font-weight: bold;
             }
-        """
-        )
+        """)
         layout.addWidget(battery_label)
 
         layout.addItem(QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum))
 
         status_label = QLabel("状態")
-        status_label.setStyleSheet(
-            """
+        status_label.setStyleSheet("""
             QLabel {
                 color: #8E8E93;
                 font-size: 14px;
                 font-weight: bold;
             }
-        """
-        )
+        """)
         status_label.setMinimumWidth(80)
         layout.addWidget(status_label)
 
@@ -421,14 +294,12 @@ class ConnectedMainWindow(QWidget):
         """ボタンエリアを作成"""
         button_area = QFrame()
         button_area.setFixedHeight(120)
-        button_area.setStyleSheet(
-            """
+        button_area.setStyleSheet("""
             QFrame {
                 background-color: #1C1C1E;
                 border-top: 1px solid #404040;
             }
-        """
-        )
+        """)
 
         layout = QVBoxLayout()
         layout.setContentsMargins(20, 20, 20, 20)
@@ -436,7 +307,7 @@ class ConnectedMainWindow(QWidget):
 
         # 再読み込みボタン
         refresh_btn = ModernButton("再読み込み")
-        refresh_btn.clicked.connect(self.refresh_device_list)
+        refresh_btn.clicked.connect(self.force_refresh_device_list)
         layout.addWidget(refresh_btn)
 
         # 下部ボタン行
@@ -458,77 +329,67 @@ class ConnectedMainWindow(QWidget):
 
     def apply_dark_theme(self):
         """ダークテーマを適用"""
-        self.setStyleSheet(
-            """
+        self.setStyleSheet("""
             QWidget {
                 background-color: #2C2C2E;
                 color: white;
                 font-family: "Segoe UI", "Yu Gothic UI", "Meiryo UI";
             }
-        """
-        )
+        """)
 
-    def refresh_device_list(self):
-        """デバイスリストを更新"""
-        # 既存のデバイス行をクリア
-        self.clear_device_list()
-
-        # 非同期でデバイス情報を取得
-        try:
-            import asyncio
-
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                devices = loop.run_until_complete(
-                    self.battery_monitor.update_battery_levels()
-                )
-            finally:
-                loop.close()
-        except Exception as e:
-            print(f"デバイス情報取得エラー: {e}")
-            devices = []
-
-        if not devices:
-            # デバイスが見つからない場合
-            no_device_label = QLabel("接続されているBluetoothデバイスがありません")
-            no_device_label.setStyleSheet(
-                """
-                QLabel {
-                    color: #8E8E93;
-                    font-size: 16px;
-                    padding: 40px;
-                    text-align: center;
-                }
-            """
-            )
-            self.device_list_layout.addWidget(no_device_label)
-        else:
-            # デバイス情報を表示
-            for device in devices:
-                battery_level = (
-                    device.battery_level if device.battery_level is not None else -1
-                )
-                status_text = "接続中" if device.is_connected else "切断"
-
-                device_row = DeviceRow(device.name, battery_level, status_text)
-                self.device_list_layout.addWidget(device_row)
-                self.device_rows.append(device_row)
-
-        # 下部にスペーサーを追加
-        self.device_list_layout.addItem(
-            QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding)
-        )
+    def refresh_device_list(self, force: bool = False):
+        """デバイスリストの更新を要求（結果はupdate_device_listで反映）"""
+        self.refresh_worker.request_refresh(force)
+
+    def force_refresh_device_list(self):
+        """キャッシュを使わずにデバイスリストを更新"""
+        self.refresh_device_list(force=True)
+
+    def update_device_list(self, devices):
+        """取得したデバイス情報でデバイスリストを更新
+
+        モデルがアドレスをキーに差分を取り、変更のあった行のみ再描画される
+        """
+        self.loading = False
+        self.device_model.set_devices(devices)
+        self.update_placeholder()
+
+    def show_last_known_devices(self, devices):
+        """前回起動時のデバイス一覧を表示（初回スキャンの結果で置き換えられる）"""
+        self.device_model.set_devices(devices)
+        self.update_placeholder()
+
+    def add_found_devices(self, devices):
+        """スキャンの途中で見つかったデバイスを追加（表示済みの行は完了時に更新）"""
+        self.device_model.add_devices(devices)
+        self.update_placeholder()
+
+    def apply_battery_events(self, events):
+        """まとめられた変化イベントをデバイスリストに反映（変化のあった行のみ調べる）"""
+        self.loading = False
+        self.device_model.apply_events(events)
+        self.update_placeholder()
+
+    def on_refresh_failed(self, error):
+        """更新失敗時の処理（検索中の表示を終える）"""
+        if self.loading:
+            self.loading = False
+            self.update_placeholder()
 
     def clear_device_list(self):
         """デバイスリストをクリア"""
-        while self.device_list_layout.count():
-            child = self.device_list_layout.takeAt(0)
-            if child and child.widget():
-                widget = child.widget()
-                if widget:
-                    widget.deleteLater()
-        self.device_rows.clear()
+        self.device_model.clear()
+        self.update_placeholder()
+
+    def update_placeholder(self):
+        """デバイス数に応じてメッセージと絞り込み欄の表示を切り替え"""
+        count = self.device_model.rowCount()
+        self.no_device_label.setText(
+            self.LOADING_TEXT if self.loading else self.NO_DEVICE_TEXT
+        )
+        self.no_device_label.setVisible(count == 0)
+        self.device_view.setVisible(count > 0)
+        self.filter_edit.setVisible(count >= self.FILTER_THRESHOLD)
 
 
 # テスト用のメイン関数
@@ -544,5 +405,6 @@ if __name__ == "__main__":
     # メインウィンドウを表示
     window = ConnectedMainWindow(battery_monitor)
     window.show()
+    window.refresh_device_list()
 
     sys.exit(app.exec_())
@@ -17,9 +17,13 @@ from PyQt5.QtWidgets import (
     QMessageBox,
 )
 from PyQt5.QtCore import QTimer, Qt, pyqtSignal
-from PyQt5.QtGui import QIcon, QPixmap, QPainter, QFont, QColor
+from PyQt5.QtGui import QFont
 from battery_monitor import BatteryMonitor
+from async_worker import BatteryRefreshWorker
 from utils.config import ConfigManager
+from ui.battery_icons import shared_icon_cache
+from ui.device_model import format_remaining
+from ui.event_throttle import EventThrottle
 
 
 class SystemTrayIcon(QSystemTrayIcon):
@@ -28,11 +32,13 @@ class SystemTrayIcon(QSystemTrayIcon):
     # シグナル定義
     show_main_window = pyqtSignal()
     quit_application = pyqtSignal()
+    manual_refresh_done = pyqtSignal(str)  # エラーメッセージ（成功時は空文字列）
 
     def __init__(
         self,
         battery_monitor: BatteryMonitor,
         config_manager: ConfigManager,
+        refresh_worker: BatteryRefreshWorker = None,
         parent=None,
     ):
         super().__init__(parent)
@@ -40,6 +46,21 @@ class SystemTrayIcon(QSystemTrayIcon):
         self.logger = logging.getLogger(__name__)
         self.battery_monitor = battery_monitor
         self.config_manager = config_manager
+        self.icon_cache = shared_icon_cache()
+
+        # 手動更新はワーカースレッドで実行し、完了をシグナルで受け取る
+        self.refresh_worker = refresh_worker or BatteryRefreshWorker(
+            battery_monitor, parent=self
+        )
+        self.refresh_worker.devices_updated.connect(self.on_refresh_finished)
+        # 手動更新の結果は、その要求のFutureの完了でのみ通知する
+        self.manual_refresh_future = None
+        self.manual_refresh_done.connect(self.on_manual_refresh_done)
+
+        # 定期更新の変化イベントはまとめて最大2回/秒でアイコンに反映する
+        self.event_throttle = EventThrottle(max_fps=2, parent=self)
+        self.event_throttle.flushed.connect(self.on_battery_events)
+        self.refresh_worker.battery_events.connect(self.event_throttle.push)
 
         # アイコンとメニューの初期化
         self.setup_icon()
@@ -58,7 +79,8 @@ class SystemTrayIcon(QSystemTrayIcon):
         # 初期アイコンを設定（実際のアイコンファイルまたは生成されたアイコン）
         icon = self.create_battery_icon(None)
         self.setIcon(icon)
-        self.setToolTip("Connected - Bluetoothデバイス バッテリー監視")
+        # 初回スキャンが完了するまでの表示
+        self.setToolTip("Connected - Bluetoothデバイスを検索しています…")
 
     def setup_menu(self):
         """コンテキストメニューを設定"""
@@ -100,72 +122,48 @@ class SystemTrayIcon(QSystemTrayIcon):
 
         self.setContextMenu(menu)
 
-    def create_battery_icon(self, battery_level=None):
-        """バッテリーレベルに応じたアイコンを生成"""
-        # 16x16のアイコンを生成
-        pixmap = QPixmap(16, 16)
-        pixmap.fill(QColor(0, 0, 0, 0))  # 透明
+    def create_battery_icon(self, battery_level=None, charging=False):
+        """バッテリーレベルに応じたアイコンを取得（描画済みのものは共有キャッシュから返す）"""
+        app = QApplication.instance()
+        device_pixel_ratio = app.devicePixelRatio() if app is not None else 1.0
+        return self.icon_cache.icon("tray", battery_level, charging, device_pixel_ratio)
 
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
+    def update_icon(self, devices):
+        """デバイス状況に応じてアイコンとツールチップを更新"""
+        if not devices:
+            # デバイスが接続されていない
+            self.setIcon(self.create_battery_icon(None))
+            self.setToolTip("Connected - 接続デバイスなし")
+            return
 
-        if battery_level is None:
-            # 不明状態：グレーのアイコン
-            painter.setBrush(QColor(128, 128, 128))
-            painter.drawRect(2, 4, 10, 8)
-            painter.drawRect(12, 6, 2, 4)
+        # 最もバッテリーレベルの低いデバイスをアイコンに表示
+        known = [
+            device
+            for device in devices
+            if device.battery_level is not None and device.battery_level >= 0
+        ]
+        if known:
+            lowest = min(known, key=lambda device: device.battery_level)
+            icon = self.create_battery_icon(lowest.battery_level, lowest.is_charging)
         else:
-            # バッテリーレベルに応じた色
-            if battery_level <= 10:
-                color = QColor(255, 0, 0)  # 赤
-            elif battery_level <= 25:
-                color = QColor(255, 255, 0)  # 黄
-            else:
-                color = QColor(0, 255, 0)  # 緑
-
-            # バッテリー外枠
-            painter.setPen(QColor(0, 0, 0))
-            painter.drawRect(2, 4, 10, 8)
-            painter.drawRect(12, 6, 2, 4)
-
-            # バッテリー残量
-            painter.setBrush(color)
-            fill_width = int(8 * battery_level / 100)
-            painter.drawRect(3, 5, fill_width, 6)
-
-        painter.end()
-        return QIcon(pixmap)
-
-    def update_icon(self, devices_status):
-        """デバイス状況に応じてアイコンを更新"""
-        if not devices_status:
-            # デバイスが接続されていない
             icon = self.create_battery_icon(None)
-            tooltip = "Connected - 接続デバイスなし"
-        else:
-            # 最も低いバッテリーレベルを取得
-            min_battery = min(
-                device["battery_level"]
-                for device in devices_status.values()
-                if device["battery_level"] is not None
-            )
-
-            icon = self.create_battery_icon(min_battery)
-
-            # ツールチップにデバイス情報を表示
-            tooltip_lines = ["Connected - Bluetoothデバイス"]
-            for device in devices_status.values():
-                if device["battery_level"] is not None:
-                    tooltip_lines.append(
-                        f"{device['name']}: {device['battery_level']}%"
-                    )
-                else:
-                    tooltip_lines.append(f"{device['name']}: 不明")
-
-            tooltip = "\n".join(tooltip_lines)
+
+        # ツールチップにデバイス情報を表示
+        tooltip_lines = ["Connected - Bluetoothデバイス"]
+        for device in devices:
+            if device.battery_level is not None and device.battery_level >= 0:
+                line = f"{device.name}: {device.battery_level}%"
+                remaining = format_remaining(getattr(device, "time_remaining", None))
+                if remaining:
+                    line += f" ({remaining})"
+                if getattr(device, "is_stale", False):
+                    line += " (前回の値)"
+                tooltip_lines.append(line)
+            else:
+                tooltip_lines.append(f"{device.name}: 不明")
 
         self.setIcon(icon)
-        self.setToolTip(tooltip)
+        self.setToolTip("\n".join(tooltip_lines))
 
     def on_tray_icon_activated(self, reason):
         """トレイアイコンがクリックされた時の処理"""
@@ -214,19 +212,37 @@ class SystemTrayIcon(QSystemTrayIcon):
 
     def manual_refresh(self):
         """手動でバッテリー情報を更新"""
-        import asyncio
+        future = self.refresh_worker.request_refresh(force=True)
+        self.manual_refresh_future = future
+        future.add_done_callback(self._on_manual_refresh_future_done)
 
-        # 非同期でバッテリー情報を更新
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            loop.run_until_complete(self.battery_monitor.update_battery_levels())
-            self.showMessage("Connected", "バッテリー情報を更新しました")
-        except Exception as e:
-            self.logger.error(f"手動更新エラー: {e}")
+    def _on_manual_refresh_future_done(self, future):
+        """手動更新の完了時の処理（ワーカースレッドから呼ばれる）"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        # シグナルはQueuedConnectionでUIスレッドに配送される
+        self.manual_refresh_done.emit(
+            "" if error is None else str(error) or "不明なエラー"
+        )
+
+    def on_manual_refresh_done(self, error):
+        """手動更新の結果を通知"""
+        self.manual_refresh_future = None
+        if error:
+            self.logger.error(f"手動更新エラー: {error}")
             self.showMessage("Connected", "更新に失敗しました")
-        finally:
-            loop.close()
+        else:
+            self.showMessage("Connected", "バッテリー情報を更新しました")
+
+    def on_refresh_finished(self, devices):
+        """バッテリー情報の更新完了時の処理"""
+        self.update_icon(devices)
+
+    def on_battery_events(self, events):
+        """変化イベント受信時にアイコンとツールチップを更新"""
+        manager = self.battery_monitor.bluetooth_manager
+        self.update_icon(list(manager.get_connected_devices().values()))
 
     def show_about(self):
         """バージョン情報を表示"""
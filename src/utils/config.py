@@ -5,28 +5,141 @@ Configuration Manager - 設定管理
 import json
 import os
 import logging
-from typing import Dict, Any, Optional
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+
+_MISSING = object()
+
+
+def _freeze(value: Any) -> Any:
+    """辞書をConfigSnapshot、リストをタプルに変換"""
+    if isinstance(value, dict):
+        return ConfigSnapshot(value)
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """_freezeの逆変換（呼び出し元が変更しても影響しない新しい辞書・リストを返す）"""
+    if isinstance(value, ConfigSnapshot):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class ConfigSnapshot:
+    """設定の読み取り専用スナップショット
+
+    セクションと値に属性でアクセスできる（例: snapshot.battery.low_battery_threshold）。
+    作成時に全てのキーパスを展開しておくため、snapshot.get("battery.update_interval")も
+    1回の辞書参照で済む。入れ子の辞書はConfigSnapshot、リストはタプルになる。
+    識別子として使えないキー（デバイスアドレスなど）はsnapshot["..."]で参照する
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        values = {key: _freeze(value) for key, value in data.items()}
+        flat = dict(values)
+        for key, value in values.items():
+            if isinstance(value, ConfigSnapshot):
+                for sub_key, sub_value in value._flat.items():
+                    flat[f"{key}.{sub_key}"] = sub_value
+        object.__setattr__(self, "_values", values)
+        object.__setattr__(self, "_flat", flat)
+        # 属性アクセスが通常のインスタンス属性の参照になるように展開
+        for key, value in values.items():
+            if key.isidentifier() and not hasattr(ConfigSnapshot, key):
+                self.__dict__[key] = value
+
+    def __getattr__(self, name: str) -> Any:
+        # インスタンス属性に展開されていないキーの場合のみ呼ばれる
+        raise AttributeError(f"設定キーが存在しません: {name}")
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("設定のスナップショットは変更できません")
+
+    def __delattr__(self, name: str):
+        raise AttributeError("設定のスナップショットは変更できません")
+
+    def __getitem__(self, key_path: str) -> Any:
+        return self._flat[key_path]
+
+    def __contains__(self, key_path: str) -> bool:
+        return key_path in self._flat
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ConfigSnapshot):
+            return NotImplemented
+        return self._values == other._values
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ConfigSnapshot({self.to_dict()!r})"
+
+    def get(self, key_path: str, default: Any = None) -> Any:
+        """キーパスで値を取得 (例: "app.language")"""
+        return self._flat.get(key_path, default)
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return list(self._values.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """通常の辞書に変換（タプルはリストに戻す）"""
+        return {key: _thaw(value) for key, value in self._values.items()}
+
 
 class ConfigManager:
-    """アプリケーション設定管理クラス"""
-    
-    def __init__(self, config_file: str = "config.json"):
+    """アプリケーション設定管理クラス
+
+    setで変更した設定はすぐには書き込まず、flush_delay秒のあいだ変更がなければ
+    バックグラウンドでまとめて書き込む（flush_delay=0の場合はその場で書き込む）。
+    batch()内の変更は抜けるときに1回だけ書き込む。終了時はflush()を呼ぶこと
+
+    値の参照はsnapshot（読み取り専用のConfigSnapshot）から行う。変更や再読み込みの
+    たびにスナップショットを作り直し、subscribeで登録したコールバックに通知する
+    """
+
+    def __init__(self, config_file: str = "config.json", flush_delay: float = 1.0):
         self.logger = logging.getLogger(__name__)
         self.config_file = self._get_config_path(config_file)
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._dirty = False  # 未書き込みの変更があるか
+        self._batch_depth = 0
+        self._flush_timer: Optional[threading.Timer] = None
+        self.write_count = 0  # 設定ファイルを書き込んだ回数
+        self.reload_count = 0  # 外部の変更を再読み込みした回数
+        self._file_signature: Optional[Tuple[int, int]] = None  # (mtime_ns, size)
+        self._subscribers: List[Tuple[str, Callable[[Any], None]]] = []
+        self._batch_snapshot: Optional[ConfigSnapshot] = (
+            None  # batch開始時のスナップショット
+        )
         self.config_data = self._load_default_config()
+        self._snapshot = ConfigSnapshot(self.config_data)
         self.load_config()
-    
+
     def _get_config_path(self, filename: str) -> str:
         """設定ファイルのパスを取得"""
         # ユーザーのAppDataフォルダに設定ファイルを保存
-        app_data = os.getenv('APPDATA', os.path.expanduser('~'))
-        config_dir = os.path.join(app_data, 'Connected')
-        
+        app_data = os.getenv("APPDATA", os.path.expanduser("~"))
+        config_dir = os.path.join(app_data, "Connected")
+
         # ディレクトリが存在しない場合は作成
         os.makedirs(config_dir, exist_ok=True)
-        
+
         return os.path.join(config_dir, filename)
-    
+
+    def get_data_path(self, filename: str) -> str:
+        """設定ファイルと同じディレクトリ（%APPDATA%/Connected）のファイルパスを取得"""
+        return os.path.join(os.path.dirname(self.config_file), filename)
+
     def _load_default_config(self) -> Dict[str, Any]:
         """デフォルト設定を読み込み"""
         return {
@@ -34,14 +147,20 @@ class ConfigManager:
                 "language": "ja",
                 "theme": "system",  # system, light, dark
                 "start_with_windows": False,
-                "minimize_to_tray": True
+                "minimize_to_tray": True,
             },
             "battery": {
                 "low_battery_threshold": 10,
                 "critical_battery_threshold": 5,
-                "update_interval": 60,  # 秒
+                "update_interval": 60,  # 秒（放電速度が不明なデバイスの読み取り間隔）
+                "min_poll_interval": 15,  # 秒（デバイスごとの読み取り間隔の下限）
+                "max_poll_interval": 1800,  # 秒（デバイスごとの読み取り間隔の上限）
+                "scan_freshness": 15,  # 秒（この期間内のスキャン結果は再利用）
+                "max_concurrent_reads": 8,  # 同時に読み取るデバイス数の上限
+                "read_timeout": 5,  # 秒（デバイスごとの読み取り期限）
+                "history_capacity": 100,  # デバイスごとにメモリに保持する履歴の件数
                 "show_percentage": True,
-                "show_icon": True
+                "show_icon": True,
             },
             "notifications": {
                 "enabled": True,
@@ -49,128 +168,347 @@ class ConfigManager:
                 "critical_battery_alert": True,
                 "device_connection_alert": False,
                 "sound_enabled": True,
-                "duration": 5  # 秒
+                "duration": 5,  # 秒
+                "coalesce_window": 2,  # 秒（この間に発生した通知は1件にまとめる）
+                "per_device_interval": 300,  # 秒（同じデバイスの同じ種類の通知の最短間隔）
+                "max_per_minute": 3,  # 1分あたりに表示する通知の上限
             },
             "devices": {
                 "auto_detect": True,
+                "backend": "powershell",  # powershell, simulated, ble
+                "simulated_device_count": 5,  # simulatedバックエンドのデバイス数
+                "ble_max_connections": 8,  # 保持するBLE接続数の上限
+                "ble_idle_timeout": 300,  # 秒（未使用のBLE接続を切断するまでの時間）
+                "reconcile_interval": 600,  # 秒（イベント監視時の全件再照合間隔）
                 "supported_types": ["earphones", "headphones", "mouse", "keyboard"],
-                "device_specific_thresholds": {}  # device_address: threshold
+                "device_specific_thresholds": {},  # device_address: threshold
+            },
+            "history": {
+                "enabled": True,  # バッテリー履歴をhistory.dbに保存
+                "retention_days": 365,  # この日数より古い履歴は削除
+                "flush_interval": 5,  # 秒（まとめて書き込む間隔）
+            },
+            "logging": {
+                "json_lines": False,  # ログをJSON Lines形式（connected.jsonl）で書き込む
+                "max_bytes": 5 * 1024 * 1024,  # ログファイルをローテーションするサイズ
+                "backup_count": 3,  # 保持する古いログファイルの数
+                "levels": {},  # ロガー名ごとのレベル（例: {"backends": "WARNING"}）
+                "aggregate_window": 60,  # WARNING未満の同じメッセージの繰り返しをまとめる秒数（0で無効）
+                "rate_limits": {},  # ロガー名ごとの1分あたりの最大件数（WARNING未満）
+                "sample_rates": {},  # ロガー名ごとに書き込む割合 0〜1（WARNING未満）
             },
             "ui": {
                 "window_position": {"x": 100, "y": 100},
                 "window_size": {"width": 400, "height": 300},
                 "always_on_top": False,
-                "show_in_taskbar": False
-            }
+                "show_in_taskbar": False,
+            },
         }
-    
+
     def load_config(self):
         """設定ファイルから設定を読み込み"""
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
+                self._file_signature = self._stat_config_file()
+                with open(self.config_file, "r", encoding="utf-8") as f:
                     loaded_config = json.load(f)
                     # デフォルト設定と読み込んだ設定をマージ
-                    self.config_data = self._merge_config(self.config_data, loaded_config)
-                    self.logger.info(f"設定ファイルを読み込みました: {self.config_file}")
+                    self._apply_config(
+                        self._merge_config(self.config_data, loaded_config)
+                    )
+                    self.logger.info(
+                        f"設定ファイルを読み込みました: {self.config_file}"
+                    )
             else:
-                self.logger.info("設定ファイルが見つかりません。デフォルト設定を使用します。")
+                self.logger.info(
+                    "設定ファイルが見つかりません。デフォルト設定を使用します。"
+                )
                 self.save_config()  # デフォルト設定を保存
         except Exception as e:
             self.logger.error(f"設定ファイルの読み込みエラー: {e}")
             self.logger.info("デフォルト設定を使用します。")
-    
+
     def save_config(self):
-        """設定をファイルに保存"""
+        """設定をファイルに保存
+
+        同じディレクトリの一時ファイルに書き込んでから置き換えるため、
+        書き込み中に終了しても元の設定ファイルは壊れない
+        """
+        with self._lock:
+            self._cancel_flush_timer()
+            temp_path = None
+            try:
+                config_dir = os.path.dirname(self.config_file)
+                prefix = os.path.basename(self.config_file) + "."
+                fd, temp_path = tempfile.mkstemp(
+                    prefix=prefix, suffix=".tmp", dir=config_dir
+                )
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self.config_data, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.config_file)
+                temp_path = None
+                # 自分の書き込みを外部の変更として再読み込みしないように記録
+                self._file_signature = self._stat_config_file()
+                self._dirty = False
+                self.write_count += 1
+                self.logger.info(f"設定ファイルを保存しました: {self.config_file}")
+            except Exception as e:
+                self.logger.error(f"設定ファイルの保存エラー: {e}")
+            finally:
+                if temp_path is not None and os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    def _stat_config_file(self) -> Optional[Tuple[int, int]]:
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config_data, f, indent=2, ensure_ascii=False)
-            self.logger.info(f"設定ファイルを保存しました: {self.config_file}")
-        except Exception as e:
-            self.logger.error(f"設定ファイルの保存エラー: {e}")
-    
-    def _merge_config(self, default: Dict[str, Any], loaded: Dict[str, Any]) -> Dict[str, Any]:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def reload_if_changed(self) -> bool:
+        """設定ファイルが外部で変更されていれば再読み込み（再読み込みした場合True）
+
+        更新日時とサイズで変更を判定するため、定期的に呼び出しても負荷は小さい。
+        未書き込みの変更がある場合は、その書き込みを優先して再読み込みしない
+        """
+        signature = self._stat_config_file()
+        if signature is None or signature == self._file_signature:
+            return False
+
+        with self._lock:
+            if self._dirty:
+                return False
+            # 読み込めない場合も同じ内容で繰り返し試さないように記録する
+            self._file_signature = signature
+            try:
+                with open(self.config_file, "r", encoding="utf-8") as f:
+                    loaded_config = json.load(f)
+            except Exception as e:
+                self.logger.error(f"設定ファイルの再読み込みエラー: {e}")
+                return False
+            old_snapshot = self._apply_config(
+                self._merge_config(self._load_default_config(), loaded_config)
+            )
+            self.reload_count += 1
+        self.logger.info(f"設定ファイルの変更を読み込みました: {self.config_file}")
+        self._publish(old_snapshot)
+        return True
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """現在の設定の読み取り専用スナップショット"""
+        return self._snapshot
+
+    def subscribe(
+        self, key_path: str, callback: Callable[[Any], None]
+    ) -> Callable[[], None]:
+        """key_path（セクションの場合はその配下のいずれか）の値が変わったときに
+        callback(新しい値)を呼ぶように登録し、登録を解除する関数を返す
+
+        コールバックは変更したスレッド（setやreload_if_changedの呼び出し元）で呼ばれる。
+        batch()内の変更は抜けるときにまとめて通知する
+        """
+        entry = (key_path, callback)
+        self._subscribers.append(entry)
+
+        def unsubscribe():
+            if entry in self._subscribers:
+                self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    def _apply_config(self, config_data: Dict[str, Any]) -> ConfigSnapshot:
+        """設定を置き換えてスナップショットを作り直す（変更前のスナップショットを返す）"""
+        with self._lock:
+            old_snapshot = self._snapshot
+            self.config_data = config_data
+            self._snapshot = ConfigSnapshot(config_data)
+            return old_snapshot
+
+    def _publish(self, old_snapshot: ConfigSnapshot):
+        """変更前のスナップショットと比べて値が変わったキーの購読者に通知"""
+        with self._lock:
+            if self._batch_depth > 0:
+                if self._batch_snapshot is None:
+                    self._batch_snapshot = old_snapshot
+                return
+            new_snapshot = self._snapshot
+
+        for key_path, callback in list(self._subscribers):
+            value = new_snapshot.get(key_path, _MISSING)
+            if value is _MISSING or value == old_snapshot.get(key_path, _MISSING):
+                continue
+            try:
+                callback(value)
+            except Exception as e:
+                self.logger.error(f"設定変更の通知エラー ({key_path}): {e}")
+
+    @property
+    def dirty(self) -> bool:
+        """未書き込みの変更があるかどうか"""
+        return self._dirty
+
+    def flush(self) -> bool:
+        """未書き込みの変更があれば直ちに書き込む（書き込んだ場合True）"""
+        with self._lock:
+            if not self._dirty:
+                self._cancel_flush_timer()
+                return False
+            self.save_config()
+            return not self._dirty
+
+    def close(self):
+        """未書き込みの変更を書き込み、バックグラウンドの書き込みを止める"""
+        self.flush()
+
+    @contextmanager
+    def batch(self):
+        """まとめて変更するためのコンテキスト（抜けるときに1回だけ書き込む）
+
+        例:
+            with config.batch():
+                config.set("app.language", "en")
+                config.set("app.theme", "dark")
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                old_snapshot = None
+                if self._batch_depth == 0:
+                    self.flush()
+                    old_snapshot, self._batch_snapshot = self._batch_snapshot, None
+            if old_snapshot is not None:
+                self._publish(old_snapshot)
+
+    def _mark_dirty(self):
+        """変更を記録し、必要に応じて書き込みを予約"""
+        self._dirty = True
+        if self._batch_depth > 0:
+            return
+        if self.flush_delay <= 0:
+            self.save_config()
+            return
+        # 変更のたびに書き込みを先送りする（最後の変更からflush_delay秒後に1回書き込む）
+        self._cancel_flush_timer()
+        self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _cancel_flush_timer(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+    def _merge_config(
+        self, default: Dict[str, Any], loaded: Dict[str, Any]
+    ) -> Dict[str, Any]:
         """デフォルト設定と読み込み設定をマージ"""
         merged = default.copy()
-        
+
         for key, value in loaded.items():
-            if key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
+            if (
+                key in merged
+                and isinstance(merged[key], dict)
+                and isinstance(value, dict)
+            ):
                 merged[key] = self._merge_config(merged[key], value)
             else:
                 merged[key] = value
-        
+
         return merged
-    
+
     def get(self, key_path: str, default: Any = None) -> Any:
-        """設定値を取得 (例: "app.language")"""
-        try:
-            keys = key_path.split('.')
-            value = self.config_data
-            
-            for key in keys:
-                value = value[key]
-            
-            return value
-        except (KeyError, TypeError):
+        """設定値を取得 (例: "app.language")
+
+        セクション・リストは呼び出し元で変更しても設定に影響しない複製を返す
+        """
+        value = self._snapshot._flat.get(key_path, _MISSING)
+        if value is _MISSING:
             return default
-    
+        if isinstance(value, (ConfigSnapshot, tuple)):
+            return _thaw(value)
+        return value
+
     def set(self, key_path: str, value: Any):
         """設定値を設定 (例: "app.language", "en")"""
         try:
-            keys = key_path.split('.')
-            config = self.config_data
-            
-            # 最後のキー以外まで移動
-            for key in keys[:-1]:
-                if key not in config:
-                    config[key] = {}
-                config = config[key]
-            
-            # 値を設定
-            config[keys[-1]] = value
-            
-            # 自動保存
-            self.save_config()
-            
+            keys = key_path.split(".")
+            with self._lock:
+                config = self.config_data
+
+                # 最後のキー以外まで移動
+                for key in keys[:-1]:
+                    if key not in config:
+                        config[key] = {}
+                    config = config[key]
+
+                # 値が変わらない場合は書き込まない
+                if keys[-1] in config and config[keys[-1]] == value:
+                    return
+
+                # 値を設定
+                config[keys[-1]] = value
+                old_snapshot = self._apply_config(self.config_data)
+
+                # 自動保存（まとめて書き込む）
+                self._mark_dirty()
+            self._publish(old_snapshot)
+
         except Exception as e:
             self.logger.error(f"設定値の設定エラー: {e}")
-    
+
     def get_low_battery_threshold(self) -> int:
         """低バッテリー閾値を取得"""
         return self.get("battery.low_battery_threshold", 10)
-    
+
     def set_low_battery_threshold(self, threshold: int):
         """低バッテリー閾値を設定"""
         if 0 <= threshold <= 100:
             self.set("battery.low_battery_threshold", threshold)
         else:
             raise ValueError("閾値は0から100の間で設定してください")
-    
+
     def get_update_interval(self) -> int:
         """更新間隔を取得（秒）"""
         return self.get("battery.update_interval", 60)
-    
+
     def set_update_interval(self, seconds: int):
         """更新間隔を設定"""
         if seconds >= 10:  # 最低10秒
             self.set("battery.update_interval", seconds)
         else:
             raise ValueError("更新間隔は10秒以上で設定してください")
-    
+
+    def get_scan_freshness(self) -> int:
+        """スキャン結果を再利用する期間を取得（秒）"""
+        return self.get("battery.scan_freshness", 15)
+
+    def get_reconcile_interval(self) -> int:
+        """イベント監視時に全件列挙で再照合する間隔を取得（秒）"""
+        return self.get("devices.reconcile_interval", 600)
+
     def is_notifications_enabled(self) -> bool:
         """通知が有効かどうか"""
         return self.get("notifications.enabled", True)
-    
+
     def get_language(self) -> str:
         """言語設定を取得"""
         return self.get("app.language", "ja")
-    
+
     def get_theme(self) -> str:
         """テーマ設定を取得"""
         return self.get("app.theme", "system")
-    
+
     def reset_to_defaults(self):
         """設定をデフォルトにリセット"""
-        self.config_data = self._load_default_config()
-        self.save_config()
+        with self._lock:
+            old_snapshot = self._apply_config(self._load_default_config())
+            self.save_config()
         self.logger.info("設定をデフォルトにリセットしました")
+        self._publish(old_snapshot)
@@ -2,141 +2,507 @@
 Logger Setup - ログ管理
 """
 
+import atexit
+import json
 import logging
 import os
+import queue
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
-
-def setup_logger(name: str = "Connected", level: int = logging.INFO) -> logging.Logger:
-    """ロガーを設定して返す"""
-    
-    # ログディレクトリの作成
-    log_dir = _get_log_directory()
-    os.makedirs(log_dir, exist_ok=True)
-    
-    # ログファイルパス
-    log_file = os.path.join(log_dir, f"{name.lower()}.log")
-    
-    # ロガーの作成
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+
+LOG_FILE_NAME = "connected"
+
+# アプリケーション全体で共有するパイプライン（setup_loggingで作成）
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_log_file: Optional[str] = None
+_lock = threading.Lock()
+# apply_log_levelsでレベルを設定したロガー名
+_configured_levels: Dict[str, int] = {}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """1レコードを1行のコンパクトなJSONにするフォーマッター
+
+    キー: t（エポック秒）, level, logger, thread, msg, exc（例外がある場合のみ）
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "t": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """呼び出し元のスレッドではメッセージの組み立てのみ行い、書式化は書き込みスレッドに任せる"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 引数は後から変更される可能性があるため、ここでメッセージを確定させる
+        message = record.getMessage()
+        if record.args:
+            record = logging.makeLogRecord(record.__dict__)
+            record.msg = message
+            record.args = None
+        return record
+
+
+class LogVolumeControl:
+    """書き込みスレッドでログの量を抑えるクラス
+
+    - 同じロガー・レベル・メッセージのレコードはwindow秒に1回だけ書き込み、
+      その間に省略した回数は次に書き込むレコードに付記する。繰り返しが止まった
+      メッセージの省略回数は、しばらくしてから（またはflush時に）1行の要約にする
+    - rate_limits: ロガー名: 1分あたりに書き込む最大件数
+    - sample_rates: ロガー名: 書き込む割合（0〜1、一定間隔で間引く）
+
+    集約・上限・サンプリングはWARNING未満のレコードにのみ適用し、警告とエラーは
+    すぐにそのまま書き込む。ロガー名は階層で一致させる（"backends"の設定は
+    "backends.powershell"にも適用される）
+    """
+
+    RATE_PERIOD = 60.0  # 秒（rate_limitsの集計期間）
+
+    def __init__(
+        self,
+        window: float = 60.0,
+        rate_limits: Optional[Mapping[str, int]] = None,
+        sample_rates: Optional[Mapping[str, float]] = None,
+        max_keys: int = 1000,
+    ):
+        self.window = window
+        self.rate_limits = dict(rate_limits or {})
+        self.sample_rates = dict(sample_rates or {})
+        self.max_keys = max_keys
+        # (ロガー名, レベル, メッセージ): [期間の開始時刻, 省略した回数, 最後のレコード]
+        self._repeats: "OrderedDict[Tuple[str, int, str], list]" = OrderedDict()
+        # ロガー名: [期間の開始時刻, 書き込んだ件数, 省略した件数, 最後のレコード]
+        self._rate_windows: Dict[str, list] = {}
+        self._sample_credits: Dict[str, float] = {}
+        self._policies: Dict[str, Tuple[Optional[int], Optional[float]]] = {}
+        self._last_sweep = 0.0
+
+        # 統計情報
+        self.passed_count = 0  # そのまま書き込んだ件数
+        self.repeated_count = 0  # 同じメッセージの繰り返しとして省略した件数
+        self.rate_limited_count = 0  # 上限を超えて省略した件数
+        self.sampled_count = 0  # サンプリングで省略した件数
+        self.summary_count = 0  # 要約として書き込んだ件数
+
+    def process(self, record: logging.LogRecord) -> List[logging.LogRecord]:
+        """レコードを受け取り、書き込むレコード（要約を含む）のリストを返す"""
+        now = record.created
+        output: List[logging.LogRecord] = []
+        if now - self._last_sweep >= 1.0:
+            self._sweep(now, output)
+
+        if record.levelno >= logging.WARNING:
+            self.passed_count += 1
+            output.append(record)
+            return output
+        if not self._admit(record, now, output):
+            return output
+        if self.window <= 0:
+            self.passed_count += 1
+            output.append(record)
+            return output
+
+        key = (record.name, record.levelno, record.getMessage())
+        entry = self._repeats.get(key)
+        if entry is not None and now - entry[0] < self.window:
+            entry[1] += 1
+            entry[2] = record
+            self.repeated_count += 1
+            return output
+
+        if entry is not None and entry[1] > 0:
+            # 前の期間に省略した回数を付記して書き込む（繰り返し中は期間ごとに1行）
+            record = _with_message(
+                record,
+                f"{key[2]} (直前の{now - entry[0]:.0f}秒間に{entry[1]}回繰り返し)",
+            )
+        self._repeats[key] = [now, 0, record]
+        self._repeats.move_to_end(key)
+        if len(self._repeats) > self.max_keys:
+            old_key, old_entry = self._repeats.popitem(last=False)
+            self._summarize_repeats(old_key, old_entry, now, output)
+        self.passed_count += 1
+        output.append(record)
+        return output
+
+    def flush(self, now: Optional[float] = None) -> List[logging.LogRecord]:
+        """省略中の回数を全て要約にして返す（終了時に呼ぶ）"""
+        output: List[logging.LogRecord] = []
+        for key, entry in self._repeats.items():
+            self._summarize_repeats(key, entry, now, output)
+        self._repeats.clear()
+        for name, window in self._rate_windows.items():
+            self._summarize_rate(name, window, output)
+        self._rate_windows.clear()
+        return output
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "passed": self.passed_count,
+            "repeated": self.repeated_count,
+            "rate_limited": self.rate_limited_count,
+            "sampled": self.sampled_count,
+            "summaries": self.summary_count,
+        }
+
+    def _policy(self, name: str) -> Tuple[Optional[int], Optional[float]]:
+        """ロガー名に適用する (1分あたりの上限, サンプリング割合)"""
+        policy = self._policies.get(name)
+        if policy is None:
+            limit = rate = None
+            parts = name.split(".")
+            for end in range(len(parts), 0, -1):
+                prefix = ".".join(parts[:end])
+                if limit is None:
+                    limit = self.rate_limits.get(prefix)
+                if rate is None:
+                    rate = self.sample_rates.get(prefix)
+            policy = self._policies[name] = (limit, rate)
+        return policy
+
+    def _admit(self, record: logging.LogRecord, now: float, output: list) -> bool:
+        """サンプリングと上限を適用（書き込む場合True）"""
+        limit, rate = self._policy(record.name)
+        if rate is not None and rate < 1.0:
+            credit = self._sample_credits.get(record.name, 0.0) + rate
+            if credit < 1.0:
+                self._sample_credits[record.name] = credit
+                self.sampled_count += 1
+                return False
+            self._sample_credits[record.name] = credit - 1.0
+
+        if limit is not None:
+            window = self._rate_windows.get(record.name)
+            if window is None or now - window[0] >= self.RATE_PERIOD:
+                if window is not None:
+                    self._summarize_rate(record.name, window, output)
+                window = self._rate_windows[record.name] = [now, 0, 0, record]
+            if window[1] >= limit:
+                window[2] += 1
+                window[3] = record
+                self.rate_limited_count += 1
+                return False
+            window[1] += 1
+        return True
+
+    def _sweep(self, now: float, output: list):
+        """繰り返しが止まったメッセージの省略回数を要約にし、古いエントリーを捨てる"""
+        self._last_sweep = now
+        expired = [
+            key
+            for key, entry in self._repeats.items()
+            if now - entry[0] >= 2 * self.window
+        ]
+        for key in expired:
+            self._summarize_repeats(key, self._repeats.pop(key), now, output)
+
+    def _summarize_repeats(self, key, entry, now: Optional[float], output: list):
+        start, count, record = entry
+        if count <= 0:
+            return
+        elapsed = (now if now is not None else record.created) - start
+        output.append(
+            _with_message(
+                record, f"{key[2]} (直前の{elapsed:.0f}秒間に{count}回繰り返し)"
+            )
+        )
+        self.summary_count += 1
+
+    def _summarize_rate(self, name: str, window: list, output: list):
+        start, _, dropped, record = window
+        if dropped <= 0:
+            return
+        summary = _with_message(
+            record,
+            f"ログの上限 ({self.rate_limits.get(name, self._policy(name)[0])}件/分) により"
+            f"{dropped}件を省略しました",
+        )
+        summary.levelno = logging.INFO
+        summary.levelname = logging.getLevelName(logging.INFO)
+        output.append(summary)
+        self.summary_count += 1
+
+
+def _with_message(record: logging.LogRecord, message: str) -> logging.LogRecord:
+    """メッセージを置き換えたレコードの複製を作る"""
+    copied = logging.makeLogRecord(record.__dict__)
+    copied.msg = message
+    copied.args = None
+    copied.exc_info = None
+    copied.exc_text = None
+    return copied
+
+
+class _VolumeControlledListener(QueueListener):
+    """LogVolumeControlを通してからハンドラーに渡すQueueListener"""
+
+    def __init__(
+        self, log_queue, *handlers, volume_control=None, respect_handler_level=False
+    ):
+        super().__init__(
+            log_queue, *handlers, respect_handler_level=respect_handler_level
+        )
+        self.volume_control = volume_control
+
+    def handle(self, record: logging.LogRecord):
+        if self.volume_control is None:
+            super().handle(record)
+            return
+        for item in self.volume_control.process(record):
+            super().handle(item)
+
+    def stop(self):
+        # キューの残りを処理してから、省略中の回数を要約として書き込む
+        super().stop()
+        if self.volume_control is not None:
+            for item in self.volume_control.flush():
+                super().handle(item)
+
+
+def apply_log_levels(levels: Mapping[str, Union[str, int]]):
+    """サブシステム（ロガー名）ごとのログレベルを設定 (例: {"backends": "WARNING"})
+
+    前回の設定に含まれ、今回含まれないロガーは親のレベルに戻す
+    """
+    logger = logging.getLogger(__name__)
+    applied: Dict[str, int] = {}
+    for name, level in levels.items():
+        value = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+        if not isinstance(value, int):
+            logger.warning(f"不明なログレベルを無視しました: {name}={level}")
+            continue
+        logging.getLogger(name).setLevel(value)
+        applied[name] = value
+    for name in _configured_levels:
+        if name not in applied:
+            logging.getLogger(name).setLevel(logging.NOTSET)
+    _configured_levels.clear()
+    _configured_levels.update(applied)
+
+
+def get_volume_stats() -> Optional[Dict[str, int]]:
+    """ログの量の制御の統計（制御が無効な場合はNone）"""
+    listener = _listener
+    if listener is None or listener.volume_control is None:
+        return None
+    return listener.volume_control.get_stats()
+
+
+def setup_logging(
+    level: int = logging.INFO,
+    json_lines: bool = False,
+    log_dir: Optional[str] = None,
+    max_bytes: int = 5 * 1024 * 1024,
+    backup_count: int = 3,
+    console_level: int = logging.WARNING,
+    aggregate_window: float = 60.0,
+    rate_limits: Optional[Mapping[str, int]] = None,
+    sample_rates: Optional[Mapping[str, float]] = None,
+) -> str:
+    """ログのパイプラインを設定し、ログファイルのパスを返す
+
+    ルートロガーにQueueHandlerを付け、全てのロガーのレコードを1つの
+    バックグラウンドスレッド（QueueListener）が共有のローテーションファイルと
+    コンソールに書き込む。ログを出すスレッド（UIスレッドを含む）はファイルI/Oを行わない。
+    書き込みスレッドでは同じメッセージの繰り返しをまとめ、ロガーごとの上限と
+    サンプリングを適用する（LogVolumeControl、aggregate_window=0かつ上限・
+    サンプリングの指定がなければ無効）。
+    設定済みの場合は何もしない。終了時はshutdown_loggingで残りを書き込む
+    """
+    global _listener, _queue_handler, _log_file
+    with _lock:
+        if _listener is not None:
+            return _log_file
+
+        # ログディレクトリの作成
+        if log_dir is None:
+            log_dir = _get_log_directory()
+        os.makedirs(log_dir, exist_ok=True)
+
+        # ログファイルパス（JSON Lines形式の場合は拡張子を変える）
+        extension = "jsonl" if json_lines else "log"
+        log_file = os.path.join(log_dir, f"{LOG_FILE_NAME}.{extension}")
+
+        # フォーマッターの作成
+        text_formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+
+        # ファイルハンドラーの作成（ローテーション付き）
+        file_handler = RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        # レベルはロガー側で判定する（apply_log_levelsでサブシステムごとに変更できる）
+        file_handler.setLevel(logging.NOTSET)
+        file_handler.setFormatter(
+            JsonLinesFormatter() if json_lines else text_formatter
+        )
+
+        # コンソールハンドラーの作成
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(console_level)  # コンソールは警告以上のみ
+        console_handler.setFormatter(text_formatter)
+
+        # 書き込みはリスナーのスレッドでのみ行う
+        log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        volume_control = None
+        if aggregate_window > 0 or rate_limits or sample_rates:
+            volume_control = LogVolumeControl(
+                aggregate_window, rate_limits, sample_rates
+            )
+        _listener = _VolumeControlledListener(
+            log_queue,
+            file_handler,
+            console_handler,
+            volume_control=volume_control,
+            respect_handler_level=True,
+        )
+        _listener.start()
+
+        _queue_handler = _DeferredQueueHandler(log_queue)
+        root = logging.getLogger()
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+        _log_file = log_file
+
+    atexit.register(shutdown_logging)
+    return log_file
+
+
+def shutdown_logging():
+    """キューに残ったレコードを書き込んでからパイプラインを停止（何度呼んでもよい）"""
+    global _listener, _queue_handler, _log_file
+    with _lock:
+        if _listener is None:
+            return
+        logging.getLogger().removeHandler(_queue_handler)
+        # stopはキューの残りを全て処理してからスレッドを終了する
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.flush()
+            handler.close()
+        _listener = None
+        _queue_handler = None
+        _log_file = None
+
+
+def setup_logger(
+    name: str = "Connected", level: int = logging.INFO, json_lines: bool = False
+) -> logging.Logger:
+    """ロガーを設定して返す（ハンドラーは共有のパイプラインのものを使う）"""
+    log_file = setup_logging(level, json_lines)
+
+    # ロガーの作成（レコードはルートロガーのQueueHandlerに伝播させる）
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    
-    # 既存のハンドラーをクリア（重複を防ぐ）
-    if logger.handlers:
-        logger.handlers.clear()
-    
-    # フォーマッターの作成
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # ファイルハンドラーの作成（ローテーション付き）
-    file_handler = RotatingFileHandler(
-        log_file,
-        maxBytes=5*1024*1024,  # 5MB
-        backupCount=3,
-        encoding='utf-8'
-    )
-    file_handler.setLevel(level)
-    file_handler.setFormatter(formatter)
-    
-    # コンソールハンドラーの作成
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.WARNING)  # コンソールは警告以上のみ
-    console_handler.setFormatter(formatter)
-    
-    # ハンドラーをロガーに追加
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
-    # 親ロガーへの伝播を防ぐ
-    logger.propagate = False
-    
+    logger.propagate = True
+
     logger.info(f"ロガーが初期化されました - ログファイル: {log_file}")
-    
+
     return logger
 
+
 def _get_log_directory() -> str:
     """ログディレクトリのパスを取得"""
     # ユーザーのAppDataフォルダにログディレクトリを作成
-    app_data = os.getenv('APPDATA', os.path.expanduser('~'))
-    log_dir = os.path.join(app_data, 'Connected', 'logs')
+    app_data = os.getenv("APPDATA", os.path.expanduser("~"))
+    log_dir = os.path.join(app_data, "Connected", "logs")
     return log_dir
 
+
 def get_logger(name: str = None) -> logging.Logger:
     """既存のロガーを取得（なければ新規作成）"""
     if name is None:
         name = "Connected"
-    
-    logger = logging.getLogger(name)
-    
-    # ロガーが設定されていない場合は設定
-    if not logger.handlers:
+
+    # パイプラインが設定されていない場合は設定
+    if _listener is None:
         return setup_logger(name)
-    
-    return logger
+
+    return logging.getLogger(name)
+
 
 class LogManager:
-    """ログ管理クラス"""
-    
+    """ログ管理クラス（各ロガーは共有のパイプライン・ログファイルに書き込む）"""
+
     def __init__(self):
         self.main_logger = setup_logger("Connected")
         self.bluetooth_logger = setup_logger("Bluetooth")
         self.battery_logger = setup_logger("Battery")
         self.ui_logger = setup_logger("UI")
-    
+
     def get_main_logger(self) -> logging.Logger:
         """メインロガーを取得"""
         return self.main_logger
-    
+
     def get_bluetooth_logger(self) -> logging.Logger:
         """Bluetoothロガーを取得"""
         return self.bluetooth_logger
-    
+
     def get_battery_logger(self) -> logging.Logger:
         """バッテリーロガーを取得"""
         return self.battery_logger
-    
+
     def get_ui_logger(self) -> logging.Logger:
         """UIロガーを取得"""
         return self.ui_logger
-    
+
     def log_system_info(self):
         """システム情報をログに記録"""
         import platform
         import sys
-        
+
         self.main_logger.info("=" * 50)
         self.main_logger.info("Connected アプリケーション開始")
         self.main_logger.info(f"OS: {platform.system()} {platform.release()}")
         self.main_logger.info(f"Python: {sys.version}")
         self.main_logger.info(f"開始時刻: {datetime.now()}")
         self.main_logger.info("=" * 50)
-    
-    def log_error_with_context(self, logger: logging.Logger, error: Exception, context: str = ""):
+
+    def log_error_with_context(
+        self, logger: logging.Logger, error: Exception, context: str = ""
+    ):
         """エラーを詳細情報と共にログに記録"""
         import traceback
-        
+
         logger.error(f"エラーが発生しました: {context}")
         logger.error(f"エラータイプ: {type(error).__name__}")
         logger.error(f"エラーメッセージ: {str(error)}")
         logger.error(f"スタックトレース:\n{traceback.format_exc()}")
-    
+
     def cleanup_old_logs(self, days: int = 30):
         """古いログファイルを削除"""
         import glob
         from datetime import timedelta
-        
+
         log_dir = _get_log_directory()
         cutoff_date = datetime.now() - timedelta(days=days)
-        
-        # ログファイルパターン
+
+        # ログファイルパターン（テキスト形式とJSON Lines形式、ローテーション後のファイル）
         log_patterns = [
             os.path.join(log_dir, "*.log"),
-            os.path.join(log_dir, "*.log.*")
+            os.path.join(log_dir, "*.log.*"),
+            os.path.join(log_dir, "*.jsonl"),
+            os.path.join(log_dir, "*.jsonl.*"),
         ]
-        
+
         deleted_count = 0
         for pattern in log_patterns:
             for log_file in glob.glob(pattern):
@@ -147,9 +513,11 @@ class LogManager:
                         deleted_count += 1
                         self.main_logger.info(f"古いログファイルを削除: {log_file}")
                 except Exception as e:
-                    self.main_logger.warning(f"ログファイル削除エラー: {log_file} - {e}")
-        
+                    self.main_logger.warning(
+                        f"ログファイル削除エラー: {log_file} - {e}"
+                    )
+
         if deleted_count > 0:
             self.main_logger.info(f"{deleted_count}個の古いログファイルを削除しました")
-        
+
         return deleted_count
@@ -0,0 +1,13 @@
+"""
+pytest設定 - src内のモジュール同士の相対インポートを解決する
+"""
+
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+# ディスプレイのない環境でもQtウィジェットを生成できるようにする
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
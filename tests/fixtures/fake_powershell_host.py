@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Fake PowerShell Host - 常駐PowerShellホストと同じプロトコルを話すテスト用スタンドイン
+
+1行1リクエストのJSONを標準入力から読み、1行1レスポンスのJSONを標準出力へ返す。
+以下のコマンドを特別扱いする:
+  - "Start-Sleep -Seconds N": N秒待機してから応答（ハングの再現）
+  - "Exit-Host": 応答せずにプロセスを終了（クラッシュの再現）
+  - "throw <message>": エラーレスポンスを返す
+  - "Get-Pid": 自身のPIDを返す
+  - "Get-PnpDevice ...": FAKE_PNP_OUTPUTの内容（なければ空配列）を返す
+それ以外は受け取ったコマンドをそのまま出力として返す。
+"stream": true のリクエストには出力を1行ずつ返す（FAKE_STREAM_DELAY秒ずつ待機）。
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+
+def handle(command: str):
+    """コマンドを処理して (ok, output) を返す"""
+    command = command.strip()
+
+    sleep_match = re.match(r"Start-Sleep -Seconds ([0-9.]+)", command)
+    if sleep_match:
+        time.sleep(float(sleep_match.group(1)))
+        return True, ""
+
+    if command == "Exit-Host":
+        sys.exit(1)
+
+    if command.startswith("throw "):
+        return False, command[len("throw ") :]
+
+    if command == "Get-Pid":
+        return True, f"{os.getpid()}\n"
+
+    if "Get-PnpDevice" in command:
+        return True, os.environ.get("FAKE_PNP_OUTPUT", "[]") + "\n"
+
+    return True, command + "\n"
+
+
+def main():
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+
+        request = json.loads(line)
+        ok, output = handle(request["command"])
+
+        if ok and request.get("stream"):
+            delay = float(os.environ.get("FAKE_STREAM_DELAY", "0"))
+            for output_line in output.splitlines():
+                if delay:
+                    time.sleep(delay)
+                frame = {"id": request["id"], "ok": True, "line": output_line}
+                sys.stdout.write(json.dumps(frame, ensure_ascii=False) + "\n")
+                sys.stdout.flush()
+            response = {"id": request["id"], "ok": True, "done": True}
+        elif ok:
+            response = {"id": request["id"], "ok": True, "output": output}
+        else:
+            response = {"id": request["id"], "ok": False, "error": output}
+
+        sys.stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Test Async Worker
+"""
+
+import threading
+import time
+import unittest
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QElapsedTimer, QEventLoop, QTimer
+from bluetooth_manager import BluetoothManager, BluetoothDevice
+from battery_monitor import BatteryMonitor
+from async_worker import AsyncLoopThread, BatteryRefreshWorker
+from ui.main_window import ConnectedMainWindow
+
+
+class SlowBluetoothManager(BluetoothManager):
+    """Get-PnpDeviceが遅い状況を再現するテスト用BluetoothManager"""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+        self.scan_threads = []
+
+    async def scan_devices(self, force=False, max_age=None):
+        # subprocess呼び出しと同様にスレッドをブロックする
+        self.scan_threads.append(threading.current_thread())
+        time.sleep(self.delay)
+        device = BluetoothDevice("Test Mouse", "00:11:22:33:44:55", "マウス")
+        device.is_connected = True
+        return [device]
+
+    async def get_battery_level(self, device):
+        return 50
+
+
+class TestAsyncWorker(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラスの設定"""
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        """テスト前の設定"""
+        self.loop_thread = AsyncLoopThread()
+        self.manager = SlowBluetoothManager(delay=0.5)
+        self.monitor = BatteryMonitor(self.manager)
+        self.worker = BatteryRefreshWorker(self.monitor, self.loop_thread)
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        self.worker.shutdown()
+
+    def wait_for_signal(self, signal, timeout_ms: int = 5000):
+        """シグナルを待ちながら、UIスレッドの最大停止時間（ミリ秒）を計測"""
+        received = []
+        max_stall = 0
+        heartbeat = QElapsedTimer()
+        heartbeat.start()
+
+        def on_tick():
+            nonlocal max_stall
+            max_stall = max(max_stall, heartbeat.restart())
+
+        loop = QEventLoop()
+        signal.connect(lambda *args: (received.append(args), loop.quit()))
+
+        ticker = QTimer()
+        ticker.timeout.connect(on_tick)
+        ticker.start(5)
+        QTimer.singleShot(timeout_ms, loop.quit)
+        loop.exec_()
+        ticker.stop()
+
+        return received, max_stall
+
+    def test_refresh_does_not_block_ui_thread(self):
+        """遅いバックエンドでもUIスレッドが停止しないテスト"""
+        timer = QElapsedTimer()
+        timer.start()
+        self.worker.request_refresh()
+        request_ms = timer.elapsed()
+
+        received, max_stall = self.wait_for_signal(self.worker.devices_updated)
+
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0][0][0].battery_level, 50)
+        self.assertLess(request_ms, 50)
+        self.assertLess(max_stall, 100)
+        self.assertIsNot(self.manager.scan_threads[0], threading.main_thread())
+
+    def test_single_loop_for_app_lifetime(self):
+        """複数回の更新で同じイベントループが使われるテスト"""
+        self.worker.request_refresh().result(5)
+        first_loop = self.loop_thread.loop
+        self.worker.request_refresh().result(5)
+
+        self.assertIs(self.loop_thread.loop, first_loop)
+        self.assertEqual(len(set(self.manager.scan_threads)), 1)
+
+    def test_initial_refresh_runs_prepare_first(self):
+        """起動時の準備処理がワーカースレッドで初回スキャンより前に実行されるテスト"""
+        prepared = []
+
+        def prepare():
+            prepared.append(
+                (threading.current_thread(), len(self.manager.scan_threads))
+            )
+            raise RuntimeError("history unavailable")
+
+        timer = QElapsedTimer()
+        timer.start()
+        self.worker.request_initial_refresh(prepare)
+        request_ms = timer.elapsed()
+
+        received, _ = self.wait_for_signal(self.worker.devices_updated)
+
+        self.assertLess(request_ms, 50)
+        self.assertEqual(len(received), 1)
+        self.assertIsNot(prepared[0][0], threading.main_thread())
+        # 準備処理はスキャン前に呼ばれ、失敗してもスキャンは行われる
+        self.assertEqual(prepared[0][1], 0)
+        self.assertEqual(len(self.manager.scan_threads), 1)
+
+    def test_main_window_stays_responsive(self):
+        """メインウィンドウの再読み込み中もUIスレッドが停止しないテスト"""
+        window = ConnectedMainWindow(self.monitor, self.worker)
+        timer = QElapsedTimer()
+        timer.start()
+        window.refresh_device_list()
+        request_ms = timer.elapsed()
+
+        received, max_stall = self.wait_for_signal(self.worker.devices_updated)
+        self.app.processEvents()
+
+        self.assertLess(request_ms, 50)
+        self.assertLess(max_stall, 100)
+        self.assertEqual(window.device_model.rowCount(), 1)
+        window.deleteLater()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""
+Test Battery Events
+"""
+
+import asyncio
+import unittest
+from bluetooth_manager import BluetoothManager, BluetoothDevice
+from battery_events import BatteryEvent, BatteryEventTracker, merge_events
+from battery_monitor import BatteryMonitor
+
+
+def make_device(index, level):
+    """テスト用デバイスを作成"""
+    device = BluetoothDevice(f"Device {index}", f"00:11:22:33:44:{index:02X}")
+    device.is_connected = True
+    device.battery_level = level
+    return device
+
+
+class StaticBluetoothManager(BluetoothManager):
+    """固定のデバイス一覧を返すテスト用BluetoothManager"""
+
+    def __init__(self, devices):
+        super().__init__()
+        self.devices = devices
+
+    async def scan_devices(self, force=False):
+        return list(self.devices)
+
+    async def get_battery_level(self, device):
+        return device.battery_level
+
+
+def kinds(events):
+    return [(event.kind, event.address[-2:]) for event in events]
+
+
+class TestBatteryEventTracker(unittest.TestCase):
+
+    def setUp(self):
+        """テスト前の設定"""
+        self.tracker = BatteryEventTracker()
+        self.devices = [make_device(i, 50) for i in range(3)]
+        self.tracker.diff(self.devices, 10)
+
+    def test_connect_and_unchanged(self):
+        """初回は接続イベント、変化がなければイベントなしのテスト"""
+        tracker = BatteryEventTracker()
+        events = tracker.diff(self.devices, 10)
+        self.assertEqual(
+            kinds(events),
+            [
+                (BatteryEvent.CONNECTED, "00"),
+                (BatteryEvent.CONNECTED, "01"),
+                (BatteryEvent.CONNECTED, "02"),
+            ],
+        )
+        self.assertEqual(tracker.diff(self.devices, 10), [])
+
+    def test_level_change_and_snapshot(self):
+        """残量の変化イベントとスナップショットのテスト"""
+        self.devices[1].battery_level = 45
+        events = self.tracker.diff(self.devices, 10)
+
+        self.assertEqual(kinds(events), [(BatteryEvent.LEVEL_CHANGED, "01")])
+        self.assertEqual((events[0].old_level, events[0].new_level), (50, 45))
+
+        # イベントのデバイスはその後の更新の影響を受けない
+        self.devices[1].battery_level = 40
+        self.assertEqual(events[0].device.battery_level, 45)
+
+    def test_threshold_crossing(self):
+        """閾値をまたいだ場合のイベントのテスト"""
+        self.devices[0].battery_level = 10
+        events = self.tracker.diff(self.devices, 10)
+        self.assertEqual(
+            kinds(events),
+            [
+                (BatteryEvent.LEVEL_CHANGED, "00"),
+                (BatteryEvent.THRESHOLD_CROSSED, "00"),
+            ],
+        )
+        self.assertTrue(events[1].is_low)
+
+        self.devices[0].battery_level = 8
+        self.assertEqual(
+            kinds(self.tracker.diff(self.devices, 10)),
+            [(BatteryEvent.LEVEL_CHANGED, "00")],
+        )
+
+        # 充電で閾値を上回った場合
+        self.devices[0].battery_level = 30
+        self.devices[0].is_charging = True
+        events = self.tracker.diff(self.devices, 10)
+        self.assertEqual(events[-1].kind, BatteryEvent.THRESHOLD_CROSSED)
+        self.assertFalse(events[-1].is_low)
+
+    def test_disconnect_keeps_last_snapshot(self):
+        """切断イベントに最後の状態が含まれるテスト"""
+        events = self.tracker.diff(self.devices[1:], 10)
+
+        self.assertEqual(kinds(events), [(BatteryEvent.DISCONNECTED, "00")])
+        self.assertEqual(events[0].device.name, "Device 0")
+        self.assertNotIn(self.devices[0].address, self.tracker)
+
+    def test_refreshed_subset(self):
+        """refreshedを指定した場合はそのデバイスと新しいデバイスのみ調べるテスト"""
+        self.devices[0].battery_level = 40
+        self.devices[1].battery_level = 40
+        self.devices.append(make_device(3, 70))
+
+        events = self.tracker.diff(self.devices, 10, [self.devices[1]])
+
+        self.assertEqual(
+            kinds(events),
+            [(BatteryEvent.CONNECTED, "03"), (BatteryEvent.LEVEL_CHANGED, "01")],
+        )
+
+
+class TestMergeEvents(unittest.TestCase):
+
+    def test_merge_to_final_state(self):
+        """同じデバイスのイベントが最終状態の1件にまとめられるテスト"""
+        tracker = BatteryEventTracker()
+        devices = [make_device(0, 50), make_device(1, 50)]
+        events = tracker.diff(devices, 10)
+        devices[0].battery_level = 9
+        events += tracker.diff(devices, 10)
+        events += tracker.diff(devices[:1], 10)
+
+        merged = merge_events(events)
+
+        self.assertEqual(
+            kinds(merged),
+            [(BatteryEvent.CONNECTED, "00"), (BatteryEvent.DISCONNECTED, "01")],
+        )
+        self.assertEqual(merged[0].new_level, 9)
+
+    def test_merge_level_changes(self):
+        """連続する残量の変化が最初と最後の値にまとめられるテスト"""
+        tracker = BatteryEventTracker()
+        device = make_device(0, 50)
+        tracker.diff([device], 10)
+        events = []
+        for level in (40, 12, 9):
+            device.battery_level = level
+            events += tracker.diff([device], 10)
+
+        merged = merge_events(events)
+
+        self.assertEqual(kinds(merged), [(BatteryEvent.LEVEL_CHANGED, "00")])
+        self.assertEqual((merged[0].old_level, merged[0].new_level), (50, 9))
+
+
+class TestMonitorEvents(unittest.TestCase):
+
+    def test_listener_and_async_iterator(self):
+        """更新時にリスナーと非同期イテレーターへ配信されるテスト"""
+        manager = StaticBluetoothManager([make_device(i, 50) for i in range(3)])
+        monitor = BatteryMonitor(manager)
+        received = []
+        monitor.add_event_listener(received.append)
+
+        async def run():
+            stream = monitor.events()
+            await monitor.update_battery_levels()
+            # 変化がなければ配信されない
+            await monitor.update_battery_levels()
+            manager.devices.pop()
+            await monitor.update_battery_levels()
+            stream.close()
+            return [event async for event in stream]
+
+        streamed = asyncio.run(run())
+
+        self.assertEqual(len(received), 2)
+        self.assertEqual(len(received[0]), 3)
+        self.assertEqual(kinds(received[1]), [(BatteryEvent.DISCONNECTED, "02")])
+        self.assertEqual(kinds(streamed), kinds(received[0] + received[1]))
+        self.assertEqual(monitor._event_streams, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
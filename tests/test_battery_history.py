@@ -0,0 +1,107 @@
+"""
+Test Battery History
+"""
+
+import unittest
+from datetime import datetime
+from battery_history import BatteryHistory, BatteryHistoryBuffer
+from battery_monitor import BatteryMonitor
+from bluetooth_manager import BluetoothManager
+from backends.simulated import SimulatedBackend
+
+
+class TestBatteryHistoryBuffer(unittest.TestCase):
+
+    def test_append_within_capacity(self):
+        """容量内のサンプルが古い順に取得できるテスト"""
+        buffer = BatteryHistoryBuffer(capacity=5)
+        for i in range(3):
+            buffer.append(1000.0 + i, 90 - i)
+
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(list(buffer), [(1000.0, 90), (1001.0, 89), (1002.0, 88)])
+        self.assertEqual(buffer.latest(), (1002.0, 88))
+
+    def test_overwrites_oldest(self):
+        """容量を超えると古いサンプルから上書きされるテスト"""
+        buffer = BatteryHistoryBuffer(capacity=4)
+        for i in range(11):
+            buffer.append(float(i), i)
+
+        timestamps, levels = buffer.views()
+        self.assertEqual(timestamps.tolist(), [7.0, 8.0, 9.0, 10.0])
+        self.assertEqual(levels.tolist(), [7, 8, 9, 10])
+
+    def test_views_are_zero_copy(self):
+        """ビューがバッファを直接参照するテスト"""
+        buffer = BatteryHistoryBuffer(capacity=3)
+        buffer.append(1.0, 50)
+        timestamps, levels = buffer.views()
+
+        self.assertIs(timestamps.obj, buffer._timestamps)
+        self.assertIs(levels.obj, buffer._levels)
+        self.assertEqual(levels.format, "B")
+
+    def test_range_query(self):
+        """時刻による範囲検索のテスト"""
+        buffer = BatteryHistoryBuffer(capacity=8)
+        for i in range(12):
+            buffer.append(100.0 + i * 10, i)
+
+        timestamps, levels = buffer.range(150.0, 180.0)
+        self.assertEqual(timestamps.tolist(), [150.0, 160.0, 170.0, 180.0])
+        self.assertEqual(levels.tolist(), [5, 6, 7, 8])
+
+        timestamps, _ = buffer.range(start=195.0)
+        self.assertEqual(timestamps.tolist(), [200.0, 210.0])
+        timestamps, _ = buffer.range(end=140.0)
+        self.assertEqual(timestamps.tolist(), [140.0])
+
+    def test_clock_going_backwards(self):
+        """時刻が逆行しても並び順が保たれるテスト"""
+        buffer = BatteryHistoryBuffer(capacity=4)
+        buffer.append(100.0, 50)
+        buffer.append(90.0, 49)
+
+        self.assertEqual(buffer.views()[0].tolist(), [100.0, 100.0])
+
+    def test_level_clamped(self):
+        """残量が0〜100に収められるテスト"""
+        buffer = BatteryHistoryBuffer(capacity=2)
+        buffer.append(1.0, 150)
+        buffer.append(2.0, -5)
+        self.assertEqual(buffer.views()[1].tolist(), [100, 0])
+
+
+class TestBatteryHistory(unittest.TestCase):
+
+    def test_capacity_per_device(self):
+        """デバイスごとに容量が適用されるテスト"""
+        history = BatteryHistory(capacity=3)
+        for i in range(5):
+            history.record("A", i, timestamp=float(i))
+        history.record("B", 70, timestamp=1.0)
+
+        self.assertEqual(history.query("A")[1].tolist(), [2, 3, 4])
+        self.assertEqual(history.query("B")[1].tolist(), [70])
+        self.assertEqual(len(history.query("unknown")[0]), 0)
+
+    def test_monitor_history(self):
+        """BatteryMonitorの履歴取得のテスト"""
+        monitor = BatteryMonitor(
+            BluetoothManager(backend=SimulatedBackend(0)), history_capacity=2
+        )
+        for level in (80, 79, 78):
+            monitor._record_battery_history("A", level)
+
+        history = monitor.get_device_battery_history("A")
+        self.assertEqual([level for _, level in history], [79, 78])
+        self.assertIsInstance(history[0][0], datetime)
+
+        timestamps, levels = monitor.get_device_battery_history("A", zero_copy=True)
+        self.assertIsInstance(levels, memoryview)
+        self.assertEqual(levels.tolist(), [79, 78])
+
+
+if __name__ == "__main__":
+    unittest.main()
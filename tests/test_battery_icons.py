@@ -0,0 +1,88 @@
+"""
+Test Battery Icons
+"""
+
+import unittest
+from PyQt5.QtWidgets import QApplication
+from ui.battery_icons import (
+    BatteryIconCache,
+    CHARGING,
+    CRITICAL,
+    LOW,
+    NORMAL,
+    ROW_STYLE,
+    TRAY_STYLE,
+    UNKNOWN,
+)
+
+
+class TestBatteryIconCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラスの設定"""
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        """テスト前の設定"""
+        self.cache = BatteryIconCache(max_size=16)
+
+    def test_states(self):
+        """残量と充電状態から表示状態が決まるテスト"""
+        self.assertEqual(ROW_STYLE.state_for(None), UNKNOWN)
+        self.assertEqual(ROW_STYLE.state_for(-1), UNKNOWN)
+        self.assertEqual(ROW_STYLE.state_for(10), CRITICAL)
+        self.assertEqual(ROW_STYLE.state_for(30), LOW)
+        self.assertEqual(ROW_STYLE.state_for(80), NORMAL)
+        self.assertEqual(ROW_STYLE.state_for(10, charging=True), CHARGING)
+        self.assertEqual(TRAY_STYLE.state_for(20), LOW)
+
+    def test_rendered_once(self):
+        """同じアイコンは1回だけ描画されるテスト"""
+        first = self.cache.pixmap("row", 80)
+        second = self.cache.pixmap("row", 80)
+
+        self.assertEqual(first.cacheKey(), second.cacheKey())
+        self.assertEqual(self.cache.get_stats()["misses"], 1)
+        self.assertEqual(self.cache.get_stats()["hits"], 1)
+
+    def test_levels_share_bucket(self):
+        """見た目が同じ残量は同じエントリーを共有するテスト"""
+        # トレイアイコンの塗りつぶし幅は8ピクセル（12.5%刻み）
+        self.cache.icon("tray", 50)
+        self.cache.icon("tray", 55)
+        self.assertEqual(self.cache.size, 1)
+
+        self.cache.icon("tray", 65)
+        self.assertEqual(self.cache.size, 2)
+
+    def test_device_pixel_ratio(self):
+        """デバイスピクセル比ごとに解像度の異なるアイコンが作られるテスト"""
+        normal = self.cache.pixmap("row", 50, device_pixel_ratio=1.0)
+        hidpi = self.cache.pixmap("row", 50, device_pixel_ratio=2.0)
+
+        self.assertEqual(normal.width(), ROW_STYLE.width)
+        self.assertEqual(hidpi.width(), ROW_STYLE.width * 2)
+        self.assertEqual(hidpi.devicePixelRatio(), 2.0)
+        self.assertEqual(self.cache.size, 2)
+
+    def test_bounded_size(self):
+        """上限を超えると古いエントリーから破棄されるテスト"""
+        for level in range(0, 101, 4):
+            self.cache.pixmap("row", level)
+
+        self.assertEqual(self.cache.size, 16)
+        self.assertGreater(self.cache.get_stats()["evictions"], 0)
+
+    def test_invalidate(self):
+        """invalidateで再描画されるテスト"""
+        self.cache.icon("tray", None)
+        self.cache.invalidate()
+        self.assertEqual(self.cache.size, 0)
+
+        self.cache.icon("tray", None)
+        self.assertEqual(self.cache.get_stats()["misses"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+Test Battery Monitor
+"""
+
+import asyncio
+import unittest
+from bluetooth_manager import BluetoothManager, BluetoothDevice
+from battery_monitor import BatteryMonitor
+from poll_scheduler import PollScheduler
+from backends.simulated import SimulatedBackend
+
+
+class SimulatedBluetoothManager(BluetoothManager):
+    """デバイスごとに読み取り遅延を設定できるテスト用BluetoothManager"""
+
+    def __init__(self, latencies):
+        super().__init__()
+        self.latencies = latencies
+        self.active_reads = 0
+        self.max_active_reads = 0
+        self.devices = []
+        for index in range(len(latencies)):
+            device = BluetoothDevice(f"Device {index}", f"00:00:00:00:00:{index:02X}")
+            device.is_connected = True
+            self.devices.append(device)
+
+    async def scan_devices(self, force=False, max_age=None):
+        return list(self.devices)
+
+    async def get_battery_level(self, device):
+        index = self.devices.index(device)
+        self.active_reads += 1
+        self.max_active_reads = max(self.max_active_reads, self.active_reads)
+        try:
+            await asyncio.sleep(self.latencies[index])
+        finally:
+            self.active_reads -= 1
+        return 50 + index
+
+
+class TestBatteryMonitor(unittest.TestCase):
+
+    def test_reads_are_concurrent_and_bounded(self):
+        """読み取りが並行して行われ、同時実行数が制限されるテスト"""
+        manager = SimulatedBluetoothManager([0.05] * 20)
+        monitor = BatteryMonitor(manager, max_concurrent_reads=4)
+
+        devices = asyncio.run(monitor.update_battery_levels())
+
+        self.assertEqual(len(devices), 20)
+        self.assertEqual(manager.max_active_reads, 4)
+        self.assertTrue(all(d.battery_level is not None for d in devices))
+
+    def test_slow_device_returns_partial_results(self):
+        """遅いデバイスがタイムアウトしても他のデバイスは更新されるテスト"""
+        manager = SimulatedBluetoothManager([0.01, 2.0, 0.01])
+        monitor = BatteryMonitor(manager, read_timeout=0.2)
+
+        devices = asyncio.run(monitor.update_battery_levels())
+
+        self.assertEqual(devices[0].battery_level, 50)
+        self.assertIsNone(devices[1].battery_level)
+        self.assertEqual(devices[2].battery_level, 52)
+
+        slow_stats = monitor.get_read_stats(devices[1].address)
+        self.assertEqual(slow_stats.timeout_count, 1)
+        self.assertEqual(slow_stats.failure_count, 1)
+
+    def test_latency_stats_are_recorded(self):
+        """デバイスごとの読み取り遅延が記録されるテスト"""
+        manager = SimulatedBluetoothManager([0.02, 0.05])
+        monitor = BatteryMonitor(manager)
+
+        asyncio.run(monitor.update_battery_levels())
+        asyncio.run(monitor.update_battery_levels())
+
+        stats = monitor.get_read_stats(manager.devices[1].address)
+        self.assertEqual(stats.read_count, 2)
+        self.assertGreaterEqual(stats.average_latency, 0.05)
+        self.assertGreaterEqual(stats.max_latency, stats.last_latency)
+        self.assertEqual(stats.to_dict()["timeout_count"], 0)
+
+    def test_estimator_created_on_first_sample(self):
+        """残り時間の推定器が最初のサンプルの記録時に作成されるテスト"""
+        manager = SimulatedBluetoothManager([0.0])
+        monitor = BatteryMonitor(manager)
+        self.assertIsNone(monitor._discharge_estimator)
+        self.assertIsNone(monitor.estimate_remaining(manager.devices[0].address))
+
+        asyncio.run(monitor.update_battery_levels())
+        self.assertIsNotNone(monitor._discharge_estimator)
+
+    def test_poll_reads_only_due_devices(self):
+        """定期更新では期限が来たデバイスのみ読み取られるテスト"""
+        manager = SimulatedBluetoothManager([0.0] * 5)
+        now = [1000.0]
+        scheduler = PollScheduler(fixed_interval=60, clock=lambda: now[0])
+        monitor = BatteryMonitor(manager, poll_scheduler=scheduler)
+
+        # 初回はすべてのデバイスが対象
+        devices = asyncio.run(monitor.poll_due_devices())
+        self.assertEqual(len(devices), 5)
+        self.assertEqual(scheduler.read_count, 5)
+
+        # 期限前は何も読み取らない
+        self.assertIsNone(asyncio.run(monitor.poll_due_devices()))
+
+        # 1台だけ期限を早めると、その1台のみ読み取られる
+        scheduler.schedule(manager.devices[2].address, 0)
+        devices = asyncio.run(monitor.poll_due_devices())
+        self.assertEqual(len(devices), 5)
+        self.assertEqual(scheduler.read_count, 6)
+        self.assertEqual(
+            monitor.get_read_stats(manager.devices[2].address).read_count, 2
+        )
+        self.assertEqual(
+            monitor.get_read_stats(manager.devices[0].address).read_count, 1
+        )
+
+    def test_poll_does_not_enumerate_every_tick(self):
+        """イベントを購読していなくても、全件列挙はscan_freshnessごとに留まるテスト"""
+        backend = SimulatedBackend(device_count=3, latency_range=(0, 0))
+        manager = BluetoothManager(backend=backend)
+        monitor = BatteryMonitor(manager, scan_freshness=60)
+        enumerations = []
+        enumerate_devices = backend.enumerate_devices
+
+        async def counting_enumerate():
+            enumerations.append(1)
+            return await enumerate_devices()
+
+        backend.enumerate_devices = counting_enumerate
+
+        async def run():
+            devices = await monitor.poll_due_devices()
+            await monitor.poll_due_devices()
+            # 鮮度期間が過ぎたら列挙し直す
+            manager._last_reconcile -= 60
+            await monitor.poll_due_devices()
+            return devices
+
+        devices = asyncio.run(run())
+        self.assertEqual(len(devices), 3)
+        self.assertEqual(len(enumerations), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
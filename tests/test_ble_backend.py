@@ -0,0 +1,220 @@
+"""
+Test BLE Backend
+"""
+
+import asyncio
+import unittest
+from bluetooth_manager import BluetoothDevice
+from backends.ble import BATTERY_LEVEL_UUID, BleakConnectionPool, BleBatteryBackend
+from backends.simulated import SimulatedBackend
+
+
+class FakeBleakClient:
+    """BleakClientの代わりに使用するテスト用クライアント"""
+
+    instances = []
+    battery_levels = {}
+    failing_addresses = set()
+    slow_addresses = set()
+
+    def __init__(self, address, timeout=10.0):
+        self.address = address
+        self.timeout = timeout
+        self.is_connected = False
+        self.read_count = 0
+        FakeBleakClient.instances.append(self)
+
+    async def connect(self):
+        # 応答しないデバイスは接続が終わらない
+        await asyncio.sleep(
+            60 if self.address in FakeBleakClient.slow_addresses else 0.01
+        )
+        self.is_connected = True
+
+    async def disconnect(self):
+        self.is_connected = False
+
+    async def read_gatt_char(self, uuid):
+        assert uuid == BATTERY_LEVEL_UUID
+        if self.address in FakeBleakClient.failing_addresses:
+            raise OSError("GATT read failed")
+        self.read_count += 1
+        return bytearray([FakeBleakClient.battery_levels.get(self.address, 80)])
+
+
+class FakeClock:
+    """テスト用の時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_device(index):
+    """テスト用デバイスを作成"""
+    device = BluetoothDevice(f"Device {index}", f"AA:BB:CC:DD:EE:{index:02X}")
+    device.is_connected = True
+    return device
+
+
+class TestBleakConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        """テスト前の設定"""
+        FakeBleakClient.instances = []
+        FakeBleakClient.battery_levels = {}
+        FakeBleakClient.failing_addresses = set()
+        FakeBleakClient.slow_addresses = set()
+        self.clock = FakeClock()
+        self.pool = BleakConnectionPool(
+            client_factory=FakeBleakClient,
+            max_size=2,
+            idle_timeout=60,
+            clock=self.clock,
+        )
+        self.backend = BleBatteryBackend(
+            base_backend=SimulatedBackend(device_count=0),
+            pool=self.pool,
+            fallback_to_base=False,
+        )
+
+    def read(self, device):
+        return asyncio.run(self.backend.read_battery_level(device))
+
+    def test_connections_are_reused(self):
+        """同じデバイスの読み取りで接続が再利用されるテスト"""
+        device = make_device(1)
+        FakeBleakClient.battery_levels[device.address] = 42
+
+        levels = [self.read(device) for _ in range(5)]
+
+        self.assertEqual(levels, [42] * 5)
+        self.assertEqual(self.pool.connect_count, 1)
+        self.assertEqual(self.pool.reuse_count, 4)
+        self.assertAlmostEqual(self.pool.reuse_ratio, 0.8)
+
+        stats = self.backend.get_stats()
+        self.assertEqual(stats["read_count"], 5)
+        self.assertIsNotNone(stats["average_read_latency"])
+
+    def test_max_pool_size(self):
+        """上限を超えると最も古い接続が切断されるテスト"""
+        devices = [make_device(i) for i in range(3)]
+        for device in devices:
+            self.read(device)
+
+        self.assertEqual(self.pool.size, 2)
+        self.assertEqual(self.pool.eviction_count, 1)
+        self.assertFalse(FakeBleakClient.instances[0].is_connected)
+        self.assertTrue(FakeBleakClient.instances[2].is_connected)
+
+    def test_idle_eviction(self):
+        """一定時間使われていない接続が切断されるテスト"""
+        first, second = make_device(1), make_device(2)
+        self.read(first)
+        self.clock.now = 100
+        self.read(second)
+
+        self.assertEqual(self.pool.size, 1)
+        self.assertFalse(FakeBleakClient.instances[0].is_connected)
+
+    def test_reconnect_after_disconnect(self):
+        """切断されていた接続は再接続されるテスト"""
+        device = make_device(1)
+        self.read(device)
+        FakeBleakClient.instances[0].is_connected = False
+        self.read(device)
+
+        self.assertEqual(self.pool.connect_count, 2)
+
+    def test_failed_read_discards_connection(self):
+        """読み取り失敗時に接続が破棄され、Noneが返るテスト"""
+        device = make_device(1)
+        FakeBleakClient.failing_addresses.add(device.address)
+
+        self.assertIsNone(self.read(device))
+        self.assertEqual(self.pool.size, 0)
+        self.assertEqual(self.backend.failure_count, 1)
+
+    def test_fallback_to_base_backend(self):
+        """GATTで読めないデバイスは基盤のバックエンドで読み取るテスト"""
+        base = SimulatedBackend(device_count=1, latency_range=(0, 0))
+        backend = BleBatteryBackend(base_backend=base, pool=self.pool)
+
+        async def run():
+            device = (await backend.enumerate_devices())[0]
+            FakeBleakClient.failing_addresses.add(device.address)
+            return await backend.read_battery_level(device)
+
+        level = asyncio.run(run())
+        self.assertIsNotNone(level)
+        self.assertEqual(base.read_count, 1)
+
+    def test_slow_connect_falls_back_within_deadline(self):
+        """GATTの接続が終わらないデバイスも呼び出し側の期限内にフォールバックするテスト"""
+        base = SimulatedBackend(device_count=1, latency_range=(0, 0))
+        backend = BleBatteryBackend(
+            base_backend=base, pool=self.pool, gatt_timeout=0.05
+        )
+
+        async def run():
+            device = (await backend.enumerate_devices())[0]
+            FakeBleakClient.slow_addresses.add(device.address)
+            return await asyncio.wait_for(backend.read_battery_level(device), 1.0)
+
+        level = asyncio.run(run())
+        self.assertIsNotNone(level)
+        self.assertEqual(base.read_count, 1)
+        self.assertEqual(FakeBleakClient.instances[0].timeout, 0.05)
+
+    def test_unsupported_devices_skip_gatt(self):
+        """GATTで読めなかったデバイスは一定時間GATTを試さないテスト"""
+        device = make_device(1)
+        FakeBleakClient.failing_addresses.add(device.address)
+        self.backend.unsupported_retry_interval = 600
+
+        self.read(device)
+        self.read(device)
+        self.assertEqual(len(FakeBleakClient.instances), 1)
+        self.assertEqual(self.backend.get_stats()["skipped_count"], 1)
+
+        # 一定時間が過ぎたら再び試す
+        FakeBleakClient.failing_addresses.clear()
+        self.clock.now += 600
+        self.assertEqual(self.read(device), 80)
+        self.assertEqual(self.backend.get_stats()["unsupported_count"], 0)
+
+    def test_stream_devices_delegates_to_base(self):
+        """デバイスのストリーミングが基盤のバックエンドに委譲されるテスト"""
+
+        class StreamingBackend(SimulatedBackend):
+            streamed = False
+
+            async def stream_devices(self):
+                StreamingBackend.streamed = True
+                for device in await self.enumerate_devices():
+                    yield device
+
+        base = StreamingBackend(device_count=3, latency_range=(0, 0))
+        backend = BleBatteryBackend(base_backend=base, pool=self.pool)
+
+        async def run():
+            return [device async for device in backend.stream_devices()]
+
+        devices = asyncio.run(run())
+        self.assertEqual(len(devices), 3)
+        self.assertTrue(StreamingBackend.streamed)
+
+    def test_close(self):
+        """すべての接続が切断されるテスト"""
+        self.read(make_device(1))
+        asyncio.run(self.backend.aclose())
+
+        self.assertEqual(self.pool.size, 0)
+        self.assertFalse(FakeBleakClient.instances[0].is_connected)
+
+
+if __name__ == "__main__":
+    unittest.main()
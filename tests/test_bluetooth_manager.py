@@ -27,28 +27,32 @@ class TestBluetoothManager(unittest.TestCase):
         """デバイスタイプ判定テスト"""
         # イヤホン
         self.assertEqual(
-            self.bluetooth_manager._determine_device_type("AirPods Pro"), "earphones"
+            self.bluetooth_manager.backend._determine_device_type("AirPods Pro"),
+            "earphones",
         )
 
         # ヘッドホン
         self.assertEqual(
-            self.bluetooth_manager._determine_device_type("Sony Headphones"),
+            self.bluetooth_manager.backend._determine_device_type("Sony Headphones"),
             "headphones",
         )
 
         # マウス
         self.assertEqual(
-            self.bluetooth_manager._determine_device_type("Bluetooth Mouse"), "mouse"
+            self.bluetooth_manager.backend._determine_device_type("Bluetooth Mouse"),
+            "mouse",
         )
 
         # キーボード
         self.assertEqual(
-            self.bluetooth_manager._determine_device_type("Magic Keyboard"), "keyboard"
+            self.bluetooth_manager.backend._determine_device_type("Magic Keyboard"),
+            "keyboard",
         )
 
         # 不明
         self.assertEqual(
-            self.bluetooth_manager._determine_device_type("Unknown Device"), "unknown"
+            self.bluetooth_manager.backend._determine_device_type("Unknown Device"),
+            "unknown",
         )
 
     async def test_battery_level_retrieval(self):
@@ -5,7 +5,10 @@ Test Configuration Manager
 import unittest
 import tempfile
 import os
-from src.utils.config import ConfigManager
+import json
+import time
+from unittest import mock
+from src.utils.config import ConfigManager, ConfigSnapshot
 
 
 class TestConfigManager(unittest.TestCase):
@@ -21,6 +24,8 @@ class TestConfigManager(unittest.TestCase):
         """テスト後のクリーンアップ"""
         import shutil
 
+        self.config_manager.close()
+
         shutil.rmtree(self.temp_dir)
 
     def test_default_config_loading(self):
@@ -50,6 +55,168 @@ class TestConfigManager(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.config_manager.set_low_battery_threshold(101)
 
+    def read_config_file(self):
+        with open(self.config_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_batch_writes_once(self):
+        """batch内の複数の変更が1回の書き込みになるテスト"""
+        writes = self.config_manager.write_count
+        with self.config_manager.batch():
+            for index in range(10):
+                self.config_manager.set(f"ui.values.key{index}", index)
+            self.assertTrue(self.config_manager.dirty)
+            self.assertEqual(self.config_manager.write_count, writes)
+
+        self.assertEqual(self.config_manager.write_count, writes + 1)
+        self.assertFalse(self.config_manager.dirty)
+        self.assertEqual(self.read_config_file()["ui"]["values"]["key9"], 9)
+
+    def test_debounced_flush(self):
+        """連続した変更が最後の変更から一定時間後にまとめて書き込まれるテスト"""
+        self.config_manager.flush_delay = 0.1
+        writes = self.config_manager.write_count
+        for threshold in (11, 12, 13):
+            self.config_manager.set("battery.low_battery_threshold", threshold)
+        self.assertEqual(self.config_manager.write_count, writes)
+
+        time.sleep(0.3)
+        self.assertEqual(self.config_manager.write_count, writes + 1)
+        self.assertEqual(
+            self.read_config_file()["battery"]["low_battery_threshold"], 13
+        )
+
+    def test_unchanged_value_is_not_written(self):
+        """値が変わらない場合は書き込まないテスト"""
+        self.config_manager.set("app.language", "ja")
+        self.assertFalse(self.config_manager.dirty)
+        self.assertFalse(self.config_manager.flush())
+
+    def test_close_flushes_pending_changes(self):
+        """closeで未書き込みの変更が書き込まれるテスト"""
+        self.config_manager.set("app.theme", "dark")
+        self.config_manager.close()
+
+        self.assertEqual(self.read_config_file()["app"]["theme"], "dark")
+        reloaded = ConfigManager(self.config_file)
+        self.assertEqual(reloaded.get("app.theme"), "dark")
+
+    def test_failed_write_keeps_previous_file(self):
+        """書き込みに失敗しても元の設定ファイルが残るテスト"""
+        self.config_manager.set("app.theme", "dark")
+        self.config_manager.flush()
+        self.config_manager.set("app.theme", "light")
+        with mock.patch("json.dump", side_effect=OSError("disk full")):
+            self.assertFalse(self.config_manager.flush())
+
+        self.assertTrue(self.config_manager.dirty)
+        self.assertEqual(self.read_config_file()["app"]["theme"], "dark")
+        self.assertEqual(os.listdir(self.temp_dir), ["test_config.json"])
+
+    def write_external(self, data):
+        """外部のエディターでの変更を模擬（更新日時を確実に進める）"""
+        stat = os.stat(self.config_file)
+        with open(self.config_file, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.utime(self.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_snapshot_attribute_access(self):
+        """スナップショットの属性アクセスと読み取り専用のテスト"""
+        snapshot = self.config_manager.snapshot
+        self.assertEqual(snapshot.battery.low_battery_threshold, 10)
+        self.assertEqual(snapshot.get("app.language"), "ja")
+        self.assertEqual(snapshot["ui.window_size.width"], 400)
+        self.assertIsInstance(snapshot.devices.supported_types, tuple)
+        with self.assertRaises(AttributeError):
+            snapshot.battery.low_battery_threshold = 20
+        with self.assertRaises(AttributeError):
+            snapshot.missing_section
+
+        self.config_manager.set("battery.low_battery_threshold", 20)
+        # 以前のスナップショットは変更されない
+        self.assertEqual(snapshot.battery.low_battery_threshold, 10)
+        self.assertEqual(self.config_manager.snapshot.battery.low_battery_threshold, 20)
+
+    def test_get_returns_copies(self):
+        """セクション・リストの取得結果を変更しても設定に影響しないテスト"""
+        window_size = self.config_manager.get("ui.window_size")
+        window_size["width"] = 1
+        supported_types = self.config_manager.get("devices.supported_types")
+        supported_types.append("speaker")
+
+        self.assertEqual(
+            self.config_manager.get("ui.window_size"), {"width": 400, "height": 300}
+        )
+        self.assertNotIn("speaker", self.config_manager.get("devices.supported_types"))
+        self.assertEqual(self.config_manager.get("battery.missing", 5), 5)
+        self.assertEqual(self.config_manager.get("app.language.missing", "x"), "x")
+
+    def test_subscribe_to_key_and_section(self):
+        """キー・セクションの変更が購読者に通知されるテスト"""
+        thresholds = []
+        sections = []
+        unsubscribe = self.config_manager.subscribe(
+            "battery.low_battery_threshold", thresholds.append
+        )
+        self.config_manager.subscribe("battery", sections.append)
+
+        self.config_manager.set("battery.low_battery_threshold", 15)
+        self.config_manager.set("battery.update_interval", 120)
+        self.config_manager.set("app.theme", "dark")
+        unsubscribe()
+        self.config_manager.set("battery.low_battery_threshold", 20)
+
+        self.assertEqual(thresholds, [15])
+        self.assertEqual(len(sections), 3)
+        self.assertIsInstance(sections[0], ConfigSnapshot)
+        self.assertEqual(sections[-1].low_battery_threshold, 20)
+
+    def test_batch_notifies_once(self):
+        """batch内の変更は抜けるときに1回だけ通知されるテスト"""
+        values = []
+        self.config_manager.subscribe("battery.low_battery_threshold", values.append)
+        with self.config_manager.batch():
+            self.config_manager.set("battery.low_battery_threshold", 15)
+            self.config_manager.set("battery.low_battery_threshold", 20)
+            self.assertEqual(values, [])
+        self.assertEqual(values, [20])
+
+    def test_hot_reload(self):
+        """外部で変更された設定ファイルを再読み込みするテスト"""
+        values = []
+        self.config_manager.subscribe("battery.low_battery_threshold", values.append)
+        self.assertFalse(self.config_manager.reload_if_changed())
+
+        data = self.read_config_file()
+        data["battery"]["low_battery_threshold"] = 25
+        del data["app"]
+        self.write_external(data)
+
+        self.assertTrue(self.config_manager.reload_if_changed())
+        self.assertEqual(values, [25])
+        self.assertEqual(self.config_manager.get_low_battery_threshold(), 25)
+        # ファイルから削除されたキーはデフォルト値になる
+        self.assertEqual(self.config_manager.get_language(), "ja")
+        self.assertFalse(self.config_manager.reload_if_changed())
+        self.assertEqual(self.config_manager.reload_count, 1)
+
+    def test_own_writes_are_not_reloaded(self):
+        """自分の書き込みは再読み込みしないテスト"""
+        self.config_manager.set("app.theme", "dark")
+        self.config_manager.flush()
+        self.assertFalse(self.config_manager.reload_if_changed())
+        self.assertEqual(self.config_manager.reload_count, 0)
+
+    def test_invalid_file_is_not_applied(self):
+        """壊れた設定ファイルは読み込まず、現在の設定を維持するテスト"""
+        stat = os.stat(self.config_file)
+        with open(self.config_file, "w", encoding="utf-8") as f:
+            f.write("{broken")
+        os.utime(self.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertFalse(self.config_manager.reload_if_changed())
+        self.assertEqual(self.config_manager.get("app.language"), "ja")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,232 @@
+"""
+Test Device Events
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+import unittest
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QEventLoop, QTimer
+from bluetooth_manager import BluetoothManager
+from backends.powershell import (
+    BATTERY_LEVEL_KEY,
+    SCAN_COMMAND,
+    PowerShellBackend,
+)
+from battery_monitor import BatteryMonitor
+from async_worker import AsyncLoopThread, BatteryRefreshWorker
+from device_events import (
+    DeviceEvent,
+    FakeDeviceEventSource,
+    PowerShellDeviceEventSource,
+)
+
+MOUSE_ID = "BTHLE\\DEV_D1E2F3A4B5C6\\7&2B3C&0&D1E2F3A4B5C6"
+HEADSET_ID = "BTHENUM\\{0000110B}_VID&0001004C\\7&1A2B&0&A0B1C2D3E4F5_C00000000"
+HEADSET_NODE_ID = "BTHENUM\\DEV_A0B1C2D3E4F5\\7&1A2B&0&BLUETOOTHDEVICE_A0B1C2D3E4F5"
+
+
+class CountingSession:
+    """PowerShellの代わりに固定の列挙結果を返すテスト用セッション"""
+
+    def __init__(self, records, properties=None):
+        self.records = records
+        self.properties = properties or []
+        self.commands = []
+        self.run_count = 0
+
+    def stream(self, command, timeout=None):
+        # 全件列挙（1行に1つのデバイス・プロパティ）
+        self.run_count += 1
+        self.commands.append(command)
+        for item in self.records + self.properties:
+            yield json.dumps(item)
+
+    def run(self, command, timeout=None):
+        # バッテリー残量の問い合わせ
+        self.commands.append(command)
+        return json.dumps({"properties": self.properties})
+
+    def close(self):
+        pass
+
+
+class TestDeviceEvents(unittest.TestCase):
+
+    def setUp(self):
+        """テスト前の設定"""
+        self.session = CountingSession(
+            [{"FriendlyName": "MX Master 3", "Status": "OK", "InstanceId": MOUSE_ID}]
+        )
+        self.source = FakeDeviceEventSource()
+        self.manager = BluetoothManager(
+            backend=PowerShellBackend(self.session, self.source),
+            reconcile_interval=600,
+        )
+        self.manager.start_event_monitoring()
+
+    def test_added_and_removed_events(self):
+        """追加・削除イベントで接続デバイス一覧が更新されるテスト"""
+        received = []
+        self.manager.add_device_listener(lambda e, d: received.append((e.kind, d)))
+
+        self.source.emit(
+            DeviceEvent(DeviceEvent.ADDED, HEADSET_ID, "AirPods Pro", "OK")
+        )
+        self.assertIn("A0:B1:C2:D3:E4:F5", self.manager.get_connected_devices())
+        self.assertEqual(received[0][1].name, "AirPods Pro")
+
+        self.source.emit(
+            DeviceEvent(DeviceEvent.REMOVED, HEADSET_NODE_ID, "AirPods Pro")
+        )
+        self.assertNotIn("A0:B1:C2:D3:E4:F5", self.manager.get_connected_devices())
+        self.assertEqual(received[1], (DeviceEvent.REMOVED, None))
+
+    def test_child_node_removal_keeps_device(self):
+        """サービスなどの子ノードのみが削除された場合はデバイスが残るテスト"""
+        self.source.emit(
+            DeviceEvent(DeviceEvent.ADDED, HEADSET_NODE_ID, "AirPods Pro", "OK")
+        )
+        self.source.emit(DeviceEvent(DeviceEvent.REMOVED, HEADSET_ID, "AirPods Pro"))
+        self.source.emit(
+            DeviceEvent(DeviceEvent.CHANGED, HEADSET_ID, "AirPods", "Error")
+        )
+
+        self.assertIn("A0:B1:C2:D3:E4:F5", self.manager.get_connected_devices())
+
+    def test_scan_only_reconciles_periodically(self):
+        """イベント監視中は全件列挙が再照合の間隔でのみ行われるテスト"""
+
+        async def run():
+            first = await self.manager.scan_devices()
+            second = await self.manager.scan_devices()
+            forced = await self.manager.scan_devices(force=True)
+            return first, second, forced
+
+        first, second, forced = asyncio.run(run())
+
+        self.assertEqual(self.session.run_count, 2)
+        self.assertEqual(len(first), 1)
+        self.assertIs(first[0], second[0])
+        self.assertIs(first[0], forced[0])
+
+    def test_scan_listener_receives_devices_during_scan(self):
+        """全件列挙の途中で見つかった接続デバイスが通知されるテスト"""
+        found = []
+        self.manager.add_scan_listener(
+            lambda device: found.append(
+                (device.name, len(self.manager.get_connected_devices()))
+            )
+        )
+        devices = asyncio.run(self.manager.scan_devices(force=True))
+
+        # 一覧の置き換え（列挙の完了）より前に通知される
+        self.assertEqual(found, [("MX Master 3", 0)])
+        self.assertEqual(len(devices), 1)
+
+    def test_event_keeps_battery_level(self):
+        """変更イベントで既存デバイスのバッテリー情報が保持されるテスト"""
+        asyncio.run(self.manager.scan_devices())
+        device = self.manager.get_connected_devices()["D1:E2:F3:A4:B5:C6"]
+        device.battery_level = 42
+
+        self.source.emit(
+            DeviceEvent(DeviceEvent.CHANGED, MOUSE_ID, "MX Master 3S", "OK")
+        )
+
+        updated = self.manager.get_connected_devices()["D1:E2:F3:A4:B5:C6"]
+        self.assertEqual(updated.name, "MX Master 3S")
+        self.assertEqual(updated.battery_level, 42)
+
+
+class TestPowerShellDeviceEventSource(unittest.TestCase):
+
+    def test_watcher_output_is_dispatched(self):
+        """監視プロセスの1行1イベントの出力が配信されるテスト"""
+        lines = [
+            {
+                "kind": "added",
+                "InstanceId": MOUSE_ID,
+                "FriendlyName": "Mouse",
+                "Status": "OK",
+            },
+            "not json",
+            {"kind": "removed", "InstanceId": MOUSE_ID, "FriendlyName": "Mouse"},
+        ]
+        script = (
+            "".join(
+                f"print({json.dumps(line if isinstance(line, str) else json.dumps(line))}, flush=True)\n"
+                for line in lines
+            )
+            + "import time; time.sleep(30)\n"
+        )
+
+        received = []
+        done = threading.Event()
+
+        def on_event(event):
+            received.append(event)
+            if len(received) == 2:
+                done.set()
+
+        source = PowerShellDeviceEventSource(
+            watcher_command=[sys.executable, "-c", script]
+        )
+        source.start(on_event)
+        try:
+            self.assertTrue(done.wait(5))
+        finally:
+            source.stop()
+
+        self.assertEqual([e.kind for e in received], ["added", "removed"])
+        self.assertFalse(source.is_running)
+
+
+class TestWorkerDeviceEvents(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラスの設定"""
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_connect_latency(self):
+        """接続イベントから一覧更新シグナルまでの遅延が1秒未満であるテスト"""
+        source = FakeDeviceEventSource()
+        session = CountingSession(
+            [],
+            [{"InstanceId": HEADSET_ID, "KeyName": BATTERY_LEVEL_KEY, "Data": 80}],
+        )
+        backend = PowerShellBackend(session, source)
+        manager = BluetoothManager(backend=backend)
+        manager.start_event_monitoring()
+        monitor = BatteryMonitor(manager)
+        worker = BatteryRefreshWorker(monitor, AsyncLoopThread())
+
+        received = []
+        loop = QEventLoop()
+        worker.devices_updated.connect(lambda d: (received.append(d), loop.quit()))
+        QTimer.singleShot(5000, loop.quit)
+
+        start = time.perf_counter()
+        threading.Thread(
+            target=source.emit,
+            args=(DeviceEvent(DeviceEvent.ADDED, HEADSET_ID, "AirPods Pro", "OK"),),
+        ).start()
+        loop.exec_()
+        latency = time.perf_counter() - start
+        worker.shutdown()
+
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0][0].name, "AirPods Pro")
+        self.assertEqual(received[0][0].battery_level, 80)
+        self.assertLess(latency, 1.0)
+        # 全件列挙は行わず、バッテリー残量の問い合わせのみ行う
+        self.assertNotIn(SCAN_COMMAND, session.commands)
+        self.assertEqual(backend.battery_query_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
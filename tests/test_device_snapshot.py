@@ -0,0 +1,98 @@
+"""
+Test Device Snapshot
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from bluetooth_manager import BluetoothDevice
+from device_snapshot import DeviceSnapshotStore
+from ui.device_model import DeviceItem
+
+
+def make_device(index, level):
+    device = BluetoothDevice(f"Device {index}", f"00:00:00:00:00:{index:02X}", "マウス")
+    device.battery_level = level
+    device.is_connected = True
+    device.last_updated = datetime(2026, 1, 1, 12, 0, index % 60)
+    return device
+
+
+class TestDeviceSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        """テスト前の設定"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "devices.json")
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip_marks_devices_stale(self):
+        """保存した一覧が前回の値として読み込まれるテスト"""
+        store = DeviceSnapshotStore(self.path, save_delay=0)
+        devices = [make_device(0, 80), make_device(1, None)]
+        devices[0].is_charging = True
+        store.update(devices)
+
+        loaded = DeviceSnapshotStore(self.path).load()
+
+        self.assertEqual([d.address for d in loaded], [d.address for d in devices])
+        self.assertEqual(loaded[0].battery_level, 80)
+        self.assertTrue(loaded[0].is_charging)
+        self.assertIsNone(loaded[1].battery_level)
+        self.assertEqual(loaded[1].last_updated, devices[1].last_updated)
+        self.assertTrue(all(d.is_stale and d.is_connected for d in loaded))
+        self.assertEqual(DeviceItem.from_device(loaded[0]).status, "前回の値")
+
+    def test_updates_are_debounced(self):
+        """連続した変化が1回の書き込みにまとめられ、変化がなければ書き込まないテスト"""
+        store = DeviceSnapshotStore(self.path, save_delay=0.1)
+        device = make_device(0, 50)
+        for level in (50, 49, 48):
+            device.battery_level = level
+            store.update([device])
+        self.assertEqual(store.write_count, 0)
+
+        time.sleep(0.3)
+        self.assertEqual(store.write_count, 1)
+        store.update([device])
+        self.assertFalse(store.flush())
+        self.assertEqual(store.write_count, 1)
+        self.assertEqual(DeviceSnapshotStore(self.path).load()[0].battery_level, 48)
+
+    def test_close_writes_pending_update(self):
+        """closeで予約中の書き込みが行われるテスト"""
+        store = DeviceSnapshotStore(self.path, save_delay=60)
+        store.update([make_device(0, 30)])
+        store.close()
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual(len(data["devices"]), 1)
+        self.assertEqual(os.listdir(self.temp_dir), ["devices.json"])
+
+    def test_missing_or_broken_file(self):
+        """ファイルがない・壊れている場合は空の一覧になるテスト"""
+        self.assertEqual(DeviceSnapshotStore(self.path).load(), [])
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{broken")
+        self.assertEqual(DeviceSnapshotStore(self.path).load(), [])
+
+    def test_load_is_fast(self):
+        """多数のデバイスでも読み込みが数ミリ秒で終わるテスト"""
+        store = DeviceSnapshotStore(self.path, save_delay=0)
+        store.update([make_device(index % 256, 50) for index in range(200)])
+
+        loaded_store = DeviceSnapshotStore(self.path)
+        self.assertEqual(len(loaded_store.load()), 200)
+        self.assertLess(loaded_store.load_time, 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
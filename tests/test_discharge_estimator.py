@@ -0,0 +1,137 @@
+"""
+Test Discharge Estimator
+"""
+
+import unittest
+from discharge_estimator import DischargeEstimator, RemainingEstimate
+from ui.device_model import format_remaining
+
+
+def discharge_trace(
+    estimator, address, rate_per_hour, minutes, start_level=100, start=0.0
+):
+    """一定速度で放電する1分間隔のサンプルを追加"""
+    for minute in range(minutes):
+        level = int(start_level - rate_per_hour * minute / 60)
+        estimator.observe(address, start + minute * 60, level)
+
+
+class TestDischargeEstimator(unittest.TestCase):
+
+    def test_constant_discharge(self):
+        """一定速度の放電から残り時間を推定するテスト"""
+        estimator = DischargeEstimator()
+        discharge_trace(estimator, "A", rate_per_hour=10, minutes=240)
+
+        estimate = estimator.estimate_remaining("A")
+        self.assertAlmostEqual(estimate.rate_per_hour, 10, delta=1.5)
+        self.assertAlmostEqual(estimate.hours, 6, delta=1.0)
+        self.assertGreater(estimate.confidence, 0.5)
+
+    def test_confidence_grows_with_observation(self):
+        """観測期間が長いほど信頼度が上がるテスト"""
+        estimator = DischargeEstimator()
+        discharge_trace(estimator, "A", rate_per_hour=20, minutes=10)
+        early = estimator.estimate_remaining("A").confidence
+
+        discharge_trace(
+            estimator, "A", rate_per_hour=20, minutes=120, start_level=96, start=600
+        )
+        later = estimator.estimate_remaining("A").confidence
+        self.assertLess(early, later)
+
+    def test_incremental_matches_single_batch(self):
+        """サンプルごとの更新と一括更新の結果が一致するテスト"""
+        incremental = DischargeEstimator()
+        batched = DischargeEstimator()
+        for minute in range(120):
+            for index, rate in enumerate((5, 12, 30)):
+                level = int(100 - rate * minute / 60)
+                incremental.observe(f"D{index}", minute * 60, level)
+                batched.observe(f"D{index}", minute * 60, level)
+            incremental.update()
+
+        for index in range(3):
+            expected = incremental.estimate_remaining(f"D{index}")
+            actual = batched.estimate_remaining(f"D{index}")
+            self.assertAlmostEqual(expected.hours, actual.hours, places=6)
+            self.assertAlmostEqual(expected.confidence, actual.confidence, places=6)
+
+    def test_charging_resets(self):
+        """充電・残量の増加で推定がやり直されるテスト"""
+        estimator = DischargeEstimator()
+        discharge_trace(estimator, "A", rate_per_hour=10, minutes=120)
+        self.assertIsNotNone(estimator.estimate_remaining("A"))
+
+        estimator.observe("A", 120 * 60, 90)
+        self.assertIsNone(estimator.estimate_remaining("A"))
+
+        estimator.observe("A", 121 * 60, 91, charging=True)
+        self.assertIsNone(estimator.estimate_remaining("A"))
+
+    def test_jitter_does_not_reset(self):
+        """報告される残量の小さな揺れでは推定がやり直されないテスト"""
+        estimator = DischargeEstimator()
+        discharge_trace(estimator, "A", rate_per_hour=10, minutes=120)
+        before = estimator.estimate_remaining("A")
+
+        for minute, level in enumerate((81, 80, 81, 80, 82), start=120):
+            estimator.observe("A", minute * 60, level)
+            self.assertIsNotNone(estimator.estimate_remaining("A"))
+
+        after = estimator.estimate_remaining("A")
+        self.assertGreaterEqual(after.confidence, before.confidence * 0.5)
+
+    def test_long_gap_resets(self):
+        """長時間観測できなかった場合に推定がやり直されるテスト"""
+        estimator = DischargeEstimator(max_gap=3600)
+        discharge_trace(estimator, "A", rate_per_hour=10, minutes=60)
+        estimator.observe("A", 60 * 60 + 7200, 80)
+        self.assertIsNone(estimator.estimate_remaining("A"))
+
+    def test_not_discharging(self):
+        """残量が変わらない場合は推定しないテスト"""
+        estimator = DischargeEstimator()
+        for minute in range(60):
+            estimator.observe("A", minute * 60, 80)
+        self.assertIsNone(estimator.estimate_remaining("A"))
+        self.assertEqual(estimator.estimate_all(), {})
+
+    def test_many_devices(self):
+        """初期容量を超えるデバイス数を扱えるテスト"""
+        estimator = DischargeEstimator(initial_capacity=2)
+        for index in range(50):
+            discharge_trace(
+                estimator, f"D{index}", rate_per_hour=10 + index, minutes=30
+            )
+
+        estimates = estimator.estimate_all()
+        self.assertEqual(len(estimates), 50)
+        self.assertGreater(
+            estimates["D49"].rate_per_hour, estimates["D0"].rate_per_hour
+        )
+
+
+class TestFormatRemaining(unittest.TestCase):
+
+    def test_format(self):
+        """残り時間の表示文字列のテスト"""
+        self.assertEqual(
+            format_remaining(RemainingEstimate(3.2, 10, 0.9)), "残り約3時間"
+        )
+        self.assertEqual(
+            format_remaining(RemainingEstimate(0.5, 10, 0.9)), "残り約30分"
+        )
+        self.assertEqual(
+            format_remaining(RemainingEstimate(0.01, 10, 0.9)), "残り約10分"
+        )
+        self.assertEqual(format_remaining(RemainingEstimate(100, 1, 0.9)), "残り約4日")
+
+    def test_low_confidence_hidden(self):
+        """信頼度が低い推定は表示しないテスト"""
+        self.assertIsNone(format_remaining(RemainingEstimate(3, 10, 0.1)))
+        self.assertIsNone(format_remaining(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Test History Store
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from history_store import HistoryStore
+from battery_monitor import BatteryMonitor
+from bluetooth_manager import BluetoothManager
+from backends.simulated import SimulatedBackend
+
+
+class TestHistoryStore(unittest.TestCase):
+
+    def setUp(self):
+        """テスト前の設定"""
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, "history.db")
+        self.now = 1_700_000_000.0
+        self.store = self.create_store()
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        self.store.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def create_store(self, **options):
+        options.setdefault("flush_interval", 60)
+        store = HistoryStore(self.db_path, clock=lambda: self.now, **options)
+        store.start()
+        return store
+
+    def test_wal_mode(self):
+        """WALモードで開かれるテスト"""
+        connection = sqlite3.connect(self.db_path)
+        mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+        connection.close()
+        self.assertEqual(mode, "wal")
+
+    def test_batched_writes(self):
+        """記録したサンプルがまとめて書き込まれるテスト"""
+        for i in range(50):
+            self.store.record("A", 100 - i, self.now + i * 60)
+
+        self.assertEqual(self.store.query("A"), [])  # flush_interval前は未書き込み
+        self.assertTrue(self.store.flush())
+
+        rows = self.store.query("A")
+        self.assertEqual(len(rows), 50)
+        self.assertEqual(rows[0], (int(self.now), 100))
+        self.assertEqual(self.store.get_stats()["batches"], 1)
+
+    def test_batch_size(self):
+        """batch_size件ごとに書き込まれるテスト"""
+        self.store.close()
+        self.store = self.create_store(batch_size=10)
+        for i in range(25):
+            self.store.record("A", 50, self.now + i)
+        self.store.flush()
+
+        self.assertEqual(self.store.get_stats()["written"], 25)
+        self.assertEqual(self.store.get_stats()["batches"], 3)
+
+    def test_range_query(self):
+        """デバイス・期間による検索のテスト"""
+        for i in range(10):
+            self.store.record("A", 90 - i, self.now + i * 60)
+            self.store.record("B", 50, self.now + i * 60)
+        self.store.flush()
+
+        rows = self.store.query("A", self.now + 120, self.now + 240)
+        self.assertEqual([level for _, level in rows], [88, 87, 86])
+
+        latest = self.store.query("A", limit=2)
+        self.assertEqual([level for _, level in latest], [82, 81])
+        self.assertEqual(self.store.query("unknown"), [])
+        self.assertEqual(sorted(self.store.addresses()), ["A", "B"])
+
+    def test_retention(self):
+        """保存期間を過ぎたサンプルが削除されるテスト"""
+        self.store.record("A", 80, self.now - 10 * 86400)
+        self.store.record("A", 70, self.now - 86400)
+        self.store.close()
+
+        self.store = self.create_store(retention_days=7)
+        self.store.flush()
+
+        self.assertEqual([level for _, level in self.store.query("A")], [70])
+        self.assertEqual(self.store.get_stats()["pruned"], 1)
+
+    def test_subsecond_samples_are_kept(self):
+        """同じ秒のサンプルが1件にまとめられないテスト"""
+        self.store.record("A", 80, self.now + 0.2)
+        self.store.record("A", 79, self.now + 0.7)
+        self.store.flush()
+
+        self.assertEqual(
+            self.store.query("A"), [(self.now + 0.2, 80), (self.now + 0.7, 79)]
+        )
+
+    def test_queue_is_bounded(self):
+        """キューが一杯の場合はサンプルを捨てて数えるテスト"""
+        store = HistoryStore(self.db_path, max_queue=2)
+        for level in range(3):
+            store.record("A", level, self.now)
+
+        self.assertEqual(store.get_stats()["queued"], 2)
+        self.assertEqual(store.get_stats()["dropped"], 1)
+
+    def test_stopped_writer_is_restarted(self):
+        """書き込みスレッドが停止した場合、次の記録で再起動されるテスト"""
+        self.store.restart_interval = 0
+        with mock.patch.object(
+            self.store, "_write_batch", side_effect=RuntimeError("disk error")
+        ):
+            self.store.record("A", 80, self.now)
+            self.assertFalse(self.store.flush(timeout=1))
+            self.store._thread.join(1)
+        self.assertFalse(self.store.is_running)
+
+        self.store.record("A", 79, self.now + 60)
+        self.assertTrue(self.store.flush())
+        self.assertEqual(self.store.query("A"), [(self.now + 60, 79)])
+        self.assertEqual(self.store.get_stats()["restarts"], 1)
+
+    def test_close_flushes(self):
+        """終了時に未書き込みのサンプルが保存されるテスト"""
+        self.store.record("A", 42, self.now)
+        self.store.close()
+
+        self.store = self.create_store()
+        self.assertEqual(self.store.query("A"), [(int(self.now), 42)])
+
+    def test_monitor_restores_history(self):
+        """BatteryMonitorが保存された履歴を読み込むテスト"""
+        manager = BluetoothManager(backend=SimulatedBackend(0))
+        monitor = BatteryMonitor(manager, history_capacity=3, history_store=self.store)
+        for i, level in enumerate((90, 80, 70, 60)):
+            with mock.patch(
+                "battery_monitor.time.time", return_value=self.now + i * 60
+            ):
+                monitor._record_battery_history("A", level)
+        self.store.close()
+
+        self.store = self.create_store()
+        restored = BatteryMonitor(manager, history_capacity=3, history_store=self.store)
+        restored.restore_history()
+
+        history = restored.get_device_battery_history("A")
+        self.assertEqual([level for _, level in history], [80, 70, 60])
+
+
+if __name__ == "__main__":
+    unittest.main()
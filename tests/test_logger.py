@@ -0,0 +1,272 @@
+"""
+Test Logger
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from utils import logger as log_module
+from utils.logger import (
+    LogManager,
+    LogVolumeControl,
+    apply_log_levels,
+    setup_logging,
+    shutdown_logging,
+)
+
+
+class SlowHandler(logging.Handler):
+    """書き込みが遅いディスクを再現するテスト用ハンドラー"""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.threads = []
+
+    def emit(self, record):
+        self.threads.append(threading.current_thread())
+        time.sleep(self.delay)
+
+
+class TestLoggingPipeline(unittest.TestCase):
+
+    def setUp(self):
+        """テスト前の設定"""
+        shutdown_logging()
+        self.temp_dir = tempfile.mkdtemp()
+        self.root_level = logging.getLogger().level
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        shutdown_logging()
+        logging.getLogger().setLevel(self.root_level)
+        shutil.rmtree(self.temp_dir)
+
+    def read_lines(self, log_file):
+        with open(log_file, "r", encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def test_records_are_written_by_listener_thread(self):
+        """ログを出すスレッドではなくリスナーのスレッドで書き込まれるテスト"""
+        setup_logging(log_dir=self.temp_dir)
+        slow = SlowHandler(0.05)
+        log_module._listener.handlers += (slow,)
+
+        start = time.perf_counter()
+        for index in range(5):
+            logging.getLogger("battery_monitor").info("read %d", index)
+        elapsed = time.perf_counter() - start
+        shutdown_logging()
+
+        self.assertLess(elapsed, 0.05)
+        self.assertEqual(len(slow.threads), 5)
+        self.assertNotIn(threading.current_thread(), slow.threads)
+
+    def test_shutdown_flushes_all_records(self):
+        """終了時にキューに残ったレコードが全て書き込まれるテスト"""
+        log_file = setup_logging(log_dir=self.temp_dir)
+        logger = logging.getLogger("test.flush")
+        for index in range(1000):
+            logger.info(f"message {index}")
+        shutdown_logging()
+
+        lines = self.read_lines(log_file)
+        self.assertEqual(len(lines), 1000)
+        self.assertTrue(lines[-1].endswith("message 999"))
+
+    def test_json_lines_format(self):
+        """JSON Lines形式で1レコードが1行のJSONになるテスト"""
+        log_file = setup_logging(log_dir=self.temp_dir, json_lines=True)
+        logger = logging.getLogger("test.json")
+        logger.warning("残量 %d%%", 9)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("失敗")
+        shutdown_logging()
+
+        self.assertTrue(log_file.endswith(".jsonl"))
+        records = [json.loads(line) for line in self.read_lines(log_file)]
+        self.assertEqual(records[0]["msg"], "残量 9%")
+        self.assertEqual(records[0]["level"], "WARNING")
+        self.assertEqual(records[0]["logger"], "test.json")
+        self.assertIn("ValueError: boom", records[1]["exc"])
+
+    def test_arguments_are_captured_at_call_time(self):
+        """後から変更された引数ではなく呼び出し時の値が書き込まれるテスト"""
+        log_file = setup_logging(log_dir=self.temp_dir)
+        devices = ["mouse"]
+        logging.getLogger("test.args").info("devices: %s", devices)
+        devices.append("keyboard")
+        shutdown_logging()
+
+        self.assertTrue(self.read_lines(log_file)[0].endswith("devices: ['mouse']"))
+
+    def test_repeated_messages_are_summarized_at_shutdown(self):
+        """繰り返しのメッセージが1行になり、終了時に省略回数が書き込まれるテスト"""
+        log_file = setup_logging(log_dir=self.temp_dir, aggregate_window=60)
+        for _ in range(100):
+            logging.getLogger("test.repeat").info("scan: %d devices", 3)
+        shutdown_logging()
+
+        lines = self.read_lines(log_file)
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].endswith("scan: 3 devices"))
+        self.assertRegex(lines[1], r"scan: 3 devices \(直前の\d+秒間に99回繰り返し\)$")
+
+    def test_log_manager_shares_one_file(self):
+        """LogManagerの各ロガーが1つのファイルに書き込むテスト"""
+        log_file = setup_logging(log_dir=self.temp_dir)
+        manager = LogManager()
+        manager.get_bluetooth_logger().info("bluetooth")
+        manager.get_ui_logger().info("ui")
+        shutdown_logging()
+
+        self.assertEqual(os.listdir(self.temp_dir), [os.path.basename(log_file)])
+        lines = self.read_lines(log_file)
+        self.assertTrue(
+            any(" - Bluetooth - INFO - bluetooth" in line for line in lines)
+        )
+        self.assertTrue(any(" - UI - INFO - ui" in line for line in lines))
+        for name in ("Connected", "Bluetooth", "Battery", "UI"):
+            self.assertEqual(logging.getLogger(name).handlers, [])
+
+    def test_cleanup_removes_json_lines_logs(self):
+        """古いログの削除でJSON Lines形式のログも削除されるテスト"""
+        names = ["connected.log", "connected.jsonl", "connected.jsonl.1", "notes.txt"]
+        for name in names:
+            open(os.path.join(self.temp_dir, name), "w").close()
+        manager = LogManager()
+
+        with mock.patch.object(
+            log_module, "_get_log_directory", return_value=self.temp_dir
+        ), mock.patch("os.path.getctime", return_value=0):
+            manager.cleanup_old_logs(days=30)
+
+        self.assertEqual(os.listdir(self.temp_dir), ["notes.txt"])
+
+
+def make_record(name, message, created, level=logging.INFO):
+    """作成時刻を指定したテスト用レコード"""
+    record = logging.LogRecord(name, level, __file__, 0, message, None, None)
+    record.created = created
+    return record
+
+
+class TestLogVolumeControl(unittest.TestCase):
+
+    def messages(self, records):
+        return [record.getMessage() for record in records]
+
+    def test_repeats_are_aggregated_per_window(self):
+        """同じメッセージの繰り返しが期間ごとに1行にまとめられるテスト"""
+        control = LogVolumeControl(window=60)
+        written = []
+        for second in range(0, 180, 15):
+            written += control.process(make_record("scan", "デバイス数: 3", second))
+
+        self.assertEqual(
+            self.messages(written),
+            [
+                "デバイス数: 3",
+                "デバイス数: 3 (直前の60秒間に3回繰り返し)",
+                "デバイス数: 3 (直前の60秒間に3回繰り返し)",
+            ],
+        )
+        self.assertEqual(
+            self.messages(control.flush(now=180)),
+            ["デバイス数: 3 (直前の60秒間に3回繰り返し)"],
+        )
+        stats = control.get_stats()
+        self.assertEqual(stats["passed"], 3)
+        self.assertEqual(stats["repeated"], 9)
+
+    def test_warnings_are_not_aggregated(self):
+        """警告とエラーは繰り返しでも集約されず、すぐに書き込まれるテスト"""
+        control = LogVolumeControl(window=60)
+        written = []
+        for second in range(3):
+            written += control.process(
+                make_record("scan", "スキャン失敗", second, level=logging.ERROR)
+            )
+
+        self.assertEqual(self.messages(written), ["スキャン失敗"] * 3)
+        self.assertEqual(control.flush(now=3), [])
+
+    def test_stopped_repeats_are_summarized(self):
+        """繰り返しが止まったメッセージの省略回数が後で要約されるテスト"""
+        control = LogVolumeControl(window=10)
+        control.process(make_record("scan", "timeout", 0))
+        control.process(make_record("scan", "timeout", 1))
+        written = control.process(make_record("other", "done", 25))
+
+        self.assertEqual(
+            self.messages(written), ["timeout (直前の25秒間に1回繰り返し)", "done"]
+        )
+        self.assertEqual(control.flush(), [])
+
+    def test_rate_limit_applies_to_logger_hierarchy(self):
+        """上限がロガーの階層に適用され、WARNING以上は常に書き込まれるテスト"""
+        control = LogVolumeControl(window=0, rate_limits={"backends": 2})
+        written = []
+        for index in range(5):
+            written += control.process(
+                make_record("backends.ble", f"read {index}", index)
+            )
+        written += control.process(
+            make_record("backends.ble", "failed", 6, level=logging.WARNING)
+        )
+        written += control.process(make_record("backends.ble", "read 6", 61))
+
+        self.assertEqual(
+            self.messages(written),
+            [
+                "read 0",
+                "read 1",
+                "failed",
+                "ログの上限 (2件/分) により3件を省略しました",
+                "read 6",
+            ],
+        )
+        self.assertEqual(control.get_stats()["rate_limited"], 3)
+
+    def test_sampling(self):
+        """サンプリングで指定した割合のレコードのみ書き込まれるテスト"""
+        control = LogVolumeControl(window=0, sample_rates={"poll": 0.25})
+        written = []
+        for index in range(100):
+            written += control.process(make_record("poll", f"tick {index}", index))
+
+        self.assertEqual(len(written), 25)
+        self.assertEqual(control.get_stats()["sampled"], 75)
+
+
+class TestLogLevels(unittest.TestCase):
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        apply_log_levels({})
+
+    def test_apply_and_reset_levels(self):
+        """サブシステムごとのレベルが設定され、設定から外すと戻るテスト"""
+        apply_log_levels({"test.backends": "WARNING", "test.ui": logging.DEBUG})
+        self.assertEqual(logging.getLogger("test.backends").level, logging.WARNING)
+        self.assertFalse(
+            logging.getLogger("test.backends.ble").isEnabledFor(logging.INFO)
+        )
+        self.assertEqual(logging.getLogger("test.ui").level, logging.DEBUG)
+
+        apply_log_levels({"test.ui": "info", "test.bad": "LOUD"})
+        self.assertEqual(logging.getLogger("test.backends").level, logging.NOTSET)
+        self.assertEqual(logging.getLogger("test.ui").level, logging.INFO)
+        self.assertEqual(logging.getLogger("test.bad").level, logging.NOTSET)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,250 @@
+"""
+Test Main Window
+"""
+
+import unittest
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, pyqtSignal
+from bluetooth_manager import BluetoothManager, BluetoothDevice
+from battery_monitor import BatteryMonitor
+from battery_events import BatteryEventTracker
+from backends.simulated import SimulatedBackend
+from ui.device_model import AddressRole, BatteryLevelRole, StatusRole
+from ui.main_window import ConnectedMainWindow
+
+
+class StubRefreshWorker(QObject):
+    """更新要求を記録するだけのテスト用ワーカー"""
+
+    devices_updated = pyqtSignal(list)
+    battery_events = pyqtSignal(list)
+    refresh_failed = pyqtSignal(str)
+    devices_found = pyqtSignal(list)
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def request_refresh(self, force=False):
+        self.requests.append(force)
+
+
+def make_device(index, level):
+    """テスト用デバイスを作成"""
+    device = BluetoothDevice(f"Device {index}", f"00:11:22:33:44:{index:02X}")
+    device.is_connected = True
+    device.battery_level = level
+    return device
+
+
+class TestMainWindow(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラスの設定"""
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        """テスト前の設定"""
+        monitor = BatteryMonitor(BluetoothManager(backend=SimulatedBackend(0)))
+        self.worker = StubRefreshWorker()
+        self.window = ConnectedMainWindow(monitor, self.worker)
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        self.window.deleteLater()
+        self.app.processEvents()
+
+    def record_model_signals(self):
+        """モデルのシグナルを記録するリストを返す"""
+        model = self.window.device_model
+        events = []
+        model.dataChanged.connect(
+            lambda first, last, roles=None: events.append(
+                ("changed", first.row(), last.row())
+            )
+        )
+        model.rowsInserted.connect(
+            lambda parent, first, last: events.append(("inserted", first, last))
+        )
+        model.rowsRemoved.connect(
+            lambda parent, first, last: events.append(("removed", first, last))
+        )
+        return events
+
+    def test_unchanged_refresh_emits_nothing(self):
+        """変更のない更新ではモデルのシグナルが発生しないテスト"""
+        devices = [make_device(i, 50 + i) for i in range(5)]
+        self.window.update_device_list(devices)
+        events = self.record_model_signals()
+
+        self.window.update_device_list(devices)
+
+        self.assertEqual(events, [])
+        self.assertEqual(self.window.device_model.rowCount(), 5)
+
+    def test_level_change_updates_single_row(self):
+        """残量の変更は該当行のみ通知されるテスト"""
+        devices = [make_device(i, 50) for i in range(3)]
+        self.window.update_device_list(devices)
+        events = self.record_model_signals()
+
+        devices[1].battery_level = 8
+        self.window.update_device_list(devices)
+
+        self.assertEqual(events, [("changed", 1, 1)])
+        model = self.window.device_model
+        index = model.index(1)
+        self.assertEqual(index.data(BatteryLevelRole), 8)
+        self.assertEqual(index.data(StatusRole), "低下")
+
+    def test_rows_added_and_removed(self):
+        """接続・切断時のみ行が追加・削除されるテスト"""
+        devices = [make_device(i, 50) for i in range(3)]
+        self.window.update_device_list(devices)
+        events = self.record_model_signals()
+
+        devices.append(make_device(3, 70))
+        self.window.update_device_list(devices)
+        self.assertEqual(events, [("inserted", 3, 3)])
+
+        events.clear()
+        self.window.update_device_list(devices[1:])
+        self.assertEqual(events, [("removed", 0, 0)])
+        model = self.window.device_model
+        self.assertIsNone(model.row_of(devices[0].address))
+        self.assertEqual(model.row_of(devices[1].address), 0)
+        self.assertEqual(model.index(0).data(AddressRole), devices[1].address)
+
+    def test_event_burst_is_applied_once(self):
+        """短時間に届いた変化イベントがまとめて1回で反映されるテスト"""
+        devices = [make_device(i, 50) for i in range(5)]
+        tracker = BatteryEventTracker()
+        self.worker.battery_events.emit(tracker.diff(devices, 10))
+        self.window.event_throttle.flush()
+        self.assertEqual(self.window.device_model.rowCount(), 5)
+        events = self.record_model_signals()
+        flushes = self.window.event_throttle.flush_count
+
+        for level in (40, 30, 20):
+            devices[3].battery_level = level
+            self.worker.battery_events.emit(tracker.diff(devices, 10, [devices[3]]))
+        disconnected = devices.pop(0)
+        self.worker.battery_events.emit(tracker.diff(devices, 10, []))
+        while self.window.event_throttle.pending_count:
+            self.app.processEvents()
+
+        self.assertEqual(self.window.event_throttle.flush_count, flushes + 1)
+        self.assertEqual(events, [("removed", 0, 0), ("changed", 2, 2)])
+        model = self.window.device_model
+        self.assertIsNone(model.row_of(disconnected.address))
+        self.assertEqual(model.index(2).data(BatteryLevelRole), 20)
+
+    def test_empty_list_shows_placeholder(self):
+        """デバイスがない場合にメッセージが表示されるテスト"""
+        self.window.update_device_list([make_device(0, 50)])
+        self.assertTrue(self.window.no_device_label.isHidden())
+
+        self.window.update_device_list([])
+        self.assertFalse(self.window.no_device_label.isHidden())
+        self.assertEqual(self.window.device_model.rowCount(), 0)
+
+    def test_loading_placeholder_until_first_data(self):
+        """初回データを受け取るまで検索中と表示され、生成時にスキャンしないテスト"""
+        self.assertEqual(self.worker.requests, [])
+        self.assertFalse(self.window.no_device_label.isHidden())
+        self.assertEqual(
+            self.window.no_device_label.text(), ConnectedMainWindow.LOADING_TEXT
+        )
+
+        self.worker.refresh_failed.emit("error")
+        self.assertEqual(
+            self.window.no_device_label.text(), ConnectedMainWindow.NO_DEVICE_TEXT
+        )
+
+    def test_last_known_devices_replaced_by_scan(self):
+        """前回の値として表示したデバイスがスキャン結果で置き換えられるテスト"""
+        stale = [make_device(0, 80), make_device(1, 40)]
+        for device in stale:
+            device.is_stale = True
+        self.window.show_last_known_devices(stale)
+        self.assertTrue(self.window.no_device_label.isHidden())
+        self.assertEqual(self.window.device_model.index(0).data(StatusRole), "前回の値")
+
+        self.window.update_device_list([make_device(0, 78)])
+        model = self.window.device_model
+        self.assertEqual(model.rowCount(), 1)
+        self.assertEqual(model.index(0).data(StatusRole), "接続中")
+        self.assertEqual(model.index(0).data(BatteryLevelRole), 78)
+
+    def test_found_devices_shown_during_scan(self):
+        """スキャンの途中で見つかったデバイスが追加され、表示済みの行は変わらないテスト"""
+        stale = make_device(0, 80)
+        stale.is_stale = True
+        self.window.show_last_known_devices([stale])
+
+        self.window.add_found_devices([make_device(0, None)])
+        self.window.add_found_devices([make_device(1, None)])
+
+        model = self.window.device_model
+        self.assertEqual(model.rowCount(), 2)
+        self.assertEqual(model.index(0).data(BatteryLevelRole), 80)
+        self.assertEqual(model.index(0).data(StatusRole), "前回の値")
+        self.assertTrue(self.window.loading)
+
+    def test_unknown_level(self):
+        """残量不明のデバイスの表示テスト"""
+        device = make_device(0, None)
+        self.window.update_device_list([device])
+        index = self.window.device_model.index(0)
+
+        self.assertEqual(index.data(BatteryLevelRole), -1)
+        self.assertEqual(index.data(StatusRole), "情報取得中")
+
+    def test_sort_and_filter(self):
+        """プロキシモデルによる並べ替え・絞り込みのテスト"""
+        devices = [make_device(i, level) for i, level in enumerate([70, 20, 90])]
+        devices[2].name = "Keyboard"
+        self.window.update_device_list(devices)
+        proxy = self.window.proxy_model
+
+        names = [proxy.index(row, 0).data() for row in range(proxy.rowCount())]
+        self.assertEqual(names, ["Device 0", "Device 1", "Keyboard"])
+
+        proxy.sort_by("battery")
+        levels = [proxy.index(row, 0).data(BatteryLevelRole) for row in range(3)]
+        self.assertEqual(levels, [20, 70, 90])
+
+        proxy.set_filter_text("key")
+        self.assertEqual(proxy.rowCount(), 1)
+        self.assertEqual(proxy.index(0, 0).data(), "Keyboard")
+
+    def test_filter_shown_for_many_devices(self):
+        """デバイス数が多い場合に絞り込み欄が表示されるテスト"""
+        self.window.update_device_list([make_device(0, 50)])
+        self.assertTrue(self.window.filter_edit.isHidden())
+
+        count = self.window.FILTER_THRESHOLD
+        self.window.update_device_list([make_device(i, 50) for i in range(count)])
+        self.assertFalse(self.window.filter_edit.isHidden())
+
+    def test_only_visible_rows_are_painted(self):
+        """5,000台でも表示中の行のみ描画されるテスト"""
+        devices = [make_device(i, i % 101) for i in range(5000)]
+        self.window.update_device_list(devices)
+        self.window.show()
+        self.app.processEvents()
+
+        delegate = self.window.device_delegate
+        delegate.paint_count = 0
+        self.window.device_view.viewport().grab()
+
+        visible_rows = (
+            self.window.device_view.viewport().height() // delegate.ROW_HEIGHT + 2
+        )
+        self.assertGreater(delegate.paint_count, 0)
+        self.assertLessEqual(delegate.paint_count, visible_rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
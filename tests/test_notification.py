@@ -0,0 +1,175 @@
+"""
+Test Notification
+"""
+
+import threading
+import time
+import unittest
+from bluetooth_manager import BluetoothDevice
+from battery_events import BatteryEventTracker
+from notification import (
+    Alert,
+    FakeNotifier,
+    NotificationDispatcher,
+    NotificationManager,
+)
+
+
+class TestNotificationDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        """テスト前の設定"""
+        self.notifier = FakeNotifier()
+        self.dispatcher = NotificationDispatcher(
+            self.notifier, coalesce_window=0.1, per_key_interval=60
+        )
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        self.dispatcher.close()
+
+    def test_submit_does_not_block(self):
+        """遅い通知バックエンドでも呼び出し元をブロックしないテスト"""
+        self.notifier.delay = 0.5
+        start = time.perf_counter()
+        self.dispatcher.submit(Alert("title", "message"))
+        elapsed = time.perf_counter() - start
+        self.dispatcher.close()
+
+        self.assertLess(elapsed, 0.05)
+        self.assertEqual(len(self.notifier.sent), 1)
+        self.assertIsNot(self.notifier.threads[0], threading.current_thread())
+        self.assertGreaterEqual(self.dispatcher.get_stats()["max_latency"], 0.5)
+
+    def test_burst_is_coalesced_into_digest(self):
+        """短時間の通知が1件のダイジェストにまとめられるテスト"""
+        self.dispatcher.submit(Alert("info", "A", key="a"))
+        self.dispatcher.submit(Alert("critical", "B", key="b", priority=Alert.CRITICAL))
+        self.dispatcher.submit(Alert("info", "C"))
+        time.sleep(0.3)
+
+        self.assertEqual(len(self.notifier.sent), 1)
+        title, message, _ = self.notifier.sent[0]
+        self.assertEqual(title, "critical（ほか2件）")
+        self.assertEqual(message.splitlines(), ["A", "B", "C"])
+        self.assertEqual(self.dispatcher.get_stats()["coalesced"], 2)
+
+    def test_superseded_alert_is_dropped(self):
+        """同じkeyの通知は新しいものに置き換えられるテスト"""
+        self.dispatcher.submit(Alert("low", "10%", key="mouse"))
+        self.dispatcher.submit(Alert("low", "8%", key="mouse"))
+        self.dispatcher.close()
+
+        self.assertEqual(self.notifier.sent, [("low", "8%", 5)])
+        self.assertEqual(self.dispatcher.get_stats()["superseded"], 1)
+
+    def test_per_key_rate_limit(self):
+        """同じkeyの通知は間隔制限され、優先度が上がった場合は表示されるテスト"""
+        self.dispatcher.submit(Alert("low", "10%", key="mouse", priority=Alert.WARNING))
+        time.sleep(0.3)
+        self.dispatcher.submit(Alert("low", "9%", key="mouse", priority=Alert.WARNING))
+        time.sleep(0.3)
+        self.dispatcher.submit(
+            Alert("critical", "5%", key="mouse", priority=Alert.CRITICAL)
+        )
+        self.dispatcher.close()
+
+        self.assertEqual([sent[1] for sent in self.notifier.sent], ["10%", "5%"])
+        self.assertEqual(self.dispatcher.get_stats()["rate_limited"], 1)
+
+    def test_disconnect_follows_connect(self):
+        """接続の直後の切断は間隔制限を受けず、まとめ中は新しい状態で置き換えられるテスト"""
+        manager = NotificationManager(dispatcher=self.dispatcher)
+        manager.send_device_connected("Mouse", key="00:11")
+        time.sleep(0.3)
+        manager.send_device_disconnected("Mouse", key="00:11")
+        time.sleep(0.3)
+
+        # まとめ中に接続と切断が続いた場合は最後の状態のみ表示する
+        manager.send_device_connected("Mouse", key="00:11")
+        manager.send_device_disconnected("Mouse", key="00:11")
+        self.dispatcher.close()
+
+        self.assertEqual(
+            [sent[1] for sent in self.notifier.sent],
+            ["Mouseが接続されました", "Mouseが切断されました", "Mouseが切断されました"],
+        )
+        stats = self.dispatcher.get_stats()
+        self.assertEqual(stats["rate_limited"], 0)
+        self.assertEqual(stats["superseded"], 1)
+
+    def test_global_rate_limit_defers_and_merges(self):
+        """全体の上限を超えた通知は待ってからまとめて表示されるテスト"""
+        dispatcher = NotificationDispatcher(
+            self.notifier, coalesce_window=0.05, global_limit=1, global_period=0.5
+        )
+        dispatcher.submit(Alert("first", "1"))
+        time.sleep(0.2)
+        dispatcher.submit(Alert("second", "2"))
+        time.sleep(0.1)
+        dispatcher.submit(Alert("third", "3"))
+        time.sleep(0.1)
+        self.assertEqual(len(self.notifier.sent), 1)
+
+        time.sleep(0.4)
+        dispatcher.close()
+        self.assertEqual(len(self.notifier.sent), 2)
+        self.assertEqual(self.notifier.sent[1][1].splitlines(), ["2", "3"])
+
+    def test_failure_is_reported(self):
+        """通知の失敗が集計され、フォールバックが呼ばれるテスト"""
+        failed = []
+        self.notifier.fail = True
+        self.dispatcher.on_failed = lambda title, message: failed.append(title)
+        self.dispatcher.submit(Alert("title", "message"))
+        self.dispatcher.close()
+
+        self.assertEqual(failed, ["title"])
+        stats = self.dispatcher.get_stats()
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(stats["dispatched"], 0)
+        self.assertEqual(stats["queue_depth"], 0)
+
+
+class TestNotificationManager(unittest.TestCase):
+
+    def test_low_battery_events_become_one_digest(self):
+        """複数デバイスの低バッテリーが1件の通知にまとめられるテスト"""
+        notifier = FakeNotifier()
+        manager = NotificationManager(
+            dispatcher=NotificationDispatcher(notifier, coalesce_window=0.1)
+        )
+        tracker = BatteryEventTracker()
+        devices = []
+        for index, level in enumerate([50, 12, 30]):
+            device = BluetoothDevice(f"Device {index}", f"00:00:00:00:00:{index:02X}")
+            device.battery_level = level
+            devices.append(device)
+        # 接続時点で閾値以下のデバイスはなく、接続通知は既定で無効
+        manager.handle_battery_events(tracker.diff(devices, 10))
+
+        devices[1].battery_level = 9
+        devices[2].battery_level = 5
+        manager.handle_battery_events(tracker.diff(devices, 10))
+        manager.close()
+
+        self.assertEqual(len(notifier.sent), 1)
+        title, message, _ = notifier.sent[0]
+        self.assertTrue(title.startswith("🔋 緊急"))
+        self.assertIn("Device 1のバッテリーが9%", message)
+        self.assertIn("Device 2のバッテリーが5%", message)
+
+    def test_disabled_notifications_are_not_queued(self):
+        """通知が無効な場合はキューに積まれないテスト"""
+        notifier = FakeNotifier()
+        manager = NotificationManager(notifier)
+        manager.disable_notifications()
+        manager.send_notification("title", "message")
+        manager.close()
+
+        self.assertEqual(notifier.sent, [])
+        self.assertEqual(manager.get_stats()["submitted"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Test Poll Scheduler
+"""
+
+import unittest
+from poll_scheduler import PollScheduler
+
+
+class FakeClock:
+    """テスト用の時計"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPollScheduler(unittest.TestCase):
+
+    def setUp(self):
+        """テスト前の設定"""
+        self.clock = FakeClock()
+        self.scheduler = PollScheduler(
+            min_interval=15, max_interval=1800, fixed_interval=60, clock=self.clock
+        )
+
+    def test_only_due_devices_are_popped(self):
+        """期限が来たデバイスのみ期限順に取り出されるテスト"""
+        self.scheduler.schedule("A", 30)
+        self.scheduler.schedule("B", 10)
+        self.scheduler.schedule("C", 300)
+
+        self.clock.now += 5
+        self.assertEqual(self.scheduler.pop_due(), [])
+
+        self.clock.now += 30
+        self.assertEqual(self.scheduler.pop_due(), ["B", "A"])
+        self.assertEqual(self.scheduler.next_deadline(), 1300.0)
+        self.assertNotIn("A", self.scheduler)
+        self.assertIn("C", self.scheduler)
+
+    def test_reschedule_and_remove(self):
+        """再スケジュール・削除した古い期限が無視されるテスト"""
+        self.scheduler.schedule("A", 10)
+        self.scheduler.schedule("A", 100)
+        self.scheduler.schedule("B", 10)
+        self.scheduler.remove("B")
+
+        self.clock.now += 50
+        self.assertEqual(self.scheduler.pop_due(), [])
+        self.clock.now += 50
+        self.assertEqual(self.scheduler.pop_due(), ["A"])
+        self.assertIsNone(self.scheduler.next_deadline())
+
+    def test_sync_adds_new_and_removes_missing(self):
+        """接続デバイスとの同期のテスト"""
+        self.scheduler.schedule("A", 100)
+        self.scheduler.schedule("B", 100)
+
+        self.scheduler.sync(["B", "C"])
+
+        self.assertEqual(self.scheduler.pop_due(), ["C"])
+        self.assertNotIn("A", self.scheduler)
+        self.assertEqual(len(self.scheduler), 1)
+
+    def test_interval_follows_drain_rate(self):
+        """放電速度に応じて間隔が決まるテスト"""
+        # 1%/分なら1分ごと
+        self.assertEqual(self.scheduler.compute_interval(80, 60.0), 60)
+        # 放電が速いほど短く（下限まで）
+        self.assertEqual(self.scheduler.compute_interval(80, 1000.0), 15)
+        # 1%/日のような遅い放電は上限まで広げる
+        self.assertEqual(self.scheduler.compute_interval(100, 1 / 24), 1800)
+
+    def test_interval_near_threshold_is_minimum(self):
+        """閾値の直前は最短間隔になるテスト"""
+        self.assertEqual(self.scheduler.compute_interval(13, 0.5, threshold=10), 15)
+        # 読み取りが遅くても、閾値に達するまでの時間の半分より長く空けない
+        self.assertEqual(
+            self.scheduler.compute_interval(20, 20.0, read_cost=30.0, threshold=10),
+            10 * 3600 / 20 / 2,
+        )
+
+    def test_interval_for_charging_failure_and_read_cost(self):
+        """充電中・読み取り失敗・読み取りが遅い場合の間隔のテスト"""
+        self.assertEqual(self.scheduler.compute_interval(50, 60.0, charging=True), 60)
+        self.assertEqual(self.scheduler.compute_interval(None), 60)
+        self.assertEqual(self.scheduler.compute_interval(80, 60.0, read_cost=3.0), 300)
+
+    def test_unchanged_level_backs_off(self):
+        """放電速度が不明で残量が変わらない間は間隔が広がるテスト"""
+        intervals = []
+        for _ in range(4):
+            intervals.append(self.scheduler.record_read("A", 100))
+            self.clock.now += intervals[-1]
+        self.assertEqual(intervals, [60, 120, 240, 480])
+
+        # 残量が変わったら元の間隔に戻る
+        self.assertEqual(self.scheduler.record_read("A", 99), 60)
+
+    def test_saved_reads_compared_with_fixed_polling(self):
+        """固定間隔と比べて省いた読み取り数のテスト"""
+        for _ in range(10):
+            self.scheduler.record_read("A", 100, rate_per_hour=1 / 24)
+            self.clock.now += 1800
+
+        stats = self.scheduler.get_stats()
+        self.assertEqual(stats["reads"], 10)
+        # 1回目 + 30分ごとの読み取り9回分（固定間隔なら30回ずつ）
+        self.assertEqual(stats["fixed_reads"], 1 + 9 * 30)
+        self.assertEqual(stats["saved"], 1 + 9 * 30 - 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,254 @@
+"""
+Test PowerShell Backend
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import unittest
+from backends.powershell import SCAN_COMMAND, PowerShellBackend
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def read_fixture(name):
+    """記録したPowerShellの出力を読み込む"""
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class FixtureSession:
+    """スキャンとバッテリー残量の問い合わせに記録した出力を返すテスト用セッション"""
+
+    def __init__(self, scan_output, battery_output="{}"):
+        self.scan_output = scan_output
+        self.battery_output = battery_output
+        self.commands = []
+
+    def stream(self, command, timeout=None):
+        self.commands.append(command)
+        yield from self.scan_output.splitlines()
+
+    def run(self, command, timeout=None):
+        self.commands.append(command)
+        return self.battery_output
+
+    def close(self):
+        pass
+
+
+def enumerate_devices(backend):
+    return asyncio.run(backend.enumerate_devices())
+
+
+RECORDS = [
+    {
+        "FriendlyName": "AirPods Max (Green) - Find My",
+        "Status": "OK",
+        "InstanceId": "BTHENUM\\{0000110B}_VID&0001004C_PID&200E\\7&1A2B&0&A0B1C2D3E4F5_C00000000",
+    },
+    {
+        "FriendlyName": "MX Master 3",
+        "Status": "OK",
+        "InstanceId": "BTHLE\\DEV_D1E2F3A4B5C6\\7&2B3C&0&D1E2F3A4B5C6",
+    },
+    {
+        "FriendlyName": "Bluetooth HID デバイス",
+        "Status": "OK",
+        "InstanceId": "HID\\{00001124}_VID&0002046D\\8&1C2D&0&0000",
+    },
+]
+
+
+class TestPowerShellBackend(unittest.TestCase):
+
+    def setUp(self):
+        """テスト前の設定"""
+        self.session = FixtureSession("\n".join(json.dumps(r) for r in RECORDS))
+        self.backend = PowerShellBackend(powershell_session=self.session)
+
+    def test_parse_records(self):
+        """アドレス・名前・デバイスタイプが解析されるテスト"""
+        devices = enumerate_devices(self.backend)
+
+        self.assertEqual(
+            [(d.address, d.name, d.device_type) for d in devices[:2]],
+            [
+                ("A0:B1:C2:D3:E4:F5", "AirPods Max (Green)", "ヘッドホン・イヤホン"),
+                ("D1:E2:F3:A4:B5:C6", "MX Master 3", "Bluetoothデバイス"),
+            ],
+        )
+        self.assertEqual(devices[2].name, "Bluetoothマウス・キーボード")
+        self.assertRegex(devices[2].address, r"^ID_[0-9A-F]{8}$")
+        self.assertTrue(all(d.is_connected for d in devices))
+
+    def test_separated_address(self):
+        """区切り文字のあるアドレスが正規化されるテスト"""
+        self.assertEqual(
+            self.backend._extract_address_from_instance_id("BTH\\aa-bb-cc-dd-ee-ff"),
+            "aa:bb:cc:dd:ee:ff",
+        )
+
+    def test_fallback_id_is_stable_across_processes(self):
+        """アドレスのないデバイスのIDがプロセスをまたいで変わらないテスト"""
+        code = (
+            "import sys; sys.path.insert(0, sys.argv[1]);"
+            "from backends.powershell import PowerShellBackend;"
+            "print(PowerShellBackend._extract_address_from_instance_id(None, sys.argv[2]))"
+        )
+        instance_id = RECORDS[2]["InstanceId"]
+        ids = set()
+        for seed in ("1", "2"):
+            result = subprocess.run(
+                [sys.executable, "-c", code, SRC_DIR, instance_id],
+                env=dict(os.environ, PYTHONHASHSEED=seed),
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            ids.add(result.stdout.strip())
+
+        expected = self.backend._extract_address_from_instance_id(instance_id)
+        self.assertEqual(ids, {expected})
+
+    def test_identity_cache(self):
+        """変化のないデバイスはキャッシュから解析結果が返されるテスト"""
+        first = enumerate_devices(self.backend)
+        second = enumerate_devices(self.backend)
+
+        self.assertEqual(
+            [(d.address, d.name) for d in first], [(d.address, d.name) for d in second]
+        )
+        self.assertIsNot(first[0], second[0])
+        stats = self.backend.get_identity_stats()
+        self.assertEqual((stats["misses"], stats["hits"]), (3, 3))
+
+        # 名前が変わった場合は解析し直す
+        renamed = dict(RECORDS[1], FriendlyName="MX Keys")
+        device = self.backend._parse_device_record(renamed)
+        self.assertEqual(
+            (device.name, device.device_type), ("MX Keys", "Bluetoothデバイス")
+        )
+        self.assertEqual(self.backend.get_identity_stats()["misses"], 4)
+
+    def test_identity_cache_is_bounded(self):
+        """キャッシュが上限を超えると古いエントリーから捨てられるテスト"""
+        backend = PowerShellBackend(
+            powershell_session=self.session, identity_cache_size=2
+        )
+        for record in RECORDS:
+            backend._parse_device_record(record)
+        backend._parse_device_record(RECORDS[0])
+
+        stats = backend.get_identity_stats()
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["misses"], 4)
+
+
+class TestBatchedScan(unittest.TestCase):
+
+    def setUp(self):
+        """テスト前の設定"""
+        self.session = FixtureSession(
+            read_fixture("pnp_scan.jsonl"), read_fixture("pnp_battery.json")
+        )
+        self.backend = PowerShellBackend(powershell_session=self.session)
+
+    def scan(self):
+        return enumerate_devices(self.backend)
+
+    def test_parse_recorded_scan(self):
+        """記録したスキャン出力からデバイスと接続状態が解析されるテスト"""
+        devices = self.scan()
+
+        self.assertEqual(
+            [(d.address, d.name, d.is_connected) for d in devices[:3]],
+            [
+                ("A0:B1:C2:D3:E4:F5", "AirPods Pro", True),
+                ("D1:E2:F3:A4:B5:C6", "MX Master 3", True),
+                ("C1:C2:C3:C4:C5:C6", "Magic Keyboard", False),
+            ],
+        )
+        # マウスのHIDコレクションはデバイスノードにまとめられる
+        self.assertEqual(len(devices), 4)
+        self.assertEqual(devices[3].name, "Bluetoothマウス・キーボード")
+        self.assertTrue(devices[3].address.startswith("ID_"))
+
+    def test_empty_output(self):
+        """デバイスのない出力の解析テスト"""
+        self.session.scan_output = ""
+        self.assertEqual(self.scan(), [])
+
+    def test_malformed_lines_are_skipped(self):
+        """不正な行を飛ばし、他のデバイスの結果は使われるテスト"""
+        self.session.scan_output = read_fixture("pnp_scan_malformed.jsonl")
+        devices = self.scan()
+
+        self.assertEqual([d.name for d in devices], ["AirPods Pro", "Magic Keyboard"])
+        self.assertEqual(self.backend.skipped_line_count, 2)
+
+    def test_devices_are_yielded_before_enumeration_ends(self):
+        """列挙の完了を待たずにデバイスが返されるテスト"""
+        lines = read_fixture("pnp_scan.jsonl").splitlines()
+        released = threading.Event()
+
+        def slow_stream(command, timeout=None):
+            yield lines[0]
+            released.wait(5)
+            yield from lines[1:]
+
+        self.session.stream = slow_stream
+
+        async def run():
+            stream = self.backend.stream_devices()
+            first = await asyncio.wait_for(stream.__anext__(), 1)
+            released.set()
+            rest = [device async for device in stream]
+            return first, rest
+
+        first, rest = asyncio.run(run())
+        self.assertEqual(first.name, "AirPods Pro")
+        self.assertEqual(len(rest), 3)
+
+    def test_battery_levels_come_from_scan(self):
+        """スキャンで取得したバッテリー残量が追加の問い合わせなしで返されるテスト"""
+
+        async def run():
+            devices = await self.backend.enumerate_devices()
+            return await asyncio.gather(
+                *(self.backend.read_battery_level(device) for device in devices)
+            )
+
+        levels = asyncio.run(run())
+
+        self.assertEqual(levels, [80, 55, None, None])
+        self.assertEqual(self.session.commands, [SCAN_COMMAND])
+
+    def test_stale_levels_are_refreshed_in_one_query(self):
+        """古くなったバッテリー残量が全デバイス分1回の問い合わせで更新されるテスト"""
+        devices = self.scan()
+        self.backend.battery_max_age = 0
+
+        async def run():
+            return await asyncio.gather(
+                *(self.backend.read_battery_level(device) for device in devices)
+            )
+
+        levels = asyncio.run(run())
+
+        # 範囲外の値(255)は無効として扱う
+        self.assertEqual(levels, [79, None, None, None])
+        self.assertEqual(self.backend.battery_query_count, 1)
+        self.assertEqual(len(self.session.commands), 2)
+        for device in devices:
+            instance_id = self.backend._instance_ids[device.address]
+            self.assertIn(instance_id, self.session.commands[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+Test PowerShell Session
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import unittest
+from powershell_session import PowerShellSession, PowerShellSessionError
+from backends.powershell import PowerShellBackend
+
+FAKE_HOST = os.path.join(
+    os.path.dirname(__file__), "fixtures", "fake_powershell_host.py"
+)
+FAKE_HOST_COMMAND = [sys.executable, "-X", "utf8", FAKE_HOST]
+
+
+class TestPowerShellSession(unittest.TestCase):
+
+    def setUp(self):
+        """テスト前の設定"""
+        self.session = PowerShellSession(host_command=FAKE_HOST_COMMAND, timeout=5)
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        self.session.close()
+
+    def test_host_process_is_reused(self):
+        """複数コマンドで同じホストプロセスが使われるテスト"""
+        first_pid = self.session.run("Get-Pid").strip()
+        second_pid = self.session.run("Get-Pid").strip()
+
+        self.assertEqual(first_pid, second_pid)
+        self.assertEqual(self.session.request_count, 2)
+        self.assertEqual(self.session.restart_count, 0)
+
+    def test_multiline_output_is_framed(self):
+        """改行を含む出力が1レスポンスとして返るテスト"""
+        output = self.session.run("line1\nline2")
+        self.assertEqual(output, "line1\nline2\n")
+
+    def test_command_error(self):
+        """コマンドエラーが例外として通知され、ホストは継続するテスト"""
+        with self.assertRaises(PowerShellSessionError):
+            self.session.run("throw 失敗しました")
+
+        self.assertEqual(self.session.run("ok"), "ok\n")
+        self.assertEqual(self.session.restart_count, 0)
+
+    def test_restart_after_crash(self):
+        """ホストがクラッシュした場合に再起動して再実行するテスト"""
+        first_pid = self.session.run("Get-Pid").strip()
+
+        self.session.max_retries = 0
+        with self.assertRaises(PowerShellSessionError):
+            self.session.run("Exit-Host")
+
+        second_pid = self.session.run("Get-Pid").strip()
+        self.assertNotEqual(first_pid, second_pid)
+        self.assertEqual(self.session.restart_count, 1)
+
+    def test_restart_after_hang(self):
+        """ホストが応答しない場合にタイムアウトで再起動するテスト"""
+        first_pid = self.session.run("Get-Pid").strip()
+
+        self.session.max_retries = 0
+        with self.assertRaises(PowerShellSessionError):
+            self.session.run("Start-Sleep -Seconds 10", timeout=0.5)
+
+        second_pid = self.session.run("Get-Pid").strip()
+        self.assertNotEqual(first_pid, second_pid)
+        self.assertEqual(self.session.restart_count, 1)
+
+    def test_stream_returns_lines_as_they_arrive(self):
+        """ストリーミングのリクエストで出力が1行ずつ返されるテスト"""
+        os.environ["FAKE_STREAM_DELAY"] = "0.2"
+        try:
+            start = time.perf_counter()
+            stream = self.session.stream("first\nsecond\nthird")
+            first = next(stream)
+            first_latency = time.perf_counter() - start
+            rest = list(stream)
+        finally:
+            del os.environ["FAKE_STREAM_DELAY"]
+
+        self.assertEqual([first] + rest, ["first", "second", "third"])
+        self.assertLess(first_latency, 0.5)
+        # ストリーミングの後も同じホストで通常のコマンドを実行できる
+        self.assertEqual(self.session.run("ok"), "ok\n")
+        self.assertEqual(self.session.restart_count, 0)
+
+    def test_stream_error(self):
+        """ストリーミングのコマンドエラーが例外として通知されるテスト"""
+        with self.assertRaises(PowerShellSessionError):
+            list(self.session.stream("throw 失敗しました"))
+
+    def test_run_json(self):
+        """JSON出力の解析テスト"""
+        self.assertEqual(self.session.run_json('{"a": 1}'), {"a": 1})
+        self.assertIsNone(self.session.run_json(""))
+
+
+class TestPowerShellBackendSession(unittest.TestCase):
+
+    def test_scan_uses_persistent_session(self):
+        """デバイス一覧取得が常駐セッション経由で行われるテスト"""
+        # 1行に1つのデバイスを出力
+        os.environ["FAKE_PNP_OUTPUT"] = "\n".join(
+            json.dumps(record)
+            for record in [
+                {
+                    "FriendlyName": "AirPods Pro",
+                    "Status": "OK",
+                    "InstanceId": "BTHENUM\\{0000110B}_VID&0001004C_PID&200E\\7&1A2B&0&A0B1C2D3E4F5_C00000000",
+                },
+                {
+                    "FriendlyName": "MX Master 3",
+                    "Status": "OK",
+                    "InstanceId": "BTHLE\\DEV_D1E2F3A4B5C6\\7&2B3C&0&D1E2F3A4B5C6",
+                },
+            ]
+        )
+        session = PowerShellSession(host_command=FAKE_HOST_COMMAND, timeout=5)
+        backend = PowerShellBackend(powershell_session=session)
+        try:
+            first = asyncio.run(backend.enumerate_devices())
+            second = asyncio.run(backend.enumerate_devices())
+        finally:
+            backend.close()
+            del os.environ["FAKE_PNP_OUTPUT"]
+
+        self.assertEqual([d.name for d in first], ["AirPods Pro", "MX Master 3"])
+        self.assertEqual(len(second), 2)
+        self.assertEqual(session.request_count, 2)
+        self.assertEqual(session.restart_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
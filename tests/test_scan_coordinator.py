@@ -0,0 +1,146 @@
+"""
+Test Scan Coordinator
+"""
+
+import asyncio
+import unittest
+from bluetooth_manager import BluetoothDevice
+from scan_coordinator import ScanCoordinator
+
+
+class CountingBatteryMonitor:
+    """スキャン回数を数えるテスト用BatteryMonitor"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.scan_count = 0
+        self.forced = []
+
+    async def update_battery_levels(self, force=False):
+        self.scan_count += 1
+        self.forced.append(force)
+        await asyncio.sleep(self.delay)
+        device = BluetoothDevice(f"Device {self.scan_count}", "00:11:22:33:44:55")
+        device.is_connected = True
+        return [device]
+
+    async def poll_due_devices(self):
+        await asyncio.sleep(self.delay)
+        return None
+
+
+class FakeClock:
+    """テスト用の時計"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestScanCoordinator(unittest.TestCase):
+
+    def setUp(self):
+        """テスト前の設定"""
+        self.monitor = CountingBatteryMonitor()
+        self.clock = FakeClock()
+        self.coordinator = ScanCoordinator(
+            self.monitor, freshness_seconds=10, clock=self.clock
+        )
+
+    def test_concurrent_requests_are_coalesced(self):
+        """同時の要求が1回のスキャンにまとめられるテスト"""
+
+        async def run():
+            return await asyncio.gather(
+                *(self.coordinator.request_scan() for _ in range(5))
+            )
+
+        results = asyncio.run(run())
+
+        self.assertEqual(self.monitor.scan_count, 1)
+        self.assertTrue(all(r[0].name == "Device 1" for r in results))
+        stats = self.coordinator.get_stats()
+        self.assertEqual(stats["requested"], 5)
+        self.assertEqual(stats["executed"], 1)
+        self.assertEqual(stats["coalesced"], 4)
+        self.assertEqual(stats["saved"], 4)
+
+    def test_fresh_result_is_cached(self):
+        """鮮度期間内はキャッシュが返され、期間後は再スキャンされるテスト"""
+
+        async def run():
+            await self.coordinator.request_scan()
+            self.clock.now += 5
+            cached = await self.coordinator.request_scan()
+            self.clock.now += 10
+            rescanned = await self.coordinator.request_scan()
+            return cached, rescanned
+
+        cached, rescanned = asyncio.run(run())
+
+        self.assertEqual(cached[0].name, "Device 1")
+        self.assertEqual(rescanned[0].name, "Device 2")
+        self.assertEqual(self.coordinator.get_stats()["cached"], 1)
+        self.assertEqual(self.monitor.scan_count, 2)
+
+    def test_force_refresh_bypasses_cache(self):
+        """強制更新ではキャッシュを使わないテスト"""
+
+        async def run():
+            await self.coordinator.request_scan()
+            return await self.coordinator.request_scan(force=True)
+
+        result = asyncio.run(run())
+
+        self.assertEqual(result[0].name, "Device 2")
+        self.assertEqual(self.coordinator.get_stats()["executed"], 2)
+        self.assertEqual(self.monitor.forced, [False, True])
+
+    def test_force_refresh_does_not_join_unforced_scan(self):
+        """強制更新は全件列挙を伴わない実行中のスキャンに合流しないテスト"""
+
+        async def run():
+            return await asyncio.gather(
+                self.coordinator.request_scan(),
+                self.coordinator.request_scan(force=True),
+                self.coordinator.request_scan(force=True),
+            )
+
+        _, forced, joined = asyncio.run(run())
+
+        self.assertEqual(forced[0].name, "Device 2")
+        self.assertEqual(joined[0].name, "Device 2")
+        self.assertEqual(self.monitor.forced, [False, True])
+
+    def test_invalidate(self):
+        """キャッシュ無効化のテスト"""
+
+        async def run():
+            await self.coordinator.request_scan()
+            self.coordinator.invalidate()
+            await self.coordinator.request_scan()
+
+        asyncio.run(run())
+        self.assertEqual(self.monitor.scan_count, 2)
+
+    def test_scan_after_idle_poll(self):
+        """期限が来たデバイスがない定期更新に合流したスキャン要求は改めてスキャンするテスト"""
+
+        async def run():
+            return await asyncio.gather(
+                self.coordinator.request_poll(), self.coordinator.request_scan()
+            )
+
+        polled, scanned = asyncio.run(run())
+
+        self.assertIsNone(polled)
+        self.assertEqual(scanned[0].name, "Device 1")
+        stats = self.coordinator.get_stats()
+        self.assertEqual(stats["skipped"], 1)
+        self.assertEqual(stats["executed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
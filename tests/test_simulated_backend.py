@@ -0,0 +1,120 @@
+"""
+Test Simulated Backend
+"""
+
+import asyncio
+import unittest
+from bluetooth_manager import BluetoothManager
+from battery_monitor import BatteryMonitor
+from backends import create_backend
+from backends.simulated import SimulatedBackend
+
+
+class FakeClock:
+    """テスト用の時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSimulatedBackend(unittest.TestCase):
+
+    def read_all(self, backend):
+        """全デバイスのバッテリー残量を読み取る"""
+
+        async def run():
+            devices = await backend.enumerate_devices()
+            levels = await asyncio.gather(
+                *(backend.read_battery_level(device) for device in devices)
+            )
+            return devices, levels
+
+        return asyncio.run(run())
+
+    def test_deterministic(self):
+        """同じシードでは同じ結果になるテスト"""
+        first = SimulatedBackend(device_count=50, seed=7, latency_range=(0, 0))
+        second = SimulatedBackend(device_count=50, seed=7, latency_range=(0, 0))
+
+        devices, first_levels = self.read_all(first)
+        _, second_levels = self.read_all(second)
+
+        self.assertEqual(len(devices), 50)
+        self.assertEqual(first_levels, second_levels)
+        self.assertEqual(len({d.address for d in devices}), 50)
+
+    def test_thousands_of_devices(self):
+        """数千台のデバイスを模擬できるテスト"""
+        backend = SimulatedBackend(device_count=5000, latency_range=(0, 0))
+        devices, levels = self.read_all(backend)
+
+        self.assertEqual(len(devices), 5000)
+        self.assertTrue(all(0 <= level <= 100 for level in levels))
+
+    def test_discharge_and_charge_cycle(self):
+        """時間経過で残量が減り、充電サイクルで回復するテスト"""
+        clock = FakeClock()
+        backend = SimulatedBackend(
+            device_count=1, latency_range=(0, 0), time_scale=3600, clock=clock
+        )
+        simulated = next(iter(backend.devices.values()))
+
+        samples = []
+        for hour in range(int(simulated.cycle_hours * 2) + 1):
+            clock.now = hour
+            _, levels = self.read_all(backend)
+            samples.append(levels[0])
+
+        self.assertGreater(max(samples), 90)
+        self.assertLess(min(samples), 30)
+
+        level, charging = simulated.state_at(
+            simulated.cycle_hours - simulated.phase_hours - 0.01
+        )
+        self.assertTrue(charging)
+        self.assertGreater(level, 90)
+
+    def test_failures(self):
+        """読み取り失敗・非対応デバイスがNoneを返すテスト"""
+        backend = SimulatedBackend(
+            device_count=1000, failure_rate=0.2, latency_range=(0, 0)
+        )
+        _, levels = self.read_all(backend)
+
+        failures = sum(1 for level in levels if level is None)
+        self.assertGreater(failures, 100)
+        self.assertLess(failures, 300)
+
+    def test_connection_events(self):
+        """接続・切断イベントがBluetoothManagerに反映されるテスト"""
+        backend = create_backend("simulated", device_count=3, latency_range=(0, 0))
+        manager = BluetoothManager(backend=backend)
+        manager.start_event_monitoring()
+        asyncio.run(manager.scan_devices())
+
+        address = next(iter(backend.devices))
+        backend.set_connected(address, False)
+        self.assertNotIn(address, manager.get_connected_devices())
+
+        backend.set_connected(address, True)
+        self.assertIn(address, manager.get_connected_devices())
+
+    def test_battery_monitor_with_simulated_backend(self):
+        """BatteryMonitorが模擬バックエンドで動作するテスト"""
+        backend = SimulatedBackend(device_count=200, latency_range=(0.001, 0.005))
+        monitor = BatteryMonitor(
+            BluetoothManager(backend=backend), max_concurrent_reads=32
+        )
+
+        devices = asyncio.run(monitor.update_battery_levels())
+
+        self.assertEqual(len(devices), 200)
+        self.assertEqual(backend.read_count, 200)
+        self.assertTrue(all(d.battery_level is not None for d in devices))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Test System Tray Icon
+"""
+
+import unittest
+from concurrent.futures import Future
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, pyqtSignal
+from bluetooth_manager import BluetoothManager, BluetoothDevice
+from battery_monitor import BatteryMonitor
+from backends.simulated import SimulatedBackend
+from ui.tray_icon import SystemTrayIcon
+
+
+class StubRefreshWorker(QObject):
+    """更新要求を記録するだけのテスト用ワーカー"""
+
+    devices_updated = pyqtSignal(list)
+    battery_events = pyqtSignal(list)
+    refresh_failed = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+        self.futures = []
+
+    def request_refresh(self, force=False):
+        self.requests.append(force)
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+class TestSystemTrayIcon(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラスの設定"""
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        """テスト前の設定"""
+        monitor = BatteryMonitor(BluetoothManager(backend=SimulatedBackend(0)))
+        self.worker = StubRefreshWorker()
+        self.tray = SystemTrayIcon(monitor, None, self.worker)
+        self.messages = []
+        self.tray.showMessage = lambda title, message: self.messages.append(message)
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        self.tray.deleteLater()
+        self.app.processEvents()
+
+    def test_initial_state(self):
+        """デバイスのない状態でアイコンとメニューが作成されるテスト"""
+        self.assertFalse(self.tray.icon().isNull())
+        self.assertIsNotNone(self.tray.contextMenu())
+
+    def test_manual_refresh(self):
+        """手動更新が強制更新として要求され、その完了時にのみ通知されるテスト"""
+        self.tray.manual_refresh()
+        self.assertEqual(self.worker.requests, [True])
+
+        # 他の更新（起動時・定期更新など）の完了ではアイコンのみ更新する
+        device = BluetoothDevice("Test Mouse", "00:11:22:33:44:55")
+        device.is_connected = True
+        device.battery_level = 42
+        self.worker.devices_updated.emit([device])
+        self.assertIn("Test Mouse: 42%", self.tray.toolTip())
+        self.assertEqual(self.messages, [])
+
+        self.worker.futures[0].set_result([device])
+        self.assertEqual(self.messages, ["バッテリー情報を更新しました"])
+        self.assertIsNone(self.tray.manual_refresh_future)
+
+    def test_manual_refresh_failure(self):
+        """手動更新の失敗が、先に他の更新が完了していても通知されるテスト"""
+        self.tray.manual_refresh()
+        self.worker.devices_updated.emit([])
+        self.worker.futures[0].set_exception(RuntimeError("scan failed"))
+
+        self.assertEqual(self.messages, ["更新に失敗しました"])
+
+
+if __name__ == "__main__":
+    unittest.main()